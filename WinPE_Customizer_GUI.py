@@ -7,7 +7,12 @@ WinPE Customizer v3.0 - 图形界面版本
 """
 
 import os
+import re
 import sys
+import atexit
+import time
+import shutil
+import tempfile
 import threading
 import queue
 from pathlib import Path
@@ -16,9 +21,21 @@ import tkinter as tk
 from tkinter import ttk, filedialog, scrolledtext, messagebox
 import subprocess
 
-# 导入配置和核心类
+# 导入配置（核心流程在开始定制时才导入，见 run_customization）
 import config
-from core.WinPE_Customizer import WinPECustomizer
+from core.wim_info import is_wim_mounted, mounted_registry
+from core.command_backend import get_backend
+
+
+# 进度解析正则（预编译）
+PERCENT_RE = re.compile(r'(\d+)%')
+STEP_RE = re.compile(r'(\d+)[/\s]+(\d+)')
+
+# 每次刷新最多处理的消息数（避免一次处理过多阻塞界面）
+LOG_BATCH_LIMIT = 2000
+
+# 启动计时起点（模块导入完成时）
+STARTUP_TIME = time.perf_counter()
 
 
 class WinPECustomizerGUI:
@@ -30,7 +47,8 @@ class WinPECustomizerGUI:
         self.root.geometry("1100x750")
         self.root.minsize(1000, 650)
         
-        # 设置窗口图标
+        # 设置窗口图标（工具窗口共用同一图标）
+        self.icon_path = None
         self.set_window_icon()
         
         # 设置样式
@@ -43,9 +61,22 @@ class WinPECustomizerGUI:
         self.output_queue = queue.Queue()
         self.customizer = None
         
+        # 日志视图状态（只保留最近 LOG_VIEW_MAX_LINES 行，完整日志写入磁盘）
+        self.log_max_lines = getattr(config, 'LOG_VIEW_MAX_LINES', 5000)
+        self.log_line_count = 0
+        self.log_last_is_progress = False
+        self.log_spill_path = Path(tempfile.gettempdir()) / f"WinPE_Customizer_GUI_{os.getpid()}.log"
+        self.log_spill = open(self.log_spill_path, 'w', encoding='utf-8')
+        # 主窗口关闭时删除（atexit 兜底：窗口未正常销毁就退出时）
+        self.root.bind("<Destroy>", self.on_destroy, add="+")
+        atexit.register(self.close_log_spill)
+        
         # 工作目录
         self.work_dir = Path(__file__).parent.absolute()
         
+        # 已打开的工具窗口 {模块名: (Toplevel, 工具实例)}
+        self.tool_windows = {}
+        
         # 配置变量
         self.winpe_dir = tk.StringVar(value=config.WINPE_DIR)
         self.cab_path = tk.StringVar(value=config.CAB_PATH)
@@ -64,9 +95,17 @@ class WinPECustomizerGUI:
         self.enable_external_apps = tk.BooleanVar(value=config.ENABLE_EXTERNAL_APPS)
         self.enable_create_dirs = tk.BooleanVar(value=config.ENABLE_CREATE_DIRS)
         self.enable_make_iso = tk.BooleanVar(value=config.ENABLE_MAKE_ISO)
+        self.enable_wim_export = tk.BooleanVar(value=config.ENABLE_WIM_EXPORT)
+        self.enable_tools_image = tk.BooleanVar(value=config.ENABLE_TOOLS_IMAGE)
+        
+        # 启动耗时统计（毫秒）
+        self.startup_timings = {}
         
-        # 创建界面
+        # 创建界面（除主控制面板外，其余标签页首次切换时才创建）
+        self.tab_builders = {}
         self.create_widgets()
+        self.startup_timings['widgets'] = (time.perf_counter() - STARTUP_TIME) * 1000
+        self.root.after_idle(self._on_first_paint)
         
         # 启动输出监控
         self.monitor_output()
@@ -99,6 +138,7 @@ class WinPECustomizerGUI:
                 if random_image.suffix.lower() == '.ico':
                     try:
                         self.root.iconbitmap(str(random_image))
+                        self.icon_path = str(random_image)
                         print(f"[图标] 使用ICO图标: {random_image.name}")
                         return
                     except Exception as e:
@@ -114,6 +154,7 @@ class WinPECustomizerGUI:
                         temp_ico = Path("temp_icon.ico")
                         img.save(temp_ico, format='ICO')
                         self.root.iconbitmap(str(temp_ico))
+                        self.icon_path = str(temp_ico)
                         print(f"[图标] 转换并使用图标: {random_image.name}")
                         return
                     except Exception as e:
@@ -127,6 +168,7 @@ class WinPECustomizerGUI:
             if icon_path.exists():
                 try:
                     self.root.iconbitmap(str(icon_path))
+                    self.icon_path = str(icon_path)
                     break
                 except Exception as e:
                     continue
@@ -159,32 +201,50 @@ class WinPECustomizerGUI:
     def create_widgets(self):
         """创建界面组件"""
         # 主容器 - 使用 Notebook 实现标签页
-        notebook = ttk.Notebook(self.root)
-        notebook.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.notebook = ttk.Notebook(self.root)
+        self.notebook.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
         # ==================== 标签页1: 主控制面板 ====================
-        main_tab = ttk.Frame(notebook)
-        notebook.add(main_tab, text="主控制面板")
+        main_tab = ttk.Frame(self.notebook)
+        self.notebook.add(main_tab, text="主控制面板")
         
         self.create_main_tab(main_tab)
         
-        # ==================== 标签页2: 路径配置 ====================
-        config_tab = ttk.Frame(notebook)
-        notebook.add(config_tab, text="路径配置")
-        
-        self.create_config_tab(config_tab)
-        
-        # ==================== 标签页3: 模块设置 ====================
-        modules_tab = ttk.Frame(notebook)
-        notebook.add(modules_tab, text="模块设置")
-        
-        self.create_modules_tab(modules_tab)
-        
-        # ==================== 标签页4: 功能包说明 ====================
-        packages_tab = ttk.Frame(notebook)
-        notebook.add(packages_tab, text="功能包说明")
-        
-        self.create_packages_tab(packages_tab)
+        # ==================== 标签页2-4: 延迟创建 ====================
+        for text, builder in [
+            ("路径配置", self.create_config_tab),
+            ("模块设置", self.create_modules_tab),
+            ("功能包说明", self.create_packages_tab),
+        ]:
+            tab = ttk.Frame(self.notebook)
+            self.notebook.add(tab, text=text)
+            self.tab_builders[str(tab)] = (builder, tab)
+        
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+    
+    def on_tab_changed(self, event=None):
+        """首次切换到标签页时创建其内容"""
+        pending = self.tab_builders.pop(self.notebook.select(), None)
+        if pending:
+            builder, tab = pending
+            builder(tab)
+    
+    def _on_first_paint(self):
+        """首次绘制完成（空闲回调在窗口完成布局和绘制后执行）"""
+        self.startup_timings['first_paint'] = (time.perf_counter() - STARTUP_TIME) * 1000
+        self.root.after(1, self._on_interactive)
+    
+    def _on_interactive(self):
+        """事件循环开始处理用户事件"""
+        self.startup_timings['interactive'] = (time.perf_counter() - STARTUP_TIME) * 1000
+        self.log(f"[启动] 首次绘制 {self.startup_timings['first_paint']:.0f} ms，"
+                 f"可交互 {self.startup_timings['interactive']:.0f} ms", 'INFO')
+        
+        # 基准测试（scripts/bench_gui_startup.py）：输出耗时后退出
+        if os.environ.get('WPE_GUI_STARTUP_REPORT'):
+            import json
+            print(json.dumps(self.startup_timings), flush=True)
+            self.root.after(0, self.root.destroy)
     
     def create_main_tab(self, parent):
         """创建主控制面板标签页"""
@@ -390,8 +450,10 @@ class WinPECustomizerGUI:
             (self.enable_regional, "配置区域和语言设置", "设置系统语言、时区、输入法为中文"),
             (self.enable_drivers, "批量安装硬件驱动", "从驱动目录递归安装所有驱动"),
             (self.enable_external_apps, "复制外置程序", "将第三方工具复制到 WinPE"),
+            (self.enable_tools_image, "外置工具映像", "大型工具打包为介质上的独立 WIM，启动后按需挂载，减小 boot.wim"),
             (self.enable_create_dirs, "创建自定义目录结构", "创建常用工作目录"),
             (self.enable_make_iso, "卸载 WIM 并生成 ISO", "保存更改并生成可启动 ISO 文件"),
+            (self.enable_wim_export, "导出压缩 boot.wim", "卸载后重新导出 WIM，去除碎片，减小体积（需启用生成 ISO）"),
         ]
         
         for var, title, desc in modules:
@@ -479,71 +541,69 @@ class WinPECustomizerGUI:
         else:
             messagebox.showwarning("警告", "目录不存在")
     
-    def open_apps_manager(self):
-        """打开外置程序管理器"""
-        import subprocess
-        import sys
+    def open_tool_window(self, module_name, class_name, title):
+        """在当前进程中以 Toplevel 打开 tools 目录下的工具窗口
+        
+        工具模块在第一次打开时才导入；窗口已打开时直接激活，不重复创建
+        """
+        existing = self.tool_windows.get(module_name)
+        if existing and existing[0].winfo_exists():
+            window = existing[0]
+            window.deiconify()
+            window.lift()
+            window.focus_force()
+            return existing[1]
+        
+        tools_dir = str(self.work_dir / "tools")
+        if tools_dir not in sys.path:
+            # 工具模块之间使用同目录导入（如 from download_dialog import DownloadDialog）
+            sys.path.insert(0, tools_dir)
         
-        script_path = Path("tools/external_apps_manager.py")
-        if not script_path.exists():
-            messagebox.showerror("错误", "找不到外置程序管理器\n路径: tools/external_apps_manager.py")
-            return
+        try:
+            import importlib
+            module = importlib.import_module(module_name)
+            tool_class = getattr(module, class_name)
+        except Exception as e:
+            self.log(f"[错误] 加载{title}失败: {e}", 'ERROR')
+            messagebox.showerror("错误", f"加载{title}失败:\n{e}")
+            return None
+        
+        window = tk.Toplevel(self.root)
+        if self.icon_path:
+            try:
+                window.iconbitmap(self.icon_path)
+            except tk.TclError:
+                pass
         
         try:
-            # 在新进程中启动
-            subprocess.Popen([sys.executable, str(script_path)])
-            self.log("[工具] 已启动外置程序管理器", 'SUCCESS')
+            tool = tool_class(window)
         except Exception as e:
+            window.destroy()
+            self.log(f"[错误] 启动{title}失败: {e}", 'ERROR')
             messagebox.showerror("错误", f"启动失败:\n{e}")
+            return None
+        
+        self.tool_windows[module_name] = (window, tool)
+        
+        def on_destroy(event, key=module_name):
+            if event.widget is window:
+                self.tool_windows.pop(key, None)
+        
+        window.bind("<Destroy>", on_destroy, add="+")
+        self.log(f"[工具] 已打开{title}", 'SUCCESS')
+        return tool
+    
+    def open_apps_manager(self):
+        """打开外置程序管理器"""
+        self.open_tool_window("external_apps_manager", "ExternalAppsManager", "外置程序管理器")
     
     def open_tools_manager(self):
         """打开WinPE工具包管理器"""
-        try:
-            script_path = self.work_dir / "tools" / "winpe_tools_manager.py"
-            if not script_path.exists():
-                messagebox.showerror("错误", f"找不到WinPE工具包管理器\n路径: {script_path}")
-                return
-            
-            subprocess.Popen([sys.executable, str(script_path)], cwd=str(self.work_dir / "tools"))
-            self.log("[工具] 已启动WinPE工具包管理器", 'SUCCESS')
-        except Exception as e:
-            self.log(f"[错误] 启动工具包管理器失败: {e}", 'ERROR')
-            messagebox.showerror("错误", f"启动失败:\n{e}")
+        self.open_tool_window("winpe_tools_manager", "WinPEToolsManager", "WinPE工具包管理器")
     
     def open_sdio_extractor(self):
         """打开SDIO驱动提取工具"""
-        try:
-            script_path = self.work_dir / "tools" / "extract_sdio_drivers_gui.py"
-            if not script_path.exists():
-                messagebox.showerror("错误", f"找不到SDIO驱动提取工具\n路径: {script_path}")
-                return
-            
-            subprocess.Popen([sys.executable, str(script_path)], cwd=str(self.work_dir / "tools"))
-            self.log("[工具] 已启动SDIO驱动提取工具", 'SUCCESS')
-        except Exception as e:
-            self.log(f"[错误] 启动SDIO驱动提取工具失败: {e}", 'ERROR')
-            messagebox.showerror("错误", f"启动失败:\n{e}")
-    
-    def open_driver_scanner(self):
-        """打开驱动扫描工具"""
-        import subprocess
-        import sys
-        
-        script_path = Path("tools/scan_drivers.py")
-        if not script_path.exists():
-            messagebox.showerror("错误", "找不到驱动扫描工具\n路径: tools/scan_drivers.py")
-            return
-        
-        # 扫描工具是命令行的，在新窗口运行
-        try:
-            drive_path = Path(self.driver_dir.get())
-            if drive_path.exists():
-                subprocess.Popen(['cmd', '/k', sys.executable, str(script_path), str(drive_path)])
-            else:
-                subprocess.Popen(['cmd', '/k', sys.executable, str(script_path)])
-            self.log("[工具] 已启动驱动扫描工具", 'SUCCESS')
-        except Exception as e:
-            messagebox.showerror("错误", f"启动失败:\n{e}")
+        self.open_tool_window("extract_sdio_drivers_gui", "SDIODriverExtractorGUI", "SDIO驱动提取工具")
     
     def make_iso_image(self):
         """生成 ISO 镜像"""
@@ -555,7 +615,7 @@ class WinPECustomizerGUI:
         mount_dir = winpe_dir / "mount"
         
         # 检查是否已挂载
-        if (mount_dir / "Windows").exists():
+        if is_wim_mounted(mount_dir):
             if not messagebox.askyesno("提示", "WIM 仍处于挂载状态。\n\n需要先卸载并保存 WIM 才能生成 ISO。\n\n是否现在卸载并保存？"):
                 return
             
@@ -593,12 +653,14 @@ class WinPECustomizerGUI:
             
             cmd = f'MakeWinPEMedia /iso "{winpe_dir}" "{iso_path}"'
             
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            startupinfo.wShowWindow = subprocess.SW_HIDE
+            startupinfo = None
+            if sys.platform == 'win32':
+                startupinfo = subprocess.STARTUPINFO()
+                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+                startupinfo.wShowWindow = subprocess.SW_HIDE
             
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True, 
-                                   encoding='utf-8', errors='ignore', startupinfo=startupinfo)
+            result = get_backend().run(cmd, capture_output=True, text=True,
+                                       encoding='utf-8', errors='ignore', startupinfo=startupinfo)
             
             if result.returncode == 0:
                 self.output_queue.put(('SUCCESS', f'[✅ 成功] ISO 文件生成成功'))
@@ -683,7 +745,7 @@ class WinPECustomizerGUI:
                 cmd = "dism /Cleanup-Wim"
                 self.log(f"执行命令: {cmd}", "INFO")
                 
-                result = subprocess.run(cmd, shell=True, capture_output=True, text=True, encoding='utf-8', errors='ignore')
+                result = get_backend().run(cmd, capture_output=True, text=True, encoding='utf-8', errors='ignore')
                 
                 if result.returncode == 0:
                     self.log("WIM 清理成功", "SUCCESS")
@@ -698,18 +760,7 @@ class WinPECustomizerGUI:
     
     def open_driver_scanner(self):
         """打开驱动扫描工具"""
-        try:
-            import subprocess
-            python_exe = sys.executable
-            scanner_path = self.work_dir / "tools" / "driver_scanner.py"
-            
-            if scanner_path.exists():
-                subprocess.Popen([python_exe, str(scanner_path)])
-                self.log("已启动驱动扫描工具", "INFO")
-            else:
-                messagebox.showerror("错误", f"找不到驱动扫描工具\n\n{scanner_path}")
-        except Exception as e:
-            messagebox.showerror("错误", f"启动驱动扫描工具失败:\n{e}")
+        self.open_tool_window("driver_scanner", "DriverScanner", "驱动扫描工具")
     
     def make_usb_disk(self):
         """制作 USB 启动盘"""
@@ -744,41 +795,79 @@ class WinPECustomizerGUI:
     
     def log(self, message, tag='INFO'):
         """添加日志"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
+        self.render_log([(tag, message)])
+    
+    def render_log(self, entries):
+        """批量添加日志（一次插入，进度行原地更新，超出上限时删除最早的行）"""
+        if not entries:
+            return
         
-        # 检测进度信息（格式：  进度: 50.0%）
-        if message.strip().startswith('进度:'):
-            # 检查最后一行是否也是进度信息
-            last_line = self.log_text.get("end-2l", "end-1l").strip()
-            if '进度:' in last_line:
-                # 删除最后一行（之前的进度）
-                self.log_text.delete("end-2l", "end-1l")
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        chunks = []           # [文本, 标签, 文本, 标签, ...]
+        spill_lines = []
+        new_lines = 0
+        delete_last = False
+        pending_progress = False  # chunks 末尾是否为本批次的进度行
+        progress_message = None
+        
+        for tag, message in entries:
+            line = f"[{timestamp}] {message}\n"
+            spill_lines.append(line)
             
-            # 插入新的进度（同一行更新）
-            full_message = f"[{timestamp}] {message}\n"
-            self.log_text.insert(tk.END, full_message, tag)
-        else:
-            # 普通消息，正常插入
-            full_message = f"[{timestamp}] {message}\n"
-            self.log_text.insert(tk.END, full_message, tag)
+            # 检测进度信息（格式：  进度: 50.0%），连续的进度行只保留最后一行
+            if message.strip().startswith('进度:'):
+                if pending_progress:
+                    chunks[-2:] = []
+                    new_lines -= 1
+                elif not chunks and self.log_last_is_progress:
+                    delete_last = True
+                chunks.extend((line, tag))
+                new_lines += 1
+                pending_progress = True
+            else:
+                if chunks and not pending_progress and chunks[-1] == tag:
+                    chunks[-2] += line  # 相同标签合并为一段
+                else:
+                    chunks.extend((line, tag))
+                new_lines += 1
+                pending_progress = False
+            
+            if PERCENT_RE.search(message) or STEP_RE.search(message):
+                progress_message = message
+        
+        if not self.log_spill.closed:
+            self.log_spill.writelines(spill_lines)
+        
+        if delete_last:
+            self.log_text.delete("end-2l", "end-1l")
+            self.log_line_count -= 1
+        
+        self.log_text.insert(tk.END, *chunks)
+        self.log_line_count += new_lines
+        self.log_last_is_progress = pending_progress
+        
+        # 环形缓冲：删除最早的行
+        excess = self.log_line_count - self.log_max_lines
+        if excess > 0:
+            self.log_text.delete("1.0", f"{excess + 1}.0")
+            self.log_line_count -= excess
         
         self.log_text.see(tk.END)
         
-        # 解析进度信息
-        self.parse_progress(message)
+        # 只需解析最后一条包含进度的消息
+        if progress_message is not None:
+            self.parse_progress(progress_message)
     
     def parse_progress(self, message):
         """解析进度信息"""
-        import re
-        
         # 解析百分比进度 (例: [50%], 50%, Progress: 50%)
-        percent_match = re.search(r'(\d+)%', message)
+        percent_match = PERCENT_RE.search(message)
         if percent_match:
             percent = int(percent_match.group(1))
             self.update_progress(percent, percent)
         
         # 解析步骤进度 (例: [3/10], 3/10, Step 3 of 10)
-        step_match = re.search(r'(\d+)[/\s]+(\d+)', message)
+        step_match = STEP_RE.search(message)
         if step_match:
             current = int(step_match.group(1))
             total = int(step_match.group(2))
@@ -805,6 +894,10 @@ class WinPECustomizerGUI:
     def clear_log(self):
         """清空日志"""
         self.log_text.delete(1.0, tk.END)
+        self.log_line_count = 0
+        self.log_last_is_progress = False
+        self.log_spill.seek(0)
+        self.log_spill.truncate()
         self.log("[系统] 日志已清空", 'INFO')
     
     def save_log(self):
@@ -816,12 +909,28 @@ class WinPECustomizerGUI:
         )
         if filename:
             try:
-                with open(filename, 'w', encoding='utf-8') as f:
-                    f.write(self.log_text.get(1.0, tk.END))
+                # 保存完整日志（界面中只保留最近的部分）
+                self.log_spill.flush()
+                shutil.copyfile(self.log_spill_path, filename)
                 self.log(f"[成功] 日志已保存到: {filename}", 'SUCCESS')
             except Exception as e:
                 messagebox.showerror("错误", f"保存日志失败:\n{e}")
     
+    def on_destroy(self, event):
+        """主窗口销毁"""
+        if event.widget is self.root:
+            self.close_log_spill()
+    
+    def close_log_spill(self):
+        """关闭并删除完整日志的临时文件"""
+        if self.log_spill.closed:
+            return
+        self.log_spill.close()
+        try:
+            self.log_spill_path.unlink()
+        except OSError:
+            pass
+    
     def mount_wim(self):
         """挂载 WIM 映像"""
         if self.is_running:
@@ -855,7 +964,7 @@ class WinPECustomizerGUI:
             mount_dir.mkdir(parents=True, exist_ok=True)
             
             # 检查是否已挂载
-            if (mount_dir / "Windows").exists():
+            if is_wim_mounted(mount_dir):
                 self.output_queue.put(('WARNING', '[提示] WIM 已处于挂载状态'))
                 return
             
@@ -863,7 +972,8 @@ class WinPECustomizerGUI:
             self.output_queue.put(('COMMAND', f'dism /mount-wim /wimfile:"{boot_wim}" /index:1 /mountdir:"{mount_dir}"'))
             
             cmd = f'dism /mount-wim /wimfile:"{boot_wim}" /index:1 /mountdir:"{mount_dir}"'
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True, encoding='utf-8', errors='ignore')
+            result = get_backend().run(cmd, capture_output=True, text=True, encoding='utf-8', errors='ignore')
+            mounted_registry.invalidate()
             
             if result.returncode == 0:
                 self.output_queue.put(('SUCCESS', '[成功] WIM 映像挂载成功'))
@@ -923,7 +1033,7 @@ class WinPECustomizerGUI:
             winpe_dir = Path(self.winpe_dir.get())
             mount_dir = winpe_dir / "mount"
             
-            if not (mount_dir / "Windows").exists():
+            if not is_wim_mounted(mount_dir):
                 self.output_queue.put(('WARNING', '[提示] WIM 未处于挂载状态'))
                 return
             
@@ -934,7 +1044,8 @@ class WinPECustomizerGUI:
             self.output_queue.put(('COMMAND', f'dism /unmount-wim /mountdir:"{mount_dir}" {flag}'))
             
             cmd = f'dism /unmount-wim /mountdir:"{mount_dir}" {flag}'
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True, encoding='utf-8', errors='ignore')
+            result = get_backend().run(cmd, capture_output=True, text=True, encoding='utf-8', errors='ignore')
+            mounted_registry.invalidate()
             
             if result.returncode == 0:
                 self.output_queue.put(('SUCCESS', f'[成功] WIM 映像卸载成功（已{action}更改）'))
@@ -986,11 +1097,12 @@ class WinPECustomizerGUI:
             # 重置停止标志
             self.stop_requested = False
             
-            # 创建自定义的 Customizer
+            # 创建自定义的 Customizer（首次运行时才导入核心流程）
+            from core.gui_customizer import CustomWinPECustomizer
             customizer = CustomWinPECustomizer(self.winpe_dir.get(), self.output_queue, self)
             
             # 运行
-            exit_code = customizer.run()
+            exit_code = customizer.run_recorded()
             
             # 设置进度为100%
             self.root.after(0, lambda: self.update_progress(100, 100))
@@ -1041,6 +1153,8 @@ class WinPECustomizerGUI:
         config.ENABLE_EXTERNAL_APPS = self.enable_external_apps.get()
         config.ENABLE_CREATE_DIRS = self.enable_create_dirs.get()
         config.ENABLE_MAKE_ISO = self.enable_make_iso.get()
+        config.ENABLE_WIM_EXPORT = self.enable_wim_export.get()
+        config.ENABLE_TOOLS_IMAGE = self.enable_tools_image.get()
     
     def save_config(self):
         """保存配置到文件"""
@@ -1070,6 +1184,8 @@ class WinPECustomizerGUI:
             self.enable_external_apps.set(config.ENABLE_EXTERNAL_APPS)
             self.enable_create_dirs.set(config.ENABLE_CREATE_DIRS)
             self.enable_make_iso.set(config.ENABLE_MAKE_ISO)
+            self.enable_wim_export.set(config.ENABLE_WIM_EXPORT)
+            self.enable_tools_image.set(config.ENABLE_TOOLS_IMAGE)
             
             self.log("[系统] 配置已重置为默认值", 'SUCCESS')
     
@@ -1078,7 +1194,7 @@ class WinPECustomizerGUI:
         for var in [self.enable_copype, self.enable_auto_mount, self.enable_feature_packs,
                     self.enable_language_packs, self.enable_fonts, self.enable_regional,
                     self.enable_drivers, self.enable_external_apps, self.enable_create_dirs,
-                    self.enable_make_iso]:
+                    self.enable_make_iso, self.enable_wim_export, self.enable_tools_image]:
             var.set(True)
     
     def deselect_all_modules(self):
@@ -1086,7 +1202,7 @@ class WinPECustomizerGUI:
         for var in [self.enable_copype, self.enable_auto_mount, self.enable_feature_packs,
                     self.enable_language_packs, self.enable_fonts, self.enable_regional,
                     self.enable_drivers, self.enable_external_apps, self.enable_create_dirs,
-                    self.enable_make_iso]:
+                    self.enable_make_iso, self.enable_wim_export, self.enable_tools_image]:
             var.set(False)
     
     def select_recommended(self):
@@ -1101,6 +1217,8 @@ class WinPECustomizerGUI:
         self.enable_external_apps.set(False)
         self.enable_create_dirs.set(False)
         self.enable_make_iso.set(False)
+        self.enable_wim_export.set(False)
+        self.enable_tools_image.set(False)
         
         self.log("[系统] 已选择推荐配置", 'SUCCESS')
     
@@ -1130,6 +1248,8 @@ class WinPECustomizerGUI:
                 ('ENABLE_EXTERNAL_APPS', self.enable_external_apps.get()),
                 ('ENABLE_CREATE_DIRS', self.enable_create_dirs.get()),
                 ('ENABLE_MAKE_ISO', self.enable_make_iso.get()),
+                ('ENABLE_WIM_EXPORT', self.enable_wim_export.get()),
+                ('ENABLE_TOOLS_IMAGE', self.enable_tools_image.get()),
             ]
             
             for var_name, value in replacements:
@@ -1150,194 +1270,19 @@ class WinPECustomizerGUI:
     
     def monitor_output(self):
         """监控输出队列"""
+        entries = []
         try:
-            while True:
-                tag, message = self.output_queue.get_nowait()
-                self.log(message, tag)
+            while len(entries) < LOG_BATCH_LIMIT:
+                entries.append(self.output_queue.get_nowait())
         except queue.Empty:
             pass
         
+        self.render_log(entries)
+        
         # 继续监控
         self.root.after(100, self.monitor_output)
 
 
-class CustomWinPECustomizer(WinPECustomizer):
-    """自定义的定制器，输出重定向到队列"""
-    
-    def __init__(self, winpe_dir, output_queue, gui_instance=None):
-        super().__init__(winpe_dir, silent_mode=True)  # 启用静默模式，不输出到控制台
-        self.output_queue = output_queue
-        self.gui_instance = gui_instance
-        self.total_steps = 0
-        self.current_step = 0
-        
-        # 统计启用的模块数量
-        self.count_enabled_modules()
-    
-    def should_stop(self):
-        """检查是否应该停止"""
-        if self.gui_instance and self.gui_instance.stop_requested:
-            self.print_warning("[⚠️ 停止] 检测到停止请求，当前操作完成后将停止")
-            return True
-        return False
-    
-    def count_enabled_modules(self):
-        """统计启用的模块数量"""
-        modules = [
-            self.enable_copype_setup,
-            self.enable_auto_mount,
-            self.enable_feature_packs,
-            self.enable_language_packs,
-            self.enable_fonts_lp,
-            self.enable_regional_settings,
-            self.enable_drivers,
-            self.enable_external_apps,
-            self.enable_create_dirs,
-            self.enable_make_iso,
-        ]
-        self.total_steps = sum(modules)
-    
-    def report_step_start(self, step_name):
-        """报告步骤开始"""
-        self.current_step += 1
-        self.output_queue.put(('CYAN', f"[进度 {self.current_step}/{self.total_steps}] 开始: {step_name}"))
-    
-    def report_step_end(self, step_name, success=True):
-        """报告步骤结束"""
-        if success:
-            self.output_queue.put(('SUCCESS', f"[✅ 完成] {step_name}"))
-        else:
-            self.output_queue.put(('ERROR', f"[❌ 失败] {step_name}"))
-    
-    def print_header(self, text):
-        """打印标题"""
-        self.output_queue.put(('CYAN', "="*50))
-        self.output_queue.put(('HEADER', text))
-        self.output_queue.put(('CYAN', "="*50))
-    
-    def print_info(self, text):
-        """打印普通信息"""
-        self.output_queue.put(('INFO', text))
-    
-    def print_success(self, text):
-        """打印成功信息"""
-        self.output_queue.put(('SUCCESS', text))
-    
-    def print_error(self, text):
-        """打印错误信息"""
-        self.output_queue.put(('ERROR', text))
-    
-    def print_warning(self, text):
-        """打印警告信息"""
-        self.output_queue.put(('WARNING', text))
-    
-    def print_cyan(self, text):
-        """打印青色信息"""
-        self.output_queue.put(('CYAN', text))
-    
-    def run(self):
-        """主流程（重写以添加进度报告）"""
-        try:
-            # 显示配置
-            self.print_cyan("="*40)
-            self.print_cyan(f"总计 {self.total_steps} 个模块将被执行")
-            self.print_cyan("="*40)
-            
-            # 检查 ADK
-            if not self.check_adk_path():
-                return 1
-            
-            # 创建 WinPE 环境
-            if self.enable_copype_setup:
-                self.report_step_start("创建 WinPE 工作环境")
-                result = self.create_winpe_environment()
-                self.report_step_end("创建 WinPE 工作环境", result)
-                if not result:
-                    return 1
-            
-            # 挂载 WIM
-            if self.enable_auto_mount:
-                self.report_step_start("挂载 boot.wim")
-                result = self.check_and_mount_wim()
-                self.report_step_end("挂载 boot.wim", result)
-                if not result:
-                    return 1
-            
-            # 执行定制流程
-            if self.enable_feature_packs:
-                if self.should_stop():
-                    return 2
-                self.report_step_start("安装功能包")
-                result = self.install_feature_packs()
-                self.report_step_end("安装功能包", result)
-            
-            if self.enable_language_packs:
-                if self.should_stop():
-                    return 2
-                self.report_step_start("安装中文语言包")
-                result = self.install_language_packs()
-                self.report_step_end("安装中文语言包", result)
-            
-            if self.enable_fonts_lp:
-                if self.should_stop():
-                    return 2
-                self.report_step_start("安装字体支持")
-                result = self.install_fonts_and_lp()
-                self.report_step_end("安装字体支持", result)
-            
-            if self.enable_regional_settings:
-                if self.should_stop():
-                    return 2
-                self.report_step_start("配置区域设置")
-                result = self.set_regional_settings()
-                self.report_step_end("配置区域设置", result)
-            
-            if self.enable_drivers:
-                if self.should_stop():
-                    return 2
-                self.report_step_start("批量安装驱动程序")
-                result = self.install_drivers()
-                self.report_step_end("批量安装驱动程序", result)
-            
-            if self.enable_external_apps:
-                if self.should_stop():
-                    return 2
-                self.report_step_start("复制附加程序")
-                result = self.copy_external_apps()
-                self.report_step_end("复制附加程序", result)
-            
-            if self.enable_create_dirs:
-                if self.should_stop():
-                    return 2
-                self.report_step_start("创建自定义目录结构")
-                result = self.create_directories()
-                self.report_step_end("创建自定义目录结构", result)
-            
-            if self.enable_make_iso:
-                if self.should_stop():
-                    return 2
-                self.report_step_start("卸载 WIM 并生成 ISO")
-                result = self.make_iso()
-                self.report_step_end("卸载 WIM 并生成 ISO", result)
-            
-            # 显示摘要
-            self.print_cyan("="*40)
-            self.print_cyan("WinPE 定制流程已全部完成")
-            self.print_cyan("="*40)
-            self.show_summary()
-            
-            return 0
-            
-        except KeyboardInterrupt:
-            self.print_warning("\n[中断] 用户中断执行")
-            return 1
-        except Exception as e:
-            self.print_error(f"\n[异常] 发生错误: {e}")
-            import traceback
-            traceback.print_exc()
-            return 1
-
-
 def main():
     """主函数"""
     root = tk.Tk()
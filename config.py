@@ -42,6 +42,8 @@ ENABLE_EXTERNAL_APPS = True      # 是否复制附加程序
 ENABLE_CREATE_DIRS = False        # 是否创建自定义目录结构
 ENABLE_CONTEXT_MENU = True       # 是否配置右键菜单（7-Zip等）
 ENABLE_MAKE_ISO = True           # 是否卸载 WIM 并生成 ISO
+ENABLE_WIM_EXPORT = False        # 是否在卸载后导出压缩 boot.wim（需启用 ENABLE_MAKE_ISO）
+ENABLE_TOOLS_IMAGE = False       # 是否把大型附加程序打包为介质上的外置工具映像（需启用 ENABLE_EXTERNAL_APPS）
 
 # ============================================================================
 # 功能包列表
@@ -248,6 +250,60 @@ AUTO_RETRY_ON_ERROR = False
 # 最大重试次数
 MAX_RETRY_COUNT = 3
 
+# boot.wim 导出压缩方式（ENABLE_WIM_EXPORT 启用时生效）
+# max: LZX 最大压缩（推荐，体积最小，PE 启动时加载最快）
+# fast: XPRESS 快速压缩（导出更快，体积稍大）
+# none: 不压缩
+# recovery: LZMS 压缩，仅适用于 .esd，boot.wim 不可启动，会自动改用 max
+WIM_EXPORT_COMPRESS = "max"
+
+# WIM 更新引擎
+# dism:   挂载 boot.wim 后修改，卸载时提交（默认）
+# wimlib: 当只启用了文件类步骤（附加程序、自定义目录、右键菜单）时，
+#         使用 wimlib-imagex update 直接修改 WIM，跳过挂载/提交；需要安装 wimlib
+WIM_UPDATE_ENGINE = "dism"
+
+# wimlib-imagex 可执行文件路径（在 PATH 中时可只写文件名）
+WIMLIB_PATH = "wimlib-imagex"
+
+# 外置工具映像（ENABLE_TOOLS_IMAGE 启用时生效）
+# boot.wim 启动时整个加载到内存，大型工具放在介质上的独立 WIM 中，
+# WinPE 启动后由 LoadTools.cmd 只读挂载，文件在使用时才从介质读取
+TOOLS_IMAGE_MIN_SIZE_MB = 20            # EXTERNAL_APPS 所在的顶层文件夹/文件达到此大小时放入工具映像（0 表示全部）
+TOOLS_IMAGE_ITEMS = []                  # 额外放入工具映像的附加程序目录顶层文件夹/文件（不受大小限制）
+TOOLS_IMAGE_FILE = "tools/tools.wim"    # 工具映像在介质上的路径（相对于 media 目录）
+TOOLS_IMAGE_COMPRESS = "max"            # 压缩方式：max / fast / none
+TOOLS_IMAGE_MOUNT_DIR = "X:\\Tools"     # WinPE 中的挂载目录（会加入 PATH）
+TOOLS_IMAGE_AUTOLOAD = True             # 启动时后台自动加载（False 时需手动运行 LoadTools）
+
+# 是否统计每个步骤的映像体积变化（步骤前后扫描挂载目录并比较）
+ENABLE_SIZE_ACCOUNTING = False
+
+# 体积统计报告文件（JSON，含 treemap 数据，相对于项目根目录）
+SIZE_REPORT_FILE = "size_report.json"
+
+# 是否对变化的文件计算哈希（更准确但更慢，默认只比较大小和修改时间）
+SIZE_ACCOUNTING_HASH = False
+
+# 命令执行后端
+# subprocess: 执行真实的 DISM / copype / MakeWinPEMedia（默认）
+# emulator:   使用 core/dism_emulator.py 模拟执行，用于在 Linux 上测试和基准测试流程
+COMMAND_BACKEND = "subprocess"
+
+# 模拟器设置（仅 COMMAND_BACKEND = "emulator" 时生效）
+EMULATOR_LANGUAGE = "zh-cn"        # 模拟输出语言：zh-cn / en
+EMULATOR_LATENCY = 0.0             # 每条命令的固定延迟（秒）
+EMULATOR_PROGRESS_DELAY = 0.0      # 进度条每次刷新的延迟（秒）
+EMULATOR_FAIL_RATE = 0.0           # 随机失败概率（0~1）
+EMULATOR_FAIL_PATTERN = ""         # 命令匹配此正则表达式时模拟失败
+
+# 是否记录运行历史（SQLite），用于按历史耗时预测进度和剩余时间、比较两次运行
+ENABLE_RUN_HISTORY = True
+
+# 运行历史数据库文件（相对于项目根目录）
+# 查看: python core/run_history.py list / compare <A> <B>
+RUN_HISTORY_DB = "run_history.db"
+
 # ============================================================================
 # 颜色配置（使用 colorama）
 # ============================================================================
@@ -261,4 +317,8 @@ USE_COLORS = True  # 是否使用彩色输出
 ENABLE_LOGGING = True              # 是否启用日志
 LOG_FILE = "WinPE_Customizer.log"  # 日志文件名
 LOG_LEVEL = "INFO"                 # 日志级别：DEBUG, INFO, WARNING, ERROR
+LOG_MAX_BYTES = 10 * 1024 * 1024   # 单个日志文件最大字节数，超出后轮转（.1、.2 ...）
+LOG_BACKUP_COUNT = 5               # 保留的轮转日志数量
+LOG_JSON = True                    # 是否同时写入 JSON Lines 日志（与 LOG_FILE 同名，扩展名 .jsonl）
+LOG_VIEW_MAX_LINES = 5000          # 图形界面日志窗口最多保留的行数（完整日志可通过“保存日志”导出）
 
@@ -10,8 +10,10 @@ WinPE Customizer v3.0 - Python 版本
 
 import os
 import sys
+import shutil
 import subprocess
 import datetime
+import time
 from pathlib import Path
 from colorama import init, Fore, Style
 
@@ -19,6 +21,15 @@ from colorama import init, Fore, Style
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 import config
+from core.wim_info import read_wim_info, is_wim_mounted, mounted_registry, WimFormatError
+from core.image_manifest import ImageSizeAccountant
+from core.wim_update import MountDirImage, WimlibImage, WimlibError
+from core.command_backend import get_backend
+from core.async_logger import get_log_writer
+from core.run_history import get_run_history, ProgressEstimator, profile_hash, format_duration
+from core.tools_image import (plan_tools_image, stage_items, capture_command, loader_script,
+                              startnet_section, update_startnet, shipped_bytes, packed_executables, launcher_dirs, launcher_script, pe_subsystem,
+                              LOADER_SCRIPT, LAUNCHER_DIR, IMAGE_SUBSYSTEM_WINDOWS_GUI)
 
 # 初始化 colorama（Windows 彩色输出支持）
 init(autoreset=True)
@@ -59,13 +70,136 @@ class WinPECustomizer:
         self.enable_create_dirs = config.ENABLE_CREATE_DIRS
         self.enable_context_menu = config.ENABLE_CONTEXT_MENU
         self.enable_make_iso = config.ENABLE_MAKE_ISO
+        self.enable_wim_export = config.ENABLE_WIM_EXPORT
+        self.wim_export_compress = config.WIM_EXPORT_COMPRESS
+        self.enable_tools_image = config.ENABLE_TOOLS_IMAGE
+        self.tools_image_min_size_mb = config.TOOLS_IMAGE_MIN_SIZE_MB
+        self.tools_image_file = config.TOOLS_IMAGE_FILE
+        self.tools_image_compress = config.TOOLS_IMAGE_COMPRESS
+        self.tools_image_mount_dir = config.TOOLS_IMAGE_MOUNT_DIR
+        self.tools_image_autoload = config.TOOLS_IMAGE_AUTOLOAD
+        self.tools_image_items = config.TOOLS_IMAGE_ITEMS
+        
+        # 日志文件（后台线程写入，ENABLE_LOGGING 为 False 时为 None）
+        self.logger = get_log_writer(self.work_dir)
+        
+        # 运行历史（记录各步骤耗时，预测进度和剩余时间）
+        self.history = get_run_history(self.work_dir)
+        self.history_run_id = None
+        self.estimator = None
+        self._step_start_time = time.time()
+        self._item_start_time = time.time()
+        
+        # 命令执行后端（真实命令 / 模拟器）
+        self.backend = get_backend()
+        
+        # WIM 更新引擎（dism 挂载 / wimlib 免挂载）
+        self.wim_update_engine = config.WIM_UPDATE_ENGINE
+        self.wimlib_path = config.WIMLIB_PATH
+        self.boot_wim = self.winpe_dir / "media" / "sources" / "boot.wim"
+        self._image = None
+        
+        # 映像体积统计
+        self.size_accountant = None
+        if config.ENABLE_SIZE_ACCOUNTING:
+            self.size_accountant = ImageSizeAccountant(self.mount_dir, with_hash=config.SIZE_ACCOUNTING_HASH)
         
         # 从 config.py 加载包列表
         self.feature_packages = config.FEATURE_PACKAGES
         self.language_packages = config.LANGUAGE_PACKAGES
     
+    def _step_started(self, step_name):
+        """步骤开始（体积统计快照、历史记录计时、进度预测）"""
+        self._step_start_time = time.time()
+        if self.size_accountant and is_wim_mounted(self.mount_dir):
+            self.size_accountant.begin_step(step_name)
+        
+        if self.estimator and self.estimator.available:
+            self.estimator.start(step_name)
+            percent, remaining = self.estimator.estimate()
+            self.print_info(f"[预计] 总体进度 {percent:.0f}%，预计剩余 {format_duration(remaining)}")
+    
+    def _step_finished(self, step_name, success=None):
+        """步骤结束（体积统计快照并输出差异、写入历史记录）"""
+        duration = time.time() - self._step_start_time
+        record = None
+        if self.size_accountant:
+            if is_wim_mounted(self.mount_dir):
+                record = self.size_accountant.end_step()
+            else:
+                # 步骤中映像已卸载（如生成 ISO），清单不再有效
+                self.size_accountant.cancel_step()
+        if record:
+            self.print_info(f"[体积] {step_name}: 新增 {record['bytes_added'] / 1048576:.1f} MB，"
+                            f"删除 {record['bytes_removed'] / 1048576:.1f} MB，"
+                            f"净增 {record['net_bytes'] / 1048576:+.1f} MB")
+        
+        if self.estimator:
+            self.estimator.finish(step_name)
+        if self.history_run_id:
+            self.history.record_step(self.history_run_id, "step", step_name, self._step_start_time, duration,
+                                     record['net_bytes'] if record else None, success)
+    
+    def _item_started(self, kind, name):
+        """单项开始（功能包、驱动目录）"""
+        self._item_start_time = time.time()
+        if self.size_accountant:
+            self.size_accountant.begin_item(kind, name)
+    
+    def _item_finished(self, kind, name, success=None):
+        """单项结束"""
+        duration = time.time() - self._item_start_time
+        record = self.size_accountant.end_item() if self.size_accountant else None
+        if self.history_run_id:
+            self.history.record_step(self.history_run_id, kind, name, self._item_start_time, duration,
+                                     record['net_bytes'] if record else None, success)
+    
+    def profile_key(self):
+        """当前配置的指纹（用于匹配历史运行）"""
+        drivers = []
+        if self.driver_path.exists():
+            drivers = sorted(d.name for d in self.driver_path.iterdir() if d.is_dir())
+        return profile_hash({
+            'modules': [
+                self.enable_copype_setup, self.enable_auto_mount, self.enable_feature_packs,
+                self.enable_language_packs, self.enable_fonts_lp, self.enable_regional_settings,
+                self.enable_drivers, self.enable_external_apps, self.enable_create_dirs,
+                self.enable_context_menu, self.enable_make_iso, self.enable_wim_export,
+                self.enable_tools_image,
+            ],
+            'feature_packages': [name for name, _ in self.feature_packages],
+            'language_packages': [name for name, _ in self.language_packages],
+            'drivers': drivers,
+        })
+    
+    def run_recorded(self):
+        """执行主流程并写入运行历史"""
+        if self.history:
+            profile = self.profile_key()
+            self.estimator = ProgressEstimator(self.history.expected_durations(profile))
+            self.history_run_id = self.history.begin_run(profile, self.winpe_dir)
+            if self.estimator.available:
+                self.print_info(f"[预计] 根据历史记录（profile {profile}），预计总耗时 "
+                                f"{format_duration(self.estimator.total)}")
+        
+        exit_code = 1
+        try:
+            exit_code = self.run()
+        finally:
+            self.close_image()
+            if self.history_run_id:
+                self.history.finish_run(self.history_run_id, exit_code)
+                self.history_run_id = None
+        return exit_code
+    
+    def _log(self, tag, text):
+        """写入日志文件（非阻塞）"""
+        if self.logger:
+            self.logger.log(tag, text)
+    
     def print_header(self, text):
         """打印标题"""
+        self._log('HEADER', text)
         if not self.silent_mode:
             print(f"\n{Fore.CYAN}{'=' * 50}{Style.RESET_ALL}")
             print(f"{Fore.CYAN}{text:^50}{Style.RESET_ALL}")
@@ -73,26 +207,31 @@ class WinPECustomizer:
     
     def print_info(self, text):
         """打印普通信息（白色）"""
+        self._log('INFO', text)
         if not self.silent_mode:
             print(f"{Fore.WHITE}{text}{Style.RESET_ALL}")
     
     def print_success(self, text):
         """打印成功信息（绿色）"""
+        self._log('SUCCESS', text)
         if not self.silent_mode:
             print(f"{Fore.GREEN}{text}{Style.RESET_ALL}")
     
     def print_error(self, text):
         """打印错误信息（红色）"""
+        self._log('ERROR', text)
         if not self.silent_mode:
             print(f"{Fore.RED}{text}{Style.RESET_ALL}")
     
     def print_warning(self, text):
         """打印警告信息（黄色）"""
+        self._log('WARNING', text)
         if not self.silent_mode:
             print(f"{Fore.YELLOW}{text}{Style.RESET_ALL}")
     
     def print_cyan(self, text):
         """打印青色信息"""
+        self._log('CYAN', text)
         if not self.silent_mode:
             print(f"{Fore.CYAN}{text}{Style.RESET_ALL}")
     
@@ -105,15 +244,26 @@ class WinPECustomizer:
             self.print_cyan("=" * 56)
             print()
             
-            result = subprocess.run(cmd, shell=True)
+            # 捕获输出：显示在控制台的同时写入日志（无人值守构建时可从日志排查）
+            process = self.backend.popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                encoding='utf-8',
+                errors='ignore',
+                bufsize=1
+            )
+            returncode = self._echo_command_output(process)
             
             print()
             self.print_cyan("=" * 56)
-            if result.returncode == 0:
+            if returncode == 0:
                 self.print_success("[命令结果] 命令执行成功 (Exit Code: 0)")
             else:
-                self.print_error(f"[命令结果] 命令执行失败 (Exit Code: {result.returncode})")
+                self.print_error(f"[命令结果] 命令执行失败 (Exit Code: {returncode})")
             print()
+            return returncode
         else:
             # 静默模式：捕获输出，不显示在控制台
             self.print_cyan("[命令执行] 准备执行命令:")
@@ -126,9 +276,8 @@ class WinPECustomizer:
                 startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
                 startupinfo.wShowWindow = subprocess.SW_HIDE
             
-            result = subprocess.run(
-                cmd, 
-                shell=True,
+            result = self.backend.run(
+                cmd,
                 capture_output=True,
                 text=True,
                 encoding='utf-8',
@@ -149,6 +298,39 @@ class WinPECustomizer:
         
         return result.returncode
     
+    def _echo_command_output(self, process):
+        """逐行显示命令输出（进度条在同一行刷新）并写入日志，返回退出码"""
+        import re
+        last_was_progress = False
+        last_percent = -1
+        for line in process.stdout:
+            line = line.rstrip()
+            # 检测进度条：控制台原样刷新，日志只记录每 10% 的进度
+            if '[' in line and '%' in line and '=' in line:
+                print(f"\r{line}", end='', flush=True)
+                last_was_progress = True
+                match = re.search(r'(\d+\.?\d*)%', line)
+                if match:
+                    percent = float(match.group(1))
+                    if last_percent < 0 or percent - last_percent >= 10.0 or (percent >= 99.0 > last_percent):
+                        self._log('OUTPUT', f"进度: {percent:.0f}%")
+                        last_percent = percent
+                continue
+            if line.strip():
+                # 如果上一行是进度条，先换行
+                if last_was_progress:
+                    print()
+                    last_was_progress = False
+                print(line)
+                self._log('OUTPUT', line.strip())
+        
+        # 如果最后一行是进度条，换行
+        if last_was_progress:
+            print()
+        
+        process.wait()
+        return process.returncode
+    
     def _process_command_output(self, output):
         """处理命令输出"""
         for line in output.split('\n'):
@@ -242,8 +424,68 @@ class WinPECustomizer:
         print()
         return True
     
+    def needs_mount(self):
+        """是否启用了必须挂载映像的步骤（DISM 离线服务）"""
+        return any([
+            self.enable_feature_packs,
+            self.enable_language_packs,
+            self.enable_fonts_lp,
+            self.enable_regional_settings,
+            self.enable_drivers,
+        ])
+    
+    def use_mountless_update(self):
+        """是否使用免挂载更新（wimlib 引擎且只有文件类步骤）"""
+        if self.wim_update_engine != "wimlib" or self.needs_mount():
+            return False
+        if is_wim_mounted(self.mount_dir):
+            return False  # 已处于挂载状态，直接修改挂载目录
+        return WimlibImage.is_available(self.wimlib_path)
+    
+    def get_image(self):
+        """获取文件类步骤使用的映像对象"""
+        if self._image is None:
+            if self.use_mountless_update():
+                self._image = WimlibImage(self.boot_wim, 1, self.wimlib_path)
+            else:
+                self._image = MountDirImage(self.mount_dir)
+        return self._image
+    
+    def commit_image(self):
+        """提交免挂载模式下暂存的文件修改"""
+        if self._image is None or not self._image.mountless:
+            return True
+        
+        if not self._image.commands:
+            return True
+        
+        self.print_info(f"[免挂载] 正在写入 {len(self._image.commands)} 项修改到 boot.wim...")
+        start = time.time()
+        success, output = self._image.commit()
+        if success:
+            self.print_success(f"[免挂载] boot.wim 更新完成，耗时 {time.time() - start:.1f} 秒")
+        else:
+            self.print_error("[失败] wimlib-imagex update 执行失败")
+            for line in output.strip().splitlines()[-10:]:
+                self.print_error(f"  {line}")
+        return success
+    
+    def close_image(self):
+        """释放映像对象（删除免挂载模式的暂存目录，未提交的修改被放弃）"""
+        if self._image is not None:
+            self._image.close()
+            self._image = None
+    
     def check_and_mount_wim(self):
         """检查并挂载 WIM 映像"""
+        if self.use_mountless_update():
+            self.print_info("[免挂载] 仅启用了文件类步骤，使用 wimlib 直接更新 boot.wim，跳过挂载")
+            return True
+        
+        if self.wim_update_engine == "wimlib" and not self.needs_mount() \
+                and not WimlibImage.is_available(self.wimlib_path):
+            self.print_warning(f"[警告] 未找到 {self.wimlib_path}，改用 DISM 挂载方式")
+        
         if not self.enable_auto_mount:
             self.print_warning("[跳过] 已禁用自动挂载功能")
             return True
@@ -264,12 +506,14 @@ class WinPECustomizer:
             self.mount_dir.mkdir(parents=True)
             self.print_success("[完成] 挂载目录创建完成")
         
-        # 检查是否已挂载
+        # 直接读取 WIM 文件头和 XML，显示映像信息（无需调用 DISM）
+        self.show_wim_info(boot_wim)
+        
+        # 检查是否已挂载（读取 DISM 挂载登记表）
         windows_dir = self.mount_dir / "Windows"
-        if windows_dir.exists():
+        if is_wim_mounted(self.mount_dir):
             self.print_success("[已挂载] WIM 映像已经处于挂载状态，跳过挂载操作")
             self.print_success(f"[已挂载] 挂载点: {self.mount_dir}")
-            self.print_success("[已挂载] 检测到 Windows 目录存在")
         else:
             self.print_info("[准备] 挂载目录存在但为空，准备挂载 WIM 映像...")
             self.print_info(f"[准备] WIM 文件路径: {boot_wim}")
@@ -277,6 +521,7 @@ class WinPECustomizer:
             
             cmd = f'dism /mount-wim /wimfile:"{boot_wim}" /index:1 /mountdir:"{self.mount_dir}"'
             exit_code = self.run_command(cmd)
+            mounted_registry.invalidate()
             
             if exit_code != 0:
                 self.print_error("[失败] WIM 映像挂载失败")
@@ -294,6 +539,24 @@ class WinPECustomizer:
         print()
         return True
     
+    def show_wim_info(self, wim_path):
+        """显示 WIM 映像信息（纯 Python 读取，毫秒级）"""
+        try:
+            info = read_wim_info(wim_path)
+        except (OSError, WimFormatError) as e:
+            self.print_warning(f"[警告] 无法读取 WIM 信息: {e}")
+            return None
+        
+        size_mb = info.file_size / (1024 * 1024)
+        self.print_info(f"[映像] 文件大小: {size_mb:.1f} MB，压缩: {info.compression}，映像数: {info.image_count}")
+        for image in info.images:
+            total_mb = image.total_bytes / (1024 * 1024)
+            self.print_info(f"[映像] #{image.index} {image.name}  版本: {image.version}  "
+                            f"架构: {image.arch or '未知'}  展开大小: {total_mb:.1f} MB")
+        if info.write_in_progress:
+            self.print_warning("[警告] WIM 标记为写入未完成，上次提交可能被中断")
+        return info
+    
     def install_package(self, pkg_name, pkg_desc):
         """安装单个功能包"""
         pkg_file = self.cab_path / f"{pkg_name}.cab"
@@ -315,9 +578,8 @@ class WinPECustomizer:
                 print()
                 
                 # 执行命令并实时过滤输出
-                process = subprocess.Popen(
+                process = self.backend.popen(
                     cmd,
-                    shell=True,
                     stdout=subprocess.PIPE,
                     stderr=subprocess.STDOUT,
                     text=True,
@@ -326,30 +588,8 @@ class WinPECustomizer:
                     bufsize=1
                 )
                 
-                # 逐行读取输出并过滤
-                last_was_progress = False
-                for line in process.stdout:
-                    line = line.rstrip()
-                    # 检测进度条
-                    if '[' in line and '%' in line and '=' in line:
-                        # 在同一行显示进度条
-                        print(f"\r{line}", end='', flush=True)
-                        last_was_progress = True
-                        continue
-                    # 显示其他输出
-                    if line.strip():
-                        # 如果上一行是进度条，先换行
-                        if last_was_progress:
-                            print()
-                            last_was_progress = False
-                        print(line)
-                
-                # 如果最后一行是进度条，换行
-                if last_was_progress:
-                    print()
-                
-                process.wait()
-                exit_code = process.returncode
+                # 逐行读取输出（显示并写入日志）
+                exit_code = self._echo_command_output(process)
                 
                 print()
             else:
@@ -363,9 +603,8 @@ class WinPECustomizer:
                     startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
                     startupinfo.wShowWindow = subprocess.SW_HIDE
                 
-                process = subprocess.Popen(
+                process = self.backend.popen(
                     cmd,
-                    shell=True,
                     stdout=subprocess.PIPE,
                     stderr=subprocess.STDOUT,
                     text=True,
@@ -402,10 +641,12 @@ class WinPECustomizer:
                 self.print_error(f"==== [失败] {pkg_desc} 安装失败 ====")
             else:
                 self.print_success(f"==== [成功] {pkg_desc} 安装成功 ====")
+            return exit_code == 0
         else:
             self.print_warning(f"[跳过] {pkg_desc} - 文件不存在")
             self.print_warning(f"        包名: {pkg_name}.cab")
             self.print_cyan("=" * 42)
+        return None
     
     def install_language_package(self, pkg_name, pkg_desc):
         """安装单个语言包"""
@@ -427,9 +668,8 @@ class WinPECustomizer:
                 self.print_info(f"[命令] {cmd}")
                 print()
                 
-                process = subprocess.Popen(
+                process = self.backend.popen(
                     cmd,
-                    shell=True,
                     stdout=subprocess.PIPE,
                     stderr=subprocess.STDOUT,
                     text=True,
@@ -438,24 +678,7 @@ class WinPECustomizer:
                     bufsize=1
                 )
                 
-                last_was_progress = False
-                for line in process.stdout:
-                    line = line.rstrip()
-                    if '[' in line and '%' in line and '=' in line:
-                        print(f"\r{line}", end='', flush=True)
-                        last_was_progress = True
-                        continue
-                    if line.strip():
-                        if last_was_progress:
-                            print()
-                            last_was_progress = False
-                        print(line)
-                
-                if last_was_progress:
-                    print()
-                
-                process.wait()
-                exit_code = process.returncode
+                exit_code = self._echo_command_output(process)
                 print()
             else:
                 # 静默模式：捕获输出到日志
@@ -468,9 +691,8 @@ class WinPECustomizer:
                     startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
                     startupinfo.wShowWindow = subprocess.SW_HIDE
                 
-                process = subprocess.Popen(
+                process = self.backend.popen(
                     cmd,
-                    shell=True,
                     stdout=subprocess.PIPE,
                     stderr=subprocess.STDOUT,
                     text=True,
@@ -506,10 +728,12 @@ class WinPECustomizer:
                 self.print_error(f"==== [失败] {pkg_desc} 安装失败 ====")
             else:
                 self.print_success(f"==== [成功] {pkg_desc} 安装成功 ====")
+            return exit_code == 0
         else:
             self.print_warning(f"[跳过] {pkg_desc} - 文件不存在")
             self.print_warning(f"        包名: {pkg_name}.cab")
             self.print_cyan("=" * 42)
+        return None
     
     def install_feature_packs(self):
         """安装功能包"""
@@ -524,7 +748,9 @@ class WinPECustomizer:
         
         for pkg_name, pkg_desc in self.feature_packages:
             self.last_progress = -1  # 重置进度计数器
-            self.install_package(pkg_name, pkg_desc)
+            self._item_started("package", pkg_name)
+            result = self.install_package(pkg_name, pkg_desc)
+            self._item_finished("package", pkg_name, result)
         
         if not self.silent_mode:
             print()
@@ -546,7 +772,9 @@ class WinPECustomizer:
         
         for pkg_name, pkg_desc in self.language_packages:
             self.last_progress = -1  # 重置进度计数器
-            self.install_language_package(pkg_name, pkg_desc)
+            self._item_started("package", pkg_name)
+            result = self.install_language_package(pkg_name, pkg_desc)
+            self._item_finished("package", pkg_name, result)
         
         if not self.silent_mode:
             print()
@@ -571,7 +799,9 @@ class WinPECustomizer:
         if font_pkg.exists():
             self.print_info("[安装] 正在安装: 中文字体支持包")
             cmd = f'dism /image:"{self.mount_dir}" /add-package /packagepath:"{font_pkg}"'
-            subprocess.run(cmd, shell=True)
+            self._item_started("package", "WinPE-FontSupport-ZH-CN")
+            result = self.backend.run(cmd)
+            self._item_finished("package", "WinPE-FontSupport-ZH-CN", result.returncode == 0)
         else:
             self.print_warning("[跳过] 中文字体支持包 - 文件不存在")
         
@@ -582,7 +812,9 @@ class WinPECustomizer:
         if lp_pkg.exists():
             self.print_info("[安装] 正在安装: 核心语言包")
             cmd = f'dism /image:"{self.mount_dir}" /add-package /packagepath:"{lp_pkg}"'
-            subprocess.run(cmd, shell=True)
+            self._item_started("package", "zh-cn/lp")
+            result = self.backend.run(cmd)
+            self._item_finished("package", "zh-cn/lp", result.returncode == 0)
         else:
             self.print_warning("[跳过] 核心语言包 - 文件不存在")
         
@@ -606,7 +838,7 @@ class WinPECustomizer:
         for setting, desc in config.REGIONAL_SETTINGS:
             self.print_info(f"[配置] {desc}")
             cmd = f'dism /image:"{self.mount_dir}" /{setting}'
-            subprocess.run(cmd, shell=True, capture_output=True)
+            self.backend.run(cmd, capture_output=True)
             print()
         
         self.print_success("[完成] 区域和语言设置配置成功")
@@ -639,7 +871,9 @@ class WinPECustomizer:
             # 如果没有子目录，直接递归安装整个目录
             self.print_info("[扫描] 未发现子目录，将递归安装整个目录...")
             cmd = f'dism /image:"{self.mount_dir}" /add-driver /driver:"{self.driver_path}" /recurse'
+            self._item_started("driver", self.driver_path.name)
             exit_code = self.run_command(cmd)
+            self._item_finished("driver", self.driver_path.name, exit_code == 0)
             
             if exit_code != 0:
                 self.print_error("[失败] 驱动程序安装过程中出现错误")
@@ -667,6 +901,7 @@ class WinPECustomizer:
                 
                 # 安装此子目录的驱动
                 cmd = f'dism /image:"{self.mount_dir}" /add-driver /driver:"{subdir}" /recurse'
+                self._item_started("driver", subdir.name)
                 
                 if self.silent_mode:
                     # 静默模式：捕获输出
@@ -678,9 +913,8 @@ class WinPECustomizer:
                         startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
                         startupinfo.wShowWindow = subprocess.SW_HIDE
                     
-                    process = subprocess.Popen(
+                    process = self.backend.popen(
                         cmd,
-                        shell=True,
                         stdout=subprocess.PIPE,
                         stderr=subprocess.STDOUT,
                         text=True,
@@ -728,6 +962,8 @@ class WinPECustomizer:
                         self.print_success(f"[完成] {subdir.name} 安装成功")
                     else:
                         self.print_error(f"[失败] {subdir.name} 安装失败")
+                
+                self._item_finished("driver", subdir.name, exit_code == 0)
             
             self.print_success(f"[总计] 已处理 {total_dirs} 个驱动目录")
         
@@ -752,15 +988,19 @@ class WinPECustomizer:
             print()
             return True
         
-        system32 = self.mount_dir / "Windows" / "System32"
+        image = self.get_image()
+        
+        # 大型工具打包为外置工具映像，不再复制到 boot.wim
+        packed = self.build_tools_image() if self.enable_tools_image else set()
         
         # 示例：复制 DiskGenius
         diskgenius = self.external_apps / "DiskGenius.exe"
-        if diskgenius.exists():
+        if "DiskGenius.exe" in packed:
+            self.print_info("[跳过] DiskGenius.exe 已放入外置工具映像")
+        elif diskgenius.exists():
             self.print_info("[复制] 正在复制: DiskGenius.exe")
-            import shutil
             try:
-                shutil.copy2(diskgenius, system32)
+                image.add_file(diskgenius, "Windows/System32/DiskGenius.exe")
                 self.print_success("[成功] DiskGenius.exe 复制成功")
             except Exception as e:
                 self.print_error(f"[失败] DiskGenius.exe 复制失败: {e}")
@@ -772,6 +1012,101 @@ class WinPECustomizer:
         print()
         return True
     
+    def build_tools_image(self):
+        """打包外置工具映像并配置 WinPE 按需加载
+        
+        返回放入工具映像的项目名集合；打包失败时返回空集合（工具仍复制到 boot.wim）
+        """
+        min_bytes = int(float(self.tools_image_min_size_mb) * 1024 * 1024)
+        app_sources = [entry[0] for entry in getattr(config, 'EXTERNAL_APPS', [])]
+        plan = plan_tools_image(self.external_apps, min_bytes, app_sources, self.tools_image_items)
+        if not plan.packed:
+            self.print_info(f"[工具映像] EXTERNAL_APPS 中没有达到 {self.tools_image_min_size_mb} MB 的项目，跳过打包")
+            self.remove_tools_image_startup()
+            return set()
+        
+        compress = str(self.tools_image_compress).strip().lower()
+        if compress not in ('max', 'fast', 'none'):
+            self.print_warning(f"[提示] 工具映像不支持压缩方式 {compress}，改用 max 压缩")
+            compress = 'max'
+        
+        tools_wim = self.winpe_dir / "media" / self.tools_image_file
+        tools_wim.parent.mkdir(parents=True, exist_ok=True)
+        if tools_wim.exists():
+            tools_wim.unlink()
+        
+        packed_bytes = sum(size for _, size in plan.packed)
+        self.print_info(f"[工具映像] 打包 {len(plan.packed)} 项（{packed_bytes / (1024 * 1024):.1f} MB）"
+                        f" → {tools_wim}")
+        for path, size in plan.packed:
+            self.print_info(f"  {path.name} ({size / (1024 * 1024):.1f} MB)")
+        
+        # 只打包部分项目时，用硬链接组成暂存目录（与附加程序目录同一磁盘）
+        staging = None
+        capture_dir = self.external_apps
+        if plan.kept:
+            staging = stage_items(plan.packed, self.external_apps.parent / ".tools_image_staging")
+            capture_dir = staging
+        
+        start_time = time.perf_counter()
+        try:
+            exit_code = self.run_command(capture_command(capture_dir, tools_wim, compress))
+        finally:
+            if staging is not None:
+                shutil.rmtree(staging, ignore_errors=True)
+        
+        if exit_code != 0 or not tools_wim.exists():
+            self.print_error("[失败] 工具映像打包失败，工具将复制到 boot.wim")
+            self.remove_tools_image_startup()
+            return set()
+        
+        image = self.get_image()
+        image.write_text(LOADER_SCRIPT, loader_script(self.tools_image_file, self.tools_image_mount_dir))
+        
+        # System32 中的同名启动器：快捷方式和命令行仍按原名称启动（同名 exe 已存在时不生成）
+        executables = packed_executables(plan.packed, app_sources)
+        launchers = 0
+        for exe_rel, exe_path in executables:
+            name = exe_path.stem
+            if image.exists(f"{LAUNCHER_DIR}/{name}.exe"):
+                self.print_warning(f"[提示] {LAUNCHER_DIR}/{name}.exe 已存在，不生成启动器")
+                continue
+            gui = pe_subsystem(exe_path) == IMAGE_SUBSYSTEM_WINDOWS_GUI
+            image.write_text(f"{LAUNCHER_DIR}/{name}.cmd",
+                             launcher_script(exe_rel, self.tools_image_mount_dir, gui))
+            launchers += 1
+        
+        # 在 startnet.cmd 末尾（wpeinit 之后）添加 PATH 和自动加载（已有的配置段整段替换）
+        startup_script = "Windows/System32/startnet.cmd"
+        startup_text = image.read_text(startup_script) or "@echo off\nwpeinit\n"
+        new_text = update_startnet(startup_text, startnet_section(
+            self.tools_image_mount_dir, self.tools_image_autoload, launcher_dirs(plan.packed, executables)))
+        if new_text != startup_text:
+            image.write_text(startup_script, new_text)
+        
+        size_mb = tools_wim.stat().st_size / (1024 * 1024)
+        self.print_success(f"[工具映像] 打包完成: {size_mb:.1f} MB，耗时 {time.perf_counter() - start_time:.1f} 秒")
+        saved_bytes = shipped_bytes(self.external_apps, app_sources, plan.packed)
+        self.print_info(f"[工具映像] boot.wim 减少约 {saved_bytes / (1024 * 1024):.1f} MB（未压缩，EXTERNAL_APPS 中已打包的程序）")
+        self.print_info(f"[工具映像] 已在 {LAUNCHER_DIR} 生成 {launchers} 个启动器（程序名.cmd）")
+        if self.tools_image_autoload:
+            self.print_info(f"[提示] WinPE 启动后将在后台挂载到 {self.tools_image_mount_dir}")
+        else:
+            self.print_info(f"[提示] 在 WinPE 中运行 LoadTools 挂载到 {self.tools_image_mount_dir}")
+        return {path.name for path, _ in plan.packed}
+    
+    def remove_tools_image_startup(self):
+        """未打包工具映像时删除 startnet.cmd 中以前生成的工具映像配置段"""
+        image = self.get_image()
+        startup_script = "Windows/System32/startnet.cmd"
+        startup_text = image.read_text(startup_script)
+        if startup_text is None:
+            return
+        new_text = update_startnet(startup_text)
+        if new_text != startup_text:
+            image.write_text(startup_script, new_text)
+            self.print_info("[工具映像] 已删除 startnet.cmd 中以前生成的工具映像配置")
+    
     def create_directories(self):
         """创建自定义目录结构"""
         if not self.enable_create_dirs:
@@ -783,12 +1118,18 @@ class WinPECustomizer:
         self.print_info("[说明] 在 WinPE 中创建常用工作目录")
         print()
         
+        image = self.get_image()
+        
         # 从 config.py 读取目录列表
         for dir_name in config.CUSTOM_DIRECTORIES:
-            dir_path = self.mount_dir / dir_name
-            if not dir_path.exists():
+            try:
+                exists = image.exists(dir_name)
+            except WimlibError as e:
+                self.print_error(f"[错误] {e}")
+                return False
+            if not exists:
                 self.print_info(f"[创建] 正在创建目录: {dir_name}")
-                dir_path.mkdir(parents=True)
+                image.mkdir(dir_name)
             else:
                 self.print_warning(f"[存在] 目录已存在: {dir_name}")
         
@@ -921,23 +1262,19 @@ class WinPECustomizer:
         """将注册表文件部署到 WinPE 并配置启动脚本"""
         self.print_info("[部署] 部署注册表文件到 WinPE...")
         
-        # 目标注册表文件路径
-        reg_target = self.mount_dir / "Windows" / "System32" / "7zip_menu.reg"
+        image = self.get_image()
         
         # 复制注册表文件到 WinPE
-        import shutil
-        shutil.copy(reg_file, reg_target)
-        self.print_success(f"[复制] 注册表文件 → {reg_target.name}")
+        image.add_file(reg_file, "Windows/System32/7zip_menu.reg")
+        self.print_success("[复制] 注册表文件 → 7zip_menu.reg")
         
         # 配置启动脚本
-        startup_script = self.mount_dir / "Windows" / "System32" / "startnet.cmd"
+        startup_script = "Windows/System32/startnet.cmd"
         
-        self.print_info(f"[修改] 配置启动脚本: {startup_script.name}")
+        self.print_info("[修改] 配置启动脚本: startnet.cmd")
         
-        startup_content = []
-        if startup_script.exists():
-            with open(startup_script, 'r', encoding='utf-8', errors='ignore') as f:
-                startup_content = f.readlines()
+        startup_text = image.read_text(startup_script)
+        startup_content = startup_text.splitlines(keepends=True) if startup_text else []
         
         # 检查是否已经添加过
         already_added = any('7zip_menu.reg' in line for line in startup_content)
@@ -965,8 +1302,7 @@ class WinPECustomizer:
                 if line.strip().lower() != '@echo off':
                     new_content.append(line)
             
-            with open(startup_script, 'w', encoding='utf-8') as f:
-                f.writelines(new_content)
+            image.write_text(startup_script, ''.join(new_content))
             
             self.print_success("[配置] startnet.cmd 已更新")
             self.print_info("[提示] WinPE 启动时将自动导入 7-Zip 右键菜单")
@@ -984,20 +1320,35 @@ class WinPECustomizer:
         self.print_info("[说明] 保存所有更改并生成可启动 ISO 文件")
         print()
         
-        # 卸载 WIM
-        self.print_cyan("[阶段 1/2] 卸载 WIM 映像并提交更改...")
-        cmd = f'dism /unmount-wim /mountdir:"{self.mount_dir}" /commit'
-        exit_code = self.run_command(cmd)
-        
-        if exit_code != 0:
-            self.print_error("[失败] WIM 映像卸载失败")
-            return False
+        total_stages = 3 if self.enable_wim_export else 2
         
-        self.print_success("[成功] WIM 映像卸载成功")
+        if self._image is not None and self._image.mountless:
+            # 免挂载模式：提交暂存的修改，无需卸载
+            self.print_cyan(f"[阶段 1/{total_stages}] 提交 boot.wim 修改（免挂载）...")
+            if not self.commit_image():
+                return False
+        else:
+            # 卸载 WIM
+            self.print_cyan(f"[阶段 1/{total_stages}] 卸载 WIM 映像并提交更改...")
+            cmd = f'dism /unmount-wim /mountdir:"{self.mount_dir}" /commit'
+            exit_code = self.run_command(cmd)
+            mounted_registry.invalidate()
+            
+            if exit_code != 0:
+                self.print_error("[失败] WIM 映像卸载失败")
+                return False
+            
+            self.print_success("[成功] WIM 映像卸载成功")
         print()
         
+        # 导出压缩 WIM（失败时保留原 boot.wim，继续生成 ISO）
+        if self.enable_wim_export:
+            self.print_cyan(f"[阶段 2/{total_stages}] 导出并重新压缩 boot.wim...")
+            self.export_wim()
+            print()
+        
         # 生成 ISO
-        self.print_cyan("[阶段 2/2] 生成可启动 ISO 文件...")
+        self.print_cyan(f"[阶段 {total_stages}/{total_stages}] 生成可启动 ISO 文件...")
         cmd = f'MakeWinPEMedia /iso "{self.winpe_dir}" "{self.final_iso}"'
         exit_code = self.run_command(cmd)
         
@@ -1009,6 +1360,60 @@ class WinPECustomizer:
         print()
         return True
     
+    def export_wim(self):
+        """导出并重新压缩 boot.wim
+        
+        提交挂载后的 boot.wim 会保留服务操作产生的碎片和已删除资源，
+        通过 /Export-Image 重新写入一份紧凑的 WIM 后替换原文件。
+        """
+        boot_wim = self.winpe_dir / "media" / "sources" / "boot.wim"
+        export_wim = boot_wim.with_name("boot_export.wim")
+        
+        if not boot_wim.exists():
+            self.print_error(f"[错误] boot.wim 文件不存在: {boot_wim}")
+            return False
+        
+        compress = str(self.wim_export_compress).strip().lower()
+        if compress == 'recovery':
+            self.print_warning("[提示] LZMS (recovery) 压缩的 boot.wim 无法启动，改用 max 压缩")
+            compress = 'max'
+        elif compress not in ('max', 'fast', 'none'):
+            self.print_warning(f"[提示] 未知的压缩方式 {compress}，改用 max 压缩")
+            compress = 'max'
+        
+        # 清理上次残留的导出文件
+        if export_wim.exists():
+            export_wim.unlink()
+        
+        size_before = boot_wim.stat().st_size
+        self.print_info(f"[导出] 压缩方式: {compress}")
+        self.print_info(f"[导出] 原始大小: {size_before / (1024 * 1024):.2f} MB")
+        
+        # boot.wim 只包含一个 WinPE 映像（索引 1）
+        cmd = (f'dism /export-image /sourceimagefile:"{boot_wim}" /sourceindex:1 '
+               f'/destinationimagefile:"{export_wim}" /compress:{compress} /bootable')
+        start_time = time.perf_counter()
+        exit_code = self.run_command(cmd)
+        elapsed = time.perf_counter() - start_time
+        
+        if exit_code != 0 or not export_wim.exists():
+            self.print_error("[失败] boot.wim 导出失败，保留原文件")
+            if export_wim.exists():
+                export_wim.unlink()
+            return False
+        
+        size_after = export_wim.stat().st_size
+        os.replace(export_wim, boot_wim)
+        
+        saved = size_before - size_after
+        percent = (saved / size_before * 100) if size_before else 0
+        self.print_success("[成功] boot.wim 导出压缩完成")
+        self.print_info(f"[导出] 压缩前: {size_before / (1024 * 1024):.2f} MB")
+        self.print_info(f"[导出] 压缩后: {size_after / (1024 * 1024):.2f} MB")
+        self.print_info(f"[导出] 节省: {saved / (1024 * 1024):.2f} MB ({percent:.1f}%)")
+        self.print_info(f"[导出] 耗时: {elapsed:.1f} 秒")
+        return True
+    
     def show_summary(self):
         """显示执行摘要"""
         self.print_header("执行摘要和结果统计")
@@ -1029,6 +1434,30 @@ class WinPECustomizer:
             self.print_warning("[注意] 可能是因为 enable_make_iso 设置为 False")
         
         print()
+        self.show_size_report()
+    
+    def show_size_report(self):
+        """显示并保存映像体积统计"""
+        if not self.size_accountant or not self.size_accountant.steps:
+            return
+        
+        self.print_cyan("[体积] 各步骤映像体积变化（按新增字节排序）:")
+        steps = sorted(self.size_accountant.steps, key=lambda step: step['bytes_added'], reverse=True)
+        for step in steps:
+            self.print_info(f"       {step['name']}: +{step['bytes_added'] / 1048576:.1f} MB "
+                            f"({len(step['added'])} 个新文件)")
+            items = sorted(step['items'], key=lambda item: item['bytes_added'], reverse=True)
+            for item in items[:5]:
+                self.print_info(f"         - {item['name']}: +{item['bytes_added'] / 1048576:.1f} MB")
+        
+        report_file = self.work_dir / config.SIZE_REPORT_FILE
+        try:
+            self.size_accountant.save(report_file)
+            self.print_success(f"[体积] 报告已保存: {report_file}")
+        except OSError as e:
+            self.print_warning(f"[警告] 体积报告保存失败: {e}")
+        self.print_info(f"[体积] 扫描耗时: {self.size_accountant.scan_seconds:.1f} 秒")
+        print()
     
     def run(self):
         """主流程"""
@@ -1057,39 +1486,61 @@ class WinPECustomizer:
             # 执行定制流程
             if self.enable_feature_packs:
                 self.print_info("[模块] 执行模块: 安装功能包")
-                self.install_feature_packs()
+                self._step_started("安装功能包")
+                result = self.install_feature_packs()
+                self._step_finished("安装功能包", result)
             
             if self.enable_language_packs:
                 self.print_info("[模块] 执行模块: 安装中文语言包")
-                self.install_language_packs()
+                self._step_started("安装中文语言包")
+                result = self.install_language_packs()
+                self._step_finished("安装中文语言包", result)
             
             if self.enable_fonts_lp:
                 self.print_info("[模块] 执行模块: 安装字体支持")
-                self.install_fonts_and_lp()
+                self._step_started("安装字体支持")
+                result = self.install_fonts_and_lp()
+                self._step_finished("安装字体支持", result)
             
             if self.enable_regional_settings:
                 self.print_info("[模块] 执行模块: 配置区域设置")
-                self.set_regional_settings()
+                self._step_started("配置区域设置")
+                result = self.set_regional_settings()
+                self._step_finished("配置区域设置", result)
             
             if self.enable_drivers:
                 self.print_info("[模块] 执行模块: 批量安装驱动程序")
-                self.install_drivers()
+                self._step_started("批量安装驱动程序")
+                result = self.install_drivers()
+                self._step_finished("批量安装驱动程序", result)
             
             if self.enable_external_apps:
                 self.print_info("[模块] 执行模块: 复制附加程序")
-                self.copy_external_apps()
+                self._step_started("复制附加程序")
+                result = self.copy_external_apps()
+                self._step_finished("复制附加程序", result)
             
             if self.enable_create_dirs:
                 self.print_info("[模块] 执行模块: 创建自定义目录结构")
-                self.create_directories()
+                self._step_started("创建自定义目录结构")
+                result = self.create_directories()
+                self._step_finished("创建自定义目录结构", result)
             
             if self.enable_context_menu:
                 self.print_info("[模块] 执行模块: 配置右键菜单")
-                self.configure_context_menu()
+                self._step_started("配置右键菜单")
+                result = self.configure_context_menu()
+                self._step_finished("配置右键菜单", result)
+            
+            # 免挂载模式：提交文件修改
+            if not self.commit_image():
+                return 1
             
             if self.enable_make_iso:
                 self.print_info("[模块] 执行模块: 卸载 WIM 并生成 ISO")
-                self.make_iso()
+                self._step_started("卸载 WIM 并生成 ISO")
+                result = self.make_iso()
+                self._step_finished("卸载 WIM 并生成 ISO", result)
             
             # 显示摘要
             print()
@@ -1126,7 +1577,7 @@ def main():
     customizer = WinPECustomizer(winpe_dir)
     
     # 运行
-    exit_code = customizer.run()
+    exit_code = customizer.run_recorded()
     
     # 暂停等待用户
     input("\n按 Enter 键退出...")
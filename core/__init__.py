@@ -5,8 +5,13 @@
 WinPE Customizer 核心模块
 """
 
-from .WinPE_Customizer import WinPECustomizer
-
 __all__ = ['WinPECustomizer']
 __version__ = '3.0'
 
+
+def __getattr__(name):
+    # 按需导入核心类：导入 core.wim_info 等轻量子模块时不加载完整流程
+    if name == 'WinPECustomizer':
+        from .WinPE_Customizer import WinPECustomizer
+        return WinPECustomizer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
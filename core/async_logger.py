@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+异步日志写入模块
+调用方只把日志记录放入内存队列（不会阻塞在磁盘 IO 上），
+后台线程批量写入文本日志和 JSON Lines 日志，并按大小轮转
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import datetime
+import threading
+from pathlib import Path
+
+# 导入配置
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import config
+
+
+LEVELS = {'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40}
+
+# 输出标签 → 日志级别
+TAG_LEVELS = {
+    'DEBUG': 'DEBUG',
+    'COMMAND': 'INFO',
+    'OUTPUT': 'INFO',
+    'INFO': 'INFO',
+    'CYAN': 'INFO',
+    'HEADER': 'INFO',
+    'SUCCESS': 'INFO',
+    'WARNING': 'WARNING',
+    'ERROR': 'ERROR',
+}
+
+_STOP = object()
+
+
+class AsyncLogWriter:
+    """后台日志写入线程"""
+
+    def __init__(self, path, level='INFO', max_bytes=10 * 1024 * 1024, backup_count=5,
+                 write_json=True, flush_interval=0.5, batch_size=500):
+        self.path = Path(path)
+        self.json_path = self.path.with_suffix('.jsonl') if write_json else None
+        self.level = LEVELS.get(str(level).upper(), 20)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.dropped = 0
+
+        self._queue = queue.SimpleQueue()
+        self._text_file = None
+        self._json_file = None
+        self._thread = threading.Thread(target=self._worker, name="AsyncLogWriter", daemon=True)
+        self._thread.start()
+
+    def log(self, tag, message, source=None):
+        """记录一条日志（非阻塞）"""
+        level = TAG_LEVELS.get(tag, 'INFO')
+        if LEVELS[level] < self.level:
+            return
+        self._queue.put((time.time(), level, tag, message, source))
+
+    def close(self, timeout=5.0):
+        """写完剩余日志并停止线程"""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    # ------------------------------------------------------------------
+    # 后台线程
+    # ------------------------------------------------------------------
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._text_file = open(self.path, 'a', encoding='utf-8')
+        if self.json_path:
+            self._json_file = open(self.json_path, 'a', encoding='utf-8')
+
+    def _close_files(self):
+        for f in (self._text_file, self._json_file):
+            if f:
+                f.close()
+        self._text_file = None
+        self._json_file = None
+
+    def _rotate_file(self, path):
+        """path → path.1 → path.2 ... 超出 backup_count 的删除"""
+        if self.backup_count <= 0:
+            path.unlink(missing_ok=True)
+            return
+        for i in range(self.backup_count - 1, 0, -1):
+            src = Path(f"{path}.{i}")
+            if src.exists():
+                os.replace(src, f"{path}.{i + 1}")
+        if path.exists():
+            os.replace(path, f"{path}.1")
+
+    def _rotate_if_needed(self):
+        if not self.max_bytes or self._text_file.tell() < self.max_bytes:
+            return
+        self._close_files()
+        self._rotate_file(self.path)
+        if self.json_path:
+            self._rotate_file(self.json_path)
+        self._open()
+
+    def _write_batch(self, batch):
+        text_lines = []
+        json_lines = []
+        for created, level, tag, message, source in batch:
+            stamp = datetime.datetime.fromtimestamp(created)
+            text_lines.append(f"{stamp:%Y-%m-%d %H:%M:%S} [{level:<7}] {message}\n")
+            if self._json_file:
+                record = {
+                    'time': stamp.isoformat(timespec='milliseconds'),
+                    'level': level,
+                    'tag': tag,
+                    'message': message,
+                }
+                if source:
+                    record['source'] = source
+                json_lines.append(json.dumps(record, ensure_ascii=False) + '\n')
+
+        self._text_file.writelines(text_lines)
+        self._text_file.flush()
+        if self._json_file:
+            self._json_file.writelines(json_lines)
+            self._json_file.flush()
+        self._rotate_if_needed()
+
+    def _worker(self):
+        try:
+            self._open()
+        except OSError:
+            # 无法打开日志文件时丢弃所有日志，不影响主流程
+            while self._queue.get() is not _STOP:
+                self.dropped += 1
+            return
+
+        running = True
+        while running:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = []
+            while True:
+                if item is _STOP:
+                    running = False
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except OSError:
+                    self.dropped += len(batch)
+
+        self._close_files()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_log_writer(base_dir=None):
+    """获取全局日志写入器（config.ENABLE_LOGGING 为 False 时返回 None）"""
+    global _writer
+    if not config.ENABLE_LOGGING:
+        return None
+
+    with _writer_lock:
+        if _writer is None:
+            log_path = Path(config.LOG_FILE)
+            if not log_path.is_absolute():
+                base_dir = Path(base_dir) if base_dir else Path(__file__).parent.parent
+                log_path = base_dir / log_path
+            _writer = AsyncLogWriter(
+                log_path,
+                level=config.LOG_LEVEL,
+                max_bytes=getattr(config, 'LOG_MAX_BYTES', 10 * 1024 * 1024),
+                backup_count=getattr(config, 'LOG_BACKUP_COUNT', 5),
+                write_json=getattr(config, 'LOG_JSON', True),
+            )
+            atexit.register(_writer.close)
+        return _writer
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+命令执行后端
+- SubprocessBackend: 通过系统 shell 执行真实的 DISM / copype / MakeWinPEMedia（默认）
+- EmulatorBackend:   将命令交给 core/dism_emulator.py 模拟执行，
+                     可在 Linux 上对流程、输出解析和 GUI 队列进行基准测试和回归测试
+"""
+
+import os
+import sys
+import subprocess
+from pathlib import Path
+
+# 导入配置
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import config
+
+
+EMULATOR_SCRIPT = Path(__file__).parent / "dism_emulator.py"
+
+
+class SubprocessBackend:
+    """真实命令后端（shell 执行）"""
+
+    name = "subprocess"
+
+    def popen(self, cmd, **kwargs):
+        """启动命令，参数同 subprocess.Popen"""
+        kwargs['shell'] = True
+        return subprocess.Popen(cmd, **kwargs)
+
+    def run(self, cmd, **kwargs):
+        """执行命令并等待完成，参数同 subprocess.run"""
+        kwargs['shell'] = True
+        return subprocess.run(cmd, **kwargs)
+
+
+class EmulatorBackend:
+    """模拟命令后端
+
+    每条命令都会启动一个独立的模拟器进程，输出（包括 \\r 进度条）通过真实管道返回，
+    因此上层的读取、解析和队列逻辑与真实环境完全一致。
+    """
+
+    name = "emulator"
+
+    def __init__(self, language=None, latency=None, progress_delay=None,
+                 fail_rate=None, fail_pattern=None, seed=None):
+        self.language = language if language is not None else config.EMULATOR_LANGUAGE
+        self.latency = latency if latency is not None else config.EMULATOR_LATENCY
+        self.progress_delay = progress_delay if progress_delay is not None else config.EMULATOR_PROGRESS_DELAY
+        self.fail_rate = fail_rate if fail_rate is not None else config.EMULATOR_FAIL_RATE
+        self.fail_pattern = fail_pattern if fail_pattern is not None else config.EMULATOR_FAIL_PATTERN
+        self.seed = seed
+
+    def _env(self, env=None):
+        """构造传递给模拟器的环境变量"""
+        env = dict(env if env is not None else os.environ)
+        env['WPE_EMU_LANG'] = self.language
+        env['WPE_EMU_LATENCY'] = str(self.latency)
+        env['WPE_EMU_PROGRESS_DELAY'] = str(self.progress_delay)
+        env['WPE_EMU_FAIL_RATE'] = str(self.fail_rate)
+        env['WPE_EMU_FAIL_PATTERN'] = self.fail_pattern or ''
+        if self.seed is not None:
+            env['WPE_EMU_SEED'] = str(self.seed)
+        env.setdefault('PYTHONIOENCODING', 'utf-8')
+        return env
+
+    def _args(self, cmd, kwargs):
+        kwargs.pop('shell', None)
+        kwargs.pop('startupinfo', None)
+        kwargs['env'] = self._env(kwargs.get('env'))
+        return [sys.executable, str(EMULATOR_SCRIPT), cmd]
+
+    def popen(self, cmd, **kwargs):
+        """启动模拟命令，参数同 subprocess.Popen"""
+        return subprocess.Popen(self._args(cmd, kwargs), **kwargs)
+
+    def run(self, cmd, **kwargs):
+        """执行模拟命令并等待完成，参数同 subprocess.run"""
+        return subprocess.run(self._args(cmd, kwargs), **kwargs)
+
+
+def get_backend(name=None):
+    """按名称（默认读取 config.COMMAND_BACKEND）创建命令后端"""
+    name = name or getattr(config, 'COMMAND_BACKEND', 'subprocess')
+    if name == 'emulator':
+        return EmulatorBackend()
+    return SubprocessBackend()
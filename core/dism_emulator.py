@@ -0,0 +1,575 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+DISM / copype / MakeWinPEMedia 模拟器
+用于在 Linux（或没有 ADK、没有管理员权限的环境）上运行完整定制流程：
+- "WIM" 映像是一个 zip 文件，挂载即解压到挂载目录，提交即重新打包
+- 输出格式模仿真实工具，包括 \\r 刷新的进度条和中/英文本
+- 可通过环境变量注入延迟和失败
+
+用法: python dism_emulator.py "<完整命令行>"
+
+环境变量:
+  WPE_EMU_LANG            输出语言 zh-cn / en（默认 zh-cn）
+  WPE_EMU_LATENCY         每条命令的固定延迟（秒）
+  WPE_EMU_PROGRESS_DELAY  进度条每次刷新的延迟（秒）
+  WPE_EMU_FAIL_RATE       随机失败概率（0~1）
+  WPE_EMU_FAIL_PATTERN    命令匹配此正则时失败
+  WPE_EMU_SEED            随机数种子
+  WPE_EMU_STATE_DIR       挂载登记目录（默认系统临时目录下 wpe_dism_emu）
+  WPE_EMU_BASE_FILES      copype 生成的基础映像文件数（默认 200）
+  WPE_EMU_BASE_FILE_SIZE  基础映像单个文件大小（字节，默认 16384）
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shlex
+import random
+import shutil
+import tempfile
+import zipfile
+from pathlib import Path
+
+
+DISM_VERSION = "10.0.26100.1"
+
+MESSAGES = {
+    'zh-cn': {
+        'banner': "部署映像服务和管理工具\n版本: {version}\n",
+        'image_version': "映像版本: {version}\n",
+        'mounting': "正在装载映像",
+        'unmounting': "正在卸载映像",
+        'saving': "正在保存映像",
+        'exporting': "正在导出映像",
+        'capturing': "正在捕获映像",
+        'adding_package': "正在处理 1 (共 1 个) - 正在添加程序包 {name}",
+        'searching_drivers': "正在搜索要安装的驱动程序包...",
+        'found_drivers': "找到 {count} 个要安装的驱动程序包。",
+        'installing_driver': "正在安装 {index} / {count} - {path}: 已成功安装驱动程序包。",
+        'intl': "正在设置 {name}",
+        'success': "操作成功完成。",
+        'error': "错误: {code}\n\n{message}\n\nDISM 日志文件位于 C:\\Windows\\Logs\\DISM\\dism.log",
+        'not_found': "系统找不到指定的文件。",
+        'not_empty': "装载目录不为空。",
+        'not_mounted': "找不到指定的装载映像。",
+        'injected': "模拟器注入的失败。",
+        'unknown_option': "{option} 选项未知。",
+        'no_mounts': "未找到装载的映像。",
+        'mounted_list': "装载的映像:\n",
+        'copype_title': "正在创建 Windows PE 自定义工作目录",
+        'copype_exists': "目标目录已存在: {path}",
+        'media_creating': "正在创建 {path}...",
+        'media_complete': "% 已完成",
+        'done': "成功",
+    },
+    'en': {
+        'banner': "Deployment Image Servicing and Management tool\nVersion: {version}\n",
+        'image_version': "Image Version: {version}\n",
+        'mounting': "Mounting image",
+        'unmounting': "Unmounting image",
+        'saving': "Saving image",
+        'exporting': "Exporting image",
+        'capturing': "Capturing image",
+        'adding_package': "Processing 1 of 1 - Adding package {name}",
+        'searching_drivers': "Searching for driver packages to install...",
+        'found_drivers': "Found {count} driver package(s) to install.",
+        'installing_driver': "Installing {index} of {count} - {path}: The driver package was successfully installed.",
+        'intl': "Setting {name}",
+        'success': "The operation completed successfully.",
+        'error': "Error: {code}\n\n{message}\n\nThe DISM log file can be found at C:\\Windows\\Logs\\DISM\\dism.log",
+        'not_found': "The system cannot find the file specified.",
+        'not_empty': "The mount directory is not empty.",
+        'not_mounted': "The specified mounted image cannot be found.",
+        'injected': "Failure injected by the emulator.",
+        'unknown_option': "The {option} option is unknown.",
+        'no_mounts': "No mounted images found.",
+        'mounted_list': "Mounted images:\n",
+        'copype_title': "Creating Windows PE customization working directory",
+        'copype_exists': "Destination directory exists: {path}",
+        'media_creating': "Creating {path}...",
+        'media_complete': "% complete",
+        'done': "Success",
+    },
+}
+
+# 错误码（与真实 DISM 一致）
+ERROR_FILE_NOT_FOUND = 0x80070002
+ERROR_NOT_EMPTY = 0xc1420116
+ERROR_NOT_MOUNTED = 0xc1420127
+ERROR_SOURCE_MISSING = 0x800f081f
+ERROR_INVALID_PARAMETER = 87
+
+
+class EmulatorError(Exception):
+    """模拟命令失败"""
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def split_command(cmd):
+    """按 Windows 命令行习惯拆分参数（引号可出现在参数中间，反斜杠不转义）"""
+    lexer = shlex.shlex(cmd, posix=True)
+    lexer.whitespace_split = True
+    lexer.escape = ''
+    return list(lexer)
+
+
+class Emulator:
+    """命令模拟器"""
+
+    def __init__(self, env=None):
+        env = env if env is not None else os.environ
+        lang = env.get('WPE_EMU_LANG', 'zh-cn').lower()
+        self.msg = MESSAGES.get(lang, MESSAGES['zh-cn'])
+        self.latency = float(env.get('WPE_EMU_LATENCY', '0') or 0)
+        self.progress_delay = float(env.get('WPE_EMU_PROGRESS_DELAY', '0') or 0)
+        self.fail_rate = float(env.get('WPE_EMU_FAIL_RATE', '0') or 0)
+        self.fail_pattern = env.get('WPE_EMU_FAIL_PATTERN', '')
+        seed = env.get('WPE_EMU_SEED')
+        self.rng = random.Random(int(seed) if seed else None)
+        self.state_dir = Path(env.get('WPE_EMU_STATE_DIR') or Path(tempfile.gettempdir()) / 'wpe_dism_emu')
+        self.base_files = int(env.get('WPE_EMU_BASE_FILES', '200'))
+        self.base_file_size = int(env.get('WPE_EMU_BASE_FILE_SIZE', '16384'))
+
+    # ------------------------------------------------------------------
+    # 输出
+    # ------------------------------------------------------------------
+
+    def out(self, text=''):
+        sys.stdout.write(text + '\n')
+        sys.stdout.flush()
+
+    def text(self, key, **kwargs):
+        return self.msg[key].format(**kwargs)
+
+    def progress_bar(self, percent):
+        """生成 DISM 风格进度条"""
+        width = 58
+        filled = int(width * percent / 100)
+        bar = list('=' * filled + ' ' * (width - filled))
+        label = f"{percent:.1f}%"
+        start = (width - len(label)) // 2
+        bar[start:start + len(label)] = label
+        return '[' + ''.join(bar) + ']'
+
+    def progress(self, work=None, steps=20):
+        """输出进度条；work 为可迭代的工作项时按完成比例刷新"""
+        items = list(work) if work is not None else [None] * steps
+        total = max(len(items), 1)
+        last = -1
+        sys.stdout.write('\r' + self.progress_bar(0.0))
+        for i, item in enumerate(items, 1):
+            if callable(item):
+                item()
+            percent = round(100.0 * i / total, 1)
+            # 最多刷新约 50 次，和真实 DISM 的刷新频率接近
+            if percent - last >= 2.0 or i == total:
+                sys.stdout.write('\r' + self.progress_bar(percent))
+                sys.stdout.flush()
+                last = percent
+                if self.progress_delay:
+                    time.sleep(self.progress_delay)
+        sys.stdout.write('\r' + self.progress_bar(100.0) + '\n')
+        sys.stdout.flush()
+
+    def banner(self):
+        self.out()
+        self.out(self.text('banner', version=DISM_VERSION))
+
+    # ------------------------------------------------------------------
+    # 挂载登记
+    # ------------------------------------------------------------------
+
+    def _mounts_file(self):
+        return self.state_dir / 'mounts.json'
+
+    def load_mounts(self):
+        try:
+            with open(self._mounts_file(), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_mounts(self, mounts):
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self._mounts_file().with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(mounts, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self._mounts_file())
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    # ------------------------------------------------------------------
+    # 入口
+    # ------------------------------------------------------------------
+
+    def should_fail(self, cmd):
+        if self.fail_pattern and re.search(self.fail_pattern, cmd, re.IGNORECASE):
+            return True
+        return self.fail_rate > 0 and self.rng.random() < self.fail_rate
+
+    def execute(self, cmd):
+        """执行命令，返回退出码"""
+        if self.latency:
+            time.sleep(self.latency)
+
+        args = split_command(cmd)
+        if not args:
+            return 0
+
+        program = Path(args[0]).name.lower()
+        for suffix in ('.exe', '.cmd', '.bat'):
+            if program.endswith(suffix):
+                program = program[:-len(suffix)]
+
+        handlers = {
+            'dism': self.run_dism,
+            'copype': self.run_copype,
+            'makewinpemedia': self.run_makewinpemedia,
+        }
+        handler = handlers.get(program)
+        if handler is None:
+            sys.stderr.write(f"'{args[0]}' is not recognized as an internal or external command.\n")
+            return 9009
+
+        try:
+            if self.should_fail(cmd):
+                if program == 'dism':
+                    self.banner()
+                raise EmulatorError(ERROR_SOURCE_MISSING, self.text('injected'))
+            return handler(args[1:])
+        except EmulatorError as e:
+            code = f"0x{e.code:08x}" if e.code > 0xFFFF else str(e.code)
+            self.out(self.text('error', code=code, message=e.message))
+            self.out()
+            return e.code & 0xFF or 1
+
+    # ------------------------------------------------------------------
+    # DISM
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def parse_options(args):
+        """解析 /key:value 和 /flag 形式的参数"""
+        options = {}
+        for arg in args:
+            if not arg.startswith('/'):
+                continue
+            key, sep, value = arg[1:].partition(':')
+            options[key.lower()] = value if sep else True
+        return options
+
+    def run_dism(self, args):
+        options = self.parse_options(args)
+        self.banner()
+
+        if 'mount-wim' in options or 'mount-image' in options:
+            return self.dism_mount(options)
+        if 'unmount-wim' in options or 'unmount-image' in options:
+            return self.dism_unmount(options)
+        if 'export-image' in options:
+            return self.dism_export(options)
+        if 'capture-image' in options:
+            return self.dism_capture(options)
+        if 'get-mountedwiminfo' in options or 'get-mountedimageinfo' in options:
+            return self.dism_get_mounted()
+        if 'get-wiminfo' in options or 'get-imageinfo' in options:
+            return self.dism_get_info(options)
+        if 'cleanup-wim' in options or 'cleanup-mountpoints' in options:
+            self.save_mounts({})
+            self.out(self.text('success'))
+            return 0
+
+        image = options.get('image')
+        if isinstance(image, str):
+            self.out(self.text('image_version', version=DISM_VERSION))
+            mount_dir = Path(image)
+            if not (mount_dir / 'Windows').is_dir():
+                raise EmulatorError(ERROR_NOT_MOUNTED, self.text('not_mounted'))
+            if 'add-package' in options:
+                return self.dism_add_package(mount_dir, options)
+            if 'add-driver' in options:
+                return self.dism_add_driver(mount_dir, options)
+            settings = [key for key in options if key.startswith('set-')]
+            if settings:
+                return self.dism_intl(mount_dir, options, settings)
+
+        unknown = next((arg for arg in args if arg.startswith('/')), '')
+        raise EmulatorError(ERROR_INVALID_PARAMETER, self.text('unknown_option', option=unknown))
+
+    def dism_mount(self, options):
+        wim = Path(options.get('wimfile') or options.get('imagefile') or '')
+        mount_dir = Path(options.get('mountdir') or '')
+        if not wim.is_file():
+            raise EmulatorError(ERROR_FILE_NOT_FOUND, self.text('not_found'))
+        mount_dir.mkdir(parents=True, exist_ok=True)
+        if any(mount_dir.iterdir()):
+            raise EmulatorError(ERROR_NOT_EMPTY, self.text('not_empty'))
+
+        self.out(self.text('mounting'))
+        with zipfile.ZipFile(wim) as zf:
+            members = zf.infolist()
+            self.progress([lambda m=m: zf.extract(m, mount_dir) for m in members])
+
+        mounts = self.load_mounts()
+        mounts[self._key(mount_dir)] = {
+            'mount_dir': str(mount_dir),
+            'wim': str(wim.absolute()),
+            'index': int(options.get('index', 1)),
+        }
+        self.save_mounts(mounts)
+        self.out(self.text('success'))
+        return 0
+
+    def dism_unmount(self, options):
+        mount_dir = Path(options.get('mountdir') or '')
+        mounts = self.load_mounts()
+        record = mounts.get(self._key(mount_dir))
+        if record is None:
+            raise EmulatorError(ERROR_NOT_MOUNTED, self.text('not_mounted'))
+
+        if options.get('commit'):
+            self.out(self.text('saving'))
+            files = [p for p in mount_dir.rglob('*')]
+            tmp = Path(record['wim'] + '.emu_tmp')
+            with zipfile.ZipFile(tmp, 'w', zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+                self.progress([lambda p=p: zf.write(p, p.relative_to(mount_dir).as_posix()) for p in files])
+            os.replace(tmp, record['wim'])
+
+        self.out(self.text('unmounting'))
+        entries = list(mount_dir.iterdir())
+
+        def remove(entry):
+            if entry.is_dir() and not entry.is_symlink():
+                shutil.rmtree(entry)
+            else:
+                entry.unlink()
+
+        self.progress([lambda e=e: remove(e) for e in entries])
+
+        del mounts[self._key(mount_dir)]
+        self.save_mounts(mounts)
+        self.out(self.text('success'))
+        return 0
+
+    def dism_export(self, options):
+        source = Path(options.get('sourceimagefile') or '')
+        dest = Path(options.get('destinationimagefile') or '')
+        if not source.is_file():
+            raise EmulatorError(ERROR_FILE_NOT_FOUND, self.text('not_found'))
+
+        method, level = self.compression(options)
+        self.out(self.text('exporting'))
+        with zipfile.ZipFile(source) as src, zipfile.ZipFile(dest, 'w', method, compresslevel=level) as dst:
+            members = src.infolist()
+            self.progress([lambda m=m: dst.writestr(m.filename, src.read(m)) for m in members])
+        self.out(self.text('success'))
+        return 0
+
+    def dism_capture(self, options):
+        capture_dir = Path(options.get('capturedir') or '')
+        dest = Path(options.get('imagefile') or '')
+        if not capture_dir.is_dir():
+            raise EmulatorError(ERROR_FILE_NOT_FOUND, self.text('not_found'))
+
+        method, level = self.compression(options)
+        self.out(self.text('capturing'))
+        files = [p for p in capture_dir.rglob('*') if p.is_file()]
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        with zipfile.ZipFile(dest, 'w', method, compresslevel=level) as zf:
+            self.progress([lambda p=p: zf.write(p, p.relative_to(capture_dir).as_posix()) for p in files])
+        self.out(self.text('success'))
+        return 0
+
+    @staticmethod
+    def compression(options):
+        """/Compress 选项对应的 zip 压缩方式"""
+        compress = str(options.get('compress', 'max')).lower()
+        return {
+            'none': (zipfile.ZIP_STORED, None),
+            'fast': (zipfile.ZIP_DEFLATED, 1),
+            'max': (zipfile.ZIP_DEFLATED, 9),
+            'recovery': (zipfile.ZIP_LZMA, None),
+        }.get(compress, (zipfile.ZIP_DEFLATED, 9))
+
+    def dism_get_mounted(self):
+        mounts = self.load_mounts()
+        if not mounts:
+            self.out(self.text('no_mounts'))
+        else:
+            self.out(self.text('mounted_list'))
+            for record in mounts.values():
+                self.out(f"Mount Dir : {record['mount_dir']}")
+                self.out(f"Image File : {record['wim']}")
+                self.out(f"Image Index : {record['index']}")
+                self.out("Mounted Read/Write : Yes")
+                self.out("Status : Ok")
+                self.out()
+        self.out(self.text('success'))
+        return 0
+
+    def dism_get_info(self, options):
+        wim = Path(options.get('wimfile') or options.get('imagefile') or '')
+        if not wim.is_file():
+            raise EmulatorError(ERROR_FILE_NOT_FOUND, self.text('not_found'))
+        with zipfile.ZipFile(wim) as zf:
+            size = sum(info.file_size for info in zf.infolist())
+        self.out("Details for image : " + str(wim))
+        self.out()
+        self.out("Index : 1")
+        self.out("Name : Microsoft Windows PE (amd64)")
+        self.out("Description : Microsoft Windows PE (amd64)")
+        self.out(f"Size : {size:,} bytes")
+        self.out()
+        self.out(self.text('success'))
+        return 0
+
+    def dism_add_package(self, mount_dir, options):
+        package = Path(options.get('packagepath') or '')
+        if not package.exists():
+            raise EmulatorError(ERROR_FILE_NOT_FOUND, self.text('not_found'))
+
+        identity = f"{package.stem}-Package~31bf3856ad364e35~amd64~~{DISM_VERSION}"
+        self.out(self.text('adding_package', name=identity))
+
+        def apply():
+            if zipfile.is_zipfile(package):
+                # 模拟包：zip 内容即为要写入映像的文件
+                with zipfile.ZipFile(package) as zf:
+                    zf.extractall(mount_dir)
+            else:
+                payload = mount_dir / 'Windows' / 'WinSxS' / identity
+                payload.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(package, payload / package.name)
+            manifest = mount_dir / 'Windows' / 'servicing' / 'Packages' / f"{identity}.mum"
+            manifest.parent.mkdir(parents=True, exist_ok=True)
+            manifest.write_text(f'<assembly identity="{identity}"/>\n', encoding='utf-8')
+
+        self.progress([apply] + [None] * 19)
+        self.out(self.text('success'))
+        return 0
+
+    def dism_add_driver(self, mount_dir, options):
+        driver = Path(options.get('driver') or '')
+        if not driver.exists():
+            raise EmulatorError(ERROR_FILE_NOT_FOUND, self.text('not_found'))
+
+        self.out(self.text('searching_drivers'))
+        if driver.is_file():
+            infs = [driver]
+        elif options.get('recurse'):
+            infs = sorted(driver.rglob('*.inf'))
+        else:
+            infs = sorted(driver.glob('*.inf'))
+        self.out(self.text('found_drivers', count=len(infs)))
+        self.out()
+
+        store = mount_dir / 'Windows' / 'System32' / 'DriverStore' / 'FileRepository'
+        for index, inf in enumerate(infs, 1):
+            target = store / f"{inf.stem.lower()}.inf_amd64_{index:04x}"
+            target.mkdir(parents=True, exist_ok=True)
+            for item in inf.parent.iterdir():
+                if item.is_file():
+                    shutil.copy2(item, target / item.name)
+            self.out(self.text('installing_driver', index=index, count=len(infs), path=str(inf)))
+        self.out(self.text('success'))
+        return 0
+
+    def dism_intl(self, mount_dir, options, settings):
+        intl = mount_dir / 'Windows' / 'System32' / 'config' / 'intl_emulated.ini'
+        intl.parent.mkdir(parents=True, exist_ok=True)
+        with open(intl, 'a', encoding='utf-8') as f:
+            for key in settings:
+                self.out(self.text('intl', name=key))
+                f.write(f"{key}={options[key]}\n")
+        self.progress()
+        self.out(self.text('success'))
+        return 0
+
+    # ------------------------------------------------------------------
+    # copype / MakeWinPEMedia
+    # ------------------------------------------------------------------
+
+    def run_copype(self, args):
+        if len(args) < 2:
+            self.out("Usage: copype <architecture> <destination>")
+            return 1
+        arch, dest = args[0], Path(args[1])
+        self.out("=" * 51)
+        self.out(self.text('copype_title'))
+        self.out()
+        self.out(f"    {dest}")
+        self.out("=" * 51)
+        self.out()
+        if dest.exists():
+            self.out(self.text('copype_exists', path=dest))
+            return 1
+
+        sources = dest / 'media' / 'sources'
+        sources.mkdir(parents=True)
+        (dest / 'mount').mkdir()
+        (dest / 'fwfiles').mkdir()
+        (dest / 'fwfiles' / 'efisys.bin').write_bytes(b'\0' * 4096)
+        (dest / 'fwfiles' / 'etfsboot.com').write_bytes(b'\0' * 2048)
+        (dest / 'media' / 'Boot').mkdir()
+        (dest / 'media' / 'Boot' / 'BCD').write_bytes(b'\0' * 16384)
+
+        rng = random.Random(0)
+        with zipfile.ZipFile(sources / 'boot.wim', 'w', zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr('Windows/System32/startnet.cmd', 'wpeinit\r\n')
+            zf.writestr('Windows/System32/winpeshl.ini', '')
+            for i in range(self.base_files):
+                folder = ('System32', 'SysWOW64', 'Fonts', 'INF')[i % 4]
+                # 一半可压缩、一半随机数据，接近真实映像的压缩率
+                half = self.base_file_size // 2
+                data = bytes(half) + rng.randbytes(self.base_file_size - half)
+                zf.writestr(f'Windows/{folder}/{arch}_file{i:04d}.dll', data)
+
+        self.out(self.text('done'))
+        return 0
+
+    def run_makewinpemedia(self, args):
+        options = [arg for arg in args if arg.startswith('/')]
+        paths = [arg for arg in args if not arg.startswith('/')]
+        if '/iso' not in [o.lower() for o in options] or len(paths) < 2:
+            self.out("Usage: MakeWinPEMedia {/ufd | /iso} [/f] <workingDirectory> <destination>")
+            return 1
+
+        work_dir, iso = Path(paths[0]), Path(paths[1])
+        media = work_dir / 'media'
+        if not media.is_dir():
+            raise EmulatorError(ERROR_FILE_NOT_FOUND, self.text('not_found'))
+
+        self.out(self.text('media_creating', path=iso))
+        self.out()
+        files = [p for p in media.rglob('*') if p.is_file()]
+        total = max(len(files), 1)
+        with zipfile.ZipFile(iso, 'w', zipfile.ZIP_STORED) as zf:
+            for i, path in enumerate(files, 1):
+                zf.write(path, path.relative_to(media).as_posix())
+                sys.stdout.write(f"\r{100 * i // total}{self.text('media_complete')}")
+                sys.stdout.flush()
+        self.out()
+        self.out()
+        self.out(self.text('done'))
+        return 0
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return 1
+    return Emulator().execute(' '.join(sys.argv[1:]) if len(sys.argv) > 2 else sys.argv[1])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
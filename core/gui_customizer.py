@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+GUI 使用的定制器
+继承核心类，将输出重定向到 GUI 队列并报告步骤进度
+（单独成模块，GUI 只在开始定制时才导入核心流程）
+"""
+
+import sys
+from pathlib import Path
+
+# 导入核心类
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from core.WinPE_Customizer import WinPECustomizer
+
+
+class CustomWinPECustomizer(WinPECustomizer):
+    """自定义的定制器，输出重定向到队列"""
+    
+    def __init__(self, winpe_dir, output_queue, gui_instance=None):
+        super().__init__(winpe_dir, silent_mode=True)  # 启用静默模式，不输出到控制台
+        self.output_queue = output_queue
+        self.gui_instance = gui_instance
+        self.total_steps = 0
+        self.current_step = 0
+        
+        # 统计启用的模块数量
+        self.count_enabled_modules()
+    
+    def should_stop(self):
+        """检查是否应该停止"""
+        if self.gui_instance and self.gui_instance.stop_requested:
+            self.print_warning("[⚠️ 停止] 检测到停止请求，当前操作完成后将停止")
+            return True
+        return False
+    
+    def count_enabled_modules(self):
+        """统计启用的模块数量"""
+        modules = [
+            self.enable_copype_setup,
+            self.enable_auto_mount,
+            self.enable_feature_packs,
+            self.enable_language_packs,
+            self.enable_fonts_lp,
+            self.enable_regional_settings,
+            self.enable_drivers,
+            self.enable_external_apps,
+            self.enable_create_dirs,
+            self.enable_make_iso,
+        ]
+        self.total_steps = sum(modules)
+    
+    def report_step_start(self, step_name):
+        """报告步骤开始"""
+        self.current_step += 1
+        message = f"[进度 {self.current_step}/{self.total_steps}] 开始: {step_name}"
+        self._log('CYAN', message)
+        self.output_queue.put(('CYAN', message))
+        self._step_started(step_name)
+    
+    def report_step_end(self, step_name, success=True):
+        """报告步骤结束"""
+        self._step_finished(step_name, success)
+        if success:
+            self.print_success(f"[✅ 完成] {step_name}")
+        else:
+            self.print_error(f"[❌ 失败] {step_name}")
+    
+    def print_header(self, text):
+        """打印标题"""
+        self._log('HEADER', text)
+        self.output_queue.put(('CYAN', "="*50))
+        self.output_queue.put(('HEADER', text))
+        self.output_queue.put(('CYAN', "="*50))
+    
+    def print_info(self, text):
+        """打印普通信息"""
+        self._log('INFO', text)
+        self.output_queue.put(('INFO', text))
+    
+    def print_success(self, text):
+        """打印成功信息"""
+        self._log('SUCCESS', text)
+        self.output_queue.put(('SUCCESS', text))
+    
+    def print_error(self, text):
+        """打印错误信息"""
+        self._log('ERROR', text)
+        self.output_queue.put(('ERROR', text))
+    
+    def print_warning(self, text):
+        """打印警告信息"""
+        self._log('WARNING', text)
+        self.output_queue.put(('WARNING', text))
+    
+    def print_cyan(self, text):
+        """打印青色信息"""
+        self._log('CYAN', text)
+        self.output_queue.put(('CYAN', text))
+    
+    def run(self):
+        """主流程（重写以添加进度报告）"""
+        try:
+            # 显示配置
+            self.print_cyan("="*40)
+            self.print_cyan(f"总计 {self.total_steps} 个模块将被执行")
+            self.print_cyan("="*40)
+            
+            # 检查 ADK
+            if not self.check_adk_path():
+                return 1
+            
+            # 创建 WinPE 环境
+            if self.enable_copype_setup:
+                self.report_step_start("创建 WinPE 工作环境")
+                result = self.create_winpe_environment()
+                self.report_step_end("创建 WinPE 工作环境", result)
+                if not result:
+                    return 1
+            
+            # 挂载 WIM
+            if self.enable_auto_mount:
+                self.report_step_start("挂载 boot.wim")
+                result = self.check_and_mount_wim()
+                self.report_step_end("挂载 boot.wim", result)
+                if not result:
+                    return 1
+            
+            # 执行定制流程
+            if self.enable_feature_packs:
+                if self.should_stop():
+                    return 2
+                self.report_step_start("安装功能包")
+                result = self.install_feature_packs()
+                self.report_step_end("安装功能包", result)
+            
+            if self.enable_language_packs:
+                if self.should_stop():
+                    return 2
+                self.report_step_start("安装中文语言包")
+                result = self.install_language_packs()
+                self.report_step_end("安装中文语言包", result)
+            
+            if self.enable_fonts_lp:
+                if self.should_stop():
+                    return 2
+                self.report_step_start("安装字体支持")
+                result = self.install_fonts_and_lp()
+                self.report_step_end("安装字体支持", result)
+            
+            if self.enable_regional_settings:
+                if self.should_stop():
+                    return 2
+                self.report_step_start("配置区域设置")
+                result = self.set_regional_settings()
+                self.report_step_end("配置区域设置", result)
+            
+            if self.enable_drivers:
+                if self.should_stop():
+                    return 2
+                self.report_step_start("批量安装驱动程序")
+                result = self.install_drivers()
+                self.report_step_end("批量安装驱动程序", result)
+            
+            if self.enable_external_apps:
+                if self.should_stop():
+                    return 2
+                self.report_step_start("复制附加程序")
+                result = self.copy_external_apps()
+                self.report_step_end("复制附加程序", result)
+            
+            if self.enable_create_dirs:
+                if self.should_stop():
+                    return 2
+                self.report_step_start("创建自定义目录结构")
+                result = self.create_directories()
+                self.report_step_end("创建自定义目录结构", result)
+            
+            # 免挂载模式：提交文件修改
+            if not self.commit_image():
+                return 1
+            
+            if self.enable_make_iso:
+                if self.should_stop():
+                    return 2
+                self.report_step_start("卸载 WIM 并生成 ISO")
+                result = self.make_iso()
+                self.report_step_end("卸载 WIM 并生成 ISO", result)
+            
+            # 显示摘要
+            self.print_cyan("="*40)
+            self.print_cyan("WinPE 定制流程已全部完成")
+            self.print_cyan("="*40)
+            self.show_summary()
+            
+            return 0
+            
+        except KeyboardInterrupt:
+            self.print_warning("\n[中断] 用户中断执行")
+            return 1
+        except Exception as e:
+            self.print_error(f"\n[异常] 发生错误: {e}")
+            import traceback
+            traceback.print_exc()
+            return 1
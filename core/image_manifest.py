@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+映像体积统计模块
+在每个步骤前后对挂载目录生成文件清单（并行 os.scandir），
+比较差异，统计每个步骤、每个功能包、每个驱动目录新增的字节数，
+并输出适合绘制 treemap 的 JSON 报告
+"""
+
+import os
+import json
+import time
+import hashlib
+import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _scan_dir(path):
+    """扫描单个目录，返回 (文件列表, 子目录列表)"""
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        files.append((entry.path, st.st_size, st.st_mtime_ns))
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return files, subdirs
+
+
+def _hash_file(path):
+    """计算文件 SHA-1"""
+    h = hashlib.sha1()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(chunk)
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+def take_manifest(root, workers=8, with_hash=False, previous=None):
+    """生成目录清单
+
+    返回 {相对路径: (大小, 修改时间, 哈希)}，路径使用 / 分隔。
+    with_hash=True 时只对相对 previous 新增或大小/时间变化的文件计算哈希，
+    未变化的文件沿用上一次的哈希。
+    """
+    root = str(root)
+    manifest = {}
+    if not os.path.isdir(root):
+        return manifest
+
+    prefix_len = len(root.rstrip('\\/')) + 1
+    pending = [root]
+    found = []
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # 按层并行扫描
+        while pending:
+            next_level = []
+            for files, subdirs in executor.map(_scan_dir, pending):
+                found.extend(files)
+                next_level.extend(subdirs)
+            pending = next_level
+
+        to_hash = []
+        for path, size, mtime in found:
+            rel = path[prefix_len:].replace('\\', '/')
+            digest = None
+            if with_hash:
+                old = previous.get(rel) if previous else None
+                if old and old[0] == size and old[1] == mtime and old[2]:
+                    digest = old[2]
+                else:
+                    to_hash.append((rel, path))
+            manifest[rel] = (size, mtime, digest)
+
+        if to_hash:
+            digests = executor.map(_hash_file, [path for _, path in to_hash])
+            for (rel, _), digest in zip(to_hash, digests):
+                size, mtime, _ = manifest[rel]
+                manifest[rel] = (size, mtime, digest)
+
+    return manifest
+
+
+def diff_manifests(before, after):
+    """比较两个清单
+
+    返回 {'added': {路径: 大小}, 'removed': {路径: 大小},
+          'modified': {路径: 大小变化}, 'bytes_added', 'bytes_removed', 'net_bytes'}
+    """
+    added = {}
+    removed = {}
+    modified = {}
+
+    for rel, (size, mtime, digest) in after.items():
+        old = before.get(rel)
+        if old is None:
+            added[rel] = size
+            continue
+        old_size, old_mtime, old_digest = old
+        if digest and old_digest:
+            changed = digest != old_digest
+        else:
+            changed = size != old_size or mtime != old_mtime
+        if changed:
+            modified[rel] = size - old_size
+
+    for rel, (size, _, _) in before.items():
+        if rel not in after:
+            removed[rel] = size
+
+    bytes_added = sum(added.values()) + sum(d for d in modified.values() if d > 0)
+    bytes_removed = sum(removed.values()) - sum(d for d in modified.values() if d < 0)
+
+    return {
+        'added': added,
+        'removed': removed,
+        'modified': modified,
+        'bytes_added': bytes_added,
+        'bytes_removed': bytes_removed,
+        'net_bytes': bytes_added - bytes_removed,
+    }
+
+
+def _build_tree(name, sizes, max_depth):
+    """将 {路径: 字节数} 汇总为 treemap 节点（按目录层级，最多 max_depth 层）"""
+    root = {'name': name, 'children': {}}
+    for rel, size in sizes.items():
+        if size <= 0:
+            continue
+        parts = rel.split('/')
+        node = root
+        for part in parts[:max_depth]:
+            node = node['children'].setdefault(part, {'name': part, 'children': {}, 'value': 0})
+            node['value'] += size
+
+    def finalize(node):
+        children = [finalize(child) for child in node['children'].values()]
+        children.sort(key=lambda child: child['value'], reverse=True)
+        result = {'name': node['name'], 'value': node.get('value', sum(c['value'] for c in children))}
+        if children:
+            result['children'] = children
+        return result
+
+    return finalize(root)
+
+
+class ImageSizeAccountant:
+    """映像体积统计器
+
+    用法：
+        accountant.begin_step("安装功能包")
+        accountant.begin_item("package", "WinPE-WMI")
+        ...
+        accountant.end_item()
+        accountant.end_step()
+    相邻两次快照之间若无其他操作，会复用上一次的清单，避免重复扫描。
+    """
+
+    def __init__(self, mount_dir, with_hash=False, workers=8, tree_depth=4):
+        self.mount_dir = Path(mount_dir)
+        self.with_hash = with_hash
+        self.workers = workers
+        self.tree_depth = tree_depth
+        self.steps = []
+        self.scan_seconds = 0.0
+        self._last_manifest = None
+        self._step = None
+        self._item = None
+
+    def _snapshot(self, reuse=False):
+        """生成挂载目录清单"""
+        if reuse and self._last_manifest is not None:
+            return self._last_manifest
+        start = time.perf_counter()
+        manifest = take_manifest(self.mount_dir, self.workers, self.with_hash, self._last_manifest)
+        self.scan_seconds += time.perf_counter() - start
+        self._last_manifest = manifest
+        return manifest
+
+    def begin_step(self, name):
+        """步骤开始前快照"""
+        self._step = {
+            'name': name,
+            'before': self._snapshot(reuse=True),
+            'started': time.time(),
+            'items': [],
+        }
+        self._item = None
+
+    def begin_item(self, kind, name):
+        """单项（功能包、驱动目录等）开始前快照"""
+        if self._step is None:
+            return
+        self._item = {'kind': kind, 'name': name, 'before': self._snapshot(reuse=True)}
+
+    def end_item(self):
+        """单项结束后快照并记录差异"""
+        if self._step is None or self._item is None:
+            return None
+        item = self._item
+        self._item = None
+        diff = diff_manifests(item.pop('before'), self._snapshot())
+        item.update(diff)
+        self._step['items'].append(item)
+        return item
+
+    def cancel_step(self):
+        """放弃当前步骤统计（例如步骤中映像已被卸载）"""
+        self._step = None
+        self._item = None
+        self._last_manifest = None
+
+    def end_step(self):
+        """步骤结束后快照并记录差异"""
+        if self._step is None:
+            return None
+        step = self._step
+        self._step = None
+        self._item = None
+        # 最后一个单项结束时已经快照过，可以直接复用
+        diff = diff_manifests(step.pop('before'), self._snapshot(reuse=bool(step['items'])))
+        step['duration'] = time.time() - step.pop('started')
+        step.update(diff)
+        self.steps.append(step)
+        return step
+
+    def invalidate(self):
+        """清除缓存的清单（步骤之间目录可能被外部修改时调用）"""
+        self._last_manifest = None
+
+    def to_treemap(self):
+        """生成 treemap 数据（根 → 步骤 → 单项/目录）"""
+        children = []
+        for step in self.steps:
+            if step['items']:
+                items = []
+                for item in step['items']:
+                    sizes = dict(item['added'])
+                    sizes.update(item['modified'])
+                    node = _build_tree(f"{item['kind']}: {item['name']}", sizes, self.tree_depth)
+                    if node['value'] > 0:
+                        items.append(node)
+                items.sort(key=lambda node: node['value'], reverse=True)
+                node = {'name': step['name'], 'value': sum(n['value'] for n in items)}
+                if items:
+                    node['children'] = items
+            else:
+                sizes = dict(step['added'])
+                sizes.update(step['modified'])
+                node = _build_tree(step['name'], sizes, self.tree_depth)
+            if node['value'] > 0:
+                children.append(node)
+        return {'name': self.mount_dir.name, 'value': sum(c['value'] for c in children), 'children': children}
+
+    def to_dict(self):
+        """生成完整报告"""
+        def summarize(record):
+            return {
+                'bytes_added': record['bytes_added'],
+                'bytes_removed': record['bytes_removed'],
+                'net_bytes': record['net_bytes'],
+                'files_added': len(record['added']),
+                'files_removed': len(record['removed']),
+                'files_modified': len(record['modified']),
+            }
+
+        steps = []
+        for step in self.steps:
+            data = {'name': step['name'], 'duration': round(step['duration'], 2)}
+            data.update(summarize(step))
+            data['items'] = [dict(kind=item['kind'], name=item['name'], **summarize(item)) for item in step['items']]
+            steps.append(data)
+
+        return {
+            'mount_dir': str(self.mount_dir),
+            'generated': datetime.datetime.now().isoformat(timespec='seconds'),
+            'scan_seconds': round(self.scan_seconds, 2),
+            'steps': steps,
+            'treemap': self.to_treemap(),
+        }
+
+    def save(self, path):
+        """保存 JSON 报告"""
+        path = Path(path)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+运行历史数据库（SQLite）
+记录每次定制流程的步骤、功能包、驱动目录的耗时、体积变化和结果，
+并根据同一配置（profile）历次运行的中位数预测进度和剩余时间
+
+命令行:
+    python core/run_history.py list [--limit 20]
+    python core/run_history.py show <run_id>
+    python core/run_history.py compare <run_a> <run_b>
+"""
+
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import datetime
+import statistics
+import threading
+from pathlib import Path
+
+# 导入配置
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import config
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    profile     TEXT NOT NULL,
+    winpe_dir   TEXT,
+    started     REAL NOT NULL,
+    finished    REAL,
+    duration    REAL,
+    exit_code   INTEGER
+);
+CREATE TABLE IF NOT EXISTS steps (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id      INTEGER NOT NULL REFERENCES runs(id),
+    kind        TEXT NOT NULL,          -- step / package / driver
+    name        TEXT NOT NULL,
+    started     REAL NOT NULL,
+    duration    REAL NOT NULL,
+    bytes_added INTEGER,
+    success     INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_runs_profile ON runs(profile, finished);
+CREATE INDEX IF NOT EXISTS idx_steps_run ON steps(run_id);
+"""
+
+
+def profile_hash(data):
+    """计算配置指纹（相同模块、包列表和驱动目录的运行视为同一 profile）"""
+    text = json.dumps(data, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]
+
+
+def format_duration(seconds):
+    """格式化时长"""
+    if seconds is None:
+        return "-"
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600} 小时 {seconds % 3600 // 60} 分"
+    if seconds >= 60:
+        return f"{seconds // 60} 分 {seconds % 60} 秒"
+    return f"{seconds} 秒"
+
+
+class RunHistory:
+    """运行历史数据库"""
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+
+    def begin_run(self, profile, winpe_dir=None):
+        """开始一次运行，返回运行 ID"""
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "INSERT INTO runs (profile, winpe_dir, started) VALUES (?, ?, ?)",
+                (profile, str(winpe_dir) if winpe_dir else None, time.time()))
+            return cur.lastrowid
+
+    def record_step(self, run_id, kind, name, started, duration, bytes_added=None, success=None):
+        """记录步骤或单项（功能包、驱动目录）"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO steps (run_id, kind, name, started, duration, bytes_added, success) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_id, kind, name, started, duration, bytes_added,
+                 None if success is None else int(bool(success))))
+
+    def finish_run(self, run_id, exit_code):
+        """结束运行"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE runs SET finished = ?, duration = ? - started, exit_code = ? WHERE id = ?",
+                (now, now, exit_code, run_id))
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def expected_durations(self, profile, kind='step', limit=5):
+        """同一 profile 最近 limit 次成功运行中各步骤耗时的中位数"""
+        with self._lock:
+            run_ids = [row['id'] for row in self._conn.execute(
+                "SELECT id FROM runs WHERE profile = ? AND exit_code = 0 ORDER BY started DESC LIMIT ?",
+                (profile, limit))]
+            if not run_ids:
+                return {}
+            marks = ','.join('?' * len(run_ids))
+            rows = self._conn.execute(
+                f"SELECT name, duration FROM steps WHERE kind = ? AND run_id IN ({marks})",
+                [kind] + run_ids).fetchall()
+
+        durations = {}
+        for row in rows:
+            durations.setdefault(row['name'], []).append(row['duration'])
+        return {name: statistics.median(values) for name, values in durations.items()}
+
+    def list_runs(self, limit=20):
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(
+                "SELECT * FROM runs ORDER BY started DESC LIMIT ?", (limit,))]
+
+    def get_run(self, run_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+            return dict(row) if row else None
+
+    def get_steps(self, run_id):
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(
+                "SELECT * FROM steps WHERE run_id = ? ORDER BY started, id", (run_id,))]
+
+    def compare(self, run_a, run_b):
+        """比较两次运行，返回 [(类型, 名称, A 耗时, B 耗时, A 字节, B 字节)]"""
+        steps_a = {(s['kind'], s['name']): s for s in self.get_steps(run_a)}
+        steps_b = {(s['kind'], s['name']): s for s in self.get_steps(run_b)}
+        keys = list(steps_a) + [key for key in steps_b if key not in steps_a]
+        rows = []
+        for key in keys:
+            a = steps_a.get(key)
+            b = steps_b.get(key)
+            rows.append((key[0], key[1],
+                         a['duration'] if a else None, b['duration'] if b else None,
+                         a['bytes_added'] if a else None, b['bytes_added'] if b else None))
+        return rows
+
+
+class ProgressEstimator:
+    """根据历史耗时计算按时长加权的总体进度和剩余时间"""
+
+    def __init__(self, expected):
+        self.expected = expected          # {步骤名: 预计耗时}
+        self.total = sum(expected.values())
+        self.done = 0.0
+        self.current = None
+        self.current_started = None
+
+    @property
+    def available(self):
+        return self.total > 0
+
+    def start(self, name):
+        self.current = name
+        self.current_started = time.time()
+
+    def finish(self, name):
+        self.done += self.expected.get(name, 0.0)
+        self.current = None
+
+    def estimate(self):
+        """返回 (总体百分比, 预计剩余秒数)"""
+        if not self.available:
+            return None, None
+        progress = self.done
+        if self.current is not None:
+            elapsed = time.time() - self.current_started
+            progress += min(elapsed, self.expected.get(self.current, 0.0))
+        percent = min(100.0, 100.0 * progress / self.total)
+        return percent, max(0.0, self.total - progress)
+
+
+_history = None
+
+
+def get_run_history(base_dir=None):
+    """获取全局运行历史数据库（config.ENABLE_RUN_HISTORY 为 False 时返回 None）"""
+    global _history
+    if not getattr(config, 'ENABLE_RUN_HISTORY', False):
+        return None
+    if _history is None:
+        db_path = Path(config.RUN_HISTORY_DB)
+        if not db_path.is_absolute():
+            base_dir = Path(base_dir) if base_dir else Path(__file__).parent.parent
+            db_path = base_dir / db_path
+        try:
+            _history = RunHistory(db_path)
+        except sqlite3.Error:
+            return None
+    return _history
+
+
+def _fmt_time(ts):
+    return datetime.datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M') if ts else "-"
+
+
+def _fmt_mb(value):
+    return "-" if value is None else f"{value / 1048576:+.1f}"
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="WinPE Customizer 运行历史")
+    parser.add_argument("--db", help="数据库路径（默认读取 config.RUN_HISTORY_DB）")
+    sub = parser.add_subparsers(dest="command")
+    list_parser = sub.add_parser("list", help="列出最近的运行")
+    list_parser.add_argument("--limit", type=int, default=20)
+    show_parser = sub.add_parser("show", help="显示一次运行的步骤")
+    show_parser.add_argument("run_id", type=int)
+    cmp_parser = sub.add_parser("compare", help="比较两次运行")
+    cmp_parser.add_argument("run_a", type=int)
+    cmp_parser.add_argument("run_b", type=int)
+    cmp_parser.add_argument("--threshold", type=float, default=1.5, help="耗时倍数超过此值时标记")
+    args = parser.parse_args()
+
+    db_path = Path(args.db) if args.db else Path(__file__).parent.parent / config.RUN_HISTORY_DB
+    if not db_path.exists():
+        print(f"数据库不存在: {db_path}")
+        return 1
+    history = RunHistory(db_path)
+
+    if args.command == "show":
+        for step in history.get_steps(args.run_id):
+            indent = "" if step['kind'] == 'step' else "    "
+            print(f"{indent}{step['name']:<36} {step['duration']:9.1f} 秒  {_fmt_mb(step['bytes_added']):>9} MB")
+        return 0
+
+    if args.command == "compare":
+        for run_id in (args.run_a, args.run_b):
+            run = history.get_run(run_id)
+            if run is None:
+                print(f"运行不存在: {run_id}")
+                return 1
+            print(f"#{run_id}: {_fmt_time(run['started'])}  profile {run['profile']}  "
+                  f"耗时 {format_duration(run['duration'])}  退出码 {run['exit_code']}")
+        print()
+        print(f"{'类型':<8}{'名称':<36}{'A(秒)':>10}{'B(秒)':>10}{'倍数':>8}{'A(MB)':>10}{'B(MB)':>10}")
+        for kind, name, dur_a, dur_b, bytes_a, bytes_b in history.compare(args.run_a, args.run_b):
+            ratio = dur_b / dur_a if dur_a and dur_b is not None and dur_a > 0.05 else None
+            mark = "  ⚠️" if ratio and ratio >= args.threshold else ""
+            print(f"{kind:<8}{name:<36}"
+                  f"{'-' if dur_a is None else f'{dur_a:.1f}':>10}"
+                  f"{'-' if dur_b is None else f'{dur_b:.1f}':>10}"
+                  f"{'-' if ratio is None else f'{ratio:.2f}x':>8}"
+                  f"{_fmt_mb(bytes_a):>10}{_fmt_mb(bytes_b):>10}{mark}")
+        return 0
+
+    # 默认: list
+    limit = getattr(args, 'limit', 20)
+    print(f"{'ID':>5}  {'开始时间':<17}{'profile':<14}{'耗时':<14}{'退出码':>6}")
+    for run in history.list_runs(limit):
+        exit_code = '-' if run['exit_code'] is None else run['exit_code']
+        print(f"{run['id']:>5}  {_fmt_time(run['started']):<17}{run['profile']:<14}"
+              f"{format_duration(run['duration']):<14}{exit_code:>6}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
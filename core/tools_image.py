@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+外置工具映像
+boot.wim 在 WinPE 启动时会整个解压到内存（X: 盘），放入几百 MB 的工具会明显拖慢启动、占用内存。
+启用后，EXTERNAL_APPS 引用的大型工具（以及 TOOLS_IMAGE_ITEMS 指定的项目）打包为启动介质上的独立 WIM（默认 media/tools/tools.wim），
+WinPE 启动后由 LoadTools.cmd 只读挂载到 X:\\Tools，文件在使用时才从介质读取；
+挂载失败时改为解压到 X:\\Tools。
+打包的程序在 System32 中生成同名 .cmd 启动器（尚未加载时先加载工具映像），
+快捷方式和命令行仍可按原名称启动；打包的文件夹也加入 PATH。
+"""
+
+import os
+import re
+import struct
+import shutil
+from collections import namedtuple
+from pathlib import Path
+
+
+IMAGE_NAME = "WinPE Tools"
+LOADER_SCRIPT = "Windows/System32/LoadTools.cmd"
+STARTNET_MARKER = "LoadTools.cmd"
+STARTNET_BEGIN = "REM >>> 外置工具映像（WinPE Customizer 生成，重新生成时整段替换）"
+STARTNET_END = "REM <<< 外置工具映像"
+LAUNCHER_DIR = "Windows/System32"
+
+IMAGE_SUBSYSTEM_WINDOWS_GUI = 2
+
+# 打包计划: 放入工具映像的项目、留在 boot.wim 的项目（均为 [(路径, 字节数)]）
+ToolsImagePlan = namedtuple('ToolsImagePlan', 'packed kept')
+
+
+def tree_size(path):
+    """文件或目录的总字节数"""
+    path = Path(path)
+    if path.is_file():
+        return path.stat().st_size
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def top_level_name(source):
+    """附加程序源路径所在的顶层文件夹/文件名（如 Tools/Dism++/Dism++x64.exe → Tools）"""
+    parts = [p for p in str(source).replace('\\', '/').split('/') if p]
+    return parts[0] if parts else None
+
+
+def plan_tools_image(apps_dir, min_bytes, app_sources=(), extra_items=()):
+    """划分附加程序目录中要放入工具映像的顶层文件夹/文件
+
+    只考虑实际发布的项目：app_sources（EXTERNAL_APPS 的源路径）所在的顶层项目达到 min_bytes 时打包，
+    extra_items（TOOLS_IMAGE_ITEMS）中的项目总是打包；目录中的其他内容（如 SDIO 驱动包）不处理
+    """
+    shipped = {name.lower() for name in map(top_level_name, app_sources) if name}
+    extra = {str(name).strip('\\/').lower() for name in extra_items}
+    packed, kept = [], []
+    for entry in sorted(Path(apps_dir).iterdir(), key=lambda p: p.name.lower()):
+        key = entry.name.lower()
+        if key not in shipped and key not in extra:
+            continue
+        size = tree_size(entry)
+        (packed if key in extra or size >= min_bytes else kept).append((entry, size))
+    return ToolsImagePlan(packed, kept)
+
+
+def shipped_bytes(apps_dir, app_sources, packed):
+    """打包的项目中原本会复制到 boot.wim 的字节数（EXTERNAL_APPS 中位于打包项目内的源文件）"""
+    packed_names = {path.name.lower() for path, _ in packed}
+    total = 0
+    for source in dict.fromkeys(app_sources):
+        name = top_level_name(source)
+        path = Path(apps_dir) / str(source).replace('\\', '/')
+        if name and name.lower() in packed_names and path.exists():
+            total += tree_size(path)
+    return total
+
+
+def stage_items(items, staging_dir):
+    """把要打包的项目以硬链接放到暂存目录（不支持时复制），返回暂存目录"""
+    staging_dir = Path(staging_dir)
+    if staging_dir.exists():
+        shutil.rmtree(staging_dir)
+    staging_dir.mkdir(parents=True)
+
+    def link(src, dst):
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+
+    for path, _ in items:
+        if path.is_dir():
+            shutil.copytree(path, staging_dir / path.name, copy_function=link)
+        else:
+            link(path, staging_dir / path.name)
+    return staging_dir
+
+
+def pe_subsystem(path):
+    """读取 exe 的 PE 子系统（2 为图形界面，3 为控制台），无法识别时返回 None"""
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(4096)
+    except OSError:
+        return None
+    if len(header) < 0x40 or header[:2] != b'MZ':
+        return None
+    pe_offset = struct.unpack_from('<I', header, 0x3C)[0]
+    # PE 签名(4) + COFF 文件头(20) + 可选头中子系统的偏移(68)
+    if pe_offset + 4 + 20 + 70 > len(header) or header[pe_offset:pe_offset + 4] != b'PE\0\0':
+        return None
+    return struct.unpack_from('<H', header, pe_offset + 4 + 20 + 68)[0]
+
+
+def packed_executables(items, app_sources=()):
+    """工具映像中需要启动器的程序: [(映像内相对路径, 本地路径)]
+
+    - 顶层的 exe 文件，以及打包文件夹第一层中的 exe（更深的子目录中多为辅助程序）
+    - EXTERNAL_APPS 中源文件位于打包项目内的程序（如 Tools/Dism++/Dism++x64.exe）
+    """
+    result = {}
+    packed = {path.name.lower(): path for path, _ in items}
+    for path, _ in items:
+        if path.is_file():
+            if path.suffix.lower() == '.exe':
+                result.setdefault(path.name.lower(), (path.name, path))
+        elif path.is_dir():
+            for exe in sorted(path.iterdir(), key=lambda p: p.name.lower()):
+                if exe.is_file() and exe.suffix.lower() == '.exe':
+                    rel = f"{path.name}\\{exe.name}"
+                    result.setdefault(rel.lower(), (rel, exe))
+
+    for source in app_sources:
+        parts = [p for p in str(source).replace('\\', '/').split('/') if p]
+        if len(parts) < 2 or not parts[-1].lower().endswith('.exe'):
+            continue
+        top = packed.get(parts[0].lower())
+        if top is None or not top.is_dir():
+            continue
+        exe = top.joinpath(*parts[1:])
+        if exe.is_file():
+            rel = '\\'.join([top.name] + parts[1:])
+            result.setdefault(rel.lower(), (rel, exe))
+    return list(result.values())
+
+
+def launcher_dirs(items, executables):
+    """加入 PATH 的目录（相对挂载目录）：打包的文件夹和有启动器的程序所在目录"""
+    dirs = [path.name for path, _ in items if path.is_dir()]
+    for rel, _ in executables:
+        parent = rel.rpartition('\\')[0]
+        if parent and parent not in dirs:
+            dirs.append(parent)
+    return dirs
+
+
+def launcher_script(exe_rel, mount_dir, gui=True):
+    """System32 中的程序启动器（工具映像尚未加载时先加载；图形界面程序不等待退出）"""
+    target = f"{mount_dir}\\{exe_rel}"
+    lines = ['@echo off']
+    if not target.isascii():
+        lines.append('chcp 65001 >nul')
+    lines += [
+        f'if not exist "{target}" call X:\\Windows\\System32\\{STARTNET_MARKER} >nul',
+        f'start "" "{target}" %*' if gui else f'"{target}" %*',
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+def capture_command(capture_dir, wim_path, compress="max"):
+    """打包工具映像的 DISM 命令"""
+    return (f'dism /capture-image /imagefile:"{wim_path}" /capturedir:"{capture_dir}" '
+            f'/name:"{IMAGE_NAME}" /compress:{compress}')
+
+
+def loader_script(image_file, mount_dir):
+    """WinPE 中加载工具映像的脚本（在各盘符上查找介质中的工具映像并只读挂载）"""
+    image_file = image_file.replace('/', '\\').strip('\\')
+    flag = "X:\\Windows\\Temp\\tools_loaded.flag"
+    lines = [
+        '@echo off',
+        'chcp 65001 >nul',
+        'REM 按需加载外置工具映像（由 WinPE Customizer 生成）',
+        f'if exist "{flag}" exit /b 0',
+        'set TOOLSWIM=',
+        'for %%d in (C D E F G H I J K L M N O P Q R S T U V W Y Z) do (',
+        f'    if not defined TOOLSWIM if exist "%%d:\\{image_file}" set "TOOLSWIM=%%d:\\{image_file}"',
+        ')',
+        'if not defined TOOLSWIM (',
+        f'    echo 未找到工具映像 {image_file}',
+        '    exit /b 1',
+        ')',
+        f'if not exist "{mount_dir}" mkdir "{mount_dir}"',
+        f'echo 正在加载工具映像 %TOOLSWIM% 到 {mount_dir} ...',
+        f'dism /mount-image /imagefile:"%TOOLSWIM%" /index:1 /mountdir:"{mount_dir}" /readonly >nul',
+        'if errorlevel 1 (',
+        '    echo 挂载失败，改为解压（占用内存）...',
+        f'    dism /apply-image /imagefile:"%TOOLSWIM%" /index:1 /applydir:"{mount_dir}" >nul',
+        '    if errorlevel 1 (',
+        '        echo 工具映像加载失败',
+        '        exit /b 1',
+        '    )',
+        ')',
+        f'echo.>"{flag}"',
+        'echo 工具映像加载完成',
+        'exit /b 0',
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+def startnet_section(mount_dir, autoload=True, subdirs=()):
+    """startnet.cmd 中的工具映像配置（挂载目录和打包的各个文件夹加入 PATH，可选后台加载）"""
+    path = ';'.join([mount_dir] + [f"{mount_dir}\\{name}" for name in subdirs])
+    lines = [
+        STARTNET_BEGIN,
+        'REM 运行 LoadTools 加载工具映像',
+        f'set "PATH=%PATH%;{path}"',
+    ]
+    if autoload:
+        lines.append(f'start "LoadTools" /min cmd /c X:\\Windows\\System32\\{STARTNET_MARKER}')
+    lines.append(STARTNET_END)
+    return '\n'.join(lines) + '\n'
+
+
+# 早期版本没有起止标记的配置段
+_LEGACY_SECTION = re.compile(
+    r'\n?REM =+\nREM 外置工具映像（运行 LoadTools 加载）\nREM =+\n'
+    r'(?:set "PATH=.*\n)?(?:start "LoadTools".*\n)?\n?')
+
+
+def update_startnet(text, section=None):
+    """替换 startnet.cmd 中的工具映像配置段（section 为 None 时删除），返回新内容
+
+    配置段由起止 REM 标记界定，打包项目、挂载目录或自动加载设置变化时原位整段更新；
+    没有配置段时追加到末尾（wpeinit 之后）
+    """
+    text = _LEGACY_SECTION.sub('\n', text)
+    begin = text.find(STARTNET_BEGIN)
+    if begin != -1:
+        end = text.find(STARTNET_END, begin)
+        end = len(text) if end == -1 else end + len(STARTNET_END)
+        if text.startswith('\n', end):
+            end += 1
+        if section:
+            return text[:begin] + section + text[end:]
+        head = text[:begin].rstrip('\n')
+        tail = text[end:].lstrip('\n')
+        return head + '\n' + (('\n' + tail) if tail else '')
+    if not section:
+        return text
+    if not text.endswith('\n'):
+        text += '\n'
+    return text + '\n' + section
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+WIM 映像信息读取模块（纯 Python 实现）
+直接解析 WIM 文件头、资源表和内嵌 XML，无需调用 DISM
+同时提供已挂载映像登记表（读取 DISM 写入的注册表），用于毫秒级判断挂载状态
+"""
+
+import os
+import sys
+import struct
+import time
+import threading
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+
+# WIM 文件头（WIMHEADER_V1_PACKED，共 208 字节）
+WIM_MAGIC = b'MSWIM\x00\x00\x00'
+WIM_HEADER_FORMAT = '<8sIIII16sHHI24s24s24sI24s60s'
+WIM_HEADER_SIZE = struct.calcsize(WIM_HEADER_FORMAT)
+
+# 资源表中每个条目的大小：RESHDR(24) + 分卷号(2) + 引用计数(4) + SHA-1(20)
+LOOKUP_ENTRY_SIZE = 50
+
+# 文件头标志
+FLAG_HEADER_COMPRESSION = 0x00000002
+FLAG_HEADER_READONLY = 0x00000004
+FLAG_HEADER_SPANNED = 0x00000008
+FLAG_HEADER_RESOURCE_ONLY = 0x00000010
+FLAG_HEADER_METADATA_ONLY = 0x00000020
+FLAG_HEADER_WRITE_IN_PROGRESS = 0x00000040
+FLAG_HEADER_RP_FIX = 0x00000080
+FLAG_HEADER_COMPRESS_XPRESS = 0x00020000
+FLAG_HEADER_COMPRESS_LZX = 0x00040000
+FLAG_HEADER_COMPRESS_LZMS = 0x00080000
+FLAG_HEADER_COMPRESS_XPRESS2 = 0x00200000
+
+# 资源标志
+RESHDR_FLAG_FREE = 0x01
+RESHDR_FLAG_METADATA = 0x02
+RESHDR_FLAG_COMPRESSED = 0x04
+RESHDR_FLAG_SPANNED = 0x08
+
+# DISM 挂载登记表位置
+MOUNTED_IMAGES_KEY = r"SOFTWARE\Microsoft\WIMMount\Mounted Images"
+
+
+class WimFormatError(Exception):
+    """WIM 文件格式错误"""
+    pass
+
+
+def _parse_reshdr(raw):
+    """解析 RESHDR_DISK_SHORT（7 字节压缩大小 + 1 字节标志 + 偏移 + 原始大小）"""
+    size_and_flags, offset, original_size = struct.unpack('<QQQ', raw)
+    return {
+        'size': size_and_flags & 0x00FFFFFFFFFFFFFF,
+        'flags': size_and_flags >> 56,
+        'offset': offset,
+        'original_size': original_size,
+    }
+
+
+def _compression_name(flags):
+    """根据文件头标志返回压缩算法名称"""
+    if not flags & FLAG_HEADER_COMPRESSION:
+        return 'none'
+    if flags & FLAG_HEADER_COMPRESS_LZX:
+        return 'LZX'
+    if flags & FLAG_HEADER_COMPRESS_XPRESS:
+        return 'XPRESS'
+    if flags & FLAG_HEADER_COMPRESS_LZMS:
+        return 'LZMS'
+    if flags & FLAG_HEADER_COMPRESS_XPRESS2:
+        return 'XPRESS2'
+    return 'unknown'
+
+
+def _xml_text(element, path, default=''):
+    """读取 XML 子节点文本"""
+    node = element.find(path)
+    if node is None or node.text is None:
+        return default
+    return node.text.strip()
+
+
+def _xml_int(element, path, default=0):
+    """读取 XML 子节点整数"""
+    text = _xml_text(element, path)
+    try:
+        return int(text, 0) if text else default
+    except ValueError:
+        return default
+
+
+class WimImage:
+    """WIM 中单个映像的信息"""
+
+    def __init__(self, index):
+        self.index = index
+        self.name = ''
+        self.description = ''
+        self.flags = ''
+        self.dir_count = 0
+        self.file_count = 0
+        self.total_bytes = 0
+        self.hard_link_bytes = 0
+        self.arch = None
+        self.version = ''
+        self.build = 0
+        self.edition = ''
+        self.languages = []
+
+    def to_dict(self):
+        """转换为字典"""
+        return dict(self.__dict__)
+
+
+class WimInfo:
+    """WIM 文件信息"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.file_size = 0
+        self.version = 0
+        self.flags = 0
+        self.compression = 'none'
+        self.chunk_size = 0
+        self.guid = ''
+        self.part_number = 1
+        self.total_parts = 1
+        self.image_count = 0
+        self.boot_index = 0
+        self.resource_count = 0
+        self.metadata_count = 0
+        self.stored_bytes = 0
+        self.total_bytes = 0
+        self.images = []
+
+    @property
+    def write_in_progress(self):
+        """WIM 是否处于未完成写入状态（例如提交过程中被中断）"""
+        return bool(self.flags & FLAG_HEADER_WRITE_IN_PROGRESS)
+
+    @property
+    def readonly(self):
+        """WIM 是否只读"""
+        return bool(self.flags & FLAG_HEADER_READONLY)
+
+    def get_image(self, index):
+        """按索引（从 1 开始）获取映像信息"""
+        for image in self.images:
+            if image.index == index:
+                return image
+        return None
+
+    def to_dict(self):
+        """转换为字典"""
+        data = {key: value for key, value in self.__dict__.items() if key != 'images'}
+        data['path'] = str(self.path)
+        data['images'] = [image.to_dict() for image in self.images]
+        return data
+
+
+def _parse_xml(info, xml_bytes):
+    """解析内嵌 XML 数据（UTF-16 LE 编码）"""
+    if not xml_bytes:
+        return
+
+    text = xml_bytes.decode('utf-16', errors='ignore').rstrip('\x00')
+    try:
+        root = ET.fromstring(text)
+    except ET.ParseError:
+        return
+
+    info.total_bytes = _xml_int(root, 'TOTALBYTES')
+
+    for element in root.findall('IMAGE'):
+        try:
+            index = int(element.get('INDEX', '0'))
+        except ValueError:
+            continue
+
+        image = WimImage(index)
+        image.name = _xml_text(element, 'NAME')
+        image.description = _xml_text(element, 'DESCRIPTION')
+        image.flags = _xml_text(element, 'FLAGS')
+        image.dir_count = _xml_int(element, 'DIRCOUNT')
+        image.file_count = _xml_int(element, 'FILECOUNT')
+        image.total_bytes = _xml_int(element, 'TOTALBYTES')
+        image.hard_link_bytes = _xml_int(element, 'HARDLINKBYTES')
+
+        windows = element.find('WINDOWS')
+        if windows is not None:
+            arch = _xml_text(windows, 'ARCH')
+            image.arch = {'0': 'x86', '5': 'arm', '6': 'ia64', '9': 'amd64', '12': 'arm64'}.get(arch, arch or None)
+            image.edition = _xml_text(windows, 'EDITIONID')
+            image.build = _xml_int(windows, 'VERSION/BUILD')
+            image.version = '.'.join(str(part) for part in (
+                _xml_int(windows, 'VERSION/MAJOR'),
+                _xml_int(windows, 'VERSION/MINOR'),
+                image.build,
+                _xml_int(windows, 'VERSION/SPBUILD'),
+            ))
+            image.languages = [node.text.strip() for node in windows.findall('LANGUAGES/LANGUAGE') if node.text]
+
+        info.images.append(image)
+
+    info.images.sort(key=lambda image: image.index)
+
+
+def _read_wim_info(path):
+    """读取并解析 WIM 文件（不带缓存）"""
+    path = Path(path)
+    info = WimInfo(path)
+    info.file_size = path.stat().st_size
+
+    with open(path, 'rb') as f:
+        raw = f.read(WIM_HEADER_SIZE)
+        if len(raw) < WIM_HEADER_SIZE:
+            raise WimFormatError(f"文件过小，不是有效的 WIM: {path}")
+
+        (magic, header_size, version, flags, chunk_size, guid, part_number,
+         total_parts, image_count, rh_lookup, rh_xml, rh_boot, boot_index,
+         rh_integrity, _unused) = struct.unpack(WIM_HEADER_FORMAT, raw)
+
+        if magic != WIM_MAGIC:
+            raise WimFormatError(f"文件头标识错误，不是 WIM 文件: {path}")
+
+        info.version = version
+        info.flags = flags
+        info.compression = _compression_name(flags)
+        info.chunk_size = chunk_size
+        info.guid = guid.hex()
+        info.part_number = part_number
+        info.total_parts = total_parts
+        info.image_count = image_count
+        info.boot_index = boot_index
+
+        # 资源表（未压缩存储）
+        lookup = _parse_reshdr(rh_lookup)
+        if lookup['offset'] and lookup['size']:
+            f.seek(lookup['offset'])
+            table = f.read(lookup['size'])
+            for pos in range(0, len(table) - LOOKUP_ENTRY_SIZE + 1, LOOKUP_ENTRY_SIZE):
+                entry = _parse_reshdr(table[pos:pos + 24])
+                if entry['flags'] & RESHDR_FLAG_FREE:
+                    continue
+                info.resource_count += 1
+                info.stored_bytes += entry['size']
+                if entry['flags'] & RESHDR_FLAG_METADATA:
+                    info.metadata_count += 1
+
+        # 内嵌 XML（未压缩存储）
+        xml_res = _parse_reshdr(rh_xml)
+        if xml_res['offset'] and xml_res['size']:
+            f.seek(xml_res['offset'])
+            _parse_xml(info, f.read(xml_res['size']))
+
+    return info
+
+
+_info_cache = {}
+_info_cache_lock = threading.Lock()
+
+
+def read_wim_info(path):
+    """读取 WIM 文件信息
+
+    结果按 (路径, 大小, 修改时间) 缓存，文件未变化时直接返回缓存。
+    """
+    path = Path(path)
+    stat = path.stat()
+    key = (str(path.absolute()), stat.st_size, stat.st_mtime_ns)
+
+    with _info_cache_lock:
+        cached = _info_cache.get(key)
+    if cached is not None:
+        return cached
+
+    info = _read_wim_info(path)
+    with _info_cache_lock:
+        _info_cache.clear()  # 同一路径只保留最新版本
+        _info_cache[key] = info
+    return info
+
+
+def _normalize_path(path):
+    """规范化路径以便比较（大小写不敏感，统一分隔符）"""
+    return os.path.normcase(os.path.abspath(str(path))).rstrip('\\/')
+
+
+class MountedImageRegistry:
+    """已挂载映像登记表
+
+    读取 DISM 在注册表中登记的挂载信息，结果缓存 ttl 秒。
+    非 Windows 系统或无法读取注册表时 available 为 False。
+    """
+
+    def __init__(self, ttl=2.0):
+        self.ttl = ttl
+        self.available = sys.platform == 'win32'
+        self._images = []
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """使缓存失效（挂载/卸载后调用）"""
+        with self._lock:
+            self._loaded_at = 0.0
+
+    def _load(self):
+        """从注册表读取挂载记录"""
+        import winreg
+
+        images = []
+        try:
+            root = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, MOUNTED_IMAGES_KEY)
+        except FileNotFoundError:
+            return images  # 从未挂载过映像
+
+        with root:
+            index = 0
+            while True:
+                try:
+                    sub_name = winreg.EnumKey(root, index)
+                except OSError:
+                    break
+                index += 1
+
+                record = {'id': sub_name}
+                try:
+                    with winreg.OpenKey(root, sub_name) as sub:
+                        for value_name, field in (('Mount Path', 'mount_dir'), ('WIM Path', 'wim_path'),
+                                                  ('Image Index', 'index'), ('Status', 'status'),
+                                                  ('Mount Flags', 'flags')):
+                            try:
+                                record[field] = winreg.QueryValueEx(sub, value_name)[0]
+                            except FileNotFoundError:
+                                record[field] = None
+                except OSError:
+                    continue
+
+                if record.get('mount_dir'):
+                    images.append(record)
+        return images
+
+    def get_mounted_images(self):
+        """返回所有已挂载映像，注册表不可用时返回 None"""
+        if not self.available:
+            return None
+
+        with self._lock:
+            if time.monotonic() - self._loaded_at < self.ttl:
+                return list(self._images)
+            try:
+                self._images = self._load()
+            except (ImportError, OSError):
+                self.available = False
+                return None
+            self._loaded_at = time.monotonic()
+            return list(self._images)
+
+    def find(self, mount_dir):
+        """查找挂载到指定目录的映像记录"""
+        images = self.get_mounted_images()
+        if images is None:
+            return None
+        target = _normalize_path(mount_dir)
+        for record in images:
+            if _normalize_path(record['mount_dir']) == target:
+                return record
+        return None
+
+
+# 全局登记表实例（缓存在模块级共享）
+mounted_registry = MountedImageRegistry()
+
+
+def is_wim_mounted(mount_dir):
+    """判断挂载目录上是否挂载了 WIM
+
+    优先使用 DISM 挂载登记表；登记表不可用时回退为检查 Windows 目录是否存在。
+    """
+    images = mounted_registry.get_mounted_images()
+    if images is None:
+        return (Path(mount_dir) / "Windows").exists()
+    return mounted_registry.find(mount_dir) is not None
+
+
+def main():
+    """命令行入口：显示 WIM 信息和已挂载映像"""
+    import json
+
+    if len(sys.argv) < 2:
+        images = mounted_registry.get_mounted_images()
+        if images is None:
+            print("当前系统无法读取挂载登记表")
+            return 1
+        print(json.dumps(images, indent=2, ensure_ascii=False))
+        return 0
+
+    start = time.perf_counter()
+    info = read_wim_info(sys.argv[1])
+    elapsed = (time.perf_counter() - start) * 1000
+    print(json.dumps(info.to_dict(), indent=2, ensure_ascii=False))
+    print(f"读取耗时: {elapsed:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
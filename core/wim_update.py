@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+WIM 映像文件更新模块
+为只添加/删除文件的步骤（附加程序、自定义目录、右键菜单）提供统一接口：
+- MountDirImage: 直接操作 DISM 挂载目录
+- WimlibImage:   通过 wimlib-imagex update 直接修改 WIM，无需挂载/提交（Windows 和 Linux 均可用）
+"""
+
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+
+def _rel(path):
+    """规范化映像内相对路径（使用 / 分隔，不含开头的 /）"""
+    return str(path).replace('\\', '/').strip('/')
+
+
+class MountDirImage:
+    """挂载目录映像（DISM 挂载模式）"""
+
+    mountless = False
+
+    def __init__(self, mount_dir):
+        self.mount_dir = Path(mount_dir)
+
+    def _path(self, rel):
+        return self.mount_dir / _rel(rel)
+
+    def exists(self, rel):
+        """映像内路径是否存在"""
+        return self._path(rel).exists()
+
+    def read_text(self, rel, encoding='utf-8'):
+        """读取映像内文本文件，不存在时返回 None"""
+        path = self._path(rel)
+        if not path.exists():
+            return None
+        with open(path, 'r', encoding=encoding, errors='ignore') as f:
+            return f.read()
+
+    def write_text(self, rel, content, encoding='utf-8'):
+        """写入映像内文本文件"""
+        path = self._path(rel)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding=encoding) as f:
+            f.write(content)
+
+    def add_file(self, src, rel):
+        """复制文件到映像内"""
+        path = self._path(rel)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(src, path)
+
+    def add_tree(self, src, rel):
+        """复制目录到映像内"""
+        shutil.copytree(src, self._path(rel), dirs_exist_ok=True)
+
+    def mkdir(self, rel):
+        """在映像内创建目录"""
+        self._path(rel).mkdir(parents=True, exist_ok=True)
+
+    def delete(self, rel):
+        """删除映像内文件或目录"""
+        path = self._path(rel)
+        if path.is_dir():
+            shutil.rmtree(path)
+        elif path.exists():
+            path.unlink()
+
+    def commit(self):
+        """挂载模式下由 DISM 卸载时提交，这里无需操作"""
+        return True, ""
+
+    def close(self):
+        """挂载模式下没有临时文件"""
+        pass
+
+
+class WimlibError(Exception):
+    """wimlib-imagex 执行失败"""
+    pass
+
+
+class WimlibImage:
+    """免挂载 WIM 映像（wimlib-imagex update）
+
+    写操作先暂存到临时目录并记录为更新命令，commit() 时一次性执行
+    `wimlib-imagex update`；读操作通过 `wimlib-imagex dir/extract` 直接读取 WIM。
+    """
+
+    mountless = True
+
+    def __init__(self, wim_path, index=1, wimlib='wimlib-imagex'):
+        self.wim_path = Path(wim_path)
+        self.index = index
+        self.wimlib = wimlib
+        self.staging = None     # 暂存目录（首次写入时创建，close() 时删除）
+        self.commands = []
+        self._staged = {}      # 映像内路径 -> 暂存文件
+        self._deleted = set()
+        self._listing = None   # 映像内路径集合（小写，延迟加载）
+        self._counter = 0
+
+    @staticmethod
+    def is_available(wimlib='wimlib-imagex'):
+        """检查 wimlib-imagex 是否可用"""
+        return shutil.which(wimlib) is not None or Path(wimlib).is_file()
+
+    def _run(self, args, input_text=None):
+        """执行 wimlib-imagex"""
+        result = subprocess.run([self.wimlib] + [str(arg) for arg in args], input=input_text,
+                                capture_output=True, text=True, encoding='utf-8', errors='ignore')
+        return result.returncode, (result.stdout or '') + (result.stderr or '')
+
+    def _load_listing(self):
+        """读取映像内完整路径列表（只执行一次）"""
+        if self._listing is None:
+            code, output = self._run(['dir', self.wim_path, self.index])
+            if code != 0:
+                raise WimlibError(f"读取映像目录失败: {output.strip()}")
+            self._listing = {line.strip().strip('/').lower() for line in output.splitlines() if line.strip()}
+        return self._listing
+
+    def _staging_dir(self):
+        """暂存目录（不存在时创建）"""
+        if self.staging is None:
+            self.staging = Path(tempfile.mkdtemp(prefix='wim_update_'))
+        return self.staging
+
+    def _stage_path(self, rel):
+        """为暂存文件分配临时路径"""
+        self._counter += 1
+        path = self._staging_dir() / str(self._counter) / Path(_rel(rel)).name
+        path.parent.mkdir(parents=True)
+        return path
+
+    def exists(self, rel):
+        """映像内路径是否存在（包含尚未提交的修改）"""
+        rel = _rel(rel)
+        key = rel.lower()
+        if key in self._deleted:
+            return False
+        if any(staged.lower() == key or staged.lower().startswith(key + '/') for staged in self._staged):
+            return True
+        return key in self._load_listing()
+
+    def read_text(self, rel, encoding='utf-8'):
+        """读取映像内文本文件，不存在时返回 None"""
+        rel = _rel(rel)
+        staged = self._staged.get(rel)
+        if staged is not None and staged.is_file():
+            with open(staged, 'r', encoding=encoding, errors='ignore') as f:
+                return f.read()
+        if not self.exists(rel):
+            return None
+
+        dest = Path(tempfile.mkdtemp(dir=self._staging_dir()))
+        code, output = self._run(['extract', self.wim_path, self.index, '/' + rel,
+                                  f'--dest-dir={dest}', '--no-acls', '--no-attributes'])
+        if code != 0:
+            raise WimlibError(f"读取文件失败 {rel}: {output.strip()}")
+        with open(dest / Path(rel).name, 'r', encoding=encoding, errors='ignore') as f:
+            return f.read()
+
+    def write_text(self, rel, content, encoding='utf-8'):
+        """写入映像内文本文件"""
+        rel = _rel(rel)
+        path = self._stage_path(rel)
+        with open(path, 'w', encoding=encoding) as f:
+            f.write(content)
+        self._add(path, rel)
+
+    def add_file(self, src, rel):
+        """添加文件到映像（先复制到暂存目录，避免提交前源文件被修改）"""
+        rel = _rel(rel)
+        path = self._stage_path(rel)
+        shutil.copy2(src, path)
+        self._add(path, rel)
+
+    def add_tree(self, src, rel):
+        """添加目录到映像"""
+        self._add(Path(src), _rel(rel))
+
+    def mkdir(self, rel):
+        """在映像内创建目录（添加一个空目录）"""
+        rel = _rel(rel)
+        path = self._stage_path(rel)
+        path.mkdir()
+        self._add(path, rel)
+
+    def delete(self, rel):
+        """删除映像内文件或目录"""
+        rel = _rel(rel)
+        self._staged.pop(rel, None)
+        self._deleted.add(rel.lower())
+        self.commands.append(f'delete --force --recursive "/{rel}"')
+
+    def _add(self, src, rel):
+        self._staged[rel] = Path(src)
+        self._deleted.discard(rel.lower())
+        self.commands.append(f'add "{src}" "/{rel}"')
+
+    def commit(self):
+        """执行所有更新命令，返回 (是否成功, 输出)
+
+        失败时保留更新命令和暂存文件（可再次提交）；成功后才清空并删除暂存文件
+        """
+        if not self.commands:
+            return True, ""
+        code, output = self._run(['update', self.wim_path, self.index],
+                                 input_text='\n'.join(self.commands) + '\n')
+        if code != 0:
+            return False, output
+
+        self._listing = None
+        self.close()
+        return True, output
+
+    def close(self):
+        """放弃尚未提交的修改并删除暂存目录（之后再写入时重新创建）"""
+        self.commands = []
+        self._staged = {}
+        self._deleted = set()
+        if self.staging is not None:
+            shutil.rmtree(self.staging, ignore_errors=True)
+            self.staging = None
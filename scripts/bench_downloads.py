@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+工具下载基准测试（本地 HTTP 服务器）
+
+在本机启动一个模拟下载服务器（可设置每个请求的首字节延迟和每个连接的带宽），
+分别用旧方式（逐个 requests.get，8 KiB 分块）和下载引擎（连接池 + 并发 + 自适应分块）
+下载同一批文件，比较总耗时、进度事件数量和建立的 TCP 连接数。
+
+--drop-after 模拟连接中断：每个文件的第一次请求只发送指定比例的数据就断开，
+比较从头重新下载与断点续传（Range + If-Range）实际传输的字节数，并校验 SHA-256。
+
+用法:
+    python scripts/bench_downloads.py [--files 12] [--size-mb 4] [--latency 0.3]
+                                      [--bandwidth-mb 20] [--workers 4] [--per-host 4]
+                                      [--drop-after 0.6]
+"""
+
+import os
+import sys
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "tools"))
+import requests
+from download_engine import DownloadEngine, DownloadJob
+
+
+class BenchServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, payloads, latency, bandwidth):
+        super().__init__(address, BenchHandler)
+        self.payloads = payloads      # {路径: 数据}
+        self.latency = latency        # 每个请求的首字节延迟（秒）
+        self.bandwidth = bandwidth    # 每个连接的带宽（字节/秒，0 表示不限）
+        self.connections = 0
+        self.bytes_sent = 0
+        self.drop_after = 0.0         # 第一次请求发送该比例后断开（0 表示不断开）
+        self.dropped = set()
+        self.lock = threading.Lock()
+
+
+class BenchHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # 支持 keep-alive
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        data = self.server.payloads.get(self.path)
+        if data is None:
+            self.send_error(404)
+            return
+        time.sleep(self.server.latency)
+        etag = '"%s"' % hashlib.md5(data).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        # 支持 Range 续传（If-Range 与 ETag 不一致时返回完整文件）
+        begin = 0
+        range_header = self.headers.get("Range", "")
+        if range_header.startswith("bytes=") and self.headers.get("If-Range", etag) == etag:
+            begin = int(range_header[6:].split("-")[0])
+        if begin:
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {begin}-{len(data) - 1}/{len(data)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(data) - begin))
+        self.send_header("ETag", etag)
+        self.end_headers()
+
+        stop = len(data)
+        with self.server.lock:
+            if self.server.drop_after and self.path not in self.server.dropped:
+                self.server.dropped.add(self.path)
+                stop = int(len(data) * self.server.drop_after)
+
+        block = 64 * 1024
+        start = time.perf_counter()
+        for offset in range(begin, stop, block):
+            chunk = data[offset:min(offset + block, stop)]
+            self.wfile.write(chunk)
+            with self.server.lock:
+                self.server.bytes_sent += len(chunk)
+            if self.server.bandwidth:
+                # 按带宽限速
+                expected = (offset - begin + block) / self.server.bandwidth
+                delay = expected - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+        if stop < len(data):
+            # 模拟连接中断
+            self.close_connection = True
+            self.connection.shutdown(2)
+
+
+def download_sequential(urls, dest):
+    """旧方式：逐个下载，每个文件一个新连接，8 KiB 分块，每个分块一次进度回调"""
+    events = 0
+    for i, url in enumerate(urls):
+        response = requests.get(url, stream=True)
+        response.raise_for_status()
+        with open(dest / f"seq_{i}.bin", 'wb') as f:
+            for chunk in response.iter_content(chunk_size=8192):
+                if chunk:
+                    f.write(chunk)
+                    events += 1
+    return events
+
+
+def download_restart(urls, dest):
+    """中断后从头重新下载（旧方式）"""
+    events = 0
+    for i, url in enumerate(urls):
+        while True:
+            try:
+                response = requests.get(url, stream=True)
+                response.raise_for_status()
+                with open(dest / f"restart_{i}.bin", 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=8192):
+                        f.write(chunk)
+                        events += 1
+                break
+            except requests.RequestException:
+                continue
+    return events
+
+
+def download_engine(urls, dest, workers, per_host, sha256=None):
+    """下载引擎：并发 + 连接池（中断时断点续传）"""
+    counter = {'events': 0}
+
+    def on_event(event):
+        counter['events'] += 1
+
+    engine = DownloadEngine(max_workers=workers, per_host=per_host)
+    jobs = [DownloadJob(f"file{i}", url, dest, filename=f"engine_{i}.bin", sha256=sha256)
+            for i, url in enumerate(urls)]
+    try:
+        engine.run(jobs, on_event)
+    finally:
+        engine.close()
+    failed = [job for job in jobs if job.status != 'done']
+    if failed:
+        raise RuntimeError(f"{len(failed)} 个任务失败: {failed[0].error}")
+    return counter['events']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="工具下载基准测试（本地 HTTP 服务器）")
+    parser.add_argument("--files", type=int, default=12, help="文件数量")
+    parser.add_argument("--size-mb", type=float, default=4, help="每个文件大小（MB）")
+    parser.add_argument("--latency", type=float, default=0.3, help="每个请求的首字节延迟（秒）")
+    parser.add_argument("--bandwidth-mb", type=float, default=20, help="每个连接的带宽（MB/s，0 表示不限）")
+    parser.add_argument("--workers", type=int, default=4, help="下载引擎并发数")
+    parser.add_argument("--per-host", type=int, default=4, help="下载引擎同一主机并发数")
+    parser.add_argument("--drop-after", type=float, default=0, help="第一次请求发送该比例后断开（0~1，0 表示不断开）")
+    args = parser.parse_args()
+
+    size = int(args.size_mb * 1024 * 1024)
+    payload = os.urandom(size)
+    payloads = {f"/file{i}.bin": payload for i in range(args.files)}
+
+    server = BenchServer(("127.0.0.1", 0), payloads, args.latency, int(args.bandwidth_mb * 1024 * 1024))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [base + path for path in payloads]
+    dest = Path(tempfile.mkdtemp(prefix="wpe_dl_bench_"))
+
+    sha256 = hashlib.sha256(payload).hexdigest()
+    print(f"文件: {args.files} x {args.size_mb} MB  延迟: {args.latency} 秒  "
+          f"单连接带宽: {args.bandwidth_mb or '不限'} MB/s")
+    if args.drop_after:
+        print(f"模拟中断: 每个文件第一次请求发送 {args.drop_after:.0%} 后断开")
+        scenarios = [
+            ("中断后从头下载", lambda: download_restart(urls, dest)),
+            (f"下载引擎(续传)", lambda: download_engine(urls, dest, args.workers, args.per_host, sha256)),
+        ]
+    else:
+        scenarios = [
+            ("逐个下载", lambda: download_sequential(urls, dest)),
+            (f"下载引擎({args.workers} 并发)", lambda: download_engine(urls, dest, args.workers, args.per_host)),
+        ]
+    print()
+    try:
+        for name, func in scenarios:
+            server.connections = 0
+            server.bytes_sent = 0
+            server.dropped = set()
+            server.drop_after = args.drop_after
+            start = time.perf_counter()
+            events = func()
+            elapsed = time.perf_counter() - start
+            total_mb = args.files * size / 1048576
+            print(f"{name:<18} 耗时 {elapsed:7.2f} 秒  {total_mb / elapsed:7.1f} MB/s  "
+                  f"进度事件 {events:6d}  TCP 连接 {server.connections}  "
+                  f"传输 {server.bytes_sent / 1048576:7.1f} MB")
+    finally:
+        server.shutdown()
+        shutil.rmtree(dest, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
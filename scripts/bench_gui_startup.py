@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+GUI 启动耗时基准测试
+
+每次启动一个新的 Python 进程，统计:
+- 导入耗时: 导入 WinPE_Customizer_GUI 模块（不需要图形界面，可在 Linux 无显示环境运行）
+- 界面耗时: 启动完整 GUI（设置 WPE_GUI_STARTUP_REPORT=1，GUI 在可交互后输出耗时并退出），
+  包括创建控件、首次绘制和可交互时间，以及进程总耗时
+
+用法:
+    python scripts/bench_gui_startup.py [--runs 5] [--import-only]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent.parent.absolute()
+
+IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import WinPE_Customizer_GUI; "
+    "print((time.perf_counter() - t) * 1000)"
+)
+
+
+def has_display():
+    """是否可以创建 Tk 窗口"""
+    return sys.platform == 'win32' or bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+
+
+def measure_import():
+    """新进程中导入 GUI 模块的耗时（毫秒）"""
+    result = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], cwd=str(PROJECT_DIR),
+                            capture_output=True, text=True, timeout=60)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def measure_startup():
+    """启动完整 GUI，返回 GUI 报告的耗时和进程总耗时（毫秒）"""
+    env = dict(os.environ, WPE_GUI_STARTUP_REPORT="1", PYTHONIOENCODING="utf-8")
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "WinPE_Customizer_GUI.py"], cwd=str(PROJECT_DIR),
+                            capture_output=True, text=True, encoding='utf-8', env=env, timeout=120)
+    total = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings['process'] = total
+    return timings
+
+
+def print_row(name, values):
+    print(f"  {name:<14} 中位数 {statistics.median(values):8.1f} ms   最小 {min(values):8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GUI 启动耗时基准测试")
+    parser.add_argument("--runs", type=int, default=5, help="重复次数")
+    parser.add_argument("--import-only", action="store_true", help="只统计模块导入耗时")
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    print(f"重复: {args.runs}")
+    print_row("导入", imports)
+
+    if args.import_only:
+        return 0
+    if not has_display():
+        print("\n没有可用的图形显示，跳过界面启动测试（可使用 --import-only）")
+        return 0
+
+    samples = {}
+    for _ in range(args.runs):
+        for name, value in measure_startup().items():
+            samples.setdefault(name, []).append(value)
+
+    labels = {
+        'widgets': "创建控件",
+        'first_paint': "首次绘制",
+        'interactive': "可交互",
+        'process': "进程总耗时",
+    }
+    for name, label in labels.items():
+        if name in samples:
+            print_row(label, samples[name])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
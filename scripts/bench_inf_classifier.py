@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+INF 驱动类型识别基准测试
+
+生成模拟 INF 语料（不同设备类、较大的 AddReg / SourceDisksFiles 节、多语言 Strings），
+比较旧的识别方式（约 60 个关键字正则逐个在整个文件上 re.search）与
+tools/inf_classifier.py（先看 [Version] 设备类，再在 Strings 和型号名称上匹配
+每类一个预编译正则）的耗时，并统计两者结果不一致的数量。
+
+用法:
+    python scripts/bench_inf_classifier.py [--infs 1000] [--body-lines 200] [--repeat 1]
+"""
+
+import re
+import sys
+import time
+import random
+import argparse
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "tools"))
+from inf_classifier import classify_inf
+
+
+# 旧版 SDIODriverExtractor 的关键字（逐个 re.search，RAID > 网卡 > 存储）
+LEGACY_RAID = [
+    r'\bRAID\b', r'\braid\b', r'\bMegaRAID\b', r'\bMegaraid\b', r'\bRAIDXpert\b', r'\braidxpert\b',
+    r'\bNVMe RAID\b', r'\bIntel.*RST\b', r'\bRapidStorage\b', r'\bRST\b', r'\bVROC\b', r'\bvroc\b',
+    r'\bSATA RAID\b', r'\bSAS RAID\b', r'\bPerc\b', r'\bPERC\b', r'\bLSI\b', r'\bAvago\b',
+    r'\bBroadcom.*RAID\b', r'\bAdaptec\b', r'\bMicrosemi\b', r'\bHighPoint\b', r'\bRocketRAID\b',
+    r'\bPromise\b', r'\bFastTrak\b', r'\bMarvell.*RAID\b', r'\bArrays\b',
+]
+LEGACY_STORAGE = [
+    r'\bAHCI\b', r'\bahci\b', r'\bSATA\b', r'\bsata\b', r'\bSAS\b', r'\bsas\b', r'\bNVMe\b', r'\bnvme\b',
+    r'\bIDE\b', r'\bide\b', r'\bATAPI\b', r'\batapi\b', r'\bSCSI\b', r'\bscsi\b',
+    r'\bStorage Controller\b', r'\bHost Controller\b', r'\bDisk Controller\b',
+]
+LEGACY_NETWORK = [
+    r'\bEthernet\b', r'\bethernet\b', r'\bNetwork\b', r'\bnetwork\b', r'\bLAN\b', r'\blan\b',
+    r'\bNIC\b', r'\bnic\b', r'\bWireless\b', r'\bwireless\b', r'\bWiFi\b', r'\bwifi\b',
+    r'\bWLAN\b', r'\bwlan\b', r'\b802\.11\b', r'\bGigabit\b', r'\b10GbE\b', r'\b10Gigabit\b',
+    r'\bIntel.*Network\b', r'\bRealtek.*Network\b', r'\bBroadcom.*Network\b', r'\bQualcomm.*Network\b',
+]
+
+
+def legacy_classify(content):
+    for pattern in LEGACY_RAID:
+        if re.search(pattern, content, re.IGNORECASE):
+            return 'raid'
+    for pattern in LEGACY_NETWORK:
+        if re.search(pattern, content, re.IGNORECASE):
+            return 'network'
+    for pattern in LEGACY_STORAGE:
+        if re.search(pattern, content, re.IGNORECASE):
+            return 'storage'
+    return None
+
+
+# (设备类, 设备描述)
+DEVICES = [
+    ('SCSIAdapter', "Intel(R) Chipset SATA/PCIe RST Premium Controller"),
+    ('SCSIAdapter', "LSI MegaRAID SAS 9361-8i"),
+    ('HDC', "Standard SATA AHCI Controller"),
+    ('SCSIAdapter', "Samsung NVMe Controller"),
+    ('Net', "Realtek PCIe GbE Family Controller"),
+    ('Net', "Intel(R) Wi-Fi 6 AX201 160MHz"),
+    ('Display', "NVIDIA GeForce RTX 3060"),
+    ('MEDIA', "Realtek High Definition Audio"),
+    ('USB', "Intel(R) USB 3.1 eXtensible Host Controller"),
+    ('Bluetooth', "Intel(R) Wireless Bluetooth(R)"),
+    ('System', "Intel(R) Management Engine Interface"),
+    ('System', "AMD SMBus"),
+    ('HIDClass', "ELAN Touchpad"),
+    ('Camera', "Integrated Webcam"),
+]
+
+
+def make_inf(index, body_lines, rng):
+    inf_class, desc = DEVICES[index % len(DEVICES)]
+    lines = [
+        "; Copyright (c) Vendor Corporation. All rights reserved.",
+        "[Version]",
+        f"Signature=\"$WINDOWS NT$\"",
+        f"Class={inf_class}",
+        "Provider=%VendorName%",
+        f"DriverVer=01/01/2023,{index % 30}.0.{index}.0",
+        "CatalogFile=drv.cat",
+        "[Manufacturer]",
+        "%VendorName% = Models, NTamd64, NTamd64.10.0...19041",
+        "[Models.NTamd64]",
+    ]
+    for n in range(3):
+        lines.append(f"%DeviceDesc{n}% = Install, PCI\\VEN_{rng.randrange(0x10000):04X}&DEV_{rng.randrange(0x10000):04X}")
+    lines.append("[Install.NT]")
+    lines.append("CopyFiles = Drv_CopyFiles")
+    lines.append("AddReg = Drv_AddReg")
+    lines.append("[Drv_AddReg]")
+    for n in range(body_lines):
+        lines.append(f"HKR, Parameters\\Setting{n}, Value{n}, 0x00010001, {rng.randrange(1 << 16)}"
+                     f" ; default {n}")
+    lines.append("[Strings]")
+    lines.append("VendorName = \"Vendor Corporation\"")
+    for n in range(3):
+        lines.append(f"DeviceDesc{n} = \"{desc} #{n}\"")
+    lines.append("[Strings.0804]")
+    lines.append("VendorName = \"供应商公司\"")
+    for n in range(3):
+        lines.append(f"DeviceDesc{n} = \"{desc} #{n}\"")
+    return '\r\n'.join(lines) + '\r\n'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="INF 驱动类型识别基准测试")
+    parser.add_argument("--infs", type=int, default=1000, help="INF 数量")
+    parser.add_argument("--body-lines", type=int, default=200, help="每个 INF 的 AddReg 行数")
+    parser.add_argument("--repeat", type=int, default=1, help="重复次数（取最快一次）")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    corpus = [make_inf(i, rng.randrange(args.body_lines // 4, args.body_lines * 2), rng)
+              for i in range(args.infs)]
+    total_mb = sum(len(text) for text in corpus) / 1048576
+    print(f"语料: {args.infs} 个 INF，{total_mb:.1f} MB 文本\n")
+
+    results = {}
+    for label, func in (("逐个关键字", legacy_classify), ("inf_classifier", classify_inf)):
+        best = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            types = [func(text) for text in corpus]
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[label] = (best, types)
+        counts = Counter(t or 'other' for t in types)
+        print(f"{label:<16} {best:>7.2f} 秒  {args.infs / best:>9.0f} 个/秒   "
+              f"RAID {counts['raid']}  存储 {counts['storage']}  网卡 {counts['network']}  其他 {counts['other']}")
+
+    legacy_time, legacy_types = results["逐个关键字"]
+    new_time, new_types = results["inf_classifier"]
+    print(f"\n加速 {legacy_time / new_time:.1f} 倍")
+
+    changed = Counter((DEVICES[i % len(DEVICES)][1], old or 'other', new or 'other')
+                      for i, (old, new) in enumerate(zip(legacy_types, new_types)) if old != new)
+    if changed:
+        print("\n结果不同的设备（旧 → 新）:")
+        for (desc, old, new), count in sorted(changed.items()):
+            print(f"  {desc}: {old} → {new}（{count} 个）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+WinPE 定制流程基准测试（使用 DISM 模拟器，可在 Linux 上运行）
+
+在临时目录中生成模拟的 ADK 组件包和驱动目录，使用 COMMAND_BACKEND = "emulator"
+执行完整流程（copype → 挂载 → 功能包 → 语言包 → 区域设置 → 驱动 → 附加程序 → 卸载 → ISO），
+统计总耗时、各步骤耗时以及 GUI 队列消息数量。
+
+用法:
+    python scripts/bench_pipeline.py [--mode cli|gui] [--drivers 20] [--runs 3]
+                                     [--latency 0] [--progress-delay 0] [--lang zh-cn]
+                                     [--fail-pattern REGEX] [--keep]
+"""
+
+import os
+import sys
+import time
+import queue
+import shutil
+import zipfile
+import argparse
+import tempfile
+import contextlib
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import config
+
+
+def build_fixture(root, driver_count, package_size):
+    """生成模拟的 ADK 组件包和驱动目录"""
+    cab_path = root / "WinPE_OCs"
+    (cab_path / "zh-cn").mkdir(parents=True)
+
+    packages = [name for name, _ in config.FEATURE_PACKAGES + config.FONT_PACKAGES]
+    packages += [f"zh-cn/{name}" for name, _ in config.LANGUAGE_PACKAGES]
+    for name in packages:
+        # 模拟包为 zip，内容会被模拟器解压到映像中
+        target = cab_path / f"{name}.cab"
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as zf:
+            safe = name.replace('/', '_')
+            zf.writestr(f"Windows/System32/{safe}.dll", os.urandom(package_size))
+            zf.writestr(f"Windows/System32/zh-CN/{safe}.dll.mui", bytes(package_size // 4))
+
+    driver_dir = root / "drive"
+    for i in range(driver_count):
+        folder = driver_dir / f"vendor{i:03d}"
+        folder.mkdir(parents=True)
+        (folder / f"drv{i:03d}.inf").write_text(
+            f"[Version]\nSignature=\"$WINDOWS NT$\"\nClass=Net\nProvider=Vendor{i}\n", encoding='utf-8')
+        (folder / f"drv{i:03d}.sys").write_bytes(os.urandom(8192))
+        (folder / f"drv{i:03d}.cat").write_bytes(bytes(1024))
+
+    apps_dir = root / "apps"
+    apps_dir.mkdir()
+    (apps_dir / "DiskGenius.exe").write_bytes(os.urandom(65536))
+
+    return cab_path, driver_dir, apps_dir
+
+
+def configure(root, cab_path, driver_dir, apps_dir):
+    """将 config 指向模拟环境"""
+    config.COMMAND_BACKEND = "emulator"
+    config.CAB_PATH = str(cab_path)
+    config.DRIVER_DIR = str(driver_dir)
+    config.EXTERNAL_APPS_DIR = str(apps_dir)
+    config.OUTPUT_ISO_NAME = str(root / "bench.iso")
+    config.LOG_FILE = str(root / "bench.log")
+    config.RUN_HISTORY_DB = str(root / "run_history.db")
+    config.ENABLE_COPYPE_SETUP = True
+    config.ENABLE_AUTO_MOUNT = True
+    config.ENABLE_FEATURE_PACKS = True
+    config.ENABLE_LANGUAGE_PACKS = True
+    config.ENABLE_FONTS_LP = True
+    config.ENABLE_REGIONAL_SETTINGS = True
+    config.ENABLE_DRIVERS = True
+    config.ENABLE_EXTERNAL_APPS = True
+    config.ENABLE_CREATE_DIRS = True
+    config.ENABLE_CONTEXT_MENU = True
+    config.ENABLE_MAKE_ISO = True
+
+
+class TimedMixin:
+    """记录每个步骤的耗时"""
+
+    def _step_started(self, step_name):
+        self.step_times[step_name] = time.perf_counter()
+        super()._step_started(step_name)
+
+    def _step_finished(self, step_name, success=None):
+        super()._step_finished(step_name, success)
+        self.step_times[step_name] = time.perf_counter() - self.step_times[step_name]
+
+
+def run_once(mode, root, index):
+    """执行一次完整流程，返回 (退出码, 总耗时, 步骤耗时, 队列消息数)"""
+    winpe_dir = root / f"WinPE_{index}"
+    messages = 0
+
+    if mode == "gui":
+        from core.gui_customizer import CustomWinPECustomizer
+
+        class Customizer(TimedMixin, CustomWinPECustomizer):
+            pass
+
+        output_queue = queue.Queue()
+        customizer = Customizer(str(winpe_dir), output_queue)
+    else:
+        from core.WinPE_Customizer import WinPECustomizer
+
+        class Customizer(TimedMixin, WinPECustomizer):
+            pass
+
+        customizer = Customizer(str(winpe_dir), silent_mode=True)
+        output_queue = None
+
+    customizer.step_times = {}
+    start = time.perf_counter()
+    # 部分步骤的子进程直接继承控制台输出，需在文件描述符层面重定向
+    sys.stdout.flush()
+    saved_fd = os.dup(1)
+    try:
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+            os.dup2(devnull.fileno(), 1)
+            exit_code = customizer.run_recorded()
+    finally:
+        os.dup2(saved_fd, 1)
+        os.close(saved_fd)
+    elapsed = time.perf_counter() - start
+
+    if output_queue is not None:
+        while not output_queue.empty():
+            output_queue.get_nowait()
+            messages += 1
+
+    return exit_code, elapsed, customizer.step_times, messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WinPE 定制流程基准测试（DISM 模拟器）")
+    parser.add_argument("--mode", choices=["cli", "gui"], default="gui", help="cli: 控制台流程；gui: GUI 队列流程")
+    parser.add_argument("--runs", type=int, default=3, help="重复次数")
+    parser.add_argument("--drivers", type=int, default=20, help="模拟驱动目录数量")
+    parser.add_argument("--package-size", type=int, default=32768, help="模拟功能包负载大小（字节）")
+    parser.add_argument("--latency", type=float, default=0.0, help="每条命令的模拟延迟（秒）")
+    parser.add_argument("--progress-delay", type=float, default=0.0, help="进度条刷新延迟（秒）")
+    parser.add_argument("--lang", default="zh-cn", help="模拟输出语言 zh-cn / en")
+    parser.add_argument("--fail-pattern", default="", help="命令匹配此正则时模拟失败")
+    parser.add_argument("--keep", action="store_true", help="保留临时目录")
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="wpe_bench_"))
+    os.environ['WPE_EMU_STATE_DIR'] = str(root / "emu_state")
+    config.EMULATOR_LANGUAGE = args.lang
+    config.EMULATOR_LATENCY = args.latency
+    config.EMULATOR_PROGRESS_DELAY = args.progress_delay
+    config.EMULATOR_FAIL_PATTERN = args.fail_pattern
+
+    try:
+        cab_path, driver_dir, apps_dir = build_fixture(root, args.drivers, args.package_size)
+        configure(root, cab_path, driver_dir, apps_dir)
+
+        totals = []
+        all_steps = {}
+        for i in range(args.runs):
+            exit_code, elapsed, steps, messages = run_once(args.mode, root, i)
+            totals.append(elapsed)
+            for name, seconds in steps.items():
+                all_steps.setdefault(name, []).append(seconds)
+            extra = f"，队列消息 {messages} 条" if args.mode == "gui" else ""
+            print(f"第 {i + 1} 次: 退出码 {exit_code}，耗时 {elapsed:.2f} 秒{extra}")
+
+        print()
+        print(f"模式: {args.mode}  驱动目录: {args.drivers}  重复: {args.runs}")
+        print(f"总耗时 中位数 {statistics.median(totals):.2f} 秒，最小 {min(totals):.2f} 秒")
+        print()
+        print("各步骤耗时（中位数）:")
+        for name, values in all_steps.items():
+            print(f"  {name:<20} {statistics.median(values):8.3f} 秒")
+    finally:
+        if args.keep:
+            print(f"\n临时目录: {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SDIO 驱动提取基准测试
+
+生成若干个模拟驱动包（每个包含多个驱动目录：INF + 驱动文件，其中 --keep-ratio 比例为
+RAID/存储/网卡驱动），比较以下方式的耗时和临时空间峰值：
+- 逐个整包：解压 → 识别 → 复制，一个包完成后再处理下一个
+- 流水线整包：解压线程与识别复制线程同时工作，限制临时空间
+- 流水线筛选：先只解压 INF 识别，再只解压选中的驱动包（默认方式）
+- 识别缓存：同一输出目录再运行一次（压缩包未变化，整包跳过），
+  以及压缩包修改时间变化、内容未变时再运行（只用 INF 缓存，不再解压和解析 INF）
+
+默认用 zip 格式和 Python 解压代替 7-Zip（本机没有 7-Zip 时也能运行）；
+--use-7z 时生成 .7z 并调用 7-Zip 命令行解压，与实际使用一致。
+
+用法:
+    python scripts/bench_sdio_extract.py [--archives 4] [--drivers 120] [--file-kb 512]
+                                         [--keep-ratio 0.1] [--extract-workers 2] [--copy-workers 2]
+                                         [--max-temp-mb 0] [--use-7z]
+"""
+
+import os
+import sys
+import time
+import queue
+import shutil
+import zipfile
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "tools"))
+from archive_extract import find_7z
+from extract_sdio_drivers import SDIODriverExtractor
+from inf_cache import InfCache
+
+KEEP_TEMPLATES = [
+    ('raid', "[Version]\nClass=SCSIAdapter\n[Strings]\nDesc=\"Intel RST VROC RAID Controller\"\n"),
+    ('storage', "[Version]\nClass=hdc\n[Strings]\nDesc=\"Standard SATA AHCI Controller\"\n"),
+    ('network', "[Version]\nClass=Net\n[Strings]\nDesc=\"Realtek PCIe Gigabit Ethernet\"\n"),
+]
+OTHER_TEMPLATE = ('other', "[Version]\nClass=Media\n[Strings]\nDesc=\"High Definition Audio Device\"\n")
+
+
+def payload(size):
+    """约一半可压缩的数据（与驱动文件的压缩率接近）"""
+    return b''.join(os.urandom(2048) + bytes(2048) for _ in range(size // 4096 + 1))[:size]
+
+
+def make_archives(src_dir, count, drivers, file_kb, keep_ratio, use_7z):
+    names = ['DP_MassStorage', 'DP_LAN', 'DP_Chipset']
+    archives = []
+    for i in range(count):
+        stage = src_dir / f"stage_{i}"
+        keep_every = max(1, round(1 / keep_ratio)) if keep_ratio > 0 else 0
+        for d in range(drivers):
+            if keep_every and d % keep_every == 0:
+                kind, inf = KEEP_TEMPLATES[(d // keep_every) % len(KEEP_TEMPLATES)]
+            else:
+                kind, inf = OTHER_TEMPLATE
+            driver_dir = stage / f"vendor{d % 7}" / f"{kind}_{d}"
+            driver_dir.mkdir(parents=True)
+            # SDIO 中的 INF 多为 UTF-16；每个 INF 内容不同（与实际一样，首次运行没有缓存命中）
+            (driver_dir / f"drv{d}.inf").write_text(inf + f"[SourceDisksFiles]\ndrv{i}_{d}.sys = 1\n",
+                                                    encoding='utf-16')
+            (driver_dir / f"drv{d}.sys").write_bytes(payload(file_kb * 1024))
+        name = f"{names[i % len(names)]}_bench{i}"
+        if use_7z:
+            archive = src_dir / f"{name}.7z"
+            subprocess.run([find_7z(), 'a', '-mx=5', str(archive), '.'], cwd=stage,
+                           capture_output=True, check=True)
+        else:
+            archive = src_dir / f"{name}.zip"
+            with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+                for path in stage.rglob('*'):
+                    if path.is_file():
+                        zf.write(path, path.relative_to(stage).as_posix())
+        shutil.rmtree(stage)
+        archives.append(archive)
+    return archives
+
+
+class BenchExtractor(SDIODriverExtractor):
+    """不输出日志；没有 7-Zip 时用 zipfile 解压"""
+
+    def __init__(self, *args, use_7z=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.use_7z = use_7z
+        self.temp_samples = queue.Queue()
+
+    def print_log(self, message, tag='INFO'):
+        pass
+
+    def extract_7z(self, archive_path, extract_to, extractor_type, extractor_path):
+        if self.use_7z:
+            return super().extract_7z(archive_path, extract_to, extractor_type, extractor_path)
+        with zipfile.ZipFile(archive_path) as zf:
+            zf.extractall(extract_to)
+        return True
+
+    def estimate_unpacked_size(self, archive_path):
+        if self.use_7z:
+            return super().estimate_unpacked_size(archive_path)
+        with zipfile.ZipFile(archive_path) as zf:
+            return sum(info.file_size for info in zf.infolist())
+
+
+def run_case(label, archives, work_dir, sequential, selective, args, cache_file=None, out_name=None):
+    out_dir = work_dir / f"out_{out_name or label}"
+    temp_dir = work_dir / f"temp_{label}"
+    temp_dir.mkdir(parents=True)
+    max_temp = int(args.max_temp_mb * 1024 * 1024) if args.max_temp_mb else None
+    extractor = BenchExtractor(work_dir, out_dir, temp_dir, extract_workers=args.extract_workers,
+                               copy_workers=args.copy_workers, max_temp_bytes=max_temp, selective=selective,
+                               use_cache=cache_file is not None, use_7z=args.use_7z)
+    # run() 之外调用 extract_all，需要自己打开缓存
+    if cache_file is not None:
+        extractor.cache = InfCache(cache_file)
+    for sub in (extractor.raid_dir, extractor.storage_dir, extractor.network_dir):
+        sub.mkdir(parents=True, exist_ok=True)
+    exe = find_7z() if args.use_7z else None
+
+    start = time.perf_counter()
+    if sequential:
+        peak = 0
+        for archive in archives:
+            peak = max(peak, extractor.estimate_unpacked_size(archive))
+            extractor.process_archive(archive, '7zip', exe)
+    else:
+        peak = extractor.extract_all(archives, '7zip', exe)
+    elapsed = time.perf_counter() - start
+    if extractor.cache is not None:
+        extractor.cache.close()
+
+    stats = extractor.stats
+    cached = (f"   跳过 {stats['skipped_archives']} 个包，INF 缓存命中 {stats['cached_infs']}"
+              if cache_file is not None else "")
+    print(f"{label:<8} {elapsed:>8.2f} 秒   临时空间峰值 {peak / 1048576:>7.1f} MB   "
+          f"RAID {stats['raid']}  存储 {stats['storage']}  网卡 {stats['network']}{cached}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SDIO 驱动提取基准测试")
+    parser.add_argument("--archives", type=int, default=4, help="驱动包数量")
+    parser.add_argument("--drivers", type=int, default=120, help="每个驱动包中的驱动数")
+    parser.add_argument("--file-kb", type=int, default=512, help="每个驱动文件的大小（KB）")
+    parser.add_argument("--keep-ratio", type=float, default=0.1, help="RAID/存储/网卡驱动所占比例")
+    parser.add_argument("--extract-workers", type=int, default=2)
+    parser.add_argument("--copy-workers", type=int, default=2)
+    parser.add_argument("--max-temp-mb", type=float, default=0, help="临时空间上限（MB，0 表示按可用空间）")
+    parser.add_argument("--use-7z", action="store_true", help="生成 .7z 并用 7-Zip 命令行解压")
+    args = parser.parse_args()
+
+    if args.use_7z and not find_7z():
+        print("[错误] 未找到 7-Zip")
+        return 1
+
+    work_dir = Path(tempfile.mkdtemp(prefix="bench_sdio_"))
+    try:
+        print(f"生成 {args.archives} 个驱动包（每个 {args.drivers} 个驱动，驱动文件 {args.file_kb} KB）...")
+        archives = make_archives(work_dir, args.archives, args.drivers, args.file_kb,
+                                 args.keep_ratio, args.use_7z)
+        total = sum(a.stat().st_size for a in archives)
+        print(f"压缩包总大小 {total / 1048576:.1f} MB\n")
+
+        sequential = run_case("逐个整包", archives, work_dir, True, False, args)
+        pipeline = run_case("流水线整包", archives, work_dir, False, False, args)
+        selective = run_case("流水线筛选", archives, work_dir, False, True, args)
+        print(f"\n流水线整包耗时为逐个整包的 {pipeline / sequential * 100:.0f}%，"
+              f"流水线筛选为 {selective / sequential * 100:.0f}%\n")
+
+        cache_file = work_dir / "inf_cache.db"
+        first = run_case("缓存首次", archives, work_dir, False, True, args, cache_file, "cached")
+        unchanged = run_case("未变化", archives, work_dir, False, True, args, cache_file, "cached")
+        # 修改时间变化（如重新下载）但内容相同：整包不能跳过，INF 使用缓存
+        for archive in archives:
+            os.utime(archive)
+        touched = run_case("仅INF缓存", archives, work_dir, False, True, args, cache_file, "touched")
+        print(f"\n未变化时耗时为首次的 {unchanged / first * 100:.1f}%，"
+              f"仅 INF 缓存时为 {touched / first * 100:.0f}%")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+工具压缩包按需解压
+先读取压缩包目录，只解压工具目录条目需要的文件：
+- 默认：主程序（exe）所在目录下的文件和子目录（DLL、数据目录），跳过安装包和文档
+- 条目声明了 "include" 时只解压匹配的文件；"exclude" 追加排除规则
+- 主程序所在目录作为根目录，解压后主程序位于 tools/<工具名>/<exe>
+
+支持 zip、tar（.tar.gz/.tgz 等）、7z/rar（优先 py7zr，其次 7-Zip 命令行）
+
+命令行:
+    python tools/archive_extract.py <压缩包> <目标目录> --exe <主程序> [--include 模式 ...] [--list]
+"""
+
+import os
+import sys
+import lzma
+import zlib
+import shutil
+import tarfile
+import zipfile
+import fnmatch
+import argparse
+import subprocess
+from collections import namedtuple
+from contextlib import contextmanager
+from pathlib import Path, PurePosixPath
+
+try:
+    import py7zr
+except ImportError:
+    py7zr = None
+
+
+ARCHIVE_SUFFIXES = ('.zip', '.7z', '.rar', '.tar', '.gz', '.tgz', '.bz2', '.xz')
+
+# 默认不解压的文件（安装包、文档、源码）
+DEFAULT_EXCLUDE = [
+    '*.msi', '*.pdf', '*.chm', '*.md',
+    'doc/*', 'docs/*', 'documentation/*', 'manual/*',
+    'src/*', 'source/*',
+]
+
+# 成员: 压缩包内路径（/ 分隔）、解压后大小、是否目录、CRC32（8 位大写十六进制，格式不提供时为 None）
+ArchiveMember = namedtuple('ArchiveMember', 'name size is_dir crc', defaults=(None,))
+
+# 解压结果: 解压文件数、文件总数、解压字节数、跳过字节数、根目录前缀、是否找到主程序
+ExtractResult = namedtuple('ExtractResult', 'extracted total extracted_bytes skipped_bytes prefix exe_found')
+
+
+class ArchiveError(Exception):
+    """无法读取或解压压缩包"""
+    pass
+
+
+# 压缩包损坏、加密或格式不受支持时读取库抛出的异常（统一转换为 ArchiveError）
+# zipfile 对加密成员抛出 RuntimeError，对不支持的压缩方法抛出 NotImplementedError
+READ_ERRORS = (zipfile.BadZipFile, tarfile.TarError, KeyError, EOFError, zlib.error, lzma.LZMAError,
+               RuntimeError, NotImplementedError)
+if py7zr is not None:
+    READ_ERRORS += (py7zr.exceptions.ArchiveError, py7zr.exceptions.PasswordRequired)
+
+
+@contextmanager
+def _reading(path):
+    """把读取库的异常转换为 ArchiveError（磁盘写入等 OSError 原样抛出）"""
+    try:
+        yield
+    except READ_ERRORS as e:
+        raise ArchiveError(f"压缩包 {Path(path).name} 已损坏或无法解压: {e!r}") from e
+
+
+def is_archive(path):
+    return Path(path).name.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _safe_name(name):
+    """规范化成员路径，拒绝绝对路径和 .. （返回 None）"""
+    name = name.replace('\\', '/')
+    parts = [p for p in PurePosixPath(name).parts if p not in ('', '.')]
+    if not parts or name.startswith('/') or '..' in parts or ':' in parts[0]:
+        return None
+    return '/'.join(parts)
+
+
+# ----------------------------------------------------------------------
+# 压缩包读取
+# ----------------------------------------------------------------------
+
+class ZipArchive:
+    def __init__(self, path):
+        self.path = Path(path)
+        self._zip = zipfile.ZipFile(path)
+
+    def members(self):
+        return [ArchiveMember(info.filename.rstrip('/'), info.file_size, info.is_dir(), f"{info.CRC:08X}")
+                for info in self._zip.infolist()]
+
+    def extract(self, pairs, dest_dir):
+        """pairs: [(成员名, 相对目标路径)]"""
+        for name, target in pairs:
+            out = Path(dest_dir) / target
+            out.parent.mkdir(parents=True, exist_ok=True)
+            with _reading(self.path), self._zip.open(name) as src, open(out, 'wb') as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+
+    def close(self):
+        self._zip.close()
+
+
+class TarArchive:
+    def __init__(self, path):
+        self.path = Path(path)
+        self._tar = tarfile.open(path, 'r:*')
+        self._by_name = {}
+
+    def members(self):
+        result = []
+        with _reading(self.path):
+            infos = self._tar.getmembers()
+        for info in infos:
+            if not (info.isfile() or info.isdir()):
+                continue  # 跳过链接和设备文件
+            name = info.name.rstrip('/')
+            self._by_name[name] = info
+            result.append(ArchiveMember(name, info.size, info.isdir()))
+        return result
+
+    def extract(self, pairs, dest_dir):
+        for name, target in pairs:
+            out = Path(dest_dir) / target
+            out.parent.mkdir(parents=True, exist_ok=True)
+            with _reading(self.path):
+                src = self._tar.extractfile(self._by_name[name])
+                with src, open(out, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+
+    def close(self):
+        self._tar.close()
+
+
+class SevenZipArchive:
+    """7z / rar：py7zr（仅 7z）或 7-Zip 命令行，解压到临时目录后移动"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.use_py7zr = py7zr is not None and self.path.suffix.lower() == '.7z'
+        self.exe = None if self.use_py7zr else find_7z()
+        if not self.use_py7zr and not self.exe:
+            raise ArchiveError(f"{self.path.suffix} 格式需要 7-Zip（或 pip install py7zr）")
+
+    def members(self):
+        if self.use_py7zr:
+            with _reading(self.path), py7zr.SevenZipFile(self.path, 'r') as archive:
+                return [ArchiveMember(info.filename.replace('\\', '/').rstrip('/'),
+                                      info.uncompressed or 0, info.is_directory,
+                                      f"{info.crc32:08X}" if info.crc32 is not None else None)
+                        for info in archive.list()]
+
+        result = subprocess.run([self.exe, 'l', '-slt', '-ba', '-sccUTF-8', str(self.path)],
+                                capture_output=True, text=True, encoding='utf-8', errors='ignore')
+        if result.returncode != 0:
+            raise ArchiveError(f"无法读取压缩包目录: {result.stderr.strip()[:200]}")
+        members = []
+        entry = {}
+        for line in result.stdout.splitlines() + ['']:
+            if not line.strip():
+                if 'Path' in entry:
+                    members.append(ArchiveMember(entry['Path'].replace('\\', '/'),
+                                                 int(entry.get('Size') or 0),
+                                                 'D' in entry.get('Attributes', '')[:1],
+                                                 entry.get('CRC') or None))
+                entry = {}
+                continue
+            key, sep, value = line.partition(' = ')
+            if sep:
+                entry[key.strip()] = value
+        return members
+
+    def extract(self, pairs, dest_dir):
+        staging = Path(dest_dir) / ".extract_tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        try:
+            names = [name for name, _ in pairs]
+            if self.use_py7zr:
+                with _reading(self.path), py7zr.SevenZipFile(self.path, 'r') as archive:
+                    archive.extract(path=staging, targets=names)
+            else:
+                list_file = staging / "files.txt"
+                list_file.write_text('\n'.join(name.replace('/', os.sep) for name in names), encoding='utf-8')
+                result = subprocess.run([self.exe, 'x', str(self.path), f'-o{staging / "files"}', '-y',
+                                         '-scsUTF-8', f'@{list_file}'],
+                                        capture_output=True, text=True, encoding='utf-8', errors='ignore')
+                if result.returncode != 0:
+                    raise ArchiveError(f"7-Zip 解压失败（返回码 {result.returncode}）: {result.stderr.strip()[:200]}")
+                staging = staging / "files"
+
+            for name, target in pairs:
+                out = Path(dest_dir) / target
+                out.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(staging / name, out)
+        finally:
+            shutil.rmtree(Path(dest_dir) / ".extract_tmp", ignore_errors=True)
+
+    def close(self):
+        pass
+
+
+def find_7z():
+    """查找 7-Zip 命令行程序"""
+    for name in ('7z', '7za', '7zz'):
+        path = shutil.which(name)
+        if path:
+            return path
+    for path in (r"C:\Program Files\7-Zip\7z.exe", r"C:\Program Files (x86)\7-Zip\7z.exe"):
+        if Path(path).exists():
+            return path
+    return None
+
+
+def open_archive(path):
+    """按扩展名（zip 再按文件头）打开压缩包"""
+    path = Path(path)
+    name = path.name.lower()
+    try:
+        if zipfile.is_zipfile(path):
+            return ZipArchive(path)
+        if name.endswith(('.7z', '.rar')):
+            return SevenZipArchive(path)
+        if tarfile.is_tarfile(path):
+            return TarArchive(path)
+    except (OSError,) + READ_ERRORS as e:
+        raise ArchiveError(f"无法打开压缩包 {path.name}: {e}")
+    raise ArchiveError(f"不支持的压缩包格式: {path.name}")
+
+
+# ----------------------------------------------------------------------
+# 选择成员
+# ----------------------------------------------------------------------
+
+def _matches(path, patterns):
+    path = path.lower()
+    for pattern in patterns:
+        pattern = pattern.lower().replace('\\', '/')
+        # 以 / 结尾或目录模式匹配任意层级
+        if fnmatch.fnmatchcase(path, pattern) or fnmatch.fnmatchcase(path, '*/' + pattern):
+            return True
+    return False
+
+
+def select_members(members, exe=None, include=None, exclude=None):
+    """选择需要解压的文件
+
+    返回 ([(成员名, 相对目标路径)], 根目录前缀, 是否找到主程序)
+    """
+    files = []
+    for member in members:
+        if member.is_dir:
+            continue
+        name = _safe_name(member.name)
+        if name:
+            files.append((name, member))
+
+    # 以主程序所在目录为根（多个同名时取层级最浅的）
+    prefix = ''
+    exe_found = False
+    if exe:
+        exe_name = exe.replace('\\', '/').lower()
+        candidates = [name for name, _ in files
+                      if name.lower() == exe_name or name.lower().endswith('/' + exe_name)]
+        if candidates:
+            exe_found = True
+            best = min(candidates, key=lambda n: (n.count('/'), len(n)))
+            prefix = best[:len(best) - len(exe_name)]
+
+    exclude_patterns = DEFAULT_EXCLUDE + list(exclude or [])
+    selected = []
+    for name, member in files:
+        if prefix and not name.startswith(prefix):
+            continue
+        relative = name[len(prefix):]
+        if include:
+            if not _matches(relative, include):
+                continue
+        elif _matches(relative, exclude_patterns):
+            continue
+        selected.append((member.name, relative))
+    return selected, prefix, exe_found
+
+
+def extract_tool(archive_path, tool_dir, entry):
+    """按工具目录条目解压压缩包，返回 ExtractResult
+
+    没有找到主程序且未声明 include 时解压全部文件（只排除安装包和文档）
+    """
+    archive = open_archive(archive_path)
+    try:
+        members = archive.members()
+        selected, prefix, exe_found = select_members(
+            members, entry.get('exe'), entry.get('include'), entry.get('exclude'))
+        sizes = {m.name: m.size for m in members if not m.is_dir}
+        archive.extract(selected, tool_dir)
+    finally:
+        archive.close()
+
+    extracted_bytes = sum(sizes.get(name, 0) for name, _ in selected)
+    return ExtractResult(len(selected), len(sizes), extracted_bytes,
+                         sum(sizes.values()) - extracted_bytes, prefix, exe_found)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按需解压工具压缩包")
+    parser.add_argument("archive", help="压缩包")
+    parser.add_argument("dest", help="目标目录")
+    parser.add_argument("--exe", help="主程序文件名")
+    parser.add_argument("--include", nargs="*", help="只解压匹配的文件（相对主程序目录）")
+    parser.add_argument("--exclude", nargs="*", help="额外排除的文件")
+    parser.add_argument("--list", action="store_true", help="只列出将要解压的文件")
+    args = parser.parse_args()
+
+    entry = {'exe': args.exe, 'include': args.include, 'exclude': args.exclude}
+    try:
+        if args.list:
+            archive = open_archive(args.archive)
+            try:
+                selected, prefix, _ = select_members(archive.members(), args.exe, args.include, args.exclude)
+            finally:
+                archive.close()
+            print(f"根目录: {prefix or '/'}")
+            for name, target in selected:
+                print(f"  {target}")
+            return 0
+
+        result = extract_tool(args.archive, args.dest, entry)
+    except ArchiveError as e:
+        print(f"[错误] {e}")
+        return 1
+    print(f"解压 {result.extracted}/{result.total} 个文件，{result.extracted_bytes / 1048576:.1f} MB，"
+          f"跳过 {result.skipped_bytes / 1048576:.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本机共享下载缓存（按内容寻址）
+多个工作区、构建机上的多个检出共用一份工具安装包：
+- 文件按 SHA-256 保存在 objects/<前两位>/<哈希>，同一内容只保存一份
+- index.db（SQLite）记录 URL -> 哈希、ETag、Last-Modified，再次下载时先用
+  If-None-Match / If-Modified-Since 向服务器确认，返回 304 则直接从缓存取出
+- 加入缓存时复制（不与工作区文件共用）；取出时优先硬链接到工作区（同一磁盘不占额外空间），否则复制。
+  工作区中的文件可能被改写（硬链接会连带改写缓存文件），取出前重新计算哈希，不一致时丢弃
+- 总大小超过上限时按最近使用时间淘汰（LRU）
+
+缓存目录默认为 %LOCALAPPDATA%\\WinPE_Customizer\\download_cache（其他系统为 ~/.cache/winpe_customizer/downloads），
+可通过环境变量 WPE_DOWNLOAD_CACHE 指定；WPE_DOWNLOAD_CACHE_MAX_MB 指定大小上限
+
+命令行:
+    python tools/download_cache.py stats
+    python tools/download_cache.py prune [--max-mb 10240]
+    python tools/download_cache.py clear
+"""
+
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import hashlib
+import argparse
+import threading
+from pathlib import Path
+
+
+MAX_CACHE_MB = 10 * 1024    # 默认大小上限（MB）
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    url           TEXT PRIMARY KEY,
+    sha256        TEXT NOT NULL,
+    etag          TEXT,
+    last_modified TEXT,
+    fetched       REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS objects (
+    sha256        TEXT PRIMARY KEY,
+    size          INTEGER NOT NULL,
+    last_used     REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_urls_sha256 ON urls(sha256);
+CREATE INDEX IF NOT EXISTS idx_objects_last_used ON objects(last_used);
+"""
+
+
+def default_cache_dir():
+    """默认缓存目录（环境变量 WPE_DOWNLOAD_CACHE 优先）"""
+    if os.environ.get('WPE_DOWNLOAD_CACHE'):
+        return Path(os.environ['WPE_DOWNLOAD_CACHE'])
+    if sys.platform == 'win32' and os.environ.get('LOCALAPPDATA'):
+        return Path(os.environ['LOCALAPPDATA']) / "WinPE_Customizer" / "download_cache"
+    return Path.home() / ".cache" / "winpe_customizer" / "downloads"
+
+
+def default_max_bytes():
+    """默认大小上限（环境变量 WPE_DOWNLOAD_CACHE_MAX_MB 优先）"""
+    try:
+        return int(float(os.environ.get('WPE_DOWNLOAD_CACHE_MAX_MB', MAX_CACHE_MB)) * 1024 * 1024)
+    except ValueError:
+        return MAX_CACHE_MB * 1024 * 1024
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def link_or_copy(src, dest):
+    """硬链接 src 到 dest（跨磁盘或不支持时复制），dest 已存在时替换。返回 'link' 或 'copy'"""
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    temp = dest.with_name(dest.name + f".{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        os.link(src, temp)
+        method = 'link'
+    except OSError:
+        shutil.copyfile(src, temp)
+        method = 'copy'
+    os.replace(temp, dest)
+    return method
+
+
+def copy_atomic(src, dest):
+    """复制 src 到 dest（先写临时文件再改名，其他进程不会读到一半的文件）"""
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    temp = dest.with_name(dest.name + f".{os.getpid()}.{threading.get_ident()}.tmp")
+    shutil.copyfile(src, temp)
+    os.replace(temp, dest)
+
+
+class DownloadCache:
+    """按内容寻址的下载缓存（多进程、多线程共用）"""
+
+    def __init__(self, root=None, max_bytes=None):
+        self.root = Path(root) if root else default_cache_dir()
+        self.max_bytes = default_max_bytes() if max_bytes is None else max_bytes
+        self.objects_dir = self.root / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # 其他进程写入时最多等待 30 秒
+        self._conn = sqlite3.connect(str(self.root / "index.db"), timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def object_path(self, sha256):
+        return self.objects_dir / sha256[:2] / sha256
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def lookup(self, url):
+        """URL 对应的缓存记录 {'sha256', 'etag', 'last_modified', 'size'}，没有或文件已丢失时返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT u.sha256, u.etag, u.last_modified, o.size FROM urls u "
+                "JOIN objects o ON o.sha256 = u.sha256 WHERE u.url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        entry = dict(row)
+        if not self._object_valid(entry['sha256'], entry['size']):
+            return None
+        return entry
+
+    def has_object(self, sha256):
+        """缓存中是否有指定哈希的文件"""
+        with self._lock:
+            row = self._conn.execute("SELECT size FROM objects WHERE sha256 = ?", (sha256.lower(),)).fetchone()
+        return row is not None and self._object_valid(sha256.lower(), row['size'])
+
+    def conditional_headers(self, entry):
+        """再验证请求头（If-None-Match / If-Modified-Since）"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def _object_valid(self, sha256, size):
+        """缓存文件存在且大小未变（硬链接的文件可能在工作区被改写）"""
+        try:
+            if self.object_path(sha256).stat().st_size == size:
+                return True
+        except OSError:
+            pass
+        self._forget(sha256)
+        return False
+
+    # ------------------------------------------------------------------
+    # 写入和取出
+    # ------------------------------------------------------------------
+
+    def store(self, url, path, etag=None, last_modified=None, sha256=None):
+        """把已下载的文件复制到缓存，返回哈希
+
+        不硬链接：工作区中的文件之后可能被改写，改写不能影响缓存
+        """
+        path = Path(path)
+        sha256 = (sha256 or file_sha256(path)).lower()
+        size = path.stat().st_size
+        obj = self.object_path(sha256)
+        if not (obj.exists() and obj.stat().st_size == size):
+            copy_atomic(path, obj)
+
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO objects (sha256, size, last_used) VALUES (?, ?, ?)",
+                (sha256, size, now))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO urls (url, sha256, etag, last_modified, fetched) VALUES (?, ?, ?, ?, ?)",
+                (url, sha256, etag, last_modified, now))
+        self.prune()
+        return sha256
+
+    def touch(self, url):
+        """服务器确认未变化（304）后更新记录时间"""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE urls SET fetched = ? WHERE url = ?", (time.time(), url))
+
+    def materialize(self, sha256, dest, verify=True):
+        """把缓存文件放到工作区，返回 'link' 或 'copy'
+
+        verify 时先重新计算哈希：取出过的文件与工作区硬链接，可能已被改写；
+        不一致时从缓存删除并返回 None
+        """
+        sha256 = sha256.lower()
+        obj = self.object_path(sha256)
+        if verify:
+            try:
+                actual = file_sha256(obj)
+            except OSError:
+                actual = None
+            if actual != sha256:
+                self._forget(sha256)
+                return None
+        method = link_or_copy(obj, dest)
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE objects SET last_used = ? WHERE sha256 = ?", (time.time(), sha256))
+        return method
+
+    # ------------------------------------------------------------------
+    # 淘汰
+    # ------------------------------------------------------------------
+
+    def total_size(self):
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+
+    def prune(self, max_bytes=None):
+        """按最近使用时间淘汰，直到总大小不超过上限。返回删除的文件数
+
+        已硬链接到工作区的文件从缓存删除后，工作区中的文件不受影响
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        with self._lock:
+            rows = self._conn.execute("SELECT sha256, size FROM objects ORDER BY last_used DESC").fetchall()
+        total = 0
+        evict = []
+        for row in rows:
+            total += row['size']
+            if total > max_bytes:
+                evict.append(row['sha256'])
+        for sha256 in evict:
+            self._forget(sha256)
+        return len(evict)
+
+    def clear(self):
+        """清空缓存"""
+        return self.prune(0)
+
+    def _forget(self, sha256):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM urls WHERE sha256 = ?", (sha256,))
+            self._conn.execute("DELETE FROM objects WHERE sha256 = ?", (sha256,))
+        try:
+            self.object_path(sha256).unlink()
+        except OSError:
+            pass
+
+    def stats(self):
+        with self._lock:
+            objects, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM objects").fetchone()
+            urls = self._conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+        return {'objects': objects, 'urls': urls, 'size': size, 'max_bytes': self.max_bytes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本机共享下载缓存")
+    parser.add_argument("--dir", help="缓存目录（默认按环境变量或系统位置）")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="显示缓存统计")
+    p_prune = sub.add_parser("prune", help="按最近使用时间淘汰到大小上限")
+    p_prune.add_argument("--max-mb", type=float, help="大小上限（MB）")
+    sub.add_parser("clear", help="清空缓存")
+    args = parser.parse_args()
+
+    cache = DownloadCache(args.dir)
+    try:
+        if args.command == "stats":
+            stats = cache.stats()
+            print(f"缓存目录: {cache.root}")
+            print(f"文件: {stats['objects']}  URL: {stats['urls']}  "
+                  f"大小: {stats['size'] / 1048576:.1f} / {stats['max_bytes'] / 1048576:.0f} MB")
+        elif args.command == "prune":
+            max_bytes = int(args.max_mb * 1024 * 1024) if args.max_mb is not None else None
+            print(f"已淘汰 {cache.prune(max_bytes)} 个文件")
+        elif args.command == "clear":
+            print(f"已删除 {cache.clear()} 个文件")
+    finally:
+        cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
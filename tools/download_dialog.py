@@ -5,15 +5,20 @@
 工具下载对话框
 """
 
-import os
+import queue
+import sqlite3
 import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
-import urllib.request
-import zipfile
-import requests
-import shutil
+
+from download_engine import DownloadEngine, DownloadJob
+from download_cache import DownloadCache
+from archive_extract import ArchiveError, extract_tool, is_archive
+
+
+EXTRACT_WORKERS = 2  # 同时解压的压缩包数（与下载并行）
 
 
 class DownloadDialog:
@@ -21,8 +26,13 @@ class DownloadDialog:
     
     def __init__(self, parent, tools):
         self.tools = tools
-        self.current_index = 0
         self.is_downloading = False
+        self.engine = None
+        self.cache = None
+        self.extractor = None
+        self.extract_futures = []
+        self.jobs = []
+        self.events = queue.Queue()  # 工作线程 → 界面（每 100ms 统一处理一次）
         
         self.dialog = tk.Toplevel(parent)
         self.dialog.title("下载工具")
@@ -31,9 +41,13 @@ class DownloadDialog:
         self.dialog.grab_set()
         
         self.create_widgets()
+        self.dialog.protocol("WM_DELETE_WINDOW", self.on_close)
+        # 父窗口（工具包管理器）关闭时对话框随之销毁，同样取消下载
+        self.dialog.bind("<Destroy>", self.on_destroy, add="+")
         
         # 自动开始下载
         self.start_download()
+        self.poll_events()
     
     def create_widgets(self):
         """创建界面"""
@@ -74,7 +88,7 @@ class DownloadDialog:
         btn_frame = ttk.Frame(frame)
         btn_frame.pack()
         
-        self.close_btn = ttk.Button(btn_frame, text="关闭", command=self.dialog.destroy, 
+        self.close_btn = ttk.Button(btn_frame, text="关闭", command=self.on_close, 
                                     state=tk.DISABLED, width=15)
         self.close_btn.pack(pady=5)
     
@@ -89,98 +103,187 @@ class DownloadDialog:
         self.log(f"准备下载 {len(self.tools)} 个工具")
         self.log("=" * 50)
         
+        # 下载到 tools 目录
+        tools_dir = Path(__file__).parent.absolute()
+        for tool in self.tools:
+            if not tool.get('download_url'):
+                self.log(f"⚠️ {tool['name']} 暂不支持自动下载，请访问: {tool['url']}")
+                continue
+            self.jobs.append(DownloadJob(tool['name'], tool['download_url'], tools_dir / tool['name'],
+                                         sha256=tool.get('sha256'), on_complete=self.queue_extract))
+        
+        if not self.jobs:
+            self.status_label.config(text="没有可自动下载的工具")
+            self.close_btn.config(state=tk.NORMAL)
+            return
+        
+        self.is_downloading = True
+        # 本机共享缓存，不可用时（目录无权限等）直接下载
+        try:
+            self.cache = DownloadCache()
+            self.log(f"下载缓存: {self.cache.root}")
+        except (OSError, sqlite3.Error) as e:
+            self.cache = None
+            self.log(f"⚠️ 下载缓存不可用: {e}")
+        self.engine = DownloadEngine(cache=self.cache)
+        self.extractor = ThreadPoolExecutor(max_workers=EXTRACT_WORKERS, thread_name_prefix="extract")
         thread = threading.Thread(target=self.download_all)
         thread.daemon = True
         thread.start()
     
     def download_all(self):
-        """下载所有工具"""
-        for i, tool in enumerate(self.tools, 1):
-            self.current_index = i
-            self.download_tool(tool, i, len(self.tools))
+        """下载所有工具（后台线程，并发执行）"""
+        try:
+            self.engine.run(self.jobs, on_event=self.events.put)
+            # 等待仍在进行的解压（extract_archive 未处理的异常也记录到日志，不在 future 中丢失）
+            wait(self.extract_futures)
+            for future in self.extract_futures:
+                if not future.cancelled() and future.exception() is not None:
+                    self.post_log(f"  ❌ 解压出错: {future.exception()!r}")
+        finally:
+            self.engine.close()
+            self.extractor.shutdown(wait=False)
+            if self.cache:
+                self.cache.close()
+            self.events.put(('finished', None))
+    
+    def post_log(self, message):
+        """工作线程中记录日志"""
+        self.events.put(('log', message))
+    
+    def poll_events(self):
+        """统一处理下载事件并刷新界面"""
+        try:
+            if not self.dialog.winfo_exists():
+                return
+        except tk.TclError:
+            return
+        
+        finished = False
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+            
+            if isinstance(event, tuple) and event[0] == 'log':
+                self.log(event[1])
+            elif isinstance(event, tuple) and event[0] == 'finished':
+                finished = True
+            else:
+                self.handle_event(event)
+        
+        self.update_progress()
         
-        self.dialog.after(0, lambda: self.close_btn.config(state=tk.NORMAL))
-        self.dialog.after(0, lambda: messagebox.showinfo("完成", "所有工具下载完成！"))
+        if finished:
+            self.on_finished()
+        else:
+            self.dialog.after(100, self.poll_events)
     
-    def download_tool(self, tool, index, total):
-        """下载单个工具"""
-        self.dialog.after(0, lambda: self.tool_label.config(text=f"[{index}/{total}] {tool['name']}"))
-        self.dialog.after(0, lambda: self.url_label.config(text=tool.get('download_url', tool['url'])))
-        
-        self.log(f"\n[{index}/{total}] 开始下载: {tool['name']}")
-        
-        # 检查是否有直接下载链接
-        if 'download_url' not in tool or not tool['download_url']:
-            self.log(f"  ⚠️ {tool['name']} 暂不支持自动下载")
-            self.log(f"  请访问: {tool['url']}")
-            self.dialog.after(0, lambda: self.status_label.config(text="跳过（无下载链接）"))
+    def handle_event(self, event):
+        """记录任务开始、完成和失败"""
+        job = event.job
+        if event.kind == 'start':
+            self.log(f"\n⬇️ 开始下载: {job.name}")
+            self.log(f"  下载链接: {job.url}")
+        elif event.kind == 'done':
+            if job.skipped:
+                self.log(f"  ✅ {job.name} 已存在且校验通过，跳过下载: {job.filename}")
+                return
+            if job.cached:
+                self.log(f"  ✅ {job.name} 使用本机缓存（{'硬链接' if job.cached == 'link' else '复制'}）: "
+                         f"{job.filename} ({job.downloaded / 1048576:.1f} MB)")
+                return
+            if job.resumed_from:
+                self.log(f"  ↪️ {job.name} 从 {job.resumed_from / 1048576:.1f} MB 处续传")
+            self.log(f"  ✅ {job.name} 下载完成: {job.filename} "
+                     f"({job.downloaded / 1048576:.1f} MB, {job.elapsed:.1f} 秒)"
+                     + ("，SHA256 校验通过" if job.sha256 else ""))
+        elif event.kind == 'error':
+            self.log(f"  ❌ {job.name} 下载失败: {event.message}")
+        elif event.kind == 'cancelled':
+            self.log(f"  ⚠️ {job.name} 已取消")
+    
+    def update_progress(self):
+        """根据所有任务计算总进度"""
+        total = len(self.jobs)
+        if not total:
             return
+        finished = sum(1 for job in self.jobs if job.status in ('done', 'error', 'cancelled'))
+        running = [job for job in self.jobs if job.status == 'running']
+        
+        # 每个任务按已下载比例计入（大小未知的任务完成时才计入）
+        fraction = 0.0
+        for job in self.jobs:
+            if job.status in ('done', 'error', 'cancelled'):
+                fraction += 1
+            elif job.status == 'running' and job.total:
+                fraction += min(job.downloaded / job.total, 1.0)
+        percent = int(fraction * 100 / total)
         
+        self.progress.config(value=percent)
+        self.percent_label.config(text=f"{percent}%")
+        self.tool_label.config(text=f"[{finished}/{total}] " +
+                               ("、".join(job.name for job in running) if running else "等待中..."))
+        extracting = sum(1 for future in self.extract_futures if not future.done())
+        if running:
+            self.status_label.config(text=f"正在下载 {len(running)} 个工具..." +
+                                     (f" 解压 {extracting} 个" if extracting else ""))
+        elif extracting:
+            self.status_label.config(text=f"正在解压 {extracting} 个压缩包...")
+    
+    def on_finished(self):
+        """全部任务结束"""
+        self.is_downloading = False
+        self.close_btn.config(state=tk.NORMAL)
+        failed = [job.name for job in self.jobs if job.status == 'error']
+        done = sum(1 for job in self.jobs if job.status == 'done')
+        self.status_label.config(text=f"完成 {done} 个，失败 {len(failed)} 个")
+        if failed:
+            messagebox.showwarning("完成", f"下载完成 {done} 个，失败 {len(failed)} 个:\n" + "\n".join(failed),
+                                   parent=self.dialog)
+        else:
+            messagebox.showinfo("完成", "所有工具下载完成！", parent=self.dialog)
+    
+    def on_close(self):
+        """关闭窗口（下载中则先确认并取消）"""
+        if self.is_downloading:
+            if not messagebox.askyesno("确认", "下载尚未完成，确定要取消并关闭吗？", parent=self.dialog):
+                return
+        self.dialog.destroy()
+    
+    def on_destroy(self, event):
+        """对话框销毁：取消下载和尚未开始的解压"""
+        if event.widget is not self.dialog or not self.is_downloading:
+            return
+        if self.engine is not None:
+            self.engine.cancel()
+        if self.extractor is not None:
+            self.extractor.shutdown(wait=False, cancel_futures=True)
+    
+    def queue_extract(self, job):
+        """下载完成后把压缩包交给解压线程池（下载线程立即继续下一个任务）"""
+        if is_archive(job.path):
+            self.extract_futures.append(self.extractor.submit(self.extract_archive, job))
+    
+    def extract_archive(self, job):
+        """按工具目录条目只解压需要的文件（在解压线程中执行）"""
+        save_path = job.path
+        entry = next((tool for tool in self.tools if tool['name'] == job.name), {})
+        
+        self.post_log(f"  📦 {job.name}: 检测到压缩包，准备解压...")
         try:
-            # 创建保存目录 - 下载到 tools 目录
-            tools_dir = Path("tools")
-            tool_dir = tools_dir / tool['name']
-            tool_dir.mkdir(parents=True, exist_ok=True)
-            
-            # 下载文件
-            download_url = tool['download_url']
-            filename = Path(download_url).name
-            save_path = tool_dir / filename
-            
-            self.log(f"  下载链接: {download_url}")
-            self.log(f"  保存到: {save_path}")
-            
-            self.dialog.after(0, lambda: self.status_label.config(text="正在下载..."))
-            
-            # 使用requests下载文件，支持进度显示
-            response = requests.get(download_url, stream=True)
-            response.raise_for_status()
-            
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
-            
-            with open(save_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        if total_size > 0:
-                            percent = int((downloaded / total_size) * 100)
-                            if percent > 100:
-                                percent = 100
-                            self.dialog.after(0, lambda p=percent: self.progress.config(value=p))
-                            self.dialog.after(0, lambda p=percent: self.percent_label.config(text=f"{p}%"))
-            
-            self.log(f"  ✅ 下载完成: {save_path.name}")
-            
-            # 如果是压缩包，尝试解压
-            if save_path.suffix.lower() in ['.zip', '.7z', '.rar', '.tar', '.gz']:
-                self.log(f"  📦 检测到压缩包，准备解压...")
-                self.dialog.after(0, lambda: self.status_label.config(text="正在解压..."))
-                
-                try:
-                    if save_path.suffix.lower() == '.zip':
-                        with zipfile.ZipFile(save_path, 'r') as zip_ref:
-                            zip_ref.extractall(tool_dir)
-                        self.log(f"  ✅ ZIP解压完成")
-                        save_path.unlink()  # 删除压缩包
-                    elif save_path.suffix.lower() in ['.tar', '.gz']:
-                        import tarfile
-                        with tarfile.open(save_path, 'r:*') as tar_ref:
-                            tar_ref.extractall(tool_dir)
-                        self.log(f"  ✅ TAR解压完成")
-                        save_path.unlink()  # 删除压缩包
-                    else:
-                        self.log(f"  ⚠️ {save_path.suffix} 格式需要手动解压")
-                except Exception as e:
-                    self.log(f"  ❌ 解压失败: {e}")
-                    self.log(f"  💡 请手动解压: {save_path}")
-            
-            self.dialog.after(0, lambda: self.status_label.config(text="完成"))
-            
-        except Exception as e:
-            self.log(f"  ❌ 下载失败: {e}")
-            self.dialog.after(0, lambda: self.status_label.config(text=f"失败: {e}"))
+            result = extract_tool(save_path, job.dest_dir, entry)
+        except (ArchiveError, OSError) as e:
+            self.post_log(f"  ❌ {job.name}: 解压失败: {e}")
+            self.post_log(f"  💡 请手动解压: {save_path}")
+            return
+        
+        self.post_log(f"  ✅ {job.name}: 解压 {result.extracted}/{result.total} 个文件 "
+                      f"({result.extracted_bytes / 1048576:.1f} MB，跳过 {result.skipped_bytes / 1048576:.1f} MB)")
+        if entry.get('exe') and not result.exe_found:
+            self.post_log(f"  ⚠️ {job.name}: 压缩包中未找到 {entry['exe']}，已解压全部程序文件")
+        save_path.unlink()  # 删除压缩包
 
 
 class DownloadDialogWrapper:
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+下载引擎
+- 所有任务共用一个 requests.Session（连接池，同一主机的连接可复用）
+- 线程池并发下载，并按主机限制同时下载数
+- 分块大小根据读取耗时自适应调整（64 KiB ~ 4 MiB）
+- 进度事件按任务节流（默认每 0.1 秒最多一次），界面只需定时读取事件队列
+- 先写入 .part 文件，中断后用 Range 续传；大小和 SHA-256（如有）校验通过后才改名为最终文件
+- 可选本机共享缓存（download_cache.DownloadCache）：有缓存时先条件请求，304 则直接从缓存取出
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit, unquote
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as Urllib3Error
+
+
+MAX_WORKERS = 4             # 同时下载的任务数
+PER_HOST_LIMIT = 2          # 同一主机同时下载数
+MIN_CHUNK = 64 * 1024       # 最小分块
+MAX_CHUNK = 4 * 1024 * 1024 # 最大分块
+PROGRESS_INTERVAL = 0.1     # 进度事件最小间隔（秒）
+TIMEOUT = 30                # 连接/读取超时（秒）
+RETRIES = 3                 # 连接中断后的续传重试次数
+
+# 事件类型: start / progress / done / error / cancelled
+DownloadEvent = namedtuple('DownloadEvent', 'kind job downloaded total speed message')
+
+
+class DownloadCancelled(Exception):
+    """下载被取消"""
+    pass
+
+
+class TruncatedDownload(Exception):
+    """下载不完整（可续传）"""
+    pass
+
+
+class ChecksumMismatch(Exception):
+    """SHA-256 校验失败"""
+    pass
+
+
+class DownloadJob:
+    """单个下载任务"""
+
+    def __init__(self, name, url, dest_dir, filename=None, sha256=None, on_complete=None):
+        self.name = name
+        self.url = url
+        self.dest_dir = Path(dest_dir)
+        self.filename = filename or unquote(Path(urlsplit(url).path).name) or "download"
+        self.sha256 = sha256            # 期望的 SHA-256（可选）
+        self.on_complete = on_complete  # 下载成功后在工作线程中调用 on_complete(job)
+
+        self.status = 'pending'  # pending / running / done / error / cancelled
+        self.downloaded = 0
+        self.total = 0
+        self.elapsed = 0.0
+        self.error = None
+        self.resumed_from = 0   # 续传起点（字节）
+        self.skipped = False    # 已存在且校验通过，未下载
+        self.cached = None      # 从本机缓存取出时为 'link' / 'copy'
+        self.etag = None
+        self.last_modified = None
+
+    @property
+    def path(self):
+        return self.dest_dir / self.filename
+
+    @property
+    def part_path(self):
+        """下载中的临时文件"""
+        return self.dest_dir / (self.filename + ".part")
+
+    @property
+    def meta_path(self):
+        """续传元数据（URL、ETag、Last-Modified、总大小）"""
+        return self.dest_dir / (self.filename + ".part.json")
+
+    @property
+    def host(self):
+        return urlsplit(self.url).netloc.lower()
+
+    def __repr__(self):
+        return f"DownloadJob({self.name!r}, {self.status})"
+
+
+class DownloadEngine:
+    """并发下载引擎"""
+
+    def __init__(self, max_workers=MAX_WORKERS, per_host=PER_HOST_LIMIT,
+                 min_chunk=MIN_CHUNK, max_chunk=MAX_CHUNK,
+                 progress_interval=PROGRESS_INTERVAL, timeout=TIMEOUT, retries=RETRIES, session=None,
+                 cache=None):
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.min_chunk = min_chunk
+        self.max_chunk = max_chunk
+        self.progress_interval = progress_interval
+        self.timeout = timeout
+        self.retries = retries
+        self.cache = cache      # DownloadCache 或 None
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=2)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['User-Agent'] = 'WinPE-Customizer'
+        self.session = session
+
+        self._cancel = threading.Event()
+        self._host_lock = threading.Lock()
+        self._host_slots = {}
+
+    # ------------------------------------------------------------------
+    # 公共接口
+    # ------------------------------------------------------------------
+
+    def run(self, jobs, on_event=None):
+        """并发下载全部任务，返回任务列表（完成后检查 job.status）"""
+        jobs = list(jobs)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="download") as pool:
+            for _ in pool.map(lambda job: self.download(job, on_event), jobs):
+                pass
+        return jobs
+
+    def download(self, job, on_event=None):
+        """下载单个任务（在调用线程中执行）"""
+        emit = on_event or (lambda event: None)
+        if self._cancel.is_set():
+            job.status = 'cancelled'
+            emit(DownloadEvent('cancelled', job, 0, 0, 0.0, "已取消"))
+            return job
+
+        with self._host_slot(job.host):
+            job.status = 'running'
+            emit(DownloadEvent('start', job, 0, 0, 0.0, job.url))
+            start = time.perf_counter()
+            try:
+                self._fetch(job, emit, start)
+                if job.on_complete:
+                    job.on_complete(job)
+                job.status = 'done'
+                job.elapsed = time.perf_counter() - start
+                emit(DownloadEvent('done', job, job.downloaded, job.total,
+                                   job.downloaded / job.elapsed if job.elapsed else 0.0, str(job.path)))
+            except DownloadCancelled:
+                job.status = 'cancelled'
+                emit(DownloadEvent('cancelled', job, job.downloaded, job.total, 0.0, "已取消"))
+            except Exception as e:
+                job.status = 'error'
+                job.error = e
+                job.elapsed = time.perf_counter() - start
+                emit(DownloadEvent('error', job, job.downloaded, job.total, 0.0, str(e)))
+        return job
+
+    def cancel(self):
+        """取消尚未完成的任务（正在下载的任务在下一个分块处停止）"""
+        self._cancel.set()
+
+    def close(self):
+        self.session.close()
+
+    # ------------------------------------------------------------------
+    # 内部实现
+    # ------------------------------------------------------------------
+
+    def _host_slot(self, host):
+        """同一主机的并发限制"""
+        with self._host_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            return slot
+
+    def _fetch(self, job, emit, start):
+        """下载到 .part 文件，校验通过后再改名为最终文件
+
+        连接中断时保留 .part 和元数据，重试或下次下载时用 Range 请求续传；
+        ETag / Last-Modified 通过 If-Range 校验，服务器文件已变化时从头下载
+        """
+        job.dest_dir.mkdir(parents=True, exist_ok=True)
+
+        # 已存在且哈希匹配的文件不再下载
+        if job.sha256 and job.path.exists() and _file_sha256(job.path) == job.sha256.lower():
+            job.downloaded = job.total = job.path.stat().st_size
+            job.skipped = True
+            return
+
+        cached = None
+        if self.cache:
+            # 哈希已固定且缓存中有该文件时无需联网
+            if job.sha256 and self.cache.has_object(job.sha256) and self._from_cache(job, job.sha256):
+                return
+            cached = self.cache.lookup(job.url)
+            if cached and job.sha256 and cached['sha256'] != job.sha256.lower():
+                cached = None
+
+        if self._fetch_with_retries(job, emit, start, cached):
+            self.cache.touch(job.url)
+            if self._from_cache(job, cached['sha256']):
+                return
+            # 缓存文件已被改写（哈希不符），不带条件重新下载
+            self._fetch_with_retries(job, emit, start)
+
+        self._finalize(job)
+        if self.cache:
+            try:
+                self.cache.store(job.url, job.path, job.etag, job.last_modified, job.sha256)
+            except (OSError, sqlite3.Error):
+                pass  # 缓存不可用不影响本次下载
+
+    def _fetch_with_retries(self, job, emit, start, cached=None):
+        """_fetch_part，连接错误时按指数退避重试"""
+        for attempt in range(self.retries + 1):
+            try:
+                return self._fetch_part(job, emit, start, cached)
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError,
+                    TruncatedDownload):
+                if attempt >= self.retries or self._cancel.is_set():
+                    raise
+                time.sleep(min(0.5 * 2 ** attempt, 10))
+
+    def _from_cache(self, job, sha256):
+        """从本机缓存取出文件（硬链接或复制）。缓存文件哈希不符时返回 False"""
+        method = self.cache.materialize(sha256, job.path)
+        if method is None:
+            return False
+        job.cached = method
+        job.downloaded = job.total = job.path.stat().st_size
+        job.part_path.unlink(missing_ok=True)
+        job.meta_path.unlink(missing_ok=True)
+        return True
+
+    def _fetch_part(self, job, emit, start, cached=None):
+        """下载（或续传）到 .part 文件。缓存的文件在服务器上未变化（304）时返回 True"""
+        part_path = job.part_path
+        meta = _read_meta(job.meta_path)
+        offset = part_path.stat().st_size if part_path.exists() else 0
+        if meta.get('url') != job.url:
+            offset = 0
+
+        # 不接受压缩传输：Content-Length、Range 偏移和 SHA-256 都按服务器上的原始字节计算
+        headers = {'Accept-Encoding': 'identity'}
+        if offset and (meta.get('etag') or meta.get('last_modified')):
+            headers['Range'] = f"bytes={offset}-"
+            headers['If-Range'] = meta.get('etag') or meta.get('last_modified')
+        else:
+            offset = 0
+            if cached:
+                headers.update(self.cache.conditional_headers(cached))
+
+        with self.session.get(job.url, stream=True, timeout=self.timeout, headers=headers) as response:
+            if response.status_code == 304 and cached:
+                return True
+            if response.status_code == 416 and offset and offset == meta.get('total'):
+                # .part 已完整（上次在改名前中断）
+                job.total = job.downloaded = offset
+                job.etag, job.last_modified = meta.get('etag'), meta.get('last_modified')
+                return False
+            response.raise_for_status()
+
+            if response.status_code == 206 and offset:
+                content_range = response.headers.get('content-range', '')
+                if not content_range.startswith(f"bytes {offset}-"):
+                    raise TruncatedDownload(f"服务器返回的范围不匹配: {content_range}")
+                job.total = offset + int(response.headers.get('content-length') or 0)
+                mode = 'ab'
+                job.resumed_from = offset
+            else:
+                # 200：不支持续传或文件已变化，从头下载
+                offset = 0
+                job.total = int(response.headers.get('content-length') or 0)
+                mode = 'wb'
+                job.resumed_from = 0
+            job.downloaded = offset
+            job.etag = response.headers.get('etag')
+            job.last_modified = response.headers.get('last-modified')
+
+            _write_meta(job.meta_path, {
+                'url': job.url,
+                'etag': job.etag,
+                'last_modified': job.last_modified,
+                'total': job.total,
+            })
+
+            chunk_size = self.min_chunk
+            last_emit = 0.0
+            with open(part_path, mode) as f:
+                while True:
+                    if self._cancel.is_set():
+                        raise DownloadCancelled()
+
+                    read_start = time.perf_counter()
+                    try:
+                        data = response.raw.read(chunk_size, decode_content=False)
+                    except Urllib3Error as e:
+                        raise TruncatedDownload(f"连接中断，已下载 {job.downloaded}/{job.total} 字节: {e}")
+                    if not data:
+                        break
+                    f.write(data)
+                    job.downloaded += len(data)
+
+                    # 读取很快说明带宽充足，加大分块以减少调用次数；读取慢则减小分块保证进度及时
+                    now = time.perf_counter()
+                    read_time = now - read_start
+                    if read_time < 0.05 and chunk_size < self.max_chunk:
+                        chunk_size = min(chunk_size * 2, self.max_chunk)
+                    elif read_time > 0.5 and chunk_size > self.min_chunk:
+                        chunk_size = max(chunk_size // 2, self.min_chunk)
+
+                    if now - last_emit >= self.progress_interval:
+                        last_emit = now
+                        elapsed = now - start
+                        emit(DownloadEvent('progress', job, job.downloaded, job.total,
+                                           job.downloaded / elapsed if elapsed else 0.0, ""))
+
+        if job.total and job.downloaded < job.total:
+            raise TruncatedDownload(f"连接中断，已下载 {job.downloaded}/{job.total} 字节")
+        return False
+
+    def _finalize(self, job):
+        """校验 .part 文件并改名为最终文件"""
+        if job.skipped:
+            return
+        part_path = job.part_path
+        if job.total and part_path.stat().st_size != job.total:
+            raise TruncatedDownload(f"文件大小不匹配: {part_path.stat().st_size}/{job.total} 字节")
+
+        if job.sha256:
+            actual = _file_sha256(part_path)
+            if actual != job.sha256.lower():
+                # 内容错误，续传也无法修复，删除后下次从头下载
+                part_path.unlink(missing_ok=True)
+                job.meta_path.unlink(missing_ok=True)
+                raise ChecksumMismatch(f"SHA-256 不匹配: 期望 {job.sha256}，实际 {actual}")
+
+        os.replace(part_path, job.path)
+        job.meta_path.unlink(missing_ok=True)
+
+
+def _file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_meta(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_meta(path, meta):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
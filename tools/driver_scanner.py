@@ -17,6 +17,11 @@ import threading
 import shutil
 
 
+# 工具目录和项目根目录（不依赖当前工作目录，便于在主程序进程内打开）
+TOOLS_DIR = Path(__file__).parent.absolute()
+PROJECT_DIR = TOOLS_DIR.parent
+
+
 class DriverScanner:
     """驱动扫描工具"""
     
@@ -30,17 +35,36 @@ class DriverScanner:
         self.set_icon()
         
         # 变量
-        self.output_dir = tk.StringVar(value=str(Path("../drive").absolute()))
+        self.output_dir = tk.StringVar(value=str(PROJECT_DIR / "drive"))
         self.is_scanning = False
         self.drivers_list = []
+        self.closed = False  # 窗口已关闭（工作线程不再更新界面，导出在当前驱动完成后停止）
         
         # 创建界面
         self.create_widgets()
+        self.root.bind("<Destroy>", self.on_destroy, add="+")
+    
+    def on_destroy(self, event):
+        """窗口关闭"""
+        if event.widget is self.root:
+            self.closed = True
+    
+    def _post(self, callback):
+        """工作线程中把界面更新交给界面线程（窗口已关闭时丢弃）"""
+        if self.closed:
+            return
+        try:
+            self.root.after(0, lambda: None if self.closed else callback())
+        except (RuntimeError, tk.TclError):
+            pass
     
     def set_icon(self):
         """设置图标"""
         import random
-        ico_dir = Path("../ico") if Path("../ico").exists() else Path("ico")
+        if isinstance(self.root, tk.Toplevel):
+            # 在主程序中打开时使用主窗口的图标
+            return
+        ico_dir = PROJECT_DIR / "ico"
         if ico_dir.exists():
             image_files = list(ico_dir.glob("*.ico")) + list(ico_dir.glob("*.png"))
             if image_files:
@@ -208,7 +232,7 @@ class DriverScanner:
     def scan_drivers(self):
         """扫描驱动"""
         try:
-            self.root.after(0, lambda: self.log("执行: dism /online /get-drivers", 'INFO'))
+            self._post(lambda: self.log("执行: dism /online /get-drivers", 'INFO'))
             
             # 执行 DISM 命令
             result = subprocess.run(
@@ -226,16 +250,16 @@ class DriverScanner:
                 self.drivers_list = drivers
                 
                 # 显示到界面
-                self.root.after(0, lambda: self.display_drivers(drivers))
-                self.root.after(0, lambda: self.log(f"扫描完成，找到 {len(drivers)} 个驱动", 'SUCCESS'))
+                self._post(lambda: self.display_drivers(drivers))
+                self._post(lambda: self.log(f"扫描完成，找到 {len(drivers)} 个驱动", 'SUCCESS'))
             else:
-                self.root.after(0, lambda: self.log(f"扫描失败: {result.stderr}", 'ERROR'))
+                self._post(lambda: self.log(f"扫描失败: {result.stderr}", 'ERROR'))
                 
         except Exception as e:
-            self.root.after(0, lambda: self.log(f"扫描出错: {e}", 'ERROR'))
+            self._post(lambda e=e: self.log(f"扫描出错: {e}", 'ERROR'))
         finally:
             self.is_scanning = False
-            self.root.after(0, lambda: self.scan_btn.config(state=tk.NORMAL))
+            self._post(lambda: self.scan_btn.config(state=tk.NORMAL))
     
     def parse_driver_list(self, output):
         """解析驱动列表"""
@@ -333,16 +357,19 @@ class DriverScanner:
         self.export_all_btn.config(state=tk.DISABLED)
         self.scan_btn.config(state=tk.DISABLED)
         
+        # 发布的名称（在界面线程读取）
+        driver_names = [self.tree.item(item, 'values')[0] for item in items]
+        
         def export_thread():
             try:
                 success_count = 0
                 fail_count = 0
                 
-                for item in items:
-                    values = self.tree.item(item, 'values')
-                    driver_name = values[0]  # 发布的名称
+                for driver_name in driver_names:
+                    if self.closed:
+                        break
                     
-                    self.root.after(0, lambda d=driver_name: self.log(f"导出: {d}", 'INFO'))
+                    self._post(lambda d=driver_name: self.log(f"导出: {d}", 'INFO'))
                     
                     # 创建驱动子目录
                     driver_dir = output_path / driver_name.replace('/', '_').replace('\\', '_')
@@ -356,24 +383,24 @@ class DriverScanner:
                     
                     if result.returncode == 0:
                         success_count += 1
-                        self.root.after(0, lambda d=driver_name: 
+                        self._post(lambda d=driver_name: 
                                       self.log(f"✓ {d}", 'SUCCESS'))
                     else:
                         fail_count += 1
-                        self.root.after(0, lambda d=driver_name: 
+                        self._post(lambda d=driver_name: 
                                       self.log(f"✗ {d} - 失败", 'ERROR'))
                 
-                self.root.after(0, lambda: self.log(
+                self._post(lambda: self.log(
                     f"导出完成！成功: {success_count}, 失败: {fail_count}", 'SUCCESS'))
-                self.root.after(0, lambda: messagebox.showinfo(
+                self._post(lambda: messagebox.showinfo(
                     "完成", f"驱动导出完成！\n\n成功: {success_count}\n失败: {fail_count}\n\n导出位置:\n{output_path}"))
                 
             except Exception as e:
-                self.root.after(0, lambda: self.log(f"导出出错: {e}", 'ERROR'))
+                self._post(lambda e=e: self.log(f"导出出错: {e}", 'ERROR'))
             finally:
-                self.root.after(0, lambda: self.export_btn.config(state=tk.NORMAL))
-                self.root.after(0, lambda: self.export_all_btn.config(state=tk.NORMAL))
-                self.root.after(0, lambda: self.scan_btn.config(state=tk.NORMAL))
+                self._post(lambda: self.export_btn.config(state=tk.NORMAL))
+                self._post(lambda: self.export_all_btn.config(state=tk.NORMAL))
+                self._post(lambda: self.scan_btn.config(state=tk.NORMAL))
         
         thread = threading.Thread(target=export_thread)
         thread.daemon = True
@@ -8,11 +8,21 @@
 import os
 import sys
 import json
+import threading
 from pathlib import Path
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from datetime import datetime
 
+from pe_scanner import PEInfo, PEInfoCache, scan_executables, compatibility_warnings, describe
+
+
+# 工具目录和项目根目录（不依赖当前工作目录，便于在主程序进程内打开）
+TOOLS_DIR = Path(__file__).parent.absolute()
+PROJECT_DIR = TOOLS_DIR.parent
+
+INSERT_BATCH = 500  # 每次插入的行数（其余在下一次空闲时继续）
+
 
 class ExternalAppsManager:
     """外置程序管理器"""
@@ -27,13 +37,25 @@ class ExternalAppsManager:
         self.set_icon()
         
         # 数据
-        self.apps_data = []  # [{"path": "", "name": "", "desktop": False, "startmenu": False, "path_env": False, "target": ""}]
-        self.external_dir = Path("外置程序")
+        # {行 ID: {"path": "", "name": "", "desktop": False, "startmenu": False, "path_env": False, "target": ""}}
+        self.apps = {}
+        self.search_index = {}  # {行 ID: 小写的名称和路径}，用于筛选
+        self._next_id = 0
+        self._load_generation = 0
+        self._filter_job = None
+        self.sort_column = None
+        self.sort_reverse = False
+        self.external_dir = PROJECT_DIR / "外置程序"
         # 配置文件保存在 tools 目录（不上传到Git）
-        self.config_file = Path("external_apps_config.json")
+        self.config_file = TOOLS_DIR / "external_apps_config.json"
+        # PE 文件头缓存（按路径、大小、修改时间）
+        self.pe_cache = PEInfoCache()
+        self.scanning = False
+        self.closed = False
         
         # 创建界面
         self.create_widgets()
+        self.root.bind("<Destroy>", self.on_destroy, add="+")
         
         # 加载配置
         self.load_config()
@@ -42,8 +64,11 @@ class ExternalAppsManager:
         """设置窗口图标 - 随机从ico目录选择"""
         import random
         
-        # 检查ico目录（支持相对路径）
-        ico_dir = Path("../ico") if Path("../ico").exists() else Path("ico")
+        # 检查ico目录
+        if isinstance(self.root, tk.Toplevel):
+            # 在主程序中打开时使用主窗口的图标
+            return
+        ico_dir = PROJECT_DIR / "ico"
         
         if ico_dir.exists():
             # 扫描所有图标文件
@@ -69,7 +94,20 @@ class ExternalAppsManager:
         self.dir_var = tk.StringVar(value=str(self.external_dir))
         ttk.Entry(toolbar, textvariable=self.dir_var, width=50).pack(side=tk.LEFT, padx=5)
         ttk.Button(toolbar, text="浏览", command=self.browse_dir).pack(side=tk.LEFT, padx=2)
-        ttk.Button(toolbar, text="🔍 扫描程序", command=self.scan_apps, style='Accent.TButton').pack(side=tk.LEFT, padx=5)
+        self.scan_btn = ttk.Button(toolbar, text="🔍 扫描程序", command=self.scan_apps, style='Accent.TButton')
+        self.scan_btn.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(toolbar, text="WinPE 架构:").pack(side=tk.LEFT, padx=(15, 5))
+        self.arch_var = tk.StringVar(value="amd64")
+        arch_combo = ttk.Combobox(toolbar, textvariable=self.arch_var, values=["amd64", "x86", "arm64"],
+                                  width=8, state="readonly")
+        arch_combo.pack(side=tk.LEFT)
+        arch_combo.bind('<<ComboboxSelected>>', lambda e: self.update_all_rows())
+        
+        ttk.Label(toolbar, text="筛选:").pack(side=tk.LEFT, padx=(15, 5))
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add('write', self.schedule_filter)
+        ttk.Entry(toolbar, textvariable=self.filter_var, width=20).pack(side=tk.LEFT)
         
         ttk.Separator(self.root, orient=tk.HORIZONTAL).pack(fill=tk.X, pady=5)
         
@@ -93,7 +131,7 @@ class ExternalAppsManager:
         scrollbar_x = ttk.Scrollbar(table_frame, orient=tk.HORIZONTAL)
         
         # Treeview
-        columns = ('name', 'path', 'desktop', 'startmenu', 'path_env', 'target')
+        columns = ('name', 'path', 'arch', 'version', 'desktop', 'startmenu', 'path_env', 'target', 'note')
         self.tree = ttk.Treeview(table_frame, columns=columns, show='headings', 
                                  yscrollcommand=scrollbar_y.set,
                                  xscrollcommand=scrollbar_x.set,
@@ -102,18 +140,29 @@ class ExternalAppsManager:
         # 列标题
         self.tree.heading('name', text='程序名称')
         self.tree.heading('path', text='相对路径')
+        self.tree.heading('arch', text='架构')
+        self.tree.heading('version', text='版本')
         self.tree.heading('desktop', text='桌面')
         self.tree.heading('startmenu', text='开始菜单')
         self.tree.heading('path_env', text='命令行(PATH)')
         self.tree.heading('target', text='目标位置')
+        self.tree.heading('note', text='兼容性')
         
         # 列宽度
         self.tree.column('name', width=200)
         self.tree.column('path', width=250)
+        self.tree.column('arch', width=100)
+        self.tree.column('version', width=110)
         self.tree.column('desktop', width=80, anchor=tk.CENTER)
         self.tree.column('startmenu', width=100, anchor=tk.CENTER)
         self.tree.column('path_env', width=120, anchor=tk.CENTER)
         self.tree.column('target', width=200)
+        self.tree.column('note', width=260)
+        self.tree.tag_configure('warn', foreground='#c05000')
+        
+        # 点击列标题排序
+        for column in columns:
+            self.tree.heading(column, command=lambda c=column: self.sort_by(c))
         
         # 布局
         self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
@@ -172,61 +221,217 @@ class ExternalAppsManager:
             self.external_dir = Path(directory)
     
     def scan_apps(self):
-        """扫描程序"""
+        """扫描程序（后台线程遍历目录并读取 PE 文件头）"""
+        if self.scanning:
+            return
         self.external_dir = Path(self.dir_var.get())
         
         if not self.external_dir.exists():
             messagebox.showerror("错误", f"目录不存在:\n{self.external_dir}")
             return
         
-        # 清空列表
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        self.apps_data.clear()
+        self.scanning = True
+        self.scan_btn.config(state=tk.DISABLED)
+        self.status_label.config(text="正在扫描...")
+        
+        def worker():
+            try:
+                entries = scan_executables(self.external_dir, self.pe_cache)
+                error = None
+            except Exception as e:
+                entries, error = [], e
+            if self.closed:
+                return
+            try:
+                self.root.after(0, lambda: None if self.closed else self._on_scan_done(entries, error))
+            except (RuntimeError, tk.TclError):
+                pass  # 窗口已关闭
         
-        # 扫描可执行文件
-        exe_files = []
-        for ext in ['*.exe', '*.EXE', '*.bat', '*.cmd', '*.com']:
-            exe_files.extend(self.external_dir.rglob(ext))
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def _on_scan_done(self, entries, error):
+        """扫描完成（界面线程）"""
+        self.scanning = False
+        self.scan_btn.config(state=tk.NORMAL)
+        if error:
+            self.status_label.config(text="扫描失败")
+            messagebox.showerror("错误", f"扫描失败:\n{error}")
+            return
         
-        if not exe_files:
+        if not entries:
+            self.set_apps([])
+            self.status_label.config(text="未找到可执行文件")
             messagebox.showinfo("提示", "未找到可执行文件")
             return
         
         # 添加到列表
-        for exe_file in exe_files:
-            rel_path = exe_file.relative_to(self.external_dir)
-            app_info = {
-                'name': exe_file.name,
-                'path': str(rel_path),
+        records = []
+        for entry in entries:
+            info = entry.info
+            records.append({
+                'name': os.path.basename(entry.path),
+                'path': entry.relative,
                 'desktop': False,
                 'startmenu': False,
                 'path_env': False,
-                'target': 'Windows/System32'
-            }
-            self.apps_data.append(app_info)
-            self.add_tree_item(app_info)
-        
-        self.status_label.config(text=f"找到 {len(exe_files)} 个程序")
-        messagebox.showinfo("完成", f"扫描完成！\n找到 {len(exe_files)} 个可执行文件")
+                'target': 'Windows/System32',
+                'machine': info.machine,
+                'subsystem': info.subsystem,
+                'version': info.version,
+                'dotnet': info.is_dotnet,
+            })
+        self.set_apps(records)
+        
+        flagged = sum(1 for app in records if self.app_warnings(app))
+        message = f"扫描完成！\n找到 {len(entries)} 个可执行文件"
+        if flagged:
+            message += f"\n\n⚠️ {flagged} 个程序可能无法在 WinPE {self.arch_var.get()} 中运行（见“兼容性”列）"
+        messagebox.showinfo("完成", message)
     
-    def add_tree_item(self, app_info):
-        """添加到树形视图"""
-        self.tree.insert('', tk.END, values=(
+    @staticmethod
+    def app_pe_info(app_info):
+        """扫描时记录的 PE 信息（旧配置中没有时视为非 PE 文件）"""
+        return PEInfo(app_info.get('machine'), app_info.get('subsystem'), app_info.get('version'),
+                      app_info.get('dotnet', False), False)
+    
+    def app_warnings(self, app_info):
+        """程序在目标架构 WinPE 中的兼容性问题"""
+        return compatibility_warnings(self.app_pe_info(app_info), self.arch_var.get())
+    
+    # ------------------------------------------------------------------
+    # 列表模型：{行 ID: 程序记录}，单项修改只更新对应的行
+    # ------------------------------------------------------------------
+    
+    def row_values(self, app_info):
+        """程序记录对应的行内容和标签"""
+        warnings = self.app_warnings(app_info)
+        values = (
             app_info['name'],
             app_info['path'],
+            describe(self.app_pe_info(app_info)),
+            app_info.get('version') or '',
             '✓' if app_info['desktop'] else '',
             '✓' if app_info['startmenu'] else '',
             '✓' if app_info['path_env'] else '',
-            app_info['target']
-        ))
+            app_info['target'],
+            '⚠️ ' + '；'.join(warnings) if warnings else ''
+        )
+        return values, ('warn',) if warnings else ()
+    
+    def set_apps(self, records):
+        """替换全部程序记录（分批插入行，避免大目录卡住界面）"""
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
+        self.apps = {}
+        self.search_index = {}
+        for app_info in records:
+            self._next_id += 1
+            item_id = f"app{self._next_id}"
+            self.apps[item_id] = app_info
+            self.search_index[item_id] = f"{app_info['name']} {app_info['path']}".lower()
+        
+        self._load_generation += 1
+        self._insert_rows(list(self.apps), 0, self._load_generation)
     
-    def refresh_tree(self):
-        """刷新树形视图"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        for app_info in self.apps_data:
-            self.add_tree_item(app_info)
+    def on_destroy(self, event):
+        """窗口销毁：停止分批插入和筛选定时器"""
+        if event.widget is not self.root:
+            return
+        self.closed = True
+        self._load_generation += 1
+        if self._filter_job:
+            try:
+                self.root.after_cancel(self._filter_job)
+            except tk.TclError:
+                pass
+            self._filter_job = None
+    
+    def _insert_rows(self, item_ids, start, generation):
+        """插入一批行，剩余的在下一次空闲时继续"""
+        if generation != self._load_generation:
+            return  # 已重新加载或窗口已关闭
+        end = min(start + INSERT_BATCH, len(item_ids))
+        for item_id in item_ids[start:end]:
+            values, tags = self.row_values(self.apps[item_id])
+            self.tree.insert('', tk.END, iid=item_id, values=values, tags=tags)
+        
+        if end < len(item_ids):
+            self.status_label.config(text=f"正在加载 {end}/{len(item_ids)}...")
+            self.root.after(1, self._insert_rows, item_ids, end, generation)
+        else:
+            if self.sort_column or self.filter_var.get().strip():
+                self.apply_view()
+            self.update_status()
+    
+    def update_row(self, item_id):
+        """刷新单行"""
+        if item_id in self.apps and self.tree.exists(item_id):
+            values, tags = self.row_values(self.apps[item_id])
+            self.tree.item(item_id, values=values, tags=tags)
+    
+    def update_all_rows(self):
+        """就地刷新所有行（目标架构变化时），不重新插入"""
+        for item_id in self.apps:
+            self.update_row(item_id)
+        self.update_status()
+    
+    def update_status(self):
+        """状态栏统计"""
+        total = len(self.apps)
+        shown = len(self.tree.get_children())
+        flagged = sum(1 for app in self.apps.values() if self.app_warnings(app))
+        text = f"共 {total} 个程序"
+        if shown != total:
+            text += f"，显示 {shown} 个"
+        if flagged:
+            text += f"，{flagged} 个可能不兼容"
+        self.status_label.config(text=text)
+    
+    def sort_by(self, column):
+        """点击列标题排序（再次点击反向）"""
+        if self.sort_column == column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column, self.sort_reverse = column, False
+        self.apply_view()
+    
+    def schedule_filter(self, *args):
+        """筛选输入停顿后再刷新"""
+        if self._filter_job:
+            self.root.after_cancel(self._filter_job)
+        self._filter_job = self.root.after(200, self.apply_view)
+    
+    def apply_view(self):
+        """按筛选条件和排序列调整行的显示和顺序（移动已有的行，不重新插入）"""
+        self._filter_job = None
+        keyword = self.filter_var.get().strip().lower()
+        item_ids = [item_id for item_id in self.apps
+                    if self.tree.exists(item_id) and (not keyword or keyword in self.search_index[item_id])]
+        
+        if self.sort_column:
+            index = self.tree['columns'].index(self.sort_column)
+            
+            def sort_key(item_id):
+                value = self.row_values(self.apps[item_id])[0][index]
+                if self.sort_column == 'version':
+                    return tuple(int(part) if part.isdigit() else 0 for part in value.split('.'))
+                return value.lower()
+            
+            item_ids.sort(key=sort_key, reverse=self.sort_reverse)
+        
+        visible = set(item_ids)
+        hidden = [item_id for item_id in self.apps if item_id not in visible and self.tree.exists(item_id)]
+        if hidden:
+            self.tree.detach(*hidden)
+        for position, item_id in enumerate(item_ids):
+            self.tree.move(item_id, '', position)
+        self.update_status()
+    
+    def selected_item(self):
+        """选中行的 ID（没有选中时返回 None）"""
+        selection = self.tree.selection()
+        return selection[0] if selection and selection[0] in self.apps else None
     
     def edit_item(self, event):
         """双击编辑"""
@@ -234,45 +439,39 @@ class ExternalAppsManager:
     
     def edit_selected(self):
         """编辑选中项"""
-        selection = self.tree.selection()
-        if not selection:
+        item_id = self.selected_item()
+        if not item_id:
             return
         
-        item_id = selection[0]
-        index = self.tree.index(item_id)
-        app_info = self.apps_data[index]
-        
-        # 创建编辑对话框
-        EditDialog(self.root, app_info, self.refresh_tree)
+        # 创建编辑对话框（保存后只刷新这一行）
+        EditDialog(self.root, self.apps[item_id], lambda: self.update_row(item_id))
     
     def toggle_option(self, option):
         """切换选项"""
-        selection = self.tree.selection()
-        if not selection:
+        item_id = self.selected_item()
+        if not item_id:
             return
         
-        item_id = selection[0]
-        index = self.tree.index(item_id)
-        self.apps_data[index][option] = not self.apps_data[index][option]
-        self.refresh_tree()
+        self.apps[item_id][option] = not self.apps[item_id][option]
+        self.update_row(item_id)
     
     def remove_selected(self):
         """移除选中项"""
-        selection = self.tree.selection()
-        if not selection:
+        item_id = self.selected_item()
+        if not item_id:
             return
         
         if messagebox.askyesno("确认", "确定要从列表中移除吗？"):
-            item_id = selection[0]
-            index = self.tree.index(item_id)
-            del self.apps_data[index]
-            self.refresh_tree()
+            del self.apps[item_id]
+            del self.search_index[item_id]
+            self.tree.delete(item_id)
+            self.update_status()
     
     def save_config(self):
         """保存配置"""
         config_data = {
             'external_dir': str(self.external_dir),
-            'apps': self.apps_data,
+            'apps': list(self.apps.values()),
             'updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
         
@@ -296,21 +495,18 @@ class ExternalAppsManager:
             
             self.external_dir = Path(config_data['external_dir'])
             self.dir_var.set(str(self.external_dir))
-            self.apps_data = config_data['apps']
-            self.refresh_tree()
-            
-            self.status_label.config(text=f"已加载 {len(self.apps_data)} 个程序")
+            self.set_apps(config_data['apps'])
         except Exception as e:
             messagebox.showerror("错误", f"加载失败:\n{e}")
     
     def save_to_config(self):
         """直接保存到core/config.py"""
-        if not self.apps_data:
+        if not self.apps:
             messagebox.showwarning("警告", "没有程序数据，请先扫描程序")
             return
         
         # 统计要保存的程序
-        apps_to_save = [app for app in self.apps_data if app['desktop'] or app['startmenu'] or app['path_env']]
+        apps_to_save = [app for app in self.apps.values() if app['desktop'] or app['startmenu'] or app['path_env']]
         
         if not apps_to_save:
             messagebox.showwarning("警告", "没有勾选任何程序的放置选项")
@@ -320,7 +516,7 @@ class ExternalAppsManager:
             return
         
         try:
-            config_file = Path("../config.py")
+            config_file = PROJECT_DIR / "config.py"
             
             if not config_file.exists():
                 messagebox.showerror("错误", "找不到 config.py 文件")
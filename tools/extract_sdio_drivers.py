@@ -2,27 +2,114 @@
 """
 SDIO 驱动提取工具
 从 SDIO_Update 的 7z 压缩包中提取 RAID、存储、网卡驱动
+
+默认先读取压缩包目录、只解压 INF 并识别，再只解压识别出的驱动包所在目录
+（SDIO 驱动包中需要的驱动只占很小一部分）；无法读取压缩包目录时（只有 WinRAR）整包解压。
+
+多个压缩包以流水线方式处理：解压线程各自解压到独立的临时目录，
+解压完成后交给识别复制线程，解压与识别复制同时进行；
+临时目录按预计解压大小限制总占用，空间不足时后面的压缩包等待。
+
+识别结果保存在 inf_cache.db：压缩包未变化时整包跳过，INF 内容未变化时不再解压和解析。
 """
 
 import os
 import sys
-import re
+import time
+import queue
 import shutil
+import argparse
+import threading
 import subprocess
-from pathlib import Path
+from collections import namedtuple
+from pathlib import Path, PurePosixPath
 from colorama import init, Fore, Style
 
+from archive_extract import open_archive, select_members, ArchiveError
+from inf_classifier import classify_inf
+from inf_reader import read_inf
+from inf_cache import InfCache, crc_key
+
 init(autoreset=True)
 
 
+EXTRACT_WORKERS = 2         # 同时解压的压缩包数
+COPY_WORKERS = 2            # 识别复制线程数
+EXPANSION_ESTIMATE = 4      # 无法读取压缩包目录时，按压缩包大小的倍数估计解压大小
+TEMP_FREE_RATIO = 0.8       # 默认临时空间上限：临时目录所在磁盘可用空间的比例
+
+DRIVER_TYPES = ('raid', 'storage', 'network')
+
+# 第一阶段结果: 需要解压的 [(成员名, 相对路径)]、解压字节数、压缩包总字节数、{INF 路径: 驱动类型}
+ArchiveScan = namedtuple('ArchiveScan', 'selected selected_bytes total_bytes types')
+
+LOG_COLORS = {
+    'INFO': Fore.WHITE,
+    'SUCCESS': Fore.GREEN,
+    'WARNING': Fore.YELLOW,
+    'ERROR': Fore.RED,
+    'COMMAND': Fore.CYAN,
+    'SEPARATOR': Fore.CYAN,
+}
+
+
+def default_temp_budget(temp_dir):
+    """临时目录所在磁盘可用空间的 80%"""
+    try:
+        return int(shutil.disk_usage(temp_dir).free * TEMP_FREE_RATIO)
+    except OSError:
+        return 0
+
+
+class TempSpaceBudget:
+    """临时空间预算：解压前按预计大小占用，识别复制完成、临时目录删除后归还"""
+    
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.in_use = 0
+        self.peak = 0
+        self._cond = threading.Condition()
+    
+    def would_wait(self, nbytes):
+        with self._cond:
+            return self.in_use > 0 and self.in_use + nbytes > self.max_bytes
+    
+    def acquire(self, nbytes):
+        # 单个压缩包超过上限时，等其他压缩包全部处理完后单独解压
+        with self._cond:
+            while self.in_use > 0 and self.in_use + nbytes > self.max_bytes:
+                self._cond.wait()
+            self.in_use += nbytes
+            self.peak = max(self.peak, self.in_use)
+    
+    def release(self, nbytes):
+        with self._cond:
+            self.in_use -= nbytes
+            self._cond.notify_all()
+
+
 class SDIODriverExtractor:
     """SDIO 驱动提取器"""
     
-    def __init__(self, sdio_dir, output_dir, temp_dir="temp_extract"):
+    def __init__(self, sdio_dir, output_dir, temp_dir="temp_extract",
+                 extract_workers=EXTRACT_WORKERS, copy_workers=COPY_WORKERS, max_temp_bytes=None,
+                 selective=True, use_cache=True, cache_file=None):
         self.sdio_dir = Path(sdio_dir)
         self.output_dir = Path(output_dir)
         self.temp_dir = Path(temp_dir)
         
+        # 流水线设置（max_temp_bytes 为 None 时按临时目录可用空间）
+        self.extract_workers = extract_workers
+        self.copy_workers = copy_workers
+        self.max_temp_bytes = max_temp_bytes
+        self.selective = selective  # 先解压 INF，只解压识别出的驱动包
+        self.use_cache = use_cache  # 使用识别缓存（run() 中打开）
+        self.cache_file = cache_file
+        self.cache = None
+        self.stop_event = threading.Event()
+        self._stats_lock = threading.Lock()
+        self._print_lock = threading.Lock()
+        
         # 创建输出目录结构
         self.raid_dir = self.output_dir / "RAID"
         self.storage_dir = self.output_dir / "Storage"
@@ -33,54 +120,15 @@ class SDIODriverExtractor:
             'raid': 0,
             'storage': 0,
             'network': 0,
-            'total_processed': 0
+            'total_processed': 0,
+            'skipped_archives': 0,
+            'cached_infs': 0
         }
-        
-        # RAID 关键字
-        self.raid_keywords = [
-            r'\bRAID\b', r'\braid\b',
-            r'\bMegaRAID\b', r'\bMegaraid\b',
-            r'\bRAIDXpert\b', r'\braidxpert\b',
-            r'\bNVMe RAID\b', r'\bIntel.*RST\b',
-            r'\bRapidStorage\b', r'\bRST\b',
-            r'\bVROC\b', r'\bvroc\b',
-            r'\bSATA RAID\b', r'\bSAS RAID\b',
-            r'\bPerc\b', r'\bPERC\b',
-            r'\bLSI\b', r'\bAvago\b', r'\bBroadcom.*RAID\b',
-            r'\bAdaptec\b', r'\bMicrosemi\b',
-            r'\bHighPoint\b', r'\bRocketRAID\b',
-            r'\bPromise\b', r'\bFastTrak\b',
-            r'\bMarvell.*RAID\b', r'\bArrays\b'
-        ]
-        
-        # 存储控制器关键字
-        self.storage_keywords = [
-            r'\bAHCI\b', r'\bahci\b',
-            r'\bSATA\b', r'\bsata\b',
-            r'\bSAS\b', r'\bsas\b',
-            r'\bNVMe\b', r'\bnvme\b',
-            r'\bIDE\b', r'\bide\b',
-            r'\bATAPI\b', r'\batapi\b',
-            r'\bSCSI\b', r'\bscsi\b',
-            r'\bStorage Controller\b',
-            r'\bHost Controller\b',
-            r'\bDisk Controller\b'
-        ]
-        
-        # 网卡关键字
-        self.network_keywords = [
-            r'\bEthernet\b', r'\bethernet\b',
-            r'\bNetwork\b', r'\bnetwork\b',
-            r'\bLAN\b', r'\blan\b',
-            r'\bNIC\b', r'\bnic\b',
-            r'\bWireless\b', r'\bwireless\b',
-            r'\bWiFi\b', r'\bwifi\b',
-            r'\bWLAN\b', r'\bwlan\b',
-            r'\b802\.11\b',
-            r'\bGigabit\b', r'\b10GbE\b', r'\b10Gigabit\b',
-            r'\bIntel.*Network\b', r'\bRealtek.*Network\b',
-            r'\bBroadcom.*Network\b', r'\bQualcomm.*Network\b'
-        ]
+    
+    def print_log(self, message, tag='INFO'):
+        """输出日志（多个线程同时输出时逐行输出）"""
+        with self._print_lock:
+            print(f"{LOG_COLORS.get(tag, '')}{message}")
     
     def check_extractor(self):
         """检查解压工具是否可用"""
@@ -123,48 +171,39 @@ class SDIODriverExtractor:
                 result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='ignore')
             
             if result.returncode != 0:
-                print(f"{Fore.RED}[错误] 解压返回码: {result.returncode}")
+                self.print_log(f"[错误] 解压返回码: {result.returncode}", 'ERROR')
                 if result.stdout:
-                    print(f"{Fore.YELLOW}输出: {result.stdout[:500]}")
+                    self.print_log(f"输出: {result.stdout[:500]}", 'WARNING')
                 if result.stderr:
-                    print(f"{Fore.YELLOW}错误: {result.stderr[:500]}")
+                    self.print_log(f"错误: {result.stderr[:500]}", 'WARNING')
             
             return result.returncode == 0
         except Exception as e:
-            print(f"{Fore.RED}[错误] 解压失败: {e}")
+            self.print_log(f"[错误] 解压失败: {e}", 'ERROR')
             return False
     
-    def identify_driver_type(self, inf_file):
-        """识别驱动类型"""
-        try:
-            with open(inf_file, 'r', encoding='utf-16-le', errors='ignore') as f:
-                content = f.read()
-        except:
+    def identify_driver_type(self, inf_file, crc=None):
+        """识别驱动类型（有缓存时按内容查询，未命中再解析）"""
+        if self.cache is not None:
             try:
-                with open(inf_file, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-            except:
+                data = Path(inf_file).read_bytes()
+            except OSError:
                 return None
+            record, hit = self.cache.analyze_inf(data, crc)
+            if hit:
+                with self._stats_lock:
+                    self.stats['cached_infs'] += 1
+            return record.driver_type
         
-        # 检查 RAID（优先级最高）
-        for pattern in self.raid_keywords:
-            if re.search(pattern, content, re.IGNORECASE):
-                return 'raid'
-        
-        # 检查网卡
-        for pattern in self.network_keywords:
-            if re.search(pattern, content, re.IGNORECASE):
-                return 'network'
-        
-        # 检查存储控制器
-        for pattern in self.storage_keywords:
-            if re.search(pattern, content, re.IGNORECASE):
-                return 'storage'
+        try:
+            content = read_inf(inf_file)
+        except OSError:
+            return None
         
-        return None
+        return classify_inf(content)
     
     def copy_driver_package(self, inf_file, driver_type):
-        """复制整个驱动包"""
+        """复制整个驱动包，返回目标目录（失败时返回 None）"""
         # 获取驱动包的根目录（包含所有相关文件）
         driver_root = inf_file.parent
         
@@ -176,90 +215,302 @@ class SDIODriverExtractor:
         elif driver_type == 'network':
             target_base = self.network_dir
         else:
-            return False
+            return None
         
         # 创建目标目录（保持原有的目录结构）
         relative_path = driver_root.relative_to(self.temp_dir)
         target_dir = target_base / relative_path
         
         if target_dir.exists():
-            return True  # 已经复制过了
+            return target_dir  # 已经复制过了
         
         try:
             target_dir.parent.mkdir(parents=True, exist_ok=True)
             shutil.copytree(driver_root, target_dir, dirs_exist_ok=True)
-            return True
+            return target_dir
         except Exception as e:
-            print(f"{Fore.RED}[错误] 复制失败 {driver_root}: {e}")
+            self.print_log(f"[错误] 复制失败 {driver_root}: {e}", 'ERROR')
+            return None
+    
+    @property
+    def cache_mode(self):
+        """缓存中区分提取方式（筛选 / 整包）"""
+        return 'selective' if self.selective else 'full'
+    
+    def skip_unchanged(self, archive_path):
+        """压缩包与缓存记录一致且驱动仍在输出目录中时跳过，返回是否跳过"""
+        if self.cache is None:
             return False
+        try:
+            archive_stats = self.cache.archive_unchanged(archive_path, self.output_dir, self.cache_mode)
+        except OSError:
+            return False
+        if archive_stats is None:
+            return False
+        
+        with self._stats_lock:
+            for key in DRIVER_TYPES:
+                self.stats[key] += archive_stats.get(key, 0)
+            self.stats['total_processed'] += 1
+            self.stats['skipped_archives'] += 1
+        self.print_log(
+            f"[跳过] {archive_path.name} 未变化: RAID {archive_stats.get('raid', 0)} 个，"
+            f"存储 {archive_stats.get('storage', 0)} 个，网卡 {archive_stats.get('network', 0)} 个", 'SUCCESS')
+        return True
     
     def process_archive(self, archive_path, extractor_type, extractor_path):
-        """处理单个 7z 压缩包"""
-        archive_name = archive_path.name
-        print(f"\n{Fore.CYAN}{'='*60}")
-        print(f"{Fore.CYAN}[处理] {archive_name}")
-        print(f"{Fore.CYAN}{'='*60}")
-        
-        # 创建临时解压目录
+        """处理单个 7z 压缩包（识别、解压、复制依次完成）"""
+        if self.skip_unchanged(archive_path):
+            return
         extract_dir = self.temp_dir / archive_path.stem
-        extract_dir.mkdir(parents=True, exist_ok=True)
+        scan = self.scan_archive(archive_path, extract_dir) if self.selective else None
+        if self.extract_archive(archive_path, extractor_type, extractor_path, scan):
+            self.classify_archive(archive_path, extract_dir, scan)
+    
+    def scan_archive(self, archive_path, extract_dir):
+        """第一阶段：读取压缩包目录，只解压 INF 并识别驱动类型
         
-        # 解压
-        print(f"{Fore.YELLOW}[解压中] 正在解压...")
-        if not self.extract_7z(archive_path, extract_dir, extractor_type, extractor_path):
-            print(f"{Fore.RED}[失败] 解压失败")
-            return
+        返回 ArchiveScan（selected 为识别出的驱动包所在目录中尚未解压的文件）；
+        无法读取压缩包目录时返回 None（改为整包解压）。
+        缓存中已有同一 CRC 的 INF 不解压，直接使用缓存的识别结果。
+        """
+        try:
+            archive = open_archive(archive_path)
+        except (ArchiveError, OSError) as e:
+            self.print_log(f"[提示] {archive_path.name}: {e}，改为整包解压", 'WARNING')
+            return None
         
-        # 扫描 .inf 文件
-        print(f"{Fore.YELLOW}[扫描中] 正在识别驱动...")
-        inf_files = list(extract_dir.rglob("*.inf"))
+        try:
+            members = archive.members()
+            files, _, _ = select_members(members, include=['*'])
+            by_name = {m.name: m for m in members}
+            infs = [(name, rel) for name, rel in files if rel.lower().endswith('.inf')]
+            
+            # 缓存中已有的 INF 不解压
+            known = {}
+            pending = []
+            for name, rel in infs:
+                member = by_name.get(name)
+                record = None
+                if self.cache is not None and member is not None:
+                    record = self.cache.get_inf(crc_key(member.crc, member.size))
+                if record is None:
+                    pending.append((name, rel))
+                else:
+                    known[rel] = record.driver_type
+            if known:
+                with self._stats_lock:
+                    self.stats['cached_infs'] += len(known)
+            
+            self.print_log(f"[筛选] {archive_path.name}: 解压 {len(pending)} 个 INF"
+                           f"（{len(known)} 个使用缓存）...", 'INFO')
+            archive.extract(pending, extract_dir)
+            for name, rel in pending:
+                member = by_name.get(name)
+                known[rel] = self.identify_driver_type(extract_dir / rel, member.crc if member else None)
+            
+            types = {}
+            package_dirs = set()
+            for rel, driver_type in known.items():
+                types[extract_dir / rel] = driver_type
+                if driver_type in DRIVER_TYPES:
+                    package_dirs.add(str(PurePosixPath(rel).parent))
+        except (ArchiveError, OSError) as e:
+            archive.close()
+            self.print_log(f"[提示] {archive_path.name}: 无法只解压 INF（{e}），改为整包解压", 'WARNING')
+            shutil.rmtree(extract_dir, ignore_errors=True)
+            return None
+        archive.close()
+        
+        def in_package(rel):
+            parent = str(PurePosixPath(rel).parent)
+            return any(d == '.' or parent == d or parent.startswith(d + '/') for d in package_dirs)
+        
+        sizes = {m.name: m.size for m in members if not m.is_dir}
+        extracted = set(pending)
+        selected = [(name, rel) for name, rel in files
+                    if (name, rel) not in extracted and in_package(rel)]
+        selected_bytes = sum(sizes.get(name, 0) for name, _ in selected)
+        return ArchiveScan(selected, selected_bytes, sum(sizes.values()), types)
+    
+    def extract_archive(self, archive_path, extractor_type, extractor_path, scan=None):
+        """解压到压缩包自己的临时目录（有 scan 时只解压选中的驱动包），失败时返回 None"""
+        extract_dir = self.temp_dir / archive_path.stem
+        extract_dir.mkdir(parents=True, exist_ok=True)
         
+        start = time.perf_counter()
+        if scan is not None:
+            self.print_log(f"[解压中] {archive_path.name}: {len(scan.selected)} 个文件，"
+                           f"{scan.selected_bytes / 1048576:.1f} MB / 共 {scan.total_bytes / 1048576:.1f} MB", 'INFO')
+            try:
+                archive = open_archive(archive_path)
+                try:
+                    archive.extract(scan.selected, extract_dir)
+                finally:
+                    archive.close()
+                success = True
+            except (ArchiveError, OSError) as e:
+                self.print_log(f"[错误] {e}", 'ERROR')
+                success = False
+        else:
+            self.print_log(f"[解压中] {archive_path.name}", 'INFO')
+            success = self.extract_7z(archive_path, extract_dir, extractor_type, extractor_path)
+        
+        if not success:
+            self.print_log(f"[失败] {archive_path.name} 解压失败", 'ERROR')
+            shutil.rmtree(extract_dir, ignore_errors=True)
+            return None
+        self.print_log(f"[解压完成] {archive_path.name}（{time.perf_counter() - start:.1f} 秒）", 'INFO')
+        return extract_dir
+    
+    def classify_archive(self, archive_path, extract_dir, scan=None):
+        """识别解压目录中的驱动并复制，完成后删除临时目录（有 scan 时使用第一阶段的识别结果）"""
+        self.print_log(f"[复制中] {archive_path.name}: 正在识别并复制驱动...", 'INFO')
         archive_stats = {'raid': 0, 'storage': 0, 'network': 0, 'other': 0}
+        packages = set()
         
-        for inf_file in inf_files:
-            driver_type = self.identify_driver_type(inf_file)
-            
-            if driver_type in ['raid', 'storage', 'network']:
-                if self.copy_driver_package(inf_file, driver_type):
+        if scan is not None:
+            classified = scan.types.items()
+        else:
+            classified = ((inf_file, self.identify_driver_type(inf_file))
+                          for inf_file in extract_dir.rglob("*.inf"))
+        
+        for inf_file, driver_type in classified:
+            if self.stop_event.is_set():
+                break
+            if driver_type in DRIVER_TYPES:
+                target_dir = self.copy_driver_package(inf_file, driver_type)
+                if target_dir:
                     archive_stats[driver_type] += 1
-                    self.stats[driver_type] += 1
+                    packages.add(target_dir.relative_to(self.output_dir).as_posix())
             else:
                 archive_stats['other'] += 1
         
-        # 显示统计
-        print(f"{Fore.GREEN}[完成] 本包统计:")
-        print(f"  ├── RAID 驱动: {archive_stats['raid']} 个")
-        print(f"  ├── 存储驱动: {archive_stats['storage']} 个")
-        print(f"  ├── 网卡驱动: {archive_stats['network']} 个")
-        print(f"  └── 其他驱动: {archive_stats['other']} 个")
+        with self._stats_lock:
+            for key in DRIVER_TYPES:
+                self.stats[key] += archive_stats[key]
+            self.stats['total_processed'] += 1
+        
+        # 同一压缩包的统计一次输出，避免与其他压缩包的日志交错
+        self.print_log(
+            f"[完成] {archive_path.name}: RAID {archive_stats['raid']} 个，"
+            f"存储 {archive_stats['storage']} 个，网卡 {archive_stats['network']} 个，"
+            f"其他 {archive_stats['other']} 个", 'SUCCESS')
         
-        # 清理临时文件
+        # 完整处理的压缩包才记录，下次未变化时跳过
+        if self.cache is not None and not self.stop_event.is_set():
+            self.cache.record_archive(archive_path, self.output_dir, self.cache_mode, packages, archive_stats)
+        
+        shutil.rmtree(extract_dir, ignore_errors=True)
+    
+    def estimate_unpacked_size(self, archive_path):
+        """估计解压后的大小（读取压缩包目录，失败时按压缩率估算）"""
         try:
-            shutil.rmtree(extract_dir)
-        except:
-            pass
+            archive = open_archive(archive_path)
+            try:
+                return sum(m.size for m in archive.members() if not m.is_dir)
+            finally:
+                archive.close()
+        except (ArchiveError, OSError):
+            return archive_path.stat().st_size * EXPANSION_ESTIMATE
+    
+    def extract_all(self, archives, extractor_type, extractor_path):
+        """流水线处理多个压缩包
+        
+        解压线程（extract_workers 个）各自解压到独立的临时目录（selective 时先解压 INF 识别，再只解压选中的驱动包），解压完成后放入队列，
+        由识别复制线程（copy_workers 个）处理；一个压缩包解压的同时，另一个压缩包在识别复制。
+        解压前按预计大小占用临时空间预算，超出预算时等待其他压缩包处理完并删除临时目录。
+        """
+        budget = TempSpaceBudget(self.max_temp_bytes or default_temp_budget(self.temp_dir))
+        self.print_log(f"[流水线] 解压线程 {self.extract_workers} 个，识别复制线程 {self.copy_workers} 个，"
+                       f"临时空间上限 {budget.max_bytes / 1024 ** 3:.1f} GB", 'INFO')
+        
+        pending = queue.Queue()
+        for index, archive in enumerate(archives, 1):
+            pending.put((index, archive))
+        extracted = queue.Queue()
+        total = len(archives)
+        
+        def extract_loop():
+            while not self.stop_event.is_set():
+                try:
+                    index, archive = pending.get_nowait()
+                except queue.Empty:
+                    return
+                self.print_log(f"【{index}/{total}】 处理: {archive.name}", 'COMMAND')
+                if self.skip_unchanged(archive):
+                    continue
+                # INF 很小，第一阶段不占用预算；第二阶段按选中的文件大小占用
+                scan = None
+                if self.selective:
+                    scan = self.scan_archive(archive, self.temp_dir / archive.stem)
+                reserved = scan.selected_bytes if scan else self.estimate_unpacked_size(archive)
+                if budget.would_wait(reserved):
+                    self.print_log(f"[等待] {archive.name} 需要约 {reserved / 1024 ** 3:.1f} GB 临时空间，"
+                                   f"等待其他压缩包处理完成", 'WARNING')
+                budget.acquire(reserved)
+                extract_dir = None
+                try:
+                    extract_dir = self.extract_archive(archive, extractor_type, extractor_path, scan)
+                finally:
+                    if extract_dir is None:
+                        budget.release(reserved)
+                    else:
+                        extracted.put((archive, extract_dir, scan, reserved))
+        
+        def classify_loop():
+            while True:
+                item = extracted.get()
+                if item is None:
+                    return
+                archive, extract_dir, scan, reserved = item
+                try:
+                    self.classify_archive(archive, extract_dir, scan)
+                except Exception as e:
+                    self.print_log(f"[错误] {archive.name} 处理失败: {e}", 'ERROR')
+                    shutil.rmtree(extract_dir, ignore_errors=True)
+                finally:
+                    budget.release(reserved)
+        
+        extractors = [threading.Thread(target=extract_loop, daemon=True)
+                      for _ in range(max(1, self.extract_workers))]
+        copiers = [threading.Thread(target=classify_loop, daemon=True)
+                   for _ in range(max(1, self.copy_workers))]
+        for thread in extractors + copiers:
+            thread.start()
+        for thread in extractors:
+            thread.join()
+        for _ in copiers:
+            extracted.put(None)
+        for thread in copiers:
+            thread.join()
+        return budget.peak
+    
+    def cancel(self):
+        """停止处理（正在解压的压缩包会继续完成，尚未开始的跳过）"""
+        self.stop_event.set()
     
     def run(self):
         """执行提取流程"""
-        print(f"{Fore.CYAN}{'='*60}")
-        print(f"{Fore.CYAN}SDIO 驱动提取工具")
-        print(f"{Fore.CYAN}{'='*60}")
+        self.print_log("="*60, 'SEPARATOR')
+        self.print_log("SDIO 驱动提取工具", 'SUCCESS')
+        self.print_log("="*60, 'SEPARATOR')
         
         # 检查解压工具
-        print(f"\n{Fore.YELLOW}[检查] 正在检查解压工具...")
+        self.print_log("[检查] 正在检查解压工具...", 'INFO')
         extractor_type, extractor_path = self.check_extractor()
         if not extractor_type:
-            print(f"{Fore.RED}[错误] 未找到解压工具（WinRAR 或 7-Zip）")
-            print(f"{Fore.YELLOW}请安装以下任意一个:")
-            print(f"  - WinRAR: https://www.winrar.com/")
-            print(f"  - 7-Zip: https://www.7-zip.org/")
+            self.print_log("[错误] 未找到解压工具（WinRAR 或 7-Zip）", 'ERROR')
+            self.print_log("请安装以下任意一个:", 'WARNING')
+            self.print_log("  - WinRAR: https://www.winrar.com/", 'INFO')
+            self.print_log("  - 7-Zip: https://www.7-zip.org/", 'INFO')
             return False
         
-        print(f"{Fore.GREEN}[通过] 使用 {extractor_type.upper()}: {extractor_path}")
+        self.print_log(f"[通过] 使用 {extractor_type.upper()}: {extractor_path}", 'SUCCESS')
         
         # 检查源目录
         if not self.sdio_dir.exists():
-            print(f"{Fore.RED}[错误] 源目录不存在: {self.sdio_dir}")
+            self.print_log(f"[错误] 源目录不存在: {self.sdio_dir}", 'ERROR')
             return False
         
         # 创建目录
@@ -268,10 +519,18 @@ class SDIODriverExtractor:
         self.network_dir.mkdir(parents=True, exist_ok=True)
         self.temp_dir.mkdir(parents=True, exist_ok=True)
         
-        print(f"\n{Fore.CYAN}[配置]")
-        print(f"  源目录: {self.sdio_dir}")
-        print(f"  输出目录: {self.output_dir}")
-        print(f"  临时目录: {self.temp_dir}")
+        self.print_log("[配置]", 'INFO')
+        self.print_log(f"  源目录: {self.sdio_dir}", 'INFO')
+        self.print_log(f"  输出目录: {self.output_dir}", 'INFO')
+        self.print_log(f"  临时目录: {self.temp_dir}", 'INFO')
+        
+        if self.use_cache:
+            try:
+                self.cache = InfCache(self.cache_file)
+                self.print_log(f"  识别缓存: {self.cache.path}", 'INFO')
+            except Exception as e:
+                self.print_log(f"[警告] 无法打开识别缓存，本次不使用缓存: {e}", 'WARNING')
+                self.cache = None
         
         # 获取所有 7z 文件
         archives = list(self.sdio_dir.glob("*.7z"))
@@ -291,58 +550,71 @@ class SDIODriverExtractor:
                     break
         
         if not target_archives:
-            print(f"{Fore.RED}[错误] 未找到目标驱动包")
+            self.print_log("[错误] 未找到目标驱动包", 'ERROR')
             return False
         
-        print(f"\n{Fore.YELLOW}[信息] 找到 {len(target_archives)} 个目标驱动包")
+        self.print_log(f"[信息] 找到 {len(target_archives)} 个目标驱动包", 'INFO')
         for archive in target_archives:
-            print(f"  - {archive.name}")
-        
-        print(f"\n{Fore.GREEN}[开始] 开始提取驱动...")
+            self.print_log(f"  - {archive.name}", 'INFO')
         
-        # 处理每个压缩包
-        for i, archive in enumerate(target_archives, 1):
-            print(f"\n{Fore.CYAN}【{i}/{len(target_archives)}】")
-            self.process_archive(archive, extractor_type, extractor_path)
-            self.stats['total_processed'] += 1
+        self.print_log("[开始] 开始提取驱动...", 'SUCCESS')
+        start = time.perf_counter()
+        try:
+            peak = self.extract_all(target_archives, extractor_type, extractor_path)
+        finally:
+            if self.cache is not None:
+                self.cache.close()
+                self.cache = None
+        elapsed = time.perf_counter() - start
         
         # 清理临时目录
         try:
             shutil.rmtree(self.temp_dir)
-            print(f"\n{Fore.GREEN}[清理] 已删除临时文件")
+            self.print_log("[清理] 已删除临时文件", 'SUCCESS')
         except:
-            print(f"\n{Fore.YELLOW}[警告] 无法删除临时目录: {self.temp_dir}")
+            self.print_log(f"[警告] 无法删除临时目录: {self.temp_dir}", 'WARNING')
         
         # 显示总统计
-        print(f"\n{Fore.GREEN}{'='*60}")
-        print(f"{Fore.GREEN}[完成] 驱动提取完成")
-        print(f"{Fore.GREEN}{'='*60}")
-        print(f"{Fore.WHITE}[总计]")
-        print(f"  ├── 处理的压缩包: {self.stats['total_processed']} 个")
-        print(f"  ├── RAID 驱动: {self.stats['raid']} 个")
-        print(f"  ├── 存储驱动: {self.stats['storage']} 个")
-        print(f"  └── 网卡驱动: {self.stats['network']} 个")
-        print(f"\n{Fore.CYAN}[输出目录]")
-        print(f"  ├── RAID: {self.raid_dir}")
-        print(f"  ├── 存储: {self.storage_dir}")
-        print(f"  └── 网卡: {self.network_dir}")
-        
-        return True
+        self.print_log("="*60, 'SEPARATOR')
+        self.print_log("[完成] 驱动提取完成" if not self.stop_event.is_set() else "[停止] 驱动提取已停止",
+                       'SUCCESS' if not self.stop_event.is_set() else 'WARNING')
+        self.print_log("="*60, 'SEPARATOR')
+        self.print_log("[总计]", 'INFO')
+        self.print_log(f"  ├── 处理的压缩包: {self.stats['total_processed']} 个", 'INFO')
+        self.print_log(f"  ├── RAID 驱动: {self.stats['raid']} 个", 'INFO')
+        self.print_log(f"  ├── 存储驱动: {self.stats['storage']} 个", 'INFO')
+        self.print_log(f"  ├── 网卡驱动: {self.stats['network']} 个", 'INFO')
+        self.print_log(f"  ├── 未变化跳过: {self.stats['skipped_archives']} 个压缩包，"
+                       f"缓存命中 {self.stats['cached_infs']} 个 INF", 'INFO')
+        self.print_log(f"  └── 耗时: {elapsed:.1f} 秒，临时空间峰值（预计）{peak / 1024 ** 3:.1f} GB", 'INFO')
+        self.print_log("[输出目录]", 'INFO')
+        self.print_log(f"  ├── RAID: {self.raid_dir}", 'INFO')
+        self.print_log(f"  ├── 存储: {self.storage_dir}", 'INFO')
+        self.print_log(f"  └── 网卡: {self.network_dir}", 'INFO')
+        
+        return not self.stop_event.is_set()
 
 
 def main():
-    if len(sys.argv) < 2:
-        print(f"{Fore.YELLOW}使用方法:")
-        print(f"  python extract_sdio_drivers.py <SDIO驱动目录> [输出目录]")
-        print(f"\n{Fore.CYAN}示例:")
-        print(f'  python extract_sdio_drivers.py "外置程序\\SDIO_Update\\drivers"')
-        print(f'  python extract_sdio_drivers.py "外置程序\\SDIO_Update\\drivers" "drive\\SDIO_Update"')
-        return 1
+    parser = argparse.ArgumentParser(
+        description="从 SDIO 驱动包中提取 RAID、存储、网卡驱动",
+        epilog='示例: python extract_sdio_drivers.py "外置程序\\SDIO_Update\\drivers" "drive\\SDIO_Update"')
+    parser.add_argument("sdio_dir", help="SDIO 驱动目录（包含 DP_*.7z）")
+    parser.add_argument("output_dir", nargs="?", default="drive\\SDIO_Update", help="输出目录")
+    parser.add_argument("--temp", default="temp_extract", help="临时解压目录")
+    parser.add_argument("--extract-workers", type=int, default=EXTRACT_WORKERS, help="同时解压的压缩包数")
+    parser.add_argument("--copy-workers", type=int, default=COPY_WORKERS, help="识别复制线程数")
+    parser.add_argument("--full", action="store_true", help="整包解压（不先识别 INF）")
+    parser.add_argument("--no-cache", action="store_true", help="不使用识别缓存（全部重新解压识别）")
+    parser.add_argument("--cache-file", help="识别缓存文件（默认 tools/inf_cache.db）")
+    parser.add_argument("--max-temp-gb", type=float, help="临时目录最多占用的空间（GB，默认为可用空间的 80%%）")
+    args = parser.parse_args()
     
-    sdio_dir = sys.argv[1]
-    output_dir = sys.argv[2] if len(sys.argv) > 2 else "drive\\SDIO_Update"
-    
-    extractor = SDIODriverExtractor(sdio_dir, output_dir)
+    max_temp_bytes = int(args.max_temp_gb * 1024 ** 3) if args.max_temp_gb else None
+    extractor = SDIODriverExtractor(args.sdio_dir, args.output_dir, args.temp,
+                                    extract_workers=args.extract_workers, copy_workers=args.copy_workers,
+                                    max_temp_bytes=max_temp_bytes, selective=not args.full,
+                                    use_cache=not args.no_cache, cache_file=args.cache_file)
     success = extractor.run()
     
     return 0 if success else 1
@@ -350,4 +622,3 @@ def main():
 
 if __name__ == "__main__":
     sys.exit(main())
-
@@ -14,6 +14,11 @@ from tkinter import ttk, filedialog, scrolledtext, messagebox
 from extract_sdio_drivers import SDIODriverExtractor
 
 
+# 工具目录和项目根目录（不依赖当前工作目录，便于在主程序进程内打开）
+TOOLS_DIR = Path(__file__).parent.absolute()
+PROJECT_DIR = TOOLS_DIR.parent
+
+
 class SDIODriverExtractorGUI:
     """SDIO 驱动提取工具 GUI"""
     
@@ -34,13 +39,34 @@ class SDIODriverExtractorGUI:
         self.is_running = False
         self.extractor = None
         self.output_queue = queue.Queue()
+        self._monitor_job = None
+        self.closed = False
         
         # 创建界面
         self.create_widgets()
         
+        # 关闭窗口时停止提取和输出监控（在主程序中打开时窗口关闭后进程仍在运行）
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.bind("<Destroy>", self.on_destroy, add="+")
+        
         # 启动输出监控
         self.monitor_output()
     
+    def set_icon(self):
+        """设置图标"""
+        import random
+        if isinstance(self.root, tk.Toplevel):
+            # 在主程序中打开时使用主窗口的图标
+            return
+        ico_dir = PROJECT_DIR / "ico"
+        if ico_dir.exists():
+            image_files = list(ico_dir.glob("*.ico"))
+            if image_files:
+                try:
+                    self.root.iconbitmap(str(random.choice(image_files)))
+                except:
+                    pass
+    
     def create_widgets(self):
         """创建界面组件"""
         # 主容器
@@ -243,35 +269,72 @@ class SDIODriverExtractorGUI:
         thread.start()
     
     def stop_extraction(self):
-        """停止提取（暂不实现完整的中断逻辑）"""
+        """停止提取（正在解压的压缩包会继续完成，尚未开始的跳过）"""
         if messagebox.askyesno("确认", "确定要停止吗？\n注意：当前正在处理的文件会继续完成。"):
             self.log("[警告] 用户请求停止（等待当前任务完成）", 'WARNING')
             self.is_running = False
+            if self.extractor is not None:
+                self.extractor.cancel()
+    
+    def on_close(self):
+        """关闭窗口（提取中则先确认）"""
+        if self.is_running and not messagebox.askyesno(
+                "确认", "驱动提取尚未完成，确定要停止并关闭吗？\n注意：当前正在解压的压缩包会继续完成。",
+                parent=self.root):
+            return
+        self.root.destroy()
+    
+    def on_destroy(self, event):
+        """窗口销毁：停止提取，取消输出监控"""
+        if event.widget is not self.root:
+            return
+        self.closed = True
+        self.is_running = False
+        if self.extractor is not None:
+            self.extractor.cancel()
+        if self._monitor_job is not None:
+            try:
+                self.root.after_cancel(self._monitor_job)
+            except tk.TclError:
+                pass
+            self._monitor_job = None
+    
+    def _post(self, callback, *args):
+        """工作线程中把界面更新交给界面线程（窗口已关闭时丢弃）"""
+        if self.closed:
+            return
+        try:
+            self.root.after(0, lambda: None if self.closed else callback(*args))
+        except (RuntimeError, tk.TclError):
+            pass
     
     def run_extraction(self, source, output, temp):
         """运行提取任务"""
         try:
             # 创建自定义的 Extractor，重定向输出
             extractor = CustomSDIOExtractor(source, output, temp, self.output_queue)
+            self.extractor = extractor
+            if self.closed:
+                extractor.cancel()  # 创建提取器前窗口已关闭
             
             # 运行提取
             success = extractor.run()
             
             # 更新统计
-            self.root.after(0, self.update_stats, extractor.stats)
+            self._post(self.update_stats, extractor.stats)
             
             if success:
                 self.output_queue.put(('SUCCESS', '[完成] 驱动提取成功完成！'))
-                self.root.after(0, self.update_status, "完成", "任务成功")
+                self._post(self.update_status, "完成", "任务成功")
             else:
                 self.output_queue.put(('ERROR', '[失败] 驱动提取未完成'))
-                self.root.after(0, self.update_status, "失败", "任务失败")
+                self._post(self.update_status, "失败", "任务失败")
                 
         except Exception as e:
             self.output_queue.put(('ERROR', f'[异常] {str(e)}'))
-            self.root.after(0, self.update_status, "错误", str(e))
+            self._post(self.update_status, "错误", str(e))
         finally:
-            self.root.after(0, self.finish_extraction)
+            self._post(self.finish_extraction)
     
     def finish_extraction(self):
         """完成提取"""
@@ -283,6 +346,10 @@ class SDIODriverExtractorGUI:
     
     def monitor_output(self):
         """监控输出队列"""
+        self._monitor_job = None
+        if self.closed:
+            return
+        
         try:
             while True:
                 tag, message = self.output_queue.get_nowait()
@@ -291,7 +358,7 @@ class SDIODriverExtractorGUI:
             pass
         
         # 继续监控
-        self.root.after(100, self.monitor_output)
+        self._monitor_job = self.root.after(100, self.monitor_output)
 
 
 class CustomSDIOExtractor(SDIODriverExtractor):
@@ -304,143 +371,6 @@ class CustomSDIOExtractor(SDIODriverExtractor):
     def print_log(self, message, tag='INFO'):
         """输出日志到队列"""
         self.output_queue.put((tag, message))
-    
-    def run(self):
-        """执行提取流程（重写以重定向输出）"""
-        self.print_log("="*60, 'SEPARATOR')
-        self.print_log("SDIO 驱动提取工具", 'SUCCESS')
-        self.print_log("="*60, 'SEPARATOR')
-        
-        # 检查解压工具
-        self.print_log("[检查] 正在检查解压工具...", 'INFO')
-        extractor_type, extractor_path = self.check_extractor()
-        if not extractor_type:
-            self.print_log("[错误] 未找到解压工具（WinRAR 或 7-Zip）", 'ERROR')
-            self.print_log("请安装以下任意一个:", 'WARNING')
-            self.print_log("  - WinRAR: https://www.winrar.com/", 'INFO')
-            self.print_log("  - 7-Zip: https://www.7-zip.org/", 'INFO')
-            return False
-        
-        self.print_log(f"[通过] 使用 {extractor_type.upper()}: {extractor_path}", 'SUCCESS')
-        
-        # 检查源目录
-        if not self.sdio_dir.exists():
-            self.print_log(f"[错误] 源目录不存在: {self.sdio_dir}", 'ERROR')
-            return False
-        
-        # 创建目录
-        self.raid_dir.mkdir(parents=True, exist_ok=True)
-        self.storage_dir.mkdir(parents=True, exist_ok=True)
-        self.network_dir.mkdir(parents=True, exist_ok=True)
-        self.temp_dir.mkdir(parents=True, exist_ok=True)
-        
-        self.print_log("[配置]", 'INFO')
-        self.print_log(f"  源目录: {self.sdio_dir}", 'INFO')
-        self.print_log(f"  输出目录: {self.output_dir}", 'INFO')
-        self.print_log(f"  临时目录: {self.temp_dir}", 'INFO')
-        
-        # 获取所有 7z 文件
-        archives = list(self.sdio_dir.glob("*.7z"))
-        
-        # 过滤：只处理关键的驱动包
-        target_archives = []
-        target_patterns = [
-            'DP_MassStorage',  # 大容量存储（包含 RAID）
-            'DP_LAN',          # 网卡驱动
-            'DP_Chipset'       # 芯片组（可能包含存储控制器）
-        ]
-        
-        for archive in archives:
-            for pattern in target_patterns:
-                if pattern in archive.name:
-                    target_archives.append(archive)
-                    break
-        
-        if not target_archives:
-            self.print_log("[错误] 未找到目标驱动包", 'ERROR')
-            return False
-        
-        self.print_log(f"[信息] 找到 {len(target_archives)} 个目标驱动包", 'INFO')
-        for archive in target_archives:
-            self.print_log(f"  - {archive.name}", 'INFO')
-        
-        self.print_log("[开始] 开始提取驱动...", 'SUCCESS')
-        
-        # 处理每个压缩包
-        for i, archive in enumerate(target_archives, 1):
-            self.print_log(f"【{i}/{len(target_archives)}】 处理: {archive.name}", 'COMMAND')
-            self.process_archive_custom(archive, extractor_type, extractor_path)
-            self.stats['total_processed'] += 1
-        
-        # 清理临时目录
-        try:
-            import shutil
-            shutil.rmtree(self.temp_dir)
-            self.print_log("[清理] 已删除临时文件", 'SUCCESS')
-        except:
-            self.print_log(f"[警告] 无法删除临时目录: {self.temp_dir}", 'WARNING')
-        
-        # 显示总统计
-        self.print_log("="*60, 'SEPARATOR')
-        self.print_log("[完成] 驱动提取完成", 'SUCCESS')
-        self.print_log("="*60, 'SEPARATOR')
-        self.print_log("[总计]", 'INFO')
-        self.print_log(f"  ├── 处理的压缩包: {self.stats['total_processed']} 个", 'INFO')
-        self.print_log(f"  ├── RAID 驱动: {self.stats['raid']} 个", 'INFO')
-        self.print_log(f"  ├── 存储驱动: {self.stats['storage']} 个", 'INFO')
-        self.print_log(f"  └── 网卡驱动: {self.stats['network']} 个", 'INFO')
-        self.print_log("[输出目录]", 'INFO')
-        self.print_log(f"  ├── RAID: {self.raid_dir}", 'INFO')
-        self.print_log(f"  ├── 存储: {self.storage_dir}", 'INFO')
-        self.print_log(f"  └── 网卡: {self.network_dir}", 'INFO')
-        
-        return True
-    
-    def process_archive_custom(self, archive_path, extractor_type, extractor_path):
-        """处理单个 7z 压缩包"""
-        import shutil
-        from pathlib import Path
-        
-        archive_name = archive_path.name
-        
-        # 创建临时解压目录
-        extract_dir = self.temp_dir / archive_path.stem
-        extract_dir.mkdir(parents=True, exist_ok=True)
-        
-        # 解压
-        self.print_log(f"  [解压中] 正在解压...", 'INFO')
-        if not self.extract_7z(archive_path, extract_dir, extractor_type, extractor_path):
-            self.print_log(f"  [失败] 解压失败", 'ERROR')
-            return
-        
-        # 扫描 .inf 文件
-        self.print_log(f"  [扫描中] 正在识别驱动...", 'INFO')
-        inf_files = list(extract_dir.rglob("*.inf"))
-        
-        archive_stats = {'raid': 0, 'storage': 0, 'network': 0, 'other': 0}
-        
-        for inf_file in inf_files:
-            driver_type = self.identify_driver_type(inf_file)
-            
-            if driver_type in ['raid', 'storage', 'network']:
-                if self.copy_driver_package(inf_file, driver_type):
-                    archive_stats[driver_type] += 1
-                    self.stats[driver_type] += 1
-            else:
-                archive_stats['other'] += 1
-        
-        # 显示统计
-        self.print_log(f"  [完成] 本包统计:", 'SUCCESS')
-        self.print_log(f"    ├── RAID 驱动: {archive_stats['raid']} 个", 'INFO')
-        self.print_log(f"    ├── 存储驱动: {archive_stats['storage']} 个", 'INFO')
-        self.print_log(f"    ├── 网卡驱动: {archive_stats['network']} 个", 'INFO')
-        self.print_log(f"    └── 其他驱动: {archive_stats['other']} 个", 'INFO')
-        
-        # 清理临时文件
-        try:
-            shutil.rmtree(extract_dir)
-        except:
-            pass
 
 
 def main():
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+SDIO 驱动识别缓存（SQLite）
+每周更新 SDIO 时大部分驱动包没有变化，缓存两级结果使提取变为增量：
+- 压缩包：按 (文件名, 大小, 修改时间, 输出目录, 提取方式) 记录上次提取的驱动包目录和统计，
+  压缩包未变且输出目录中的驱动仍在时整包跳过
+- INF：按内容（压缩包目录中的 CRC32 + 大小，或解压后的 SHA-256）记录驱动类型、
+  设备类、DriverVer、架构和硬件 ID，已识别过的 INF 不再解压和解析
+
+两种记录都保存识别规则的指纹（inf_classifier.classifier_fingerprint()），
+识别规则修改后旧记录视为未命中，重新识别
+
+缓存文件默认为 tools/inf_cache.db
+
+命令行:
+    python tools/inf_cache.py stats
+    python tools/inf_cache.py clear
+"""
+
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+from collections import namedtuple
+from pathlib import Path
+
+from inf_reader import decode_inf
+from inf_classifier import (parse_inf, classify_sections, version_class, hardware_ids,
+                            driver_version, architectures, classifier_fingerprint)
+
+TOOLS_DIR = Path(__file__).parent.absolute()
+DEFAULT_CACHE_FILE = TOOLS_DIR / "inf_cache.db"
+
+
+# 表结构变化时加 1（旧的缓存文件整个重建）
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS archives (
+    name          TEXT NOT NULL,
+    output_dir    TEXT NOT NULL,
+    mode          TEXT NOT NULL,
+    classifier    TEXT NOT NULL,
+    size          INTEGER NOT NULL,
+    mtime_ns      INTEGER NOT NULL,
+    packages      TEXT NOT NULL,
+    stats         TEXT NOT NULL,
+    processed     REAL NOT NULL,
+    PRIMARY KEY (name, output_dir, mode)
+);
+CREATE TABLE IF NOT EXISTS infs (
+    content_key   TEXT PRIMARY KEY,
+    classifier    TEXT NOT NULL,
+    driver_type   TEXT,
+    inf_class     TEXT,
+    driver_ver    TEXT,
+    arch          TEXT,
+    hardware_ids  TEXT,
+    updated       REAL NOT NULL
+);
+"""
+
+# INF 识别结果: 驱动类型（None 为其他）、设备类、DriverVer、架构列表、硬件 ID 列表
+InfRecord = namedtuple('InfRecord', 'driver_type inf_class driver_ver arch hardware_ids')
+
+
+def crc_key(crc, size):
+    """压缩包目录中的 CRC32 + 大小"""
+    return f"crc:{crc.upper()}:{size}" if crc else None
+
+
+def sha256_key(data):
+    return "sha256:" + hashlib.sha256(data).hexdigest()
+
+
+def analyze_inf_bytes(data):
+    """解码、解析并识别 INF，返回 InfRecord"""
+    sections = parse_inf(decode_inf(data))
+    inf_class, _ = version_class(sections)
+    return InfRecord(classify_sections(sections), inf_class, driver_version(sections),
+                     architectures(sections), hardware_ids(sections))
+
+
+class InfCache:
+    """驱动识别缓存（多线程共用一个连接）"""
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else DEFAULT_CACHE_FILE
+        self.classifier = classifier_fingerprint()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        with self._conn:
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                self._conn.execute("DROP TABLE IF EXISTS archives")
+                self._conn.execute("DROP TABLE IF EXISTS infs")
+                self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # INF
+    # ------------------------------------------------------------------
+
+    def get_inf(self, content_key):
+        """按内容键查询识别结果，没有或由其他版本的识别规则得出时返回 None"""
+        if not content_key:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT driver_type, inf_class, driver_ver, arch, hardware_ids FROM infs "
+                "WHERE content_key = ? AND classifier = ?", (content_key, self.classifier)).fetchone()
+        if row is None:
+            return None
+        return InfRecord(row[0], row[1], row[2], json.loads(row[3]), json.loads(row[4]))
+
+    def put_inf(self, keys, record):
+        """保存识别结果（同一 INF 可同时按 CRC 和 SHA-256 保存）"""
+        now = time.time()
+        values = (self.classifier, record.driver_type, record.inf_class, record.driver_ver,
+                  json.dumps(record.arch), json.dumps(record.hardware_ids), now)
+        with self._lock, self._conn:
+            for key in keys:
+                if key:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO infs (content_key, classifier, driver_type, inf_class, driver_ver, "
+                        "arch, hardware_ids, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (key,) + values)
+
+    def analyze_inf(self, data, crc=None):
+        """识别解压出的 INF（先查缓存），返回 (InfRecord, 是否命中缓存)"""
+        keys = [crc_key(crc, len(data)), sha256_key(data)]
+        for key in keys:
+            record = self.get_inf(key)
+            if record is not None:
+                return record, True
+        record = analyze_inf_bytes(data)
+        self.put_inf(keys, record)
+        return record, False
+
+    # ------------------------------------------------------------------
+    # 压缩包
+    # ------------------------------------------------------------------
+
+    def archive_unchanged(self, archive_path, output_dir, mode):
+        """压缩包未变化（同一提取方式、同一识别规则）且上次提取的驱动包目录都还在时，
+        返回上次的统计，否则返回 None"""
+        archive_path = Path(archive_path)
+        st = archive_path.stat()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, packages, stats, classifier FROM archives "
+                "WHERE name = ? AND output_dir = ? AND mode = ?",
+                (archive_path.name, str(Path(output_dir).absolute()), mode)).fetchone()
+        if row is None or row[0] != st.st_size or row[1] != st.st_mtime_ns or row[4] != self.classifier:
+            return None
+        if not all((Path(output_dir) / rel).is_dir() for rel in json.loads(row[2])):
+            return None
+        return json.loads(row[3])
+
+    def record_archive(self, archive_path, output_dir, mode, packages, stats):
+        """记录压缩包的提取结果（mode 为 'selective' / 'full'，packages 为相对输出目录的驱动包目录）"""
+        archive_path = Path(archive_path)
+        st = archive_path.stat()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO archives (name, output_dir, mode, classifier, size, mtime_ns, packages, "
+                "stats, processed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (archive_path.name, str(Path(output_dir).absolute()), mode, self.classifier,
+                 st.st_size, st.st_mtime_ns,
+                 json.dumps(sorted(str(p) for p in packages)), json.dumps(stats), time.time()))
+
+    def stats(self):
+        with self._lock:
+            archives = self._conn.execute("SELECT COUNT(*) FROM archives").fetchone()[0]
+            # 每个 INF 都有 SHA-256 键（CRC 键是同一 INF 的别名）
+            rows = self._conn.execute(
+                "SELECT COALESCE(driver_type, 'other'), COUNT(*) FROM infs "
+                "WHERE content_key LIKE 'sha256:%' GROUP BY 1").fetchall()
+        return {'archives': archives, 'infs': dict(rows)}
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM archives")
+            self._conn.execute("DELETE FROM infs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SDIO 驱动识别缓存")
+    parser.add_argument("--db", help=f"缓存文件（默认 {DEFAULT_CACHE_FILE}）")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="显示缓存统计")
+    sub.add_parser("clear", help="清空缓存")
+    args = parser.parse_args()
+
+    cache = InfCache(args.db)
+    try:
+        if args.command == "stats":
+            stats = cache.stats()
+            infs = stats['infs']
+            print(f"缓存文件: {cache.path}")
+            print(f"压缩包: {stats['archives']}  INF 记录: {sum(infs.values())}"
+                  f"（RAID {infs.get('raid', 0)}，存储 {infs.get('storage', 0)}，"
+                  f"网卡 {infs.get('network', 0)}，其他 {infs.get('other', 0)}）")
+        elif args.command == "clear":
+            cache.clear()
+            print("缓存已清空")
+    finally:
+        cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+INF 驱动类型识别（RAID / 存储 / 网卡）
+SDIO 提取工具和驱动扫描工具共用。
+
+识别顺序:
+1. [Version] 节的 Class / ClassGuid：SCSIAdapter、HDC 为存储，Net 为网卡
+   （存储类再按关键字区分 RAID）；其他明确的设备类（显卡、声卡、USB 等）直接判为其他
+2. 没有设备类或为 System 等通用类时，只在 [Strings] 的值和设备型号名称中匹配关键字，
+   每种类型一个预编译的正则表达式（不再对整个文件逐个关键字搜索）
+
+命令行:
+    python tools/inf_classifier.py <INF 文件或目录> ...
+"""
+
+import re
+import sys
+import hashlib
+from pathlib import Path
+
+from inf_reader import read_inf
+
+
+RAID = 'raid'
+STORAGE = 'storage'
+NETWORK = 'network'
+
+# 识别逻辑变化时加 1（关键字和设备类表的变化已包含在 classifier_fingerprint() 中）
+CLASSIFIER_VERSION = 1
+
+# 设备安装类（小写）-> 驱动类型
+CLASS_TYPES = {
+    'scsiadapter': STORAGE,
+    'hdc': STORAGE,
+    'net': NETWORK,
+}
+
+CLASS_GUID_TYPES = {
+    '{4d36e97b-e325-11ce-bfc1-08002be10318}': STORAGE,   # SCSIAdapter
+    '{4d36e96a-e325-11ce-bfc1-08002be10318}': STORAGE,   # HDC
+    '{4d36e972-e325-11ce-bfc1-08002be10318}': NETWORK,   # Net
+}
+
+# 这些设备类不能说明驱动类型，继续按关键字判断
+GENERIC_CLASSES = {'', 'system', 'unknown'}
+
+RAID_PATTERN = re.compile(
+    r'\b(?:raid|megaraid|raidxpert|rapid\s?storage|rst|vroc|sata raid|sas raid|perc|lsi|avago|'
+    r'adaptec|microsemi|highpoint|rocketraid|promise|fasttrak|arrays)\b'
+    r'|\bintel\b.*\brst\b|\bbroadcom\b.*\braid\b|\bmarvell\b.*\braid\b',
+    re.IGNORECASE)
+
+NETWORK_PATTERN = re.compile(
+    r'\b(?:ethernet|network|lan|nic|wireless|wifi|wlan|802\.11|gigabit|10gbe|10gigabit)\b',
+    re.IGNORECASE)
+
+STORAGE_PATTERN = re.compile(
+    r'\b(?:ahci|sata|sas|nvme|ide|atapi|scsi|storage controller|host controller|disk controller)\b',
+    re.IGNORECASE)
+
+
+def classifier_fingerprint():
+    """识别规则的指纹（版本号 + 设备类表 + 关键字），缓存的识别结果只在指纹相同时有效"""
+    parts = [str(CLASSIFIER_VERSION), repr(sorted(CLASS_TYPES.items())),
+             repr(sorted(CLASS_GUID_TYPES.items())), repr(sorted(GENERIC_CLASSES)),
+             RAID_PATTERN.pattern, NETWORK_PATTERN.pattern, STORAGE_PATTERN.pattern]
+    return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+def parse_inf(text):
+    """按节拆分 INF 文本，返回 {小写节名: [去掉注释和空行的行]}"""
+    sections = {}
+    current = None
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line[0] == ';':
+            continue
+        if line[0] == '[':
+            end = line.find(']')
+            if end > 0:
+                current = sections.setdefault(line[1:end].strip().lower(), [])
+                continue
+        if current is not None:
+            current.append(line)
+    return sections
+
+
+def _split_entry(line):
+    """key = value（去掉值两侧的引号和行尾注释）"""
+    key, sep, value = line.partition('=')
+    if not sep:
+        return key.strip(), ''
+    value = value.strip()
+    if value.startswith('"'):
+        end = value.find('"', 1)
+        value = value[1:end] if end > 0 else value[1:]
+    else:
+        value = value.split(';', 1)[0].strip()
+    return key.strip(), value
+
+
+def version_class(sections):
+    """[Version] 中的 (Class, ClassGuid)，均为小写"""
+    values = dict(_split_entry(line) for line in sections.get('version', ()))
+    values = {key.lower(): value.lower() for key, value in values.items()}
+    return values.get('class', ''), values.get('classguid', '')
+
+
+def strings_table(sections):
+    """所有 [Strings*] 节合并的 {小写名称: 值}"""
+    table = {}
+    for name, lines in sections.items():
+        if name == 'strings' or name.startswith('strings.'):
+            for line in lines:
+                key, value = _split_entry(line)
+                table.setdefault(key.lower(), value)
+    return table
+
+
+def _model_sections(sections):
+    """[Manufacturer] 列出的型号节名（小写）和架构修饰"""
+    result = []
+    for line in sections.get('manufacturer', ()):
+        _, value = _split_entry(line)
+        parts = [p.strip().lower() for p in value.split(',') if p.strip()]
+        if parts:
+            result.append((parts[0], parts[1:]))
+    return result
+
+
+def model_names(sections, strings):
+    """[Manufacturer] 列出的型号节中的设备名称（%变量% 按 Strings 解析）"""
+    names = []
+    for base, decorations in _model_sections(sections):
+        for section in [base] + [f"{base}.{d}" for d in decorations]:
+            for entry in sections.get(section, ()):
+                key, _ = _split_entry(entry)
+                if key.startswith('%') and key.endswith('%'):
+                    key = strings.get(key[1:-1].lower(), key)
+                names.append(key)
+    return names
+
+
+def classify_sections(sections):
+    """按已拆分的 INF 节识别驱动类型，返回 'raid' / 'storage' / 'network' 或 None"""
+    inf_class, class_guid = version_class(sections)
+    driver_type = CLASS_TYPES.get(inf_class) or CLASS_GUID_TYPES.get(class_guid)
+    if driver_type is None and inf_class not in GENERIC_CLASSES:
+        return None
+
+    strings = strings_table(sections)
+    text = '\n'.join(list(strings.values()) + model_names(sections, strings))
+
+    if driver_type == NETWORK:
+        return NETWORK
+    if RAID_PATTERN.search(text):
+        return RAID
+    if driver_type == STORAGE:
+        return STORAGE
+    if NETWORK_PATTERN.search(text):
+        return NETWORK
+    if STORAGE_PATTERN.search(text):
+        return STORAGE
+    return None
+
+
+def classify_inf(text):
+    """识别 INF 文本的驱动类型，返回 'raid' / 'storage' / 'network' 或 None"""
+    return classify_sections(parse_inf(text))
+
+
+def hardware_ids(sections):
+    """型号节中的硬件 ID（去重，保持顺序）"""
+    ids = {}
+    for base, decorations in _model_sections(sections):
+        for section in [base] + [f"{base}.{d}" for d in decorations]:
+            for entry in sections.get(section, ()):
+                _, value = _split_entry(entry)
+                for hwid in value.split(',')[1:]:
+                    hwid = hwid.split(';', 1)[0].strip()
+                    if hwid:
+                        ids.setdefault(hwid.upper(), None)
+    return list(ids)
+
+
+def driver_version(sections):
+    """[Version] 的 DriverVer（"日期,版本"），没有时为空字符串"""
+    for line in sections.get('version', ()):
+        key, value = _split_entry(line)
+        if key.lower() == 'driverver':
+            return value
+    return ''
+
+
+def architectures(sections):
+    """型号节修饰中的架构（amd64 / x86 / arm64 / ia64），没有修饰时为空列表"""
+    archs = []
+    for _, decorations in _model_sections(sections):
+        for decoration in decorations:
+            platform = decoration.split('.')[0]
+            arch = platform[2:] if platform.startswith('nt') else ''
+            if arch in ('amd64', 'x86', 'arm64', 'ia64') and arch not in archs:
+                archs.append(arch)
+    return archs
+
+
+def driver_description(sections):
+    """第一个设备型号名称（没有时为空字符串）"""
+    names = model_names(sections, strings_table(sections))
+    return names[0] if names else ''
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("使用方法: python inf_classifier.py <INF 文件或目录> ...")
+        return 1
+
+    counts = {RAID: 0, STORAGE: 0, NETWORK: 0, None: 0}
+    for arg in sys.argv[1:]:
+        path = Path(arg)
+        files = sorted(path.rglob('*.inf')) if path.is_dir() else [path]
+        for inf_file in files:
+            driver_type = classify_inf(read_inf(inf_file))
+            counts[driver_type] += 1
+            print(f"{driver_type or 'other':<8} {inf_file}")
+
+    print(f"\nRAID {counts[RAID]}  存储 {counts[STORAGE]}  网卡 {counts[NETWORK]}  其他 {counts[None]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
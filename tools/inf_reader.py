@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+INF 文件读取
+INF 可能是 UTF-16（有无 BOM 都有）、UTF-8 或 ANSI（中文系统上为 GBK）。
+一次读取字节，按 BOM 和内容判断编码后只解码一次；
+结果按 (路径, 大小, 修改时间) 缓存，同一进程内重复读取不再访问磁盘。
+"""
+
+import os
+import codecs
+from functools import lru_cache
+
+
+CACHE_SIZE = 1024       # 缓存的 INF 数量
+ANSI_ENCODING = 'gbk'   # 不是 UTF-8 时按 ANSI（GBK 兼容 ASCII）解码
+
+
+def detect_encoding(data):
+    """按 BOM 和内容判断编码，返回 (编码, BOM 长度)"""
+    if data.startswith(codecs.BOM_UTF8):
+        return 'utf-8', 3
+    if data.startswith(codecs.BOM_UTF16_LE):
+        return 'utf-16-le', 2
+    if data.startswith(codecs.BOM_UTF16_BE):
+        return 'utf-16-be', 2
+    # 没有 BOM 的 UTF-16：INF 以 ASCII 字符开头，另一半字节为 0
+    if len(data) >= 4:
+        if data[1] == 0 and data[3] == 0 and data[0] and data[2]:
+            return 'utf-16-le', 0
+        if data[0] == 0 and data[2] == 0 and data[1] and data[3]:
+            return 'utf-16-be', 0
+    try:
+        data.decode('utf-8')
+        return 'utf-8', 0
+    except UnicodeDecodeError:
+        return ANSI_ENCODING, 0
+
+
+def decode_inf(data):
+    """把 INF 字节解码为文本"""
+    encoding, bom = detect_encoding(data)
+    return data[bom:].decode(encoding, errors='replace')
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _read_cached(path, size, mtime_ns):
+    with open(path, 'rb') as f:
+        return decode_inf(f.read())
+
+
+def read_inf(path):
+    """读取 INF 文本（按路径、大小、修改时间缓存），文件无法读取时抛出 OSError"""
+    path = os.fspath(path)
+    st = os.stat(path)
+    return _read_cached(path, st.st_size, st.st_mtime_ns)
+
+
+def clear_cache():
+    _read_cached.cache_clear()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+外置程序 DLL 依赖分析
+读取每个附加程序的 PE 导入表（含延迟导入），依次在映像的 System32 和程序目录中查找依赖，
+计算需要随程序一起复制的最小 DLL 集合，并列出找不到的 DLL。
+避免整目录复制导致 boot.wim 膨胀，也避免启动 WinPE 后才发现缺少 DLL。
+
+查找规则:
+- api-ms-win-* / ext-ms-* 为 API Set，由系统加载器映射，不需要复制
+- 映像 System32 中已有的 DLL 不复制（也不会覆盖系统文件）
+- 否则在程序所在目录（及程序根目录）中查找，找到则加入复制列表并继续分析它的导入
+- 都找不到的列为未解析
+- 程序和随带 DLL 的架构必须与映像一致（WinPE 不含 WOW64，x86 程序不能在 amd64 映像中运行），
+  不一致时列为错误；映像架构按 System32\ntdll.dll 判断，也可用 --arch 指定
+
+命令行:
+    python tools/pe_deps.py                               # 分析 config.EXTERNAL_APPS
+    python tools/pe_deps.py --apps-json tools/external_apps_config.json
+    python tools/pe_deps.py --mount D:/WinPE_amd64/mount --copy
+    python tools/pe_deps.py --json deps_report.json
+    python tools/pe_deps.py --arch x86
+"""
+
+import os
+import sys
+import json
+import shutil
+import struct
+import argparse
+from pathlib import Path
+
+from pe_scanner import PEHeaders, PEFormatError, MACHINE_TYPES, ARCH_COMPATIBLE
+
+TOOLS_DIR = Path(__file__).parent.absolute()
+PROJECT_DIR = TOOLS_DIR.parent
+
+API_SET_PREFIXES = ('api-ms-win-', 'ext-ms-')
+DEFAULT_ARCH = 'amd64'
+
+
+def read_module(path):
+    """PE 文件的 (架构, 导入的 DLL 列表)，无法读取时返回 None"""
+    try:
+        with open(path, 'rb') as f:
+            headers = PEHeaders(f)
+            return MACHINE_TYPES.get(headers.machine, f"{headers.machine:#06x}"), headers.imports()
+    except (OSError, PEFormatError, struct.error):
+        return None
+
+
+def image_arch(system_dir):
+    """按映像 System32 中 ntdll.dll 的架构判断 WinPE 架构（amd64 / x86 / arm64），无法判断时返回 None"""
+    module = read_module(Path(system_dir) / "ntdll.dll") if system_dir else None
+    if module is None:
+        return None
+    return next((arch for arch, machines in ARCH_COMPATIBLE.items() if module[0] in machines), None)
+
+
+class DependencyReport:
+    """单个程序的依赖分析结果"""
+
+    def __init__(self, name, exe, target):
+        self.name = name
+        self.exe = Path(exe)
+        self.target = target
+        self.copy = []          # [Path] 需要随程序复制的 DLL（程序目录中）
+        self.system = set()     # 映像中已有的 DLL（小写）
+        self.api_sets = set()   # API Set（小写）
+        self.unresolved = {}    # {DLL: [引用它的模块]}
+        self.errors = []        # 无法读取的文件
+        self.arch = None        # 目标 WinPE 架构
+        self.arch_mismatch = [] # [(Path, 架构)] 与映像架构不一致的程序和 DLL
+        self.system_verified = True  # 是否对照了映像 System32
+
+    @property
+    def ok(self):
+        return not self.unresolved and not self.errors and not self.arch_mismatch
+
+    def copy_size(self):
+        return sum(p.stat().st_size for p in self.copy if p.exists())
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'exe': str(self.exe),
+            'target': self.target,
+            'copy': [str(p) for p in self.copy],
+            'copy_bytes': self.copy_size(),
+            'system': sorted(self.system),
+            'api_sets': len(self.api_sets),
+            'unresolved': self.unresolved,
+            'errors': self.errors,
+            'arch': self.arch,
+            'arch_mismatch': [{'file': str(p), 'machine': m} for p, m in self.arch_mismatch],
+            'system_verified': self.system_verified,
+        }
+
+
+class DependencyResolver:
+    """依赖解析器（目录列表和导入表在多个程序间共用）"""
+
+    def __init__(self, system_dir=None, arch=None):
+        self.system_dir = Path(system_dir) if system_dir else None
+        self._system_names = None
+        if self.system_dir and self.system_dir.is_dir():
+            self._system_names = {name.lower() for name in os.listdir(self.system_dir)}
+        # 目标架构：指定的 > 映像 ntdll.dll 的 > 默认 amd64
+        self.arch = arch or image_arch(self.system_dir) or DEFAULT_ARCH
+        self.machines = ARCH_COMPATIBLE.get(self.arch, set())
+        self._dir_cache = {}
+        self._imports_cache = {}
+
+    def _dir_index(self, directory):
+        """目录中的文件 {小写文件名: 实际文件名}"""
+        key = str(directory)
+        if key not in self._dir_cache:
+            try:
+                self._dir_cache[key] = {name.lower(): name for name in os.listdir(directory)}
+            except OSError:
+                self._dir_cache[key] = {}
+        return self._dir_cache[key]
+
+    def _module(self, path):
+        key = str(path).lower()
+        if key not in self._imports_cache:
+            self._imports_cache[key] = read_module(path)
+        return self._imports_cache[key]
+
+    def _find_local(self, dll, directories):
+        for directory in directories:
+            name = self._dir_index(directory).get(dll.lower())
+            if name:
+                return Path(directory) / name
+        return None
+
+    def analyze(self, exe, name=None, target="Windows/System32", app_dir=None):
+        """分析程序依赖，返回 DependencyReport"""
+        exe = Path(exe)
+        report = DependencyReport(name or exe.name, exe, target)
+        report.system_verified = self._system_names is not None
+        report.arch = self.arch
+        app_dir = Path(app_dir) if app_dir else exe.parent
+
+        queue = [exe]
+        seen = {exe.name.lower()}
+        while queue:
+            module = queue.pop(0)
+            info = self._module(module)
+            if info is None:
+                report.errors.append(str(module))
+                continue
+            machine, imports = info
+            if machine not in self.machines:
+                # 加载器不会加载其他架构的模块（WinPE 不含 WOW64）
+                report.arch_mismatch.append((module, machine))
+            for dll in imports:
+                key = dll.lower()
+                if key.startswith(API_SET_PREFIXES):
+                    report.api_sets.add(key)
+                    continue
+                if key in report.unresolved:
+                    report.unresolved[key].append(module.name)
+                    continue
+                if key in seen or key in report.system:
+                    continue
+                if self._system_names is not None and key in self._system_names:
+                    report.system.add(key)
+                    continue
+
+                local = self._find_local(dll, [module.parent, exe.parent, app_dir])
+                if local:
+                    seen.add(key)
+                    report.copy.append(local)
+                    queue.append(local)
+                elif self._system_names is None:
+                    # 没有映像目录时无法验证，视为系统 DLL
+                    report.system.add(key)
+                else:
+                    report.unresolved[key] = [module.name]
+        return report
+
+
+# ----------------------------------------------------------------------
+# 程序列表
+# ----------------------------------------------------------------------
+
+def load_config_apps():
+    """从 config.py 读取 (程序路径, 目标路径, 名称) 列表和默认映像挂载目录"""
+    sys.path.insert(0, str(PROJECT_DIR))
+    import config
+    apps_dir = Path(config.EXTERNAL_APPS_DIR)
+    if not apps_dir.is_absolute():
+        apps_dir = PROJECT_DIR / apps_dir
+    apps = [(apps_dir / entry[0], entry[1], entry[2] if len(entry) > 2 else Path(entry[0]).name)
+            for entry in config.EXTERNAL_APPS]
+    return apps, Path(config.WINPE_DIR) / "mount"
+
+
+def load_json_apps(json_file):
+    """从外置程序管理器保存的 JSON 读取程序列表"""
+    with open(json_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    apps_dir = Path(data.get('external_dir', PROJECT_DIR / "外置程序"))
+    return [(apps_dir / app['path'], app.get('target', 'Windows/System32'), app.get('name', app['path']))
+            for app in data.get('apps', [])
+            if app['path'].lower().endswith(('.exe', '.com'))]
+
+
+def copy_closure(report, mount_dir):
+    """把程序和依赖 DLL 复制到映像中的目标目录（不覆盖已有文件）"""
+    dest_dir = Path(mount_dir) / report.target
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    copied = 0
+    for src in [report.exe] + report.copy:
+        dest = dest_dir / src.name
+        if dest.exists() and src != report.exe:
+            continue
+        shutil.copy2(src, dest)
+        copied += 1
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="外置程序 DLL 依赖分析")
+    parser.add_argument("--apps-json", help="外置程序管理器保存的 JSON（默认读取 config.EXTERNAL_APPS）")
+    parser.add_argument("--mount", help="已挂载映像目录（默认 WINPE_DIR/mount）")
+    parser.add_argument("--json", help="把分析结果写入 JSON 文件")
+    parser.add_argument("--copy", action="store_true", help="把程序和需要的 DLL 复制到映像中的目标目录")
+    parser.add_argument("--arch", choices=sorted(ARCH_COMPATIBLE),
+                        help=f"目标 WinPE 架构（默认按映像 ntdll.dll 判断，无法判断时为 {DEFAULT_ARCH}）")
+    args = parser.parse_args()
+
+    apps, mount_dir = load_config_apps()
+    if args.apps_json:
+        apps = load_json_apps(args.apps_json)
+    if args.mount:
+        mount_dir = Path(args.mount)
+
+    system_dir = mount_dir / "Windows" / "System32"
+    resolver = DependencyResolver(system_dir, args.arch)
+    print(f"目标架构: {resolver.arch}")
+    if not system_dir.is_dir():
+        print(f"[警告] 映像 System32 不存在: {system_dir}")
+        print("       未挂载映像时无法确认系统 DLL，只列出程序目录中的依赖")
+        if args.copy:
+            print("[错误] --copy 需要已挂载的映像")
+            return 1
+
+    reports = []
+    for exe, target, name in apps:
+        if not exe.exists():
+            print(f"\n[跳过] {name}: 文件不存在 {exe}")
+            continue
+        report = resolver.analyze(exe, name, target)
+        reports.append(report)
+
+        print(f"\n{'✅' if report.ok else '⚠️'} {name}  ({exe.name} -> {target})")
+        print(f"   系统 DLL {len(report.system)} 个，API Set {len(report.api_sets)} 个"
+              + ("" if report.system_verified else "（未验证）"))
+        if report.copy:
+            print(f"   需要复制 {len(report.copy)} 个 DLL（{report.copy_size() / 1048576:.1f} MB）:")
+            for path in report.copy:
+                print(f"     {path.name}")
+        for dll, importers in sorted(report.unresolved.items()):
+            print(f"   ❌ 找不到 {dll}（被 {', '.join(sorted(set(importers)))} 引用）")
+        for path in report.errors:
+            print(f"   ❌ 无法读取导入表: {path}")
+        for path, machine in report.arch_mismatch:
+            print(f"   ❌ 架构不匹配: {path.name} 为 {machine}，WinPE 为 {report.arch}（不含 WOW64，无法加载）")
+        if args.copy:
+            print(f"   已复制 {copy_closure(report, mount_dir)} 个文件到 {mount_dir / target}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump([r.to_dict() for r in reports], f, indent=2, ensure_ascii=False)
+        print(f"\n分析结果已保存到: {args.json}")
+
+    failed = sum(1 for r in reports if not r.ok)
+    print(f"\n共 {len(reports)} 个程序，{failed} 个存在未解析的依赖或架构不匹配")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
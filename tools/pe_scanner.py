@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+可执行文件扫描器
+- 一次 os.scandir 并行遍历目录树，扩展名不区分大小写（不会因 *.exe / *.EXE 重复）
+- 读取 PE 文件头：CPU 架构（x86/x64/ARM64）、子系统（GUI/控制台）、文件版本、是否 .NET 程序
+- 结果按 (路径, 大小, 修改时间) 缓存，文件未变化时不再读取
+- 根据目标 WinPE 架构标记不兼容的程序（例如 amd64 WinPE 默认不含 WOW64，无法运行 32 位程序）
+
+命令行:
+    python tools/pe_scanner.py <目录> [--arch amd64]
+"""
+
+import os
+import sys
+import json
+import struct
+import argparse
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+TOOLS_DIR = Path(__file__).parent.absolute()
+CACHE_FILE = TOOLS_DIR / "pe_scan_cache.json"
+
+EXECUTABLE_EXTENSIONS = ('.exe', '.bat', '.cmd', '.com')
+PE_EXTENSIONS = ('.exe', '.com', '.dll', '.sys', '.efi')
+SCAN_WORKERS = 8
+
+MACHINE_TYPES = {
+    0x014c: 'x86',
+    0x8664: 'x64',
+    0xaa64: 'ARM64',
+    0x01c4: 'ARM',
+    0x0200: 'IA64',
+}
+
+SUBSYSTEMS = {
+    1: 'Native',
+    2: 'GUI',
+    3: 'Console',
+    9: 'WinCE',
+    10: 'EFI',
+    11: 'EFI',
+    12: 'EFI',
+    14: 'Xbox',
+    16: 'Boot',
+}
+
+# WinPE 架构 -> 可直接运行的 PE 架构
+ARCH_COMPATIBLE = {
+    'amd64': {'x64'},
+    'x86': {'x86'},
+    'arm64': {'ARM64'},
+}
+
+# PE 信息: 架构、子系统、文件版本、是否 .NET、是否 DLL（非 PE 文件时 machine 为 None）
+PEInfo = namedtuple('PEInfo', 'machine subsystem version is_dotnet is_dll')
+NOT_PE = PEInfo(None, None, None, False, False)
+
+# 扫描结果: 绝对路径、相对路径、大小、PE 信息
+ScanEntry = namedtuple('ScanEntry', 'path relative size info')
+
+
+# ----------------------------------------------------------------------
+# PE 文件头
+# ----------------------------------------------------------------------
+
+class PEFormatError(Exception):
+    """PE 文件格式错误"""
+    pass
+
+
+class PEHeaders:
+    """PE 文件头（DOS 头、COFF 头、可选头、数据目录、节表）"""
+
+    def __init__(self, f):
+        self.f = f
+        dos = self._read(0, 64)
+        if len(dos) < 64 or dos[:2] != b'MZ':
+            raise PEFormatError("不是 PE 文件")
+        pe_offset = struct.unpack_from('<I', dos, 0x3C)[0]
+        head = self._read(pe_offset, 24)
+        if len(head) < 24 or head[:4] != b'PE\0\0':
+            raise PEFormatError("不是 PE 文件")
+
+        self.machine, sections, _, _, _, opt_size, self.characteristics = struct.unpack_from('<HHIIIHH', head, 4)
+        optional = self._read(pe_offset + 24, opt_size)
+        if len(optional) < 70:
+            raise PEFormatError("可选头不完整")
+        magic = struct.unpack_from('<H', optional, 0)[0]
+        if magic == 0x20b:       # PE32+
+            dirs_offset = 112
+        elif magic == 0x10b:     # PE32
+            dirs_offset = 96
+        else:
+            raise PEFormatError(f"未知的可选头类型: {magic:#x}")
+        self.subsystem = struct.unpack_from('<H', optional, 68)[0]
+        count = struct.unpack_from('<I', optional, dirs_offset - 4)[0] if len(optional) >= dirs_offset else 0
+        count = min(count, (len(optional) - dirs_offset) // 8)
+        self.data_dirs = [struct.unpack_from('<II', optional, dirs_offset + i * 8) for i in range(max(count, 0))]
+        self.is_pe32_plus = magic == 0x20b
+        if self.is_pe32_plus:
+            self.image_base = struct.unpack_from('<Q', optional, 24)[0]
+        else:
+            self.image_base = struct.unpack_from('<I', optional, 28)[0]
+
+        table = self._read(pe_offset + 24 + opt_size, sections * 40)
+        self.sections = []
+        for i in range(len(table) // 40):
+            vsize, vaddr, raw_size, raw_ptr = struct.unpack_from('<IIII', table, i * 40 + 8)
+            self.sections.append((vaddr, max(vsize, raw_size), raw_ptr, raw_size))
+
+    def _read(self, offset, size):
+        self.f.seek(offset)
+        return self.f.read(size)
+
+    def data_dir(self, index):
+        """(RVA, 大小)，不存在时返回 (0, 0)"""
+        return self.data_dirs[index] if index < len(self.data_dirs) else (0, 0)
+
+    def rva_to_offset(self, rva):
+        for vaddr, vsize, raw_ptr, raw_size in self.sections:
+            if vaddr <= rva < vaddr + vsize and rva - vaddr < raw_size:
+                return raw_ptr + rva - vaddr
+        return None
+
+    def read_rva(self, rva, size):
+        offset = self.rva_to_offset(rva)
+        if offset is None:
+            return b''
+        return self._read(offset, size)
+
+    def read_string(self, rva, limit=256):
+        """读取以 0 结尾的 ASCII 字符串"""
+        data = self.read_rva(rva, limit)
+        return data.split(b'\0', 1)[0].decode('ascii', 'replace')
+
+    def imports(self):
+        """导入的 DLL 名称（含延迟导入），按出现顺序去重"""
+        names = []
+        rva = self.data_dir(1)[0]
+        if rva:
+            for i in range(4096):
+                desc = self.read_rva(rva + i * 20, 20)
+                if len(desc) < 20:
+                    break
+                original_thunk, _, _, name_rva, first_thunk = struct.unpack('<IIIII', desc)
+                if not (original_thunk or name_rva or first_thunk):
+                    break
+                if name_rva:
+                    names.append(self.read_string(name_rva))
+
+        rva = self.data_dir(13)[0]
+        if rva:
+            for i in range(4096):
+                desc = self.read_rva(rva + i * 32, 32)
+                if len(desc) < 32:
+                    break
+                attributes, name_rva = struct.unpack_from('<II', desc, 0)
+                if not name_rva:
+                    break
+                if not attributes & 1:
+                    name_rva -= self.image_base  # 旧格式的延迟导入使用虚拟地址
+                names.append(self.read_string(name_rva))
+
+        seen = set()
+        result = []
+        for name in names:
+            if name and name.lower() not in seen:
+                seen.add(name.lower())
+                result.append(name)
+        return result
+
+    def file_version(self):
+        """VS_FIXEDFILEINFO 中的文件版本（资源目录 RT_VERSION）"""
+        base = self.data_dir(2)[0]
+        if not base:
+            return None
+
+        def entries(dir_rva):
+            head = self.read_rva(dir_rva, 16)
+            if len(head) < 16:
+                return []
+            named, ids = struct.unpack_from('<HH', head, 12)
+            data = self.read_rva(dir_rva + 16, (named + ids) * 8)
+            return [struct.unpack_from('<II', data, i * 8) for i in range(len(data) // 8)]
+
+        # 类型 -> 名称 -> 语言，三层目录，第一层取 RT_VERSION(16)，其余取第一项
+        node = 0
+        for level in range(3):
+            found = entries(base + node)
+            if level == 0:
+                found = [e for e in found if e[0] == 16]
+            if not found:
+                return None
+            offset = found[0][1]
+            is_dir = bool(offset & 0x80000000)
+            node = offset & 0x7FFFFFFF
+            if level < 2 and not is_dir:
+                return None
+        entry = self.read_rva(base + node, 8)
+        if len(entry) < 8:
+            return None
+        data_rva, data_size = struct.unpack_from('<II', entry, 0)
+        data = self.read_rva(data_rva, min(data_size, 4096))
+        pos = data.find(b'\xbd\x04\xef\xfe')
+        if pos < 0 or len(data) < pos + 16:
+            return None
+        ms, ls = struct.unpack_from('<II', data, pos + 8)
+        return f"{ms >> 16}.{ms & 0xFFFF}.{ls >> 16}.{ls & 0xFFFF}"
+
+
+def read_pe_info(path):
+    """读取 PE 信息，非 PE 文件（批处理、DOS 程序等）返回 NOT_PE"""
+    try:
+        with open(path, 'rb') as f:
+            headers = PEHeaders(f)
+            version = headers.file_version()
+    except (OSError, PEFormatError, struct.error):
+        return NOT_PE
+    return PEInfo(
+        MACHINE_TYPES.get(headers.machine, f"{headers.machine:#06x}"),
+        SUBSYSTEMS.get(headers.subsystem, str(headers.subsystem)),
+        version,
+        headers.data_dir(14)[0] != 0,             # CLR 运行时头
+        bool(headers.characteristics & 0x2000),   # IMAGE_FILE_DLL
+    )
+
+
+def compatibility_warnings(info, target_arch='amd64'):
+    """程序在目标 WinPE 中可能无法运行的原因列表"""
+    if info.machine is None:
+        return []
+    warnings = []
+    target_arch = target_arch.lower()
+    if info.machine not in ARCH_COMPATIBLE.get(target_arch, {info.machine}):
+        if info.machine == 'x86' and target_arch == 'amd64':
+            warnings.append("32 位程序（WinPE amd64 默认不含 WOW64）")
+        else:
+            warnings.append(f"{info.machine} 程序与 WinPE {target_arch} 不兼容（WinPE 不含仿真层）")
+    if info.subsystem not in ('GUI', 'Console'):
+        warnings.append(f"子系统 {info.subsystem}，不能作为普通程序运行")
+    if info.is_dotnet:
+        warnings.append(".NET 程序（需要 WinPE-NetFx 组件）")
+    return warnings
+
+
+# ----------------------------------------------------------------------
+# 缓存
+# ----------------------------------------------------------------------
+
+class PEInfoCache:
+    """PE 信息缓存，按 (路径, 大小, 修改时间) 命中"""
+
+    def __init__(self, cache_file=CACHE_FILE):
+        self.cache_file = Path(cache_file) if cache_file else None
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._dirty = False
+        if self.cache_file:
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+
+    def get(self, path, size, mtime):
+        with self._lock:
+            entry = self._entries.get(str(path))
+        if entry and entry['size'] == size and entry['mtime'] == mtime:
+            return PEInfo(*entry['info'])
+        info = read_pe_info(path)
+        with self._lock:
+            self._entries[str(path)] = {'size': size, 'mtime': mtime, 'info': list(info)}
+            self._dirty = True
+        return info
+
+    def save(self):
+        if not self.cache_file or not self._dirty:
+            return
+        with self._lock:
+            data = dict(self._entries)
+            self._dirty = False
+        try:
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+        except OSError:
+            pass
+
+
+# ----------------------------------------------------------------------
+# 遍历
+# ----------------------------------------------------------------------
+
+def _scan_dir(path, extensions):
+    """扫描单个目录，返回 ([(路径, 大小, 修改时间)], [子目录])"""
+    files, dirs = [], []
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append(entry.path)
+                    elif os.path.splitext(entry.name)[1].lower() in extensions and entry.is_file():
+                        stat = entry.stat()
+                        files.append((entry.path, stat.st_size, stat.st_mtime))
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return files, dirs
+
+
+def walk_files(root, extensions=EXECUTABLE_EXTENSIONS, workers=SCAN_WORKERS):
+    """并行遍历目录树，返回 [(路径, 大小, 修改时间)]（按路径排序）"""
+    extensions = tuple(ext.lower() for ext in extensions)
+    results = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan") as pool:
+        pending = [pool.submit(_scan_dir, str(root), extensions)]
+        while pending:
+            future = pending.pop()
+            files, dirs = future.result()
+            results.extend(files)
+            pending.extend(pool.submit(_scan_dir, d, extensions) for d in dirs)
+    results.sort(key=lambda item: item[0].lower())
+    return results
+
+
+def scan_executables(root, cache=None, extensions=EXECUTABLE_EXTENSIONS, workers=SCAN_WORKERS):
+    """扫描目录中的可执行文件并读取 PE 信息，返回 [ScanEntry]"""
+    root = Path(root)
+    cache = cache or PEInfoCache(None)
+    files = walk_files(root, extensions, workers)
+
+    def inspect(item):
+        path, size, mtime = item
+        info = cache.get(path, size, mtime) if path.lower().endswith(PE_EXTENSIONS) else NOT_PE
+        return ScanEntry(path, os.path.relpath(path, root), size, info)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pe") as pool:
+        entries = list(pool.map(inspect, files))
+    cache.save()
+    return entries
+
+
+def describe(info):
+    """简短描述，例如 'x64 GUI'"""
+    if info.machine is None:
+        return ""
+    return f"{info.machine} {info.subsystem}" + (" .NET" if info.is_dotnet else "")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="扫描可执行文件并读取 PE 文件头")
+    parser.add_argument("directory", help="要扫描的目录")
+    parser.add_argument("--arch", default="amd64", choices=sorted(ARCH_COMPATIBLE), help="目标 WinPE 架构")
+    args = parser.parse_args()
+
+    entries = scan_executables(args.directory, PEInfoCache())
+    flagged = 0
+    for entry in entries:
+        warnings = compatibility_warnings(entry.info, args.arch)
+        flagged += bool(warnings)
+        print(f"{'⚠' if warnings else ' '} {entry.relative:<50} {describe(entry.info):<16} "
+              f"{entry.info.version or '':<16} {'；'.join(warnings)}")
+    print(f"\n共 {len(entries)} 个文件，{flagged} 个可能无法在 WinPE {args.arch} 中运行")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
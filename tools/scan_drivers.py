@@ -13,30 +13,15 @@ import datetime
 from pathlib import Path
 from colorama import init, Fore, Style
 
+from inf_classifier import parse_inf, classify_sections, driver_description
+from inf_reader import read_inf
+
 init(autoreset=True)
 
 
 class DriverScanner:
     """驱动扫描器"""
     
-    # 驱动类型关键字
-    STORAGE_KEYWORDS = [
-        'storage', 'disk', 'sata', 'ahci', 'ide', 'scsi', 'sas',
-        'nvme', 'hdd', 'ssd', 'storahci', 'stornvme'
-    ]
-    
-    RAID_KEYWORDS = [
-        'raid', 'megaraid', 'perc', 'smart array', 'smartarray',
-        'iastor', 'rst', 'rcraid', 'mrsas', 'lsi', 'adaptec',
-        'vroc', 'vmd', 'rste', 'intel raid', 'amd raid'
-    ]
-    
-    NETWORK_KEYWORDS = [
-        'network', 'ethernet', 'net', 'lan', 'nic', 'gigabit',
-        'realtek', 'intel', 'broadcom', 'e1000', 'e1g', 'rtl',
-        'bcm', 'i210', 'i219', 'i225', 'x710', 'mellanox'
-    ]
-    
     def __init__(self, scan_dir):
         """初始化"""
         self.scan_dir = Path(scan_dir)
@@ -74,8 +59,8 @@ class DriverScanner:
         """分析 .inf 文件内容"""
         try:
             # 读取文件内容
-            with open(inf_file, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read().lower()
+            content = read_inf(inf_file)
+            sections = parse_inf(content)
             
             # 获取相对路径
             rel_path = inf_file.relative_to(self.scan_dir)
@@ -93,21 +78,17 @@ class DriverScanner:
             if desc_match:
                 driver_info['desc'] = desc_match.group(1)
             else:
-                driver_info['desc'] = ''
-            
-            # 判断驱动类型
-            file_content = str(rel_path).lower() + ' ' + content
+                driver_info['desc'] = driver_description(sections)
             
-            is_raid = any(keyword in file_content for keyword in self.RAID_KEYWORDS)
-            is_storage = any(keyword in file_content for keyword in self.STORAGE_KEYWORDS)
-            is_network = any(keyword in file_content for keyword in self.NETWORK_KEYWORDS)
+            # 判断驱动类型（设备类优先，其次 Strings 和型号名称中的关键字）
+            driver_type = classify_sections(sections)
             
             # 分类
-            if is_raid:
+            if driver_type == 'raid':
                 self.raid_drivers.append(driver_info)
-            elif is_storage:
+            elif driver_type == 'storage':
                 self.storage_drivers.append(driver_info)
-            elif is_network:
+            elif driver_type == 'network':
                 self.network_drivers.append(driver_info)
             else:
                 self.other_drivers.append(driver_info)
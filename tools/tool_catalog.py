@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+WinPE 工具目录
+从 winpe_tools_catalog.json 按需加载工具列表，按名称和分类建立索引，
+支持合并远程目录更新，并缓存每个工具的本地状态（是否已下载、大小、哈希）
+
+远程更新不改写随仓库发布的 winpe_tools_catalog.json，而是累积保存在
+winpe_tools_catalog.local.json（不上传到Git），加载时叠加在发布的目录之上；
+发布的目录版本号不低于本地更新时，本地更新不再生效
+"""
+
+import os
+import json
+import hashlib
+import threading
+import urllib.request
+from pathlib import Path
+from datetime import datetime
+
+
+TOOLS_DIR = Path(__file__).parent.absolute()
+CATALOG_FILE = TOOLS_DIR / "winpe_tools_catalog.json"
+STATE_FILE = TOOLS_DIR / "winpe_tools_state.json"
+OVERLAY_FILE = TOOLS_DIR / "winpe_tools_catalog.local.json"
+
+
+class CatalogError(Exception):
+    """目录文件格式错误"""
+    pass
+
+
+class ToolCatalog:
+    """工具目录（首次访问时才读取文件）"""
+
+    def __init__(self, catalog_file=CATALOG_FILE, state_file=STATE_FILE, overlay_file=OVERLAY_FILE):
+        self.catalog_file = Path(catalog_file)
+        self.state_file = Path(state_file)
+        self.overlay_file = Path(overlay_file)
+        self._overlay = None    # 累积的本地更新（增量格式）
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._state = None
+        self._version = 0
+        self._updated = ""
+        self._update_url = ""
+        self._categories = {}
+        self._tools = []
+        self._by_name = {}
+        self._by_category = {}
+
+    # ------------------------------------------------------------------
+    # 加载和索引
+    # ------------------------------------------------------------------
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            with open(self.catalog_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._apply(data)
+            overlay = self._read_overlay()
+            if overlay and int(overlay.get('version', 0)) > self._version:
+                self._merge_update(overlay)
+                self._overlay = overlay
+            self._loaded = True
+
+    def _read_overlay(self):
+        """读取本地更新，没有或格式错误时返回 None"""
+        try:
+            with open(self.overlay_file, 'r', encoding='utf-8') as f:
+                overlay = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(overlay, dict) or not isinstance(overlay.get('tools', []), list):
+            return None
+        return overlay
+
+    def _apply(self, data):
+        """从目录数据重建索引"""
+        if not isinstance(data, dict) or not isinstance(data.get('tools'), list):
+            raise CatalogError(f"工具目录格式错误: {self.catalog_file}")
+        self._version = int(data.get('version', 0))
+        self._updated = data.get('updated', "")
+        self._update_url = data.get('update_url', "")
+        self._categories = dict(data.get('categories', {}))
+        self._tools = [tool for tool in data['tools'] if tool.get('name')]
+        self._reindex()
+
+    def _reindex(self):
+        self._by_name = {tool['name']: tool for tool in self._tools}
+        self._by_category = {}
+        for tool in self._tools:
+            self._by_category.setdefault(tool.get('category', 'other'), []).append(tool)
+
+    @property
+    def version(self):
+        """目录版本号（远程更新的版本号更高时才合并）"""
+        self._ensure_loaded()
+        return self._version
+
+    @property
+    def updated(self):
+        self._ensure_loaded()
+        return self._updated
+
+    @property
+    def update_url(self):
+        """远程目录更新地址（目录文件中的 update_url）"""
+        self._ensure_loaded()
+        return self._update_url
+
+    @property
+    def categories(self):
+        """{分类ID: 分类名称}"""
+        self._ensure_loaded()
+        return self._categories
+
+    @property
+    def tools(self):
+        """全部工具（按目录文件中的顺序）"""
+        self._ensure_loaded()
+        return self._tools
+
+    def get(self, name):
+        """按名称查找工具，不存在时返回 None"""
+        self._ensure_loaded()
+        return self._by_name.get(name)
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def __len__(self):
+        return len(self.tools)
+
+    def by_category(self, category):
+        """某个分类下的工具"""
+        self._ensure_loaded()
+        return self._by_category.get(category, [])
+
+    def grouped(self):
+        """按分类顺序返回 [(分类ID, 分类名称, 工具列表)]，未登记的分类排在最后"""
+        self._ensure_loaded()
+        groups = [(cid, cname, self._by_category[cid])
+                  for cid, cname in self._categories.items() if cid in self._by_category]
+        groups += [(cid, cid, tools) for cid, tools in self._by_category.items()
+                   if cid not in self._categories]
+        return groups
+
+    # ------------------------------------------------------------------
+    # 远程更新
+    # ------------------------------------------------------------------
+
+    def merge(self, update):
+        """合并目录更新
+
+        update 可以是完整目录，也可以是增量：
+            {"version": 2, "categories": {...}, "tools": [更新或新增的条目], "removed": ["工具名"]}
+        条目按名称合并（只覆盖提供的字段）。版本号不高于本地时不做任何修改。
+
+        返回 {'added': [...], 'updated': [...], 'removed': [...]}，未合并时返回 None
+        """
+        self._ensure_loaded()
+        version = int(update.get('version', 0))
+        if version <= self._version:
+            return None
+
+        with self._lock:
+            update = dict(update, updated=update.get('updated', datetime.now().strftime('%Y-%m-%d')))
+            result = self._merge_update(update)
+            self._add_to_overlay(update)
+            self._save()
+        return result
+
+    def _merge_update(self, update):
+        """把更新合并到内存中的目录（不检查版本号，不写文件）"""
+        result = {'added': [], 'updated': [], 'removed': []}
+        self._categories.update(update.get('categories', {}))
+        self._update_url = update.get('update_url', self._update_url)
+
+        for entry in update.get('tools', []):
+            name = entry.get('name')
+            if not name:
+                continue
+            current = self._by_name.get(name)
+            if current is None:
+                self._tools.append(dict(entry))
+                result['added'].append(name)
+            elif any(current.get(k) != v for k, v in entry.items()):
+                current.update(entry)
+                result['updated'].append(name)
+
+        removed = set(update.get('removed', []))
+        if removed:
+            result['removed'] = [t['name'] for t in self._tools if t['name'] in removed]
+            self._tools = [t for t in self._tools if t['name'] not in removed]
+
+        self._version = int(update.get('version', self._version))
+        self._updated = update.get('updated', self._updated)
+        self._reindex()
+        return result
+
+    def _add_to_overlay(self, update):
+        """把更新累积到本地更新中（条目按名称合并，删除的工具记入 removed）"""
+        overlay = self._overlay or {'categories': {}, 'tools': [], 'removed': []}
+        overlay['version'] = self._version
+        overlay['updated'] = self._updated
+        if 'update_url' in update:
+            overlay['update_url'] = update['update_url']
+        overlay.setdefault('categories', {}).update(update.get('categories', {}))
+
+        tools = overlay.setdefault('tools', [])
+        by_name = {tool['name']: tool for tool in tools if tool.get('name')}
+        removed = set(overlay.get('removed', []))
+        for entry in update.get('tools', []):
+            name = entry.get('name')
+            if not name:
+                continue
+            if name in by_name:
+                by_name[name].update(entry)
+            else:
+                by_name[name] = dict(entry)
+                tools.append(by_name[name])
+            removed.discard(name)
+
+        newly_removed = set(update.get('removed', []))
+        overlay['tools'] = [tool for tool in tools if tool.get('name') not in newly_removed]
+        overlay['removed'] = sorted(removed | newly_removed)
+        self._overlay = overlay
+
+    def merge_from_url(self, url, timeout=15):
+        """下载并合并远程目录更新"""
+        request = urllib.request.Request(url, headers={'User-Agent': 'WinPE-Customizer'})
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            update = json.loads(response.read().decode('utf-8'))
+        return self.merge(update)
+
+    def _save(self):
+        """写回本地更新（先写临时文件再替换，避免写入中断损坏文件）"""
+        temp = self.overlay_file.with_suffix('.tmp')
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(self._overlay, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        os.replace(temp, self.overlay_file)
+
+    # ------------------------------------------------------------------
+    # 本地状态缓存
+    # ------------------------------------------------------------------
+
+    def _ensure_state(self):
+        if self._state is None:
+            try:
+                with open(self.state_file, 'r', encoding='utf-8') as f:
+                    self._state = json.load(f)
+            except (OSError, ValueError):
+                self._state = {}
+        return self._state
+
+    def get_state(self, name):
+        """工具的缓存状态 {'downloaded', 'size', 'sha256', 'mtime'}，没有记录时返回空字典"""
+        with self._lock:
+            return dict(self._ensure_state().get(name, {}))
+
+    def refresh_state(self, name, tool_dir):
+        """根据工具目录更新缓存状态
+
+        只有可执行文件的大小或修改时间变化时才重新计算哈希。返回状态是否有变化
+        """
+        tool = self.get(name)
+        if tool is None:
+            return False
+
+        exe_path = Path(tool_dir) / tool['exe']
+        try:
+            stat = exe_path.stat()
+        except OSError:
+            stat = None
+
+        with self._lock:
+            old = self._ensure_state().get(name, {})
+        if stat is None:
+            new = {'downloaded': False}
+        elif old.get('size') == stat.st_size and old.get('mtime') == stat.st_mtime and old.get('sha256'):
+            new = dict(old, downloaded=True)
+        else:
+            new = {
+                'downloaded': True,
+                'size': stat.st_size,
+                'mtime': stat.st_mtime,
+                'sha256': self._hash_file(exe_path),
+            }
+
+        if new == old:
+            return False
+        with self._lock:
+            self._state[name] = new
+        return True
+
+    def save_state(self):
+        """写回状态缓存"""
+        with self._lock:
+            state = dict(self._ensure_state())
+        try:
+            with open(self.state_file, 'w', encoding='utf-8') as f:
+                json.dump(state, f, indent=2, ensure_ascii=False)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _hash_file(path, chunk_size=1024 * 1024):
+        digest = hashlib.sha256()
+        try:
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(chunk_size), b''):
+                    digest.update(chunk)
+        except OSError:
+            return None
+        return digest.hexdigest()
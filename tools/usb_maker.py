@@ -25,6 +25,14 @@ except ImportError:
     HAS_SCAN_DRIVES = False
     print("警告: 无法导入scan_drives模块")
 
+# 导入 WIM 挂载状态检测（读取 DISM 挂载登记表）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    from core.wim_info import is_wim_mounted, mounted_registry
+    HAS_WIM_INFO = True
+except ImportError:
+    HAS_WIM_INFO = False
+
 try:
     import psutil
     HAS_PSUTIL = True
@@ -672,15 +680,21 @@ class USBMakerDialog:
             mount_dir = self.winpe_dir / "mount"
             if mount_dir.exists():
                 # 检查是否有挂载
-                check_cmd = f'dism /get-mountedwiminfo'
-                result = subprocess.run(check_cmd, capture_output=True, text=True, shell=True, encoding='utf-8', errors='ignore')
+                if HAS_WIM_INFO:
+                    is_mounted = is_wim_mounted(mount_dir)
+                else:
+                    check_cmd = f'dism /get-mountedwiminfo'
+                    result = subprocess.run(check_cmd, capture_output=True, text=True, shell=True, encoding='utf-8', errors='ignore')
+                    is_mounted = str(mount_dir).lower() in result.stdout.lower()
                 
-                if "mount" in result.stdout.lower() or str(mount_dir) in result.stdout:
+                if is_mounted:
                     self.log("  ⚠️ 检测到 WIM 已挂载，正在卸载...")
                     
                     # 卸载WIM
                     unmount_cmd = f'dism /unmount-wim /mountdir:"{mount_dir}" /discard'
                     unmount_result = subprocess.run(unmount_cmd, capture_output=True, text=True, shell=True, encoding='utf-8', errors='ignore')
+                    if HAS_WIM_INFO:
+                        mounted_registry.invalidate()
                     
                     if unmount_result.returncode == 0:
                         self.log("  ✅ WIM 卸载成功")
@@ -17,290 +17,68 @@ import urllib.request
 import zipfile
 import threading
 
+from tool_catalog import ToolCatalog
+
+
+# 工具目录和项目根目录（不依赖当前工作目录，便于在主程序进程内打开）
+TOOLS_DIR = Path(__file__).parent.absolute()
+PROJECT_DIR = TOOLS_DIR.parent
+
+
+class ToolDirIndex:
+    """外置程序/Tools 目录索引
+    
+    每次扫描只列出 Tools 目录一次，仅重新读取修改时间发生变化的工具子目录，
+    返回发生变化的子目录名，界面只刷新这些工具的状态
+    """
+    
+    def __init__(self, root_dir):
+        self.root_dir = Path(root_dir)
+        self._mtimes = {}  # {子目录名: 修改时间}
+        self._files = {}   # {子目录名: 小写文件名集合}
+    
+    def scan(self):
+        """扫描一次，返回发生变化的子目录名集合"""
+        changed = set()
+        seen = set()
+        try:
+            entries = list(os.scandir(self.root_dir))
+        except OSError:
+            entries = []
+        
+        for entry in entries:
+            try:
+                if not entry.is_dir():
+                    continue
+                mtime = entry.stat().st_mtime
+            except OSError:
+                continue
+            seen.add(entry.name)
+            if self._mtimes.get(entry.name) == mtime:
+                continue
+            self._mtimes[entry.name] = mtime
+            try:
+                names = frozenset(e.name.lower() for e in os.scandir(entry.path))
+            except OSError:
+                names = frozenset()
+            if names != self._files.get(entry.name):
+                self._files[entry.name] = names
+                changed.add(entry.name)
+        
+        for name in set(self._files) - seen:
+            self._files.pop(name, None)
+            self._mtimes.pop(name, None)
+            changed.add(name)
+        return changed
+    
+    def has_file(self, tool_dir, file_name):
+        """工具子目录中是否存在指定文件（不区分大小写）"""
+        return file_name.lower() in self._files.get(tool_dir, ())
+
 
 class WinPEToolsManager:
     """WinPE 工具包管理器"""
     
-    # 工具分类
-    TOOL_CATEGORIES = {
-        'system': '系统管理',
-        'disk': '磁盘工具',
-        'compress': '压缩工具',
-        'editor': '文本编辑',
-        'browser': '浏览器',
-        'hardware': '硬件检测',
-        'network': '网络工具',
-        'recovery': '数据恢复',
-        'file': '文件管理',
-        'bootable': '启动盘制作',
-        'viewer': '文档查看',
-    }
-    
-    # 常用WinPE工具列表
-    COMMON_TOOLS = [
-        {
-            'name': 'Dism++',
-            'desc': '强大的 Windows 映像管理工具',
-            'url': 'https://github.com/Chuyu-Team/Dism-Multi-language',
-            'download_url': 'https://github.com/Chuyu-Team/Dism-Multi-language/releases/download/v10.1.1002.2/Dism++10.1.1002.1B.zip',
-            'exe': 'Dism++x64.exe',
-            'shortcut_name': 'Dism++',
-            'recommended': True,
-            'context_menu': False,
-            'category': 'system'
-        },
-        {
-            'name': 'DiskGenius',
-            'desc': '磁盘分区和数据恢复工具',
-            'url': 'https://www.diskgenius.cn/',
-            'exe': 'DiskGenius.exe',
-            'shortcut_name': 'DiskGenius',
-            'recommended': True,
-            'context_menu': False,
-            'category': 'disk'
-        },
-        {
-            'name': 'PowerShell 7',
-            'desc': '跨平台的 PowerShell 版本',
-            'url': 'https://github.com/PowerShell/PowerShell',
-            'exe': 'pwsh.exe',
-            'recommended': False,
-            'context_menu': False,
-            'category': 'system'
-        },
-        {
-            'name': 'WinNTSetup',
-            'desc': 'Windows 系统安装工具',
-            'url': 'https://msfn.org/board/topic/149612-winntsetup/',
-            'exe': 'WinNTSetup.exe',
-            'recommended': True,
-            'context_menu': False,
-            'category': 'system'
-        },
-        {
-            'name': 'CPU-Z',
-            'desc': 'CPU 信息检测工具',
-            'url': 'https://www.cpuid.com/softwares/cpu-z.html',
-            'exe': 'cpuz.exe',
-            'recommended': False,
-            'context_menu': False,
-            'category': 'hardware'
-        },
-        {
-            'name': 'CrystalDiskInfo',
-            'desc': '硬盘健康监测工具',
-            'url': 'https://crystalmark.info/',
-            'exe': 'DiskInfo64.exe',
-            'recommended': False,
-            'context_menu': False,
-            'category': 'hardware'
-        },
-        {
-            'name': 'Notepad++',
-            'desc': '文本编辑器（支持右键菜单）',
-            'url': 'https://notepad-plus-plus.org/',
-            'exe': 'notepad++.exe',
-            'recommended': True,
-            'context_menu': True,
-            'category': 'editor'
-        },
-        {
-            'name': '7-Zip',
-            'desc': '压缩解压工具（支持右键菜单）',
-            'url': 'https://www.7-zip.org/',
-            'download_url': 'https://www.7-zip.org/a/7z2301-x64.exe',
-            'exe': '7zFM.exe',
-            'shortcut_name': '7-Zip',
-            'recommended': True,
-            'context_menu': True,
-            'category': 'compress'
-        },
-        {
-            'name': 'SumatraPDF',
-            'desc': 'PDF阅读器（支持右键菜单，轻量开源）',
-            'url': 'https://www.sumatrapdfreader.org/',
-            'download_url': 'https://www.sumatrapdfreader.org/files/SumatraPDF-3.5.2-64.zip',
-            'exe': 'SumatraPDF.exe',
-            'recommended': True,
-            'context_menu': True,
-            'category': 'viewer'
-        },
-        {
-            'name': 'GreenBrowser',
-            'desc': '绿色便携浏览器',
-            'url': 'http://www.morequick.com/',
-            'exe': 'GreenBrowser.exe',
-            'recommended': True,
-            'context_menu': False,
-            'category': 'browser'
-        },
-        {
-            'name': 'Firefox Portable',
-            'desc': 'Firefox 便携版浏览器',
-            'url': 'https://portableapps.com/apps/internet/firefox_portable',
-            'exe': 'FirefoxPortable.exe',
-            'recommended': False,
-            'context_menu': False,
-            'category': 'browser'
-        },
-        {
-            'name': 'VSCode Portable',
-            'desc': 'Visual Studio Code 便携版',
-            'url': 'https://code.visualstudio.com/docs/editor/portable',
-            'exe': 'Code.exe',
-            'shortcut_name': 'VSCode',
-            'recommended': False,
-            'context_menu': True,
-            'category': 'editor'
-        },
-        {
-            'name': 'HxD',
-            'desc': '十六进制编辑器（二进制文件编辑）',
-            'url': 'https://mh-nexus.de/en/hxd/',
-            'download_url': 'https://mh-nexus.de/en/hxd/download/HxDSetup.zip',
-            'exe': 'HxD.exe',
-            'shortcut_name': 'HxD',
-            'recommended': False,
-            'context_menu': True,
-            'category': 'editor'
-        },
-        {
-            'name': 'HWiNFO',
-            'desc': '硬件信息检测工具',
-            'url': 'https://www.hwinfo.com/',
-            'exe': 'HWiNFO64.exe',
-            'recommended': False,
-            'context_menu': False,
-            'category': 'hardware'
-        },
-        {
-            'name': 'MemTest86',
-            'desc': '内存测试工具',
-            'url': 'https://www.memtest86.com/',
-            'exe': 'MemTest86.exe',
-            'recommended': False,
-            'context_menu': False,
-            'category': 'hardware'
-        },
-        {
-            'name': 'Rufus',
-            'desc': 'USB启动盘制作工具',
-            'url': 'https://rufus.ie/',
-            'exe': 'rufus.exe',
-            'recommended': False,
-            'context_menu': False,
-            'category': 'bootable'
-        },
-        {
-            'name': 'HDTune',
-            'desc': '硬盘检测工具',
-            'url': 'https://www.hdtune.com/',
-            'exe': 'HDTune.exe',
-            'recommended': False,
-            'context_menu': False,
-            'category': 'hardware'
-        },
-        {
-            'name': 'TreeSize Free',
-            'desc': '磁盘空间分析工具',
-            'url': 'https://www.jam-software.com/treesize_free',
-            'exe': 'TreeSizeFree.exe',
-            'recommended': False,
-            'context_menu': False,
-            'category': 'file'
-        },
-        {
-            'name': 'PuTTY',
-            'desc': 'SSH/Telnet 客户端',
-            'url': 'https://www.putty.org/',
-            'exe': 'putty.exe',
-            'recommended': False,
-            'context_menu': False,
-            'category': 'network'
-        },
-        {
-            'name': 'WinSCP',
-            'desc': 'SFTP/FTP 客户端',
-            'url': 'https://winscp.net/',
-            'exe': 'WinSCP.exe',
-            'recommended': False,
-            'context_menu': False,
-            'category': 'network'
-        },
-        {
-            'name': 'Recuva',
-            'desc': '文件恢复工具',
-            'url': 'https://www.ccleaner.com/recuva',
-            'exe': 'Recuva64.exe',
-            'recommended': False,
-            'context_menu': False,
-            'category': 'recovery'
-        },
-        {
-            'name': 'FastCopy',
-            'desc': '快速文件复制工具',
-            'url': 'https://fastcopy.jp/',
-            'exe': 'FastCopy.exe',
-            'recommended': False,
-            'context_menu': False,
-            'category': 'file'
-        },
-        {
-            'name': 'CPU-X Portable',
-            'desc': 'CPU信息检测工具（开源，类似CPU-Z）',
-            'url': 'https://github.com/TheTumultuousUnicornOfDarkness/CPU-X/releases',
-            'exe': 'CPU-X_win64.exe',
-            'recommended': True,
-            'context_menu': False,
-            'category': 'hardware'
-        },
-        {
-            'name': 'Ventoy',
-            'desc': '多启动U盘制作工具（支持直接引导ISO）',
-            'url': 'https://www.ventoy.net/',
-            'exe': 'Ventoy2Disk.exe',
-            'recommended': False,
-            'context_menu': False,
-            'category': 'bootable'
-        },
-        {
-            'name': 'Speccy',
-            'desc': '系统信息查看工具',
-            'url': 'https://www.ccleaner.com/speccy',
-            'exe': 'Speccy64.exe',
-            'recommended': False,
-            'context_menu': False,
-            'category': 'hardware'
-        },
-        {
-            'name': 'GPU-Z',
-            'desc': '显卡信息检测工具',
-            'url': 'https://www.techpowerup.com/gpuz/',
-            'exe': 'GPU-Z.exe',
-            'recommended': False,
-            'context_menu': False,
-            'category': 'hardware'
-        },
-        {
-            'name': 'AS SSD Benchmark',
-            'desc': 'SSD 性能测试工具',
-            'url': 'https://www.alex-is.de/',
-            'exe': 'AS SSD Benchmark.exe',
-            'recommended': False,
-            'context_menu': False,
-            'category': 'disk'
-        },
-        {
-            'name': 'Victoria HDD',
-            'desc': '硬盘诊断和修复工具',
-            'url': 'https://hdd.by/victoria/',
-            'exe': 'victoria.exe',
-            'recommended': False,
-            'context_menu': False,
-            'category': 'disk'
-        },
-    ]
-    
     def __init__(self, root):
         self.root = root
         self.root.title("WinPE 工具包管理器")
@@ -312,22 +90,37 @@ class WinPEToolsManager:
         
         # 数据
         self.tools_data = []
-        self.config_file = Path("winpe_tools_config.json")
+        self.catalog = ToolCatalog()  # 工具目录（winpe_tools_catalog.json）
+        self.config_file = TOOLS_DIR / "winpe_tools_config.json"
         
         # 工具变量字典 - 存储每个工具的勾选和桌面选项
         self.tool_vars = {}  # {tool_name: BooleanVar()}
         self.desktop_vars = {}  # {tool_name: BooleanVar()}
+        self.pe_context_vars = {}  # {tool_name: BooleanVar()}
+        
+        # 下载状态（后台扫描 外置程序/Tools，定时增量刷新）
+        self.tool_index = ToolDirIndex(PROJECT_DIR / "外置程序" / "Tools")
+        self.index_scanning = False
+        self._refresh_job = None
+        self.closed = False
         
         # 创建界面
         self.create_widgets()
+        self.root.bind("<Destroy>", self.on_destroy, add="+")
         
         # 加载配置
         self.load_config()
+        
+        # 启动下载状态扫描
+        self.refresh_download_status()
     
     def set_icon(self):
         """设置图标"""
         import random
-        ico_dir = Path("../ico") if Path("../ico").exists() else Path("ico")
+        if isinstance(self.root, tk.Toplevel):
+            # 在主程序中打开时使用主窗口的图标
+            return
+        ico_dir = PROJECT_DIR / "ico"
         if ico_dir.exists():
             image_files = list(ico_dir.glob("*.ico")) + list(ico_dir.glob("*.png"))
             if image_files:
@@ -377,6 +170,7 @@ class WinPEToolsManager:
         ttk.Separator(quick_btn_frame, orient=tk.VERTICAL).pack(side=tk.LEFT, fill=tk.Y, padx=10)
         ttk.Button(quick_btn_frame, text="⬇️ 批量自动下载", command=self.batch_download, width=18, style='Accent.TButton').pack(side=tk.LEFT, padx=5)
         ttk.Button(quick_btn_frame, text="📂 打开外置程序目录", command=self.open_external_dir, width=20).pack(side=tk.LEFT, padx=5)
+        ttk.Button(quick_btn_frame, text="🔄 更新工具目录", command=self.update_catalog, width=16).pack(side=tk.LEFT, padx=5)
         
         # 主内容区域 - 左右分栏布局
         main_content = ttk.Frame(parent)
@@ -410,177 +204,240 @@ class WinPEToolsManager:
         ttk.Label(tip_frame, text="• 推荐工具已预选", foreground="blue", font=('Arial', 9)).pack(anchor=tk.W, pady=2)
         ttk.Label(tip_frame, text="• 可添加到桌面快捷方式", foreground="purple", font=('Arial', 9)).pack(anchor=tk.W, pady=2)
         
-        # 滚动区域（只占左侧）
-        scroll_container = ttk.Frame(left_frame)
-        scroll_container.pack(fill=tk.BOTH, expand=True)
-        
-        canvas = tk.Canvas(scroll_container, bg='white')
-        scrollbar = ttk.Scrollbar(scroll_container, orient="vertical", command=canvas.yview)
-        scrollable_frame = ttk.Frame(canvas)
-        
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        # 鼠标滚轮支持
-        def on_mousewheel(event):
-            canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-        canvas.bind_all("<MouseWheel>", on_mousewheel)
-        
-        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        # 按分类组织工具
-        self.tool_vars = {}
-        self.desktop_vars = {}
-        self.pe_context_vars = {}
-        
-        # 按分类分组
-        tools_by_category = {}
-        for tool in self.COMMON_TOOLS:
-            category = tool.get('category', 'other')
-            if category not in tools_by_category:
-                tools_by_category[category] = []
-            tools_by_category[category].append(tool)
-        
-        # 按分类显示
-        for category_id, category_name in self.TOOL_CATEGORIES.items():
-            if category_id not in tools_by_category:
-                continue
-            
-            tools = tools_by_category[category_id]
-            
-            # 分类标题
-            category_frame = ttk.LabelFrame(scrollable_frame, text=f"📂 {category_name}", 
-                                          padding="10", relief=tk.GROOVE)
-            category_frame.pack(fill=tk.X, padx=10, pady=(10, 5))
+        # 工具列表（Treeview 只绘制可见行，工具数量增加也不会拖慢界面）
+        list_frame = ttk.Frame(left_frame)
+        list_frame.pack(fill=tk.BOTH, expand=True)
+        list_frame.columnconfigure(0, weight=1)
+        list_frame.rowconfigure(0, weight=1)
+        
+        columns = ('selected', 'desktop', 'context', 'status', 'desc')
+        self.tool_tree = ttk.Treeview(list_frame, columns=columns, show='tree headings', selectmode='browse')
+        self.tool_tree.heading('#0', text='工具')
+        self.tool_tree.heading('selected', text='集成')
+        self.tool_tree.heading('desktop', text='桌面')
+        self.tool_tree.heading('context', text='PE右键')
+        self.tool_tree.heading('status', text='状态')
+        self.tool_tree.heading('desc', text='说明')
+        
+        self.tool_tree.column('#0', width=170)
+        self.tool_tree.column('selected', width=45, anchor=tk.CENTER, stretch=False)
+        self.tool_tree.column('desktop', width=45, anchor=tk.CENTER, stretch=False)
+        self.tool_tree.column('context', width=55, anchor=tk.CENTER, stretch=False)
+        self.tool_tree.column('status', width=75, anchor=tk.CENTER, stretch=False)
+        self.tool_tree.column('desc', width=250)
+        
+        self.tool_tree.tag_configure('category', font=('Arial', 9, 'bold'))
+        self.tool_tree.tag_configure('downloaded', foreground='green')
+        self.tool_tree.tag_configure('missing', foreground='#c06000')
+        
+        scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.tool_tree.yview)
+        self.tool_tree.configure(yscrollcommand=scrollbar.set)
+        self.tool_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        
+        self.tool_tree.bind('<Button-1>', self.on_tool_tree_click)
+        self.tool_tree.bind('<Double-1>', self.on_tool_tree_double_click)
+        self.tool_tree.bind('<Button-3>', self.on_tool_tree_right_click)
+        self.tool_tree.bind('<<TreeviewSelect>>', self.on_tool_tree_select)
+        
+        # 选中工具的详情（单个面板，随选中项更新）
+        detail_frame = ttk.LabelFrame(left_frame, text="工具详情", padding="8")
+        detail_frame.pack(fill=tk.X, pady=(5, 0))
+        self.detail_desc = ttk.Label(detail_frame, text="选择一个工具查看详情", foreground="gray", font=('Arial', 9))
+        self.detail_desc.pack(anchor=tk.W)
+        self.detail_exe = ttk.Label(detail_frame, text="", foreground="blue", font=('Consolas', 8))
+        self.detail_exe.pack(anchor=tk.W, pady=(3, 0))
+        self.detail_path = ttk.Label(detail_frame, text="", foreground="orange", font=('Consolas', 8))
+        self.detail_path.pack(anchor=tk.W, pady=(2, 0))
+        self.detail_link = ttk.Label(detail_frame, text="", foreground="blue", cursor="hand2",
+                                     font=('Arial', 9, 'underline'))
+        self.detail_link.pack(anchor=tk.W, pady=(5, 0))
+        self.detail_link.bind("<Button-1>", lambda e: self.detail_tool and self.open_url(self.detail_tool['url']))
+        self.detail_tool = None
+        
+        self.populate_tool_tree()
+    
+    def populate_tool_tree(self):
+        """按分类填充工具列表（只插入数据行，不为每个工具创建控件）"""
+        self.tool_tree.delete(*self.tool_tree.get_children())
+        for category_id, category_name, tools in self.catalog.grouped():
+            category_iid = f"category:{category_id}"
+            self.tool_tree.insert('', tk.END, iid=category_iid, text=f"📂 {category_name}",
+                                  open=True, tags=('category',))
             
-            # 分类下的工具
             for tool in tools:
-                self._create_tool_item(category_frame, tool)
+                self._add_tool_row(category_iid, tool)
+    
+    def _add_tool_row(self, parent_iid, tool):
+        """添加单个工具行（目录更新后重新填充时保留已有的勾选状态）"""
+        name = tool['name']
+        watched = []
+        if name not in self.tool_vars:
+            self.tool_vars[name] = tk.BooleanVar(value=tool.get('recommended', False))
+            self.desktop_vars[name] = tk.BooleanVar(value=tool.get('recommended', False))
+            watched += [self.tool_vars[name], self.desktop_vars[name]]
+        if tool.get('context_menu', False) and name not in self.pe_context_vars:
+            self.pe_context_vars[name] = tk.BooleanVar(value=False)
+            watched.append(self.pe_context_vars[name])
+        
+        self.tool_tree.insert(parent_iid, tk.END, iid=f"tool:{name}", text=name)
+        self._update_tool_row(name)
+        
+        # 变量变化（全选、右键菜单、加载配置）时只刷新该行
+        for var in watched:
+            var.trace_add('write', lambda *args, n=name: self._update_tool_row(n))
     
-    def _create_tool_item(self, parent, tool):
-        """创建单个工具项"""
-        # 检查工具是否已下载
+    def selected_tools(self):
+        """勾选的工具（按目录顺序）"""
+        return [tool for tool in self.catalog.tools if self.tool_vars[tool['name']].get()]
+    
+    def _update_tool_row(self, name):
+        """刷新单个工具行的显示"""
+        tool = self.catalog.get(name)
+        if tool is None or not self.tool_tree.exists(f"tool:{name}"):
+            return
         is_downloaded = self._check_tool_downloaded(tool)
         
-        # 工具框架，根据下载状态使用不同颜色
-        tool_frame = ttk.Frame(parent, relief=tk.RIDGE, borderwidth=1, padding="8")
-        tool_frame.pack(fill=tk.X, padx=5, pady=3)
-        
-        # 如果已下载，添加绿色边框效果
-        if is_downloaded:
-            tool_frame.configure(relief=tk.SOLID, borderwidth=2)
-        
-        # 上半部分：工具名称和状态
-        header_frame = ttk.Frame(tool_frame)
-        header_frame.pack(fill=tk.X, anchor=tk.W)
-        
-        # 工具名称和下载状态
-        name_frame = ttk.Frame(header_frame)
-        name_frame.pack(side=tk.LEFT, fill=tk.X, expand=True)
-        
-        # 状态标识
-        if is_downloaded:
-            status_icon = "✅"
-            status_text = "已下载"
-            status_color = "green"
-        else:
-            status_icon = "📦"
-            status_text = "未下载"
-            status_color = "orange"
-        
-        ttk.Label(name_frame, text=f"{status_icon} {tool['name']}", 
-                 font=('Arial', 10, 'bold'), foreground=status_color).pack(side=tk.LEFT)
-        ttk.Label(name_frame, text=f"[{status_text}]", 
-                 foreground=status_color, font=('Arial', 8)).pack(side=tk.LEFT, padx=(5, 0))
-        
-        # 推荐标识
-        if tool.get('recommended', False):
-            ttk.Label(name_frame, text="⭐ 推荐", 
-                     foreground="blue", font=('Arial', 8, 'bold')).pack(side=tk.LEFT, padx=(10, 0))
-        
-        # 右键菜单标识
-        if tool.get('context_menu', False):
-            ttk.Label(name_frame, text="🖱️ 右键菜单", 
-                     foreground="purple", font=('Arial', 8, 'bold')).pack(side=tk.LEFT, padx=(10, 0))
-        
-        # 选项框架
-        option_frame = ttk.Frame(tool_frame)
-        option_frame.pack(fill=tk.X, anchor=tk.W, pady=(5, 0))
-        
-        # 复选框
-        var = tk.BooleanVar(value=tool['recommended'])
-        self.tool_vars[tool['name']] = var
-        
-        cb = ttk.Checkbutton(option_frame, text="✓ 集成此工具", variable=var)
-        cb.pack(side=tk.LEFT)
-        
-        # 绑定右键菜单
-        cb.bind("<Button-3>", lambda e, t=tool: self.show_tool_context_menu(e, t))
-        
-        # 桌面选项
-        desktop_var = tk.BooleanVar(value=tool['recommended'])
-        self.desktop_vars[tool['name']] = desktop_var
-        
-        desktop_cb = ttk.Checkbutton(option_frame, text="📌 添加到桌面", variable=desktop_var)
-        desktop_cb.pack(side=tk.LEFT, padx=(20, 0))
-        
-        # PE右键菜单选项（仅对支持右键菜单的工具显示）
-        if tool.get('context_menu', False):
-            pe_context_var = tk.BooleanVar(value=False)
-            self.pe_context_vars[tool['name']] = pe_context_var
-            
-            pe_context_cb = ttk.Checkbutton(option_frame, text="🖱️ PE右键菜单", variable=pe_context_var)
-            pe_context_cb.pack(side=tk.LEFT, padx=(20, 0))
-        
-        # 说明
-        ttk.Label(tool_frame, text=f"📝 {tool['desc']}", 
-                 foreground="gray", font=('Arial', 9)).pack(anchor=tk.W, pady=(5, 0))
-        
-        # 文件信息
-        info_frame = ttk.Frame(tool_frame)
-        info_frame.pack(fill=tk.X, anchor=tk.W, pady=(3, 0))
-        
-        ttk.Label(info_frame, text=f"📄 可执行文件: {tool['exe']}", 
-                 foreground="blue", font=('Consolas', 8)).pack(side=tk.LEFT)
-        
-        # 保存位置
-        save_path = f"外置程序/Tools/{tool['name']}/{tool['exe']}"
-        ttk.Label(tool_frame, text=f"📁 保存位置: {save_path}", 
-                 foreground="orange", font=('Consolas', 8)).pack(anchor=tk.W, pady=(2, 0))
-        
-        # 下载链接和按钮
-        link_frame = ttk.Frame(tool_frame)
-        link_frame.pack(anchor=tk.W, pady=(5, 0))
-        
-        if not is_downloaded:
-            # 未下载时显示下载按钮
-            ttk.Label(link_frame, text="⚠️ ", foreground="orange").pack(side=tk.LEFT)
-            ttk.Label(link_frame, text="需要下载:", foreground="orange", 
-                     font=('Arial', 9, 'bold')).pack(side=tk.LEFT, padx=(0, 10))
-        
-        # 手动下载链接
-        ttk.Label(link_frame, text="🌐 ").pack(side=tk.LEFT)
-        link_label = ttk.Label(link_frame, text="访问官网下载", foreground="blue", cursor="hand2", 
-                              font=('Arial', 9, 'underline'))
-        link_label.pack(side=tk.LEFT)
-        link_label.bind("<Button-1>", lambda e, url=tool['url']: self.open_url(url))
-        
-        ttk.Label(link_frame, text=f"  ({tool['url']})", foreground="gray", font=('Arial', 8)).pack(side=tk.LEFT)
+        title = f"⭐ {name}" if tool.get('recommended', False) else name
+        context = ''
+        if name in self.pe_context_vars:
+            context = '☑' if self.pe_context_vars[name].get() else '☐'
+        self.tool_tree.item(
+            f"tool:{name}",
+            text=title,
+            values=(
+                '☑' if self.tool_vars[name].get() else '☐',
+                '☑' if self.desktop_vars[name].get() else '☐',
+                context,
+                "✅ 已下载" if is_downloaded else "📦 未下载",
+                tool['desc'],
+            ),
+            tags=('downloaded' if is_downloaded else 'missing',),
+        )
+        if self.detail_tool is tool:
+            self._show_tool_detail(tool)
+    
+    def _tool_from_row(self, row_id):
+        """根据行 ID 获取工具（分类行返回 None）"""
+        if not row_id.startswith("tool:"):
+            return None
+        return self.catalog.get(row_id[len("tool:"):])
+    
+    def on_tool_tree_click(self, event):
+        """单击勾选列时切换选项"""
+        if self.tool_tree.identify_region(event.x, event.y) != 'cell':
+            return
+        tool = self._tool_from_row(self.tool_tree.identify_row(event.y))
+        if tool is None:
+            return
+        column = self.tool_tree.column(self.tool_tree.identify_column(event.x), 'id')
+        variables = {
+            'selected': self.tool_vars,
+            'desktop': self.desktop_vars,
+            'context': self.pe_context_vars,
+        }.get(column)
+        if variables and tool['name'] in variables:
+            var = variables[tool['name']]
+            var.set(not var.get())
+    
+    def on_tool_tree_double_click(self, event):
+        """双击工具名称查看详情"""
+        if self.tool_tree.identify_region(event.x, event.y) != 'tree':
+            return
+        tool = self._tool_from_row(self.tool_tree.identify_row(event.y))
+        if tool:
+            self.show_tool_info(tool)
+    
+    def on_tool_tree_right_click(self, event):
+        """右键菜单"""
+        row_id = self.tool_tree.identify_row(event.y)
+        tool = self._tool_from_row(row_id)
+        if tool:
+            self.tool_tree.selection_set(row_id)
+            self.show_tool_context_menu(event, tool)
+    
+    def on_tool_tree_select(self, event=None):
+        """选中工具时更新详情面板"""
+        selection = self.tool_tree.selection()
+        tool = self._tool_from_row(selection[0]) if selection else None
+        if tool:
+            self._show_tool_detail(tool)
+    
+    def _show_tool_detail(self, tool):
+        """更新详情面板"""
+        self.detail_tool = tool
+        missing = not self._check_tool_downloaded(tool)
+        self.detail_desc.config(text=f"📝 {tool['desc']}" + ("  ⚠️ 需要下载" if missing else ""),
+                                foreground="#c06000" if missing else "gray")
+        state = self.catalog.get_state(tool['name'])
+        exe_info = f"📄 可执行文件: {tool['exe']}"
+        if state.get('downloaded') and state.get('size') is not None:
+            exe_info += f"  ({state['size'] / 1048576:.1f} MB"
+            if state.get('sha256'):
+                exe_info += f", SHA256 {state['sha256'][:16]}…"
+            exe_info += ")"
+        self.detail_exe.config(text=exe_info)
+        self.detail_path.config(text=f"📁 保存位置: 外置程序/Tools/{tool['name']}/{tool['exe']}")
+        self.detail_link.config(text=f"🌐 访问官网下载 ({tool['url']})")
     
     def _check_tool_downloaded(self, tool):
-        """检查工具是否已下载"""
-        # 检查外置程序目录
-        external_dir = Path("../外置程序") if Path("../外置程序").exists() else Path("外置程序")
-        tool_path = external_dir / "Tools" / tool['name'] / tool['exe']
+        """检查工具是否已下载（读取目录索引，不访问文件系统）"""
+        return self.tool_index.has_file(tool['name'], tool['exe'])
+    
+    def on_destroy(self, event):
+        """窗口销毁：停止定时刷新，工作线程不再更新界面"""
+        if event.widget is not self.root:
+            return
+        self.closed = True
+        if self._refresh_job is not None:
+            try:
+                self.root.after_cancel(self._refresh_job)
+            except tk.TclError:
+                pass
+            self._refresh_job = None
+    
+    def _post(self, callback):
+        """工作线程中把界面更新交给界面线程（窗口已关闭时丢弃）"""
+        if self.closed:
+            return
+        try:
+            self.root.after(0, lambda: None if self.closed else callback())
+        except (RuntimeError, tk.TclError):
+            pass
+    
+    def refresh_download_status(self):
+        """在后台线程扫描外置程序目录，只刷新状态发生变化的工具"""
+        self._refresh_job = None
+        if self.closed:
+            return
         
-        return tool_path.exists()
+        if not self.index_scanning:
+            self.index_scanning = True
+            threading.Thread(target=self._scan_tool_index, daemon=True).start()
         
+        # 定时增量刷新（下载或手动复制工具后自动更新状态）
+        self._refresh_job = self.root.after(3000, self.refresh_download_status)
+    
+    def _scan_tool_index(self):
+        """后台扫描线程"""
+        try:
+            changed = self.tool_index.scan()
+            # 更新目录中工具的状态缓存（大小、哈希只在文件变化时重新计算）
+            state_changed = False
+            for name in changed:
+                if name in self.catalog:
+                    state_changed |= self.catalog.refresh_state(name, self.tool_index.root_dir / name)
+            if state_changed:
+                self.catalog.save_state()
+        finally:
+            self.index_scanning = False
+        if changed:
+            self._post(lambda: self._apply_index_changes(changed))
+    
+    def _apply_index_changes(self, changed):
+        """刷新发生变化的工具行"""
+        for name in changed:
+            self._update_tool_row(name)
     
     def create_custom_tab(self, parent):
         """创建自定义工具标签页"""
@@ -653,8 +510,8 @@ class WinPEToolsManager:
     
     def select_recommended_tools(self):
         """全选推荐工具"""
-        for tool in self.COMMON_TOOLS:
-            if tool['recommended']:
+        for tool in self.catalog.tools:
+            if tool.get('recommended', False):
                 self.tool_vars[tool['name']].set(True)
     
     def select_all_tools(self):
@@ -707,15 +564,14 @@ class WinPEToolsManager:
         ]
         
         # 添加选中的推荐工具
-        for tool in self.COMMON_TOOLS:
-            if self.tool_vars[tool['name']].get():
-                code_lines.append(f"    # {tool['name']} - {tool['desc']}")
-                code_lines.append(f"    (")
-                code_lines.append(f"        \"Tools/{tool['name']}/{tool['exe']}\",")
-                code_lines.append(f"        \"Windows/System32\",")
-                code_lines.append(f"        \"{tool['name']}\",")
-                code_lines.append(f"    ),")
-                code_lines.append("")
+        for tool in self.selected_tools():
+            code_lines.append(f"    # {tool['name']} - {tool['desc']}")
+            code_lines.append(f"    (")
+            code_lines.append(f"        \"Tools/{tool['name']}/{tool['exe']}\",")
+            code_lines.append(f"        \"Windows/System32\",")
+            code_lines.append(f"        \"{tool['name']}\",")
+            code_lines.append(f"    ),")
+            code_lines.append("")
         
         # 添加自定义工具
         for i in range(self.custom_listbox.size()):
@@ -739,9 +595,8 @@ class WinPEToolsManager:
         code_lines.append("# =" * 40)
         code_lines.append("")
         
-        for tool in self.COMMON_TOOLS:
-            if self.tool_vars[tool['name']].get():
-                code_lines.append(f"# {tool['name']}: {tool['url']}")
+        for tool in self.selected_tools():
+            code_lines.append(f"# {tool['name']}: {tool['url']}")
         
         code = "\n".join(code_lines)
         
@@ -761,7 +616,7 @@ class WinPEToolsManager:
             return
         
         try:
-            config_file = Path("../config.py")
+            config_file = PROJECT_DIR / "config.py"
             
             if not config_file.exists():
                 messagebox.showerror("错误", "找不到 config.py 文件")
@@ -772,7 +627,7 @@ class WinPEToolsManager:
             
             # 检查PE右键菜单选择
             pe_context_tools = []
-            for tool in self.COMMON_TOOLS:
+            for tool in self.catalog.tools:
                 if (tool.get('context_menu', False) and 
                     tool['name'] in self.pe_context_vars and 
                     self.pe_context_vars[tool['name']].get()):
@@ -784,16 +639,15 @@ class WinPEToolsManager:
             
             # 生成新的 EXTERNAL_APPS 配置
             new_apps = []
-            for tool in self.COMMON_TOOLS:
-                if self.tool_vars[tool['name']].get():
-                    desktop = self.desktop_vars[tool['name']].get()
-                    placement = []
-                    if desktop:
-                        placement.append("desktop")
-                    
-                    # 格式：(源文件路径, 目标路径, 描述, 放置选项)
-                    placement_str = str(placement).replace("'", '"')
-                    new_apps.append(f"    (\"{tool['name']}/{tool['exe']}\", \"Windows/System32\", \"{tool['name']}\", {placement_str}),\n")
+            for tool in self.selected_tools():
+                desktop = self.desktop_vars[tool['name']].get()
+                placement = []
+                if desktop:
+                    placement.append("desktop")
+                
+                # 格式：(源文件路径, 目标路径, 描述, 放置选项)
+                placement_str = str(placement).replace("'", '"')
+                new_apps.append(f"    (\"{tool['name']}/{tool['exe']}\", \"Windows/System32\", \"{tool['name']}\", {placement_str}),\n")
             
             # 替换配置
             new_lines = []
@@ -847,7 +701,7 @@ class WinPEToolsManager:
                 f.writelines(new_lines)
             
             msg = "工具配置已保存到 config.py！\n\n"
-            msg += f"已配置 {len([t for t in self.COMMON_TOOLS if self.tool_vars[t['name']].get()])} 个工具\n"
+            msg += f"已配置 {len(self.selected_tools())} 个工具\n"
             if sevenzip_selected:
                 msg += "\n✓ 7-Zip 右键菜单已启用"
             else:
@@ -895,7 +749,7 @@ class WinPEToolsManager:
     
     def open_external_dir(self):
         """打开外置程序目录"""
-        external_dir = Path("../外置程序") if Path("../外置程序").exists() else Path("外置程序")
+        external_dir = PROJECT_DIR / "外置程序"
         tools_dir = external_dir / "Tools"
         
         # 如果Tools目录不存在，创建它
@@ -958,15 +812,50 @@ class WinPEToolsManager:
             info += f"下载链接: {tool['download_url']}\n"
         info += f"推荐: {'是' if tool.get('recommended', False) else '否'}\n"
         info += f"右键菜单: {'是' if tool.get('context_menu', False) else '否'}\n"
-        info += f"体积: {tool.get('size', '未知')}\n"
+        state = self.catalog.get_state(tool['name'])
+        if state.get('downloaded') and state.get('size') is not None:
+            info += f"体积: {state['size'] / 1048576:.1f} MB\n"
+            info += f"SHA256: {state.get('sha256') or '未知'}\n"
+        else:
+            info += f"体积: {tool.get('size', '未知')}\n"
         info += f"授权: {tool.get('license', '未知')}"
         
         messagebox.showinfo(f"{tool['name']} - 详细信息", info)
     
+    def update_catalog(self):
+        """从远程地址合并工具目录更新"""
+        from tkinter import simpledialog
+        url = simpledialog.askstring("更新工具目录", "工具目录更新地址（JSON）:",
+                                     initialvalue=self.catalog.update_url, parent=self.root)
+        if not url:
+            return
+        
+        def worker():
+            try:
+                result = self.catalog.merge_from_url(url.strip())
+            except Exception as e:
+                self._post(lambda e=e: messagebox.showerror("错误", f"更新工具目录失败:\n{e}"))
+                return
+            self._post(lambda: self._on_catalog_updated(result))
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def _on_catalog_updated(self, result):
+        """目录更新完成后刷新列表"""
+        if result is None:
+            messagebox.showinfo("提示", f"工具目录已是最新版本（版本 {self.catalog.version}）")
+            return
+        self.populate_tool_tree()
+        self.tool_index = ToolDirIndex(self.tool_index.root_dir)  # 重新扫描以更新新增工具的状态
+        messagebox.showinfo("成功",
+                            f"工具目录已更新到版本 {self.catalog.version}\n\n"
+                            f"新增 {len(result['added'])} 个，更新 {len(result['updated'])} 个，"
+                            f"移除 {len(result['removed'])} 个")
+    
     def batch_download(self):
         """批量自动下载选中的工具"""
         # 获取勾选的工具
-        selected_tools = [tool for tool in self.COMMON_TOOLS if self.tool_vars[tool['name']].get()]
+        selected_tools = self.selected_tools()
         
         if not selected_tools:
             messagebox.showwarning("提示", "请先勾选要下载的工具")